@@ -1,4 +1,4 @@
-from typing import Generator, Optional, Union, Any, Dict
+from typing import Generator, Optional, Union, Any, Dict, List
 import asyncio
 from fastapi import Depends, HTTPException, status, Header, Request, Query
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
@@ -360,6 +360,28 @@ def get_api_key(
     return user
 
 
+def get_api_key_scopes(
+    db: Session = Depends(get_db), api_key_header: str = Depends(API_KEY_HEADER)
+) -> List[str]:
+    """
+    Get the scopes of the API key in the header.
+
+    Use together with get_api_key, which validates the key.
+
+    Args:
+        db: Database session
+        api_key_header: API key from header
+
+    Returns:
+        List of scopes, empty if the key has none or is unknown
+    """
+    if not api_key_header:
+        return []
+
+    scopes = db.query(APIKey.scopes).filter(APIKey.key == api_key_header).scalar()
+    return [scope.strip() for scope in (scopes or "").split(",") if scope.strip()]
+
+
 def get_experiment_by_key(
     experiment_key: str,
     db: Session = Depends(get_db),
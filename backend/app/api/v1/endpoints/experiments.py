@@ -32,11 +32,13 @@ from backend.app.schemas.experiment import (
     ExperimentUpdate,
     ExperimentResponse,
     ExperimentListResponse,
-    ExperimentResults,
     ScheduleConfig,
 )
 from backend.app.services.experiment_service import ExperimentService
-from backend.app.services.analysis_service import AnalysisService
+from backend.app.services.analysis_service import (
+    ANALYSIS_MODE_FIXED_HORIZON,
+    AnalysisService,
+)
 from backend.app.core.logging import logger
 from backend.app.core.permissions import check_permission, ResourceType, Action, get_permission_error_message, check_ownership
 from backend.app.core.scheduler import experiment_scheduler
@@ -972,7 +974,7 @@ async def complete_experiment(
 
 @router.get(
     "/{experiment_id}/results",
-    response_model=ExperimentResults,
+    response_model=Dict[str, Any],
     summary="Get experiment results",
     response_description="Returns the experiment results and analysis",
 )
@@ -980,10 +982,17 @@ async def get_experiment_results(
     experiment_id: UUID = Path(
         ..., description="The ID of the experiment to get results for"
     ),
+    analysis_mode: str = Query(
+        ANALYSIS_MODE_FIXED_HORIZON,
+        description=(
+            "fixed_horizon for classical tests, or sequential for always-valid "
+            "p-values and confidence sequences that allow peeking"
+        ),
+    ),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
     cache_control: Dict[str, Any] = Depends(deps.get_cache_control),
-) -> ExperimentResults:
+) -> Dict[str, Any]:
     """
     Get experiment results and statistical analysis.
 
@@ -998,10 +1007,10 @@ async def get_experiment_results(
     may be inconclusive.
 
     Returns:
-        ExperimentResults: Complete analysis of the experiment results
+        Dict[str, Any]: Complete analysis of the experiment results
 
     Raises:
-        HTTPException 400: If the experiment has no data or is in DRAFT status
+        HTTPException 400: If the experiment is in DRAFT status or the analysis mode is invalid
         HTTPException 403: If the user doesn't have permission to view this experiment
     """
     try:
@@ -1023,26 +1032,35 @@ async def get_experiment_results(
             )
 
         # Try to get from cache if enabled
+        cache_key = f"experiment_results:{experiment_id}:{analysis_mode}"
         if cache_control.enabled and cache_control.redis:
-            cache_key = f"experiment_results:{experiment_id}"
             cached_data = cache_control.redis.get(cache_key)
             if cached_data:
-                from pydantic import parse_raw_as
+                import json
 
-                return parse_raw_as(ExperimentResults, cached_data)
+                return json.loads(cached_data)
 
-        # Create experiment service
-        experiment_service = ExperimentService(db)
+        # Create analysis service
+        analysis_service = AnalysisService(db)
 
         # Calculate results
-        results = experiment_service.calculate_results(experiment_id)
+        try:
+            results = jsonable_encoder(
+                analysis_service.get_experiment_results(
+                    experiment_id, analysis_mode=analysis_mode
+                )
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
         # Cache results if enabled
         if cache_control.enabled and cache_control.redis:
+            import json
+
             cache_control.redis.setex(
-                f"experiment_results:{experiment_id}",
+                cache_key,
                 3600,  # Cache for 1 hour
-                results.json(),
+                json.dumps(results),
             )
 
         return results
@@ -1205,6 +1223,12 @@ async def get_daily_experiment_results(
     metric_id: Optional[UUID] = Query(
         None, description="Optional ID of specific metric to analyze"
     ),
+    granularity: str = Query(
+        "day", description="Period length: hour, day or week"
+    ),
+    time_zone: str = Query(
+        "UTC", description="Time zone the periods are aligned to"
+    ),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
     cache_control: Dict[str, Any] = Depends(deps.get_cache_control),
@@ -1215,6 +1239,7 @@ async def get_daily_experiment_results(
     This endpoint retrieves the analytical results of an experiment by day, including:
     - Daily conversion rates for each variant
     - Daily sample sizes
+    - Cumulative sample sizes and conversion rates
     - Trend analysis over time
 
     This is useful for visualizing how the experiment is performing over time
@@ -1248,7 +1273,10 @@ async def get_daily_experiment_results(
         # Try to get from cache if enabled
         if cache_control.enabled and cache_control.redis:
             metric_part = f":{metric_id}" if metric_id else ""
-            cache_key = f"experiment_daily_results:{experiment_id}{metric_part}"
+            cache_key = (
+                f"experiment_daily_results:{experiment_id}{metric_part}"
+                f":{granularity}:{time_zone}"
+            )
             cached_data = cache_control.redis.get(cache_key)
             if cached_data:
                 import json
@@ -1260,12 +1288,12 @@ async def get_daily_experiment_results(
 
         # Get daily results
         try:
-            if metric_id:
-                results = analysis_service.get_daily_results(
-                    experiment_id=experiment_id, metric_id=metric_id
-                )
-            else:
-                results = analysis_service.get_daily_results(experiment_id=experiment_id)
+            results = analysis_service.get_daily_results(
+                experiment_id=experiment_id,
+                metric_id=metric_id,
+                granularity=granularity,
+                time_zone=time_zone,
+            )
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -1274,7 +1302,10 @@ async def get_daily_experiment_results(
             import json
 
             metric_part = f":{metric_id}" if metric_id else ""
-            cache_key = f"experiment_daily_results:{experiment_id}{metric_part}"
+            cache_key = (
+                f"experiment_daily_results:{experiment_id}{metric_part}"
+                f":{granularity}:{time_zone}"
+            )
             cache_control.redis.setex(
                 cache_key,
                 3600,  # Cache for 1 hour
@@ -1303,6 +1334,11 @@ async def get_segmented_experiment_results(
     metric_id: Optional[UUID] = Query(
         None, description="Optional ID of specific metric to analyze"
     ),
+    max_segments: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Optional number of largest segments to return; the rest are grouped as 'other'",
+    ),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
     cache_control: Dict[str, Any] = Depends(deps.get_cache_control),
@@ -1347,6 +1383,7 @@ async def get_segmented_experiment_results(
             metric_part = f":{metric_id}" if metric_id else ""
             cache_key = (
                 f"experiment_segmented_results:{experiment_id}:{segment_by}{metric_part}"
+                f":{max_segments or 'all'}"
             )
             cached_data = cache_control.redis.get(cache_key)
             if cached_data:
@@ -1359,14 +1396,12 @@ async def get_segmented_experiment_results(
 
         # Get segmented results
         try:
-            if metric_id:
-                results = analysis_service.get_segmented_results(
-                    experiment_id=experiment_id, segment_by=segment_by, metric_id=metric_id
-                )
-            else:
-                results = analysis_service.get_segmented_results(
-                    experiment_id=experiment_id, segment_by=segment_by
-                )
+            results = analysis_service.get_segmented_results(
+                experiment_id=experiment_id,
+                segment_by=segment_by,
+                metric_id=metric_id,
+                max_segments=max_segments,
+            )
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -1377,6 +1412,7 @@ async def get_segmented_experiment_results(
             metric_part = f":{metric_id}" if metric_id else ""
             cache_key = (
                 f"experiment_segmented_results:{experiment_id}:{segment_by}{metric_part}"
+                f":{max_segments or 'all'}"
             )
             cache_control.redis.setex(
                 cache_key,
@@ -1390,6 +1426,101 @@ async def get_segmented_experiment_results(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get(
+    "/{experiment_id}/continuous-results/{metric_id}",
+    response_model=Dict[str, Any],
+    summary="Get continuous metric results",
+    response_description="Returns bootstrap results for a revenue, count or duration metric",
+)
+async def get_continuous_metric_results(
+    experiment_id: UUID = Path(
+        ..., description="The ID of the experiment to get results for"
+    ),
+    metric_id: UUID = Path(..., description="The ID of the metric to analyze"),
+    use_cuped: bool = Query(
+        True, description="Whether to reduce variance with pre-experiment data"
+    ),
+    num_resamples: int = Query(
+        1000, ge=100, le=20000, description="Number of bootstrap resamples"
+    ),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+    cache_control: Dict[str, Any] = Depends(deps.get_cache_control),
+) -> Dict[str, Any]:
+    """
+    Get results for a metric computed from event values.
+
+    Event values are aggregated per user, optionally adjusted with CUPED,
+    and compared to control with bootstrap confidence intervals. The
+    response includes how long loading, adjustment and resampling took.
+
+    Returns:
+        Dict[str, Any]: Continuous metric results object
+
+    Raises:
+        HTTPException 400: If the experiment is in DRAFT status or the metric is invalid
+        HTTPException 403: If the user doesn't have permission to view this experiment
+    """
+    try:
+        # Get experiment
+        experiment = db.query(Experiment).filter(Experiment.id == experiment_id).first()
+        if not experiment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Experiment not found"
+            )
+
+        # Check access permission
+        experiment = deps.get_experiment_access(experiment, current_user)
+
+        # Check if experiment has results
+        if experiment.status == ExperimentStatus.DRAFT:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot get results for experiments in DRAFT status",
+            )
+
+        # Try to get from cache if enabled
+        cache_key = (
+            f"experiment_continuous_results:{experiment_id}:{metric_id}"
+            f":{int(use_cuped)}:{num_resamples}"
+        )
+        if cache_control.enabled and cache_control.redis:
+            cached_data = cache_control.redis.get(cache_key)
+            if cached_data:
+                import json
+
+                return json.loads(cached_data)
+
+        # Create analysis service
+        analysis_service = AnalysisService(db)
+
+        # Get continuous metric results
+        try:
+            results = analysis_service.get_continuous_metric_results(
+                experiment_id=experiment_id,
+                metric_id=metric_id,
+                use_cuped=use_cuped,
+                num_resamples=num_resamples,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        # Cache results if enabled
+        if cache_control.enabled and cache_control.redis:
+            import json
+
+            cache_control.redis.setex(
+                cache_key,
+                3600,  # Cache for 1 hour
+                json.dumps(results),
+            )
+
+        return results
+    except Exception as e:
+        logger.error(f"Error getting continuous metric results: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post(
     "/{experiment_id}/metadata",
     response_model=Dict[str, Any],
@@ -14,6 +14,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, status
 from sqlalchemy.orm import Session
 
 from backend.app.api import deps
+from backend.app.core.config import settings
 from backend.app.models.experiment import Experiment, ExperimentStatus
 from backend.app.models.assignment import Assignment
 from backend.app.models.event import Event, EventType
@@ -33,6 +34,9 @@ from backend.app.services.event_service import EventService
 # Create router
 router = APIRouter()
 
+# API key scope allowing batches of up to TRACKING_TRUSTED_BATCH_MAX_EVENTS
+BULK_TRACKING_SCOPE = "tracking:bulk"
+
 
 @router.get("/")
 def get_tracking():
@@ -289,15 +293,19 @@ async def track_events_batch(
     ),
     db: Session = Depends(deps.get_db),
     api_key_info: Dict[str, Any] = Depends(deps.get_api_key),
+    api_key_scopes: List[str] = Depends(deps.get_api_key_scopes),
 ) -> EventBatchResponse:
     """
     Track multiple events in a single batch operation.
 
     This endpoint allows tracking multiple events in a single request,
-    improving performance for high-volume event tracking.
+    improving performance for high-volume event tracking. Keys and
+    assignments are resolved for the whole batch at once and the events are
+    written with a single insert.
 
-    The batch can contain up to 100 events. If any events fail validation,
-    the response will include details about which events failed and why.
+    The batch can contain up to 100 events, or up to 5000 for API keys with
+    the "tracking:bulk" scope. If any events cannot be tracked, the response
+    will include details about which events failed and why.
 
     **Authentication**: Requires a valid API key in the X-API-Key header.
 
@@ -310,108 +318,32 @@ async def track_events_batch(
         HTTPException 422: If the batch request format is invalid
     """
     # Check batch size
-    if len(request.events) > 100:
+    max_events = (
+        settings.TRACKING_TRUSTED_BATCH_MAX_EVENTS
+        if BULK_TRACKING_SCOPE in api_key_scopes
+        else settings.TRACKING_BATCH_MAX_EVENTS
+    )
+    if len(request.events) > max_events:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="Batch size exceeds the limit of 100 events",
+            detail=f"Batch size exceeds the limit of {max_events} events",
         )
 
     # Create event service
     event_service = EventService(db)
 
-    # Initialize counters
-    success_count = 0
-    failure_count = 0
-    errors = []
-
-    # Process each event
-    for index, event_request in enumerate(request.events):
-        try:
-            # Find experiment ID if specified
-            experiment_id = None
-            variant_id = None
-            if event_request.experiment_key:
-                experiment = (
-                    db.query(Experiment)
-                    .filter(Experiment.key == event_request.experiment_key)
-                    .first()
-                )
-
-                if experiment:
-                    experiment_id = experiment.id
-
-                    # Find variant if user has an assignment
-                    assignment = (
-                        db.query(Assignment)
-                        .filter(
-                            Assignment.experiment_id == experiment_id,
-                            Assignment.user_id == event_request.user_id,
-                        )
-                        .order_by(Assignment.created_at.desc())
-                        .first()
-                    )
-
-                    if assignment:
-                        variant_id = assignment.variant_id
-
-            # Find feature flag ID if specified
-            feature_flag_id = None
-            if event_request.feature_flag_key:
-                feature_flag = (
-                    db.query(FeatureFlag)
-                    .filter(FeatureFlag.key == event_request.feature_flag_key)
-                    .first()
-                )
-
-                if feature_flag:
-                    feature_flag_id = feature_flag.id
-
-            # Skip if neither found
-            if not experiment_id and not feature_flag_id:
-                failure_count += 1
-                errors.append(
-                    {
-                        "index": index,
-                        "event_type": event_request.event_type,
-                        "user_id": event_request.user_id,
-                        "error": f"Neither experiment key '{event_request.experiment_key}' nor feature flag key '{event_request.feature_flag_key}' found",
-                    }
-                )
-                continue
-
-            # Create event data
-            event_data = EventCreate(
-                user_id=event_request.user_id,
-                event_type=event_request.event_type,
-                event_name=event_request.event_type,  # Default to type if no name provided
-                experiment_id=str(experiment_id) if experiment_id else None,
-                feature_flag_id=str(feature_flag_id) if feature_flag_id else None,
-                variant_id=str(variant_id) if variant_id else None,
-                value=event_request.value,
-                properties=event_request.metadata,
-                timestamp=event_request.timestamp
-                or datetime.now(timezone.utc).isoformat(),
-            )
-
-            # Track the event
-            event_service.track_event(event_data.dict())
-            success_count += 1
-
-        except Exception as e:
-            failure_count += 1
-            errors.append(
-                {
-                    "index": index,
-                    "event_type": event_request.event_type,
-                    "user_id": event_request.user_id,
-                    "error": str(e),
-                }
-            )
+    try:
+        success_count, errors = event_service.track_events_batch(request.events)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error tracking events: {str(e)}",
+        )
 
     # Return batch response
     return EventBatchResponse(
         success_count=success_count,
-        failure_count=failure_count,
+        failure_count=len(errors),
         errors=errors if errors else None,
     )
 
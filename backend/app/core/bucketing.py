@@ -0,0 +1,140 @@
+"""
+Deterministic bucketing of users.
+
+Rollouts and variant assignments hash a key such as "{user_id}:{experiment_id}"
+with MD5 and take the digest, read as a big-endian 128-bit integer, modulo the
+number of buckets. This module computes those buckets for a single key or for
+a whole batch of keys at once, and maps buckets to variants through a
+cumulative allocation table.
+
+The batched API never builds the 128-bit integer: the digest is split into
+four 32-bit words and reduced with precomputed powers of 2**32, which gives
+bit-for-bit the same buckets as the scalar form.
+"""
+
+import hashlib
+from bisect import bisect_right
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Default bucket count for percentage rollouts and variant allocations
+PERCENT_BUCKETS = 100
+
+# Largest bucket count the batched reduction handles without uint64 overflow
+MAX_BUCKETS = 2 ** 30
+
+
+def _key_bytes(user_id: Any, salt: Optional[str]) -> bytes:
+    if salt is None:
+        return str(user_id).encode()
+    return f"{user_id}:{salt}".encode()
+
+
+def bucket(user_id: Any, salt: Optional[str] = None, num_buckets: int = PERCENT_BUCKETS) -> int:
+    """
+    Get the bucket of one user.
+
+    Args:
+        user_id: User identifier (converted with str())
+        salt: Hashed after the user ID as "{user_id}:{salt}"; None hashes the ID alone
+        num_buckets: Number of buckets
+
+    Returns:
+        Bucket in [0, num_buckets)
+    """
+    digest = hashlib.md5(_key_bytes(user_id, salt)).digest()
+    return int.from_bytes(digest, "big") % num_buckets
+
+
+def bucket_many(
+    user_ids: Iterable[Any],
+    salt: Optional[str] = None,
+    num_buckets: int = PERCENT_BUCKETS
+) -> np.ndarray:
+    """
+    Get the buckets of many users in one call.
+
+    Args:
+        user_ids: User identifiers (converted with str())
+        salt: Hashed after each user ID as "{user_id}:{salt}"; None hashes the IDs alone
+        num_buckets: Number of buckets, at most MAX_BUCKETS
+
+    Returns:
+        uint64 array of buckets in [0, num_buckets), in the order of user_ids
+
+    Raises:
+        ValueError: If num_buckets is out of range
+    """
+    if not 0 < num_buckets <= MAX_BUCKETS:
+        raise ValueError(f"num_buckets must be between 1 and {MAX_BUCKETS}")
+
+    md5 = hashlib.md5
+    if salt is None:
+        digests = b"".join(md5(str(user_id).encode()).digest() for user_id in user_ids)
+    else:
+        suffix = f":{salt}".encode()
+        digests = b"".join(md5(str(user_id).encode() + suffix).digest() for user_id in user_ids)
+
+    # Each row holds the digest's four big-endian 32-bit words, most significant first
+    words = np.frombuffer(digests, dtype=">u4").reshape(-1, 4).astype(np.uint64)
+    weights = np.array(
+        [pow(2, 96, num_buckets), pow(2, 64, num_buckets), pow(2, 32, num_buckets), 1],
+        dtype=np.uint64
+    )
+
+    # Terms are below num_buckets**2 <= 2**60, so the sum of four fits in uint64
+    return ((words % np.uint64(num_buckets)) * weights).sum(axis=1) % np.uint64(num_buckets)
+
+
+class AllocationTable:
+    """
+    Cumulative allocation thresholds mapping buckets to values, e.g. variant IDs.
+
+    A bucket maps to the first value whose cumulative allocation exceeds it;
+    buckets past the last threshold (allocations summing to less than the
+    bucket count) fall back to the last value.
+    """
+
+    def __init__(self, allocations: Sequence[float], values: Sequence[Any]):
+        """
+        Build the table.
+
+        Args:
+            allocations: Share of buckets per value, in bucket units (e.g. percent)
+            values: Values to assign, in the same order
+
+        Raises:
+            ValueError: If there are no values or the lengths differ
+        """
+        if not values:
+            raise ValueError("AllocationTable requires at least one value")
+        if len(allocations) != len(values):
+            raise ValueError("allocations and values must have the same length")
+
+        self.values: List[Any] = list(values)
+        self.thresholds = np.cumsum(np.asarray(allocations, dtype=np.float64))
+        self._threshold_list = self.thresholds.tolist()
+
+    def lookup(self, bucket_value: int) -> Any:
+        """Get the value assigned to one bucket."""
+        index = bisect_right(self._threshold_list, bucket_value)
+        return self.values[min(index, len(self.values) - 1)]
+
+    def lookup_indices(self, buckets: np.ndarray) -> np.ndarray:
+        """
+        Get the index of the assigned value for each bucket.
+
+        Args:
+            buckets: Array of buckets, e.g. from bucket_many
+
+        Returns:
+            Array of indices into values
+        """
+        indices = np.searchsorted(self.thresholds, buckets, side="right")
+        return np.minimum(indices, len(self.values) - 1)
+
+    def lookup_many(self, buckets: np.ndarray) -> List[Any]:
+        """Get the assigned value for each bucket."""
+        values = self.values
+        return [values[index] for index in self.lookup_indices(buckets).tolist()]
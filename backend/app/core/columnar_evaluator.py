@@ -0,0 +1,403 @@
+"""
+Columnar batch evaluation of targeting rules.
+
+This module evaluates one targeting rules configuration against many user
+contexts at once. Contexts are pivoted into per-attribute columns and every
+condition becomes a boolean mask over the whole batch:
+- Numeric and date conditions are NumPy array comparisons
+- Equality, IN and the remaining operators are evaluated once per distinct
+  attribute value and gathered back onto rows through dictionary codes
+- AND/OR/NOT combine masks
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from operator import ge, gt, le, lt
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.app.core.bucketing import bucket_many
+from backend.app.core.rule_compiler import RuleCompiler
+from backend.app.core.rules_engine import (
+    UserContext,
+    _parse_datetime,
+    _parse_datetime_operand,
+    get_stable_user_id,
+)
+from backend.app.schemas.targeting_rule import (
+    Condition,
+    LogicalOperator,
+    OperatorType,
+    RuleGroup,
+    TargetingRule,
+    TargetingRules,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for attributes missing from a user context
+_MISSING = object()
+
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Comparison functions for numeric operators, applied to float arrays
+_NUMERIC_COMPARATORS: Dict[OperatorType, Callable[[Any, Any], Any]] = {
+    OperatorType.GREATER_THAN: gt,
+    OperatorType.GREATER_THAN_OR_EQUAL: ge,
+    OperatorType.LESS_THAN: lt,
+    OperatorType.LESS_THAN_OR_EQUAL: le,
+}
+
+# Comparison functions for date operators, applied to microsecond arrays
+_DATE_COMPARATORS: Dict[OperatorType, Callable[[Any, Any], Any]] = {
+    OperatorType.BEFORE: lt,
+    OperatorType.AFTER: gt,
+}
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError, OverflowError):
+        return np.nan
+
+
+def _is_numeric_like(value: Any) -> bool:
+    """Match the numeric detection used by the BETWEEN operator in the rules engine."""
+    return isinstance(value, (int, float)) or (
+        isinstance(value, str) and value.replace('.', '', 1).isdigit()
+    )
+
+
+def _datetime_key(dt: datetime) -> tuple:
+    """Return (is_aware, microseconds since epoch) for a datetime."""
+    if dt.tzinfo is not None and dt.utcoffset() is not None:
+        return True, (dt - _EPOCH_AWARE) // _MICROSECOND
+    return False, (dt.replace(tzinfo=None) - _EPOCH_NAIVE) // _MICROSECOND
+
+
+class AttributeColumn:
+    """
+    Dictionary-encoded column holding one attribute across a batch.
+
+    Each row stores a code into the list of distinct values; rows where the
+    attribute is missing get code -1. Derived per-value arrays (floats,
+    datetimes) are computed lazily and shared by all conditions on the
+    attribute.
+    """
+
+    def __init__(self, values: Sequence[Any]):
+        """
+        Build the column.
+
+        Args:
+            values: Attribute value per row, _MISSING where absent
+        """
+        codes = np.empty(len(values), dtype=np.int64)
+        uniques: List[Any] = []
+        index: Dict[Any, int] = {}
+
+        for row, value in enumerate(values):
+            if value is _MISSING:
+                codes[row] = -1
+                continue
+
+            # Key by type so that e.g. True, 1 and 1.0 stay distinct values
+            try:
+                key = (type(value), value)
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(uniques)
+                    uniques.append(value)
+            except TypeError:
+                # Unhashable values (lists, dicts) each get their own slot
+                code = len(uniques)
+                uniques.append(value)
+            codes[row] = code
+
+        self.codes = codes
+        self.uniques = uniques
+        self._numeric: Optional[np.ndarray] = None
+        self._numeric_like: Optional[np.ndarray] = None
+        self._dates: Optional[tuple] = None
+
+    def gather(self, unique_mask: np.ndarray) -> np.ndarray:
+        """
+        Map a mask over distinct values onto rows.
+
+        Args:
+            unique_mask: Boolean array with one entry per distinct value
+
+        Returns:
+            Boolean array with one entry per row; False where the attribute is missing
+        """
+        # Index -1 (missing) picks the trailing False
+        return np.append(unique_mask, False)[self.codes]
+
+    def map_values(self, test: Callable[[Any], bool]) -> np.ndarray:
+        """Evaluate a scalar predicate once per distinct value and gather onto rows."""
+        unique_mask = np.fromiter(
+            (bool(test(value)) for value in self.uniques),
+            dtype=bool,
+            count=len(self.uniques)
+        )
+        return self.gather(unique_mask)
+
+    @property
+    def numeric(self) -> np.ndarray:
+        """float() of each distinct value, NaN where conversion fails."""
+        if self._numeric is None:
+            self._numeric = np.fromiter(
+                (np.nan if value is None else _to_float(value) for value in self.uniques),
+                dtype=np.float64,
+                count=len(self.uniques)
+            )
+        return self._numeric
+
+    @property
+    def numeric_like(self) -> np.ndarray:
+        """Whether each distinct value passes the BETWEEN numeric check."""
+        if self._numeric_like is None:
+            self._numeric_like = np.fromiter(
+                (_is_numeric_like(value) for value in self.uniques),
+                dtype=bool,
+                count=len(self.uniques)
+            )
+        return self._numeric_like
+
+    @property
+    def dates(self) -> tuple:
+        """(valid, is_aware, microseconds since epoch) arrays over distinct values."""
+        if self._dates is None:
+            count = len(self.uniques)
+            valid = np.zeros(count, dtype=bool)
+            aware = np.zeros(count, dtype=bool)
+            micros = np.zeros(count, dtype=np.int64)
+
+            for i, value in enumerate(self.uniques):
+                dt = _parse_datetime(value)
+                if dt is None:
+                    continue
+                try:
+                    aware[i], micros[i] = _datetime_key(dt)
+                except (OverflowError, ValueError):
+                    continue
+                valid[i] = True
+
+            self._dates = (valid, aware, micros)
+        return self._dates
+
+
+@dataclass
+class ColumnarBatchResult:
+    """Matched rule per user from a columnar batch evaluation."""
+
+    # Candidate rules in evaluation (priority) order
+    rules: List[TargetingRule]
+
+    # Index into `rules` for each user context, -1 where no rule matched
+    matched_index: np.ndarray
+
+    # Rule applied to users with no match
+    default_rule: Optional[TargetingRule] = None
+
+    def __len__(self) -> int:
+        return len(self.matched_index)
+
+    def matched_rule(self, position: int) -> Optional[TargetingRule]:
+        """Get the rule applied to the user context at a position."""
+        index = self.matched_index[position]
+        return self.rules[index] if index >= 0 else self.default_rule
+
+    def matched_rule_ids(self) -> List[Optional[str]]:
+        """Get the applied rule id for every user context, in input order."""
+        default_id = self.default_rule.id if self.default_rule else None
+        ids = [rule.id for rule in self.rules]
+        return [ids[index] if index >= 0 else default_id for index in self.matched_index.tolist()]
+
+
+class ColumnarEvaluator:
+    """
+    Evaluates a targeting rules configuration over a batch of user contexts.
+
+    Operator semantics come from the given RuleCompiler, so results match
+    evaluating each context individually with the same compiler.
+    """
+
+    def __init__(self, rule_compiler: Optional[RuleCompiler] = None):
+        """
+        Initialize the evaluator.
+
+        Args:
+            rule_compiler: Compiler providing rule ordering and condition semantics
+        """
+        self.rule_compiler = rule_compiler or RuleCompiler()
+
+    def evaluate(
+        self,
+        targeting_rules: TargetingRules,
+        user_contexts: Sequence[UserContext]
+    ) -> ColumnarBatchResult:
+        """
+        Evaluate targeting rules for every user context in the batch.
+
+        Args:
+            targeting_rules: The targeting rules configuration
+            user_contexts: User contexts to evaluate
+
+        Returns:
+            ColumnarBatchResult with the matched rule index per user
+        """
+        compiled_rules = self.rule_compiler.compile_rule_set(targeting_rules)
+        rules = [rule for rule, _ in compiled_rules.rules]
+        size = len(user_contexts)
+
+        matched_index = np.full(size, -1, dtype=np.int32)
+        columns = self._pivot(rules, user_contexts)
+
+        unassigned = np.ones(size, dtype=bool)
+        for index, rule in enumerate(rules):
+            if not unassigned.any():
+                break
+
+            mask = self._group_mask(rule.rule, columns, size) & unassigned
+
+            if rule.rollout_percentage < 100:
+                # Bucket every matching row in one batch
+                rows = np.flatnonzero(mask)
+                buckets = bucket_many(
+                    (get_stable_user_id(user_contexts[row]) for row in rows),
+                    salt=rule.id
+                )
+                mask[rows[buckets >= rule.rollout_percentage]] = False
+
+            matched_index[mask] = index
+            unassigned &= ~mask
+
+        return ColumnarBatchResult(
+            rules=rules,
+            matched_index=matched_index,
+            default_rule=compiled_rules.default_rule
+        )
+
+    def _pivot(
+        self,
+        rules: List[TargetingRule],
+        user_contexts: Sequence[UserContext]
+    ) -> Dict[str, AttributeColumn]:
+        """Pivot user contexts into one column per attribute the rules read."""
+        attributes = set()
+
+        def collect(group: RuleGroup):
+            for condition in group.conditions:
+                attributes.add(condition.attribute)
+            for nested_group in (group.groups or []):
+                collect(nested_group)
+
+        for rule in rules:
+            collect(rule.rule)
+
+        return {
+            attribute: AttributeColumn([context.get(attribute, _MISSING) for context in user_contexts])
+            for attribute in attributes
+        }
+
+    def _group_mask(
+        self,
+        group: RuleGroup,
+        columns: Dict[str, AttributeColumn],
+        size: int
+    ) -> np.ndarray:
+        """Evaluate a rule group as a mask over the batch."""
+        children = [
+            (lambda condition=condition: self._condition_mask(condition, columns[condition.attribute]))
+            for condition in group.conditions
+        ]
+        children.extend(
+            (lambda nested=nested: self._group_mask(nested, columns, size))
+            for nested in (group.groups or [])
+        )
+
+        if not children:
+            return np.ones(size, dtype=bool)
+
+        operator = group.operator
+
+        if operator in (LogicalOperator.AND, LogicalOperator.NOT):
+            mask = np.ones(size, dtype=bool)
+            for child in children:
+                mask &= child()
+                if not mask.any():
+                    break
+            # NOT negates the AND of its children
+            return ~mask if operator == LogicalOperator.NOT else mask
+
+        if operator == LogicalOperator.OR:
+            mask = np.zeros(size, dtype=bool)
+            for child in children:
+                mask |= child()
+                if mask.all():
+                    break
+            return mask
+
+        logger.warning(f"Unknown logical operator: {operator}")
+        return np.zeros(size, dtype=bool)
+
+    def _condition_mask(self, condition: Condition, column: AttributeColumn) -> np.ndarray:
+        """Evaluate a condition as a mask over the batch."""
+        operator = condition.operator
+
+        if operator in _NUMERIC_COMPARATORS:
+            threshold = _to_float(condition.value)
+            if np.isnan(threshold):
+                return column.gather(np.zeros(len(column.uniques), dtype=bool))
+            return column.gather(_NUMERIC_COMPARATORS[operator](column.numeric, threshold))
+
+        if operator in _DATE_COMPARATORS:
+            expected = _parse_datetime_operand(condition.value)
+            if expected is None:
+                return column.gather(np.zeros(len(column.uniques), dtype=bool))
+            expected_aware, expected_micros = _datetime_key(expected)
+            valid, aware, micros = column.dates
+            unique_mask = valid & (aware == expected_aware) & _DATE_COMPARATORS[operator](micros, expected_micros)
+            return column.gather(unique_mask)
+
+        if operator == OperatorType.BETWEEN:
+            return column.gather(self._between_mask(condition, column))
+
+        # Everything else is evaluated once per distinct value
+        return column.map_values(self.rule_compiler.compile_condition(condition))
+
+    def _between_mask(self, condition: Condition, column: AttributeColumn) -> np.ndarray:
+        """Evaluate BETWEEN over distinct values, numeric or date ranges."""
+        lower_value = condition.value
+        upper_value = condition.additional_value
+        unique_mask = np.zeros(len(column.uniques), dtype=bool)
+        if upper_value is None:
+            return unique_mask
+
+        # Numeric range applies to numeric-looking values when both bounds are numeric
+        use_numeric = np.zeros(len(column.uniques), dtype=bool)
+        if _is_numeric_like(lower_value) and _is_numeric_like(upper_value):
+            lower, upper = _to_float(lower_value), _to_float(upper_value)
+            use_numeric = column.numeric_like
+            numeric = column.numeric
+            unique_mask = use_numeric & (lower <= numeric) & (numeric <= upper)
+
+        lower_date = _parse_datetime_operand(lower_value)
+        upper_date = _parse_datetime_operand(upper_value)
+        if lower_date is None or upper_date is None:
+            return unique_mask
+
+        lower_aware, lower_micros = _datetime_key(lower_date)
+        upper_aware, upper_micros = _datetime_key(upper_date)
+        if lower_aware != upper_aware:
+            return unique_mask
+
+        valid, aware, micros = column.dates
+        date_mask = valid & (aware == lower_aware) & (lower_micros <= micros) & (micros <= upper_micros)
+        return np.where(use_numeric, unique_mask, date_mask)
@@ -54,6 +54,11 @@ class Settings(BaseSettings):
     COGNITO_ADMIN_GROUPS: List[str] = ["Admins", "SuperUsers"]
     SYNC_ROLES_ON_LOGIN: bool = True
 
+    # Event tracking settings
+    TRACKING_BATCH_MAX_EVENTS: int = 100
+    # Limit for API keys with the "tracking:bulk" scope, e.g. mobile SDK bursts
+    TRACKING_TRUSTED_BATCH_MAX_EVENTS: int = 5000
+
     model_config = SettingsConfigDict(
         case_sensitive=True,
         extra="allow"  # Allow extra fields
@@ -1,57 +1,118 @@
 """
 Evaluation result caching for rule evaluation.
 
-This module provides LRU caching of rule evaluation results with TTL support.
+This module provides LRU caching of rule evaluation results with TTL support,
+and a sharded variant for caches shared by many threads.
 """
 
-import hashlib
-import json
+import heapq
+import itertools
 import time
 import threading
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Marks an attribute missing from the user context, distinct from None
+_ABSENT = object()
+
 
 @dataclass
 class CacheEntry:
     """Cache entry with TTL and metadata."""
-    result: bool
+    result: Any
     created_at: float
     expires_at: float
     rule_id: str
     user_id: Optional[str] = None
+    # CLOCK reference bit, set on hits in ClockEvaluationCache
+    referenced: bool = False
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Convert a context value into a hashable form for use in a cache key.
+
+    Values are tagged with their type so that e.g. True, 1 and 1.0 (which are
+    equal in Python but evaluate differently under string operators) stay distinct.
+    """
+    value_type = type(value)
+    if value_type is str or value is None:
+        return value
+    if value_type in (list, tuple):
+        return value_type, tuple(_freeze(v) for v in value)
+    if value_type is dict:
+        try:
+            return value_type, tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+        except TypeError:
+            return value_type, repr(value)
+    if value_type in (set, frozenset):
+        return value_type, frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return value_type, repr(value)
+    return value_type, value
+
+
+def build_cache_key(
+    rule_id: str,
+    user_context: Dict[str, Any],
+    attributes: Optional[Iterable[str]] = None,
+    namespace: Optional[str] = None
+) -> Tuple:
+    """
+    Build a hashable cache key from a rule id and the relevant part of a user context.
+
+    Args:
+        rule_id: Rule identifier
+        user_context: User context dictionary
+        attributes: Context attributes the evaluation depends on; if None the
+            whole context is used
+        namespace: Optional qualifier kept apart from other entries for the same
+            rule id, e.g. a digest of the rule configuration
+
+    Returns:
+        Tuple usable directly as a dictionary key
+    """
+    if attributes is None:
+        attributes = user_context.keys()
+
+    prefix = (rule_id,) if namespace is None else (rule_id, namespace)
+    return prefix + tuple(
+        (name, _freeze(user_context.get(name, _ABSENT)))
+        for name in sorted(attributes)
+    )
 
 
 class CacheKey:
     """Cache key for rule evaluation."""
 
-    def __init__(self, rule_id: str, user_context: Dict[str, Any]):
+    def __init__(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None
+    ):
         self.rule_id = rule_id
         self.user_context = user_context
-        self._hash = self._compute_hash()
-
-    def _compute_hash(self) -> str:
-        """Compute deterministic hash of rule and context."""
-        # Sort context keys for deterministic hashing
-        context_str = json.dumps(self.user_context, sort_keys=True)
-        key_str = f"{self.rule_id}:{context_str}"
-        return hashlib.md5(key_str.encode()).hexdigest()
+        self._key = build_cache_key(rule_id, user_context, attributes)
 
     def __str__(self) -> str:
-        return self._hash
+        # Printable digest; the cache itself is keyed by the tuple
+        return format(hash(self._key) & 0xFFFFFFFFFFFFFFFF, "016x")
 
     def __hash__(self) -> int:
-        return hash(self._hash)
+        return hash(self._key)
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, CacheKey):
             return False
-        return self._hash == other._hash
+        return self._key == other._key
 
 
 class EvaluationCache:
@@ -64,8 +125,15 @@ class EvaluationCache:
     - Thread-safe operations
     - Cache invalidation by rule or user
     - Statistics tracking
+
+    Entries are indexed by rule and by user, and their expiry times are kept
+    in a min-heap, so invalidation and expiry only touch the affected entries
+    rather than scanning the whole cache under the lock.
     """
 
+    # Rebuild the expiry heap once stale items outnumber live entries by this factor
+    EXPIRY_HEAP_COMPACT_FACTOR = 2
+
     def __init__(
         self,
         max_size: int = 10000,
@@ -82,13 +150,24 @@ class EvaluationCache:
         self.default_ttl = default_ttl
 
         # Thread-safe LRU cache
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._cache: OrderedDict[Tuple, CacheEntry] = OrderedDict()
         self._lock = threading.RLock()
 
+        # Reverse indexes for invalidation
+        self._rule_index: Dict[str, Set[Tuple]] = {}
+        self._user_index: Dict[Any, Set[Tuple]] = {}
+
+        # (expires_at, sequence, key) min-heap; items for replaced or removed
+        # entries are left in place and skipped when popped
+        self._expiry_heap: List[Tuple[float, int, Tuple]] = []
+        self._expiry_sequence = itertools.count()
+
         # Statistics
         self._hits = 0
         self._misses = 0
         self._evictions = 0
+        self._key_builds = 0
+        self._key_build_ns = 0
 
     @property
     def size(self) -> int:
@@ -96,33 +175,68 @@ class EvaluationCache:
         with self._lock:
             return len(self._cache)
 
-    def generate_key(self, rule_id: str, user_context: Dict[str, Any]) -> str:
+    def generate_key(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None
+    ) -> str:
         """
-        Generate cache key for rule and user context.
+        Generate a printable cache key for rule and user context.
 
         Args:
             rule_id: Rule identifier
             user_context: User context dictionary
+            attributes: Context attributes the rule reads (defaults to all)
 
         Returns:
             Cache key string
         """
-        cache_key = CacheKey(rule_id, user_context)
+        cache_key = CacheKey(rule_id, user_context, attributes)
         return str(cache_key)
 
-    def get(self, rule_id: str, user_context: Dict[str, Any]) -> Optional[bool]:
+    def _build_key(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]],
+        namespace: Optional[str] = None
+    ) -> Tuple:
+        """Build the internal key, recording how long key construction took."""
+        start = time.perf_counter_ns()
+        key = build_cache_key(rule_id, user_context, attributes, namespace)
+        elapsed = time.perf_counter_ns() - start
+
+        # Unsynchronized; a lost update only skews the timing stats slightly
+        self._key_builds += 1
+        self._key_build_ns += elapsed
+        return key
+
+    def get(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None,
+        namespace: Optional[str] = None
+    ) -> Optional[Any]:
         """
         Get cached evaluation result.
 
         Args:
             rule_id: Rule identifier
             user_context: User context dictionary
+            attributes: Context attributes the rule reads; other attributes are
+                ignored when matching entries (defaults to all)
+            namespace: Optional key qualifier, must match the one used in set()
 
         Returns:
             Cached result or None if not found/expired
         """
-        key = self.generate_key(rule_id, user_context)
+        key = self._build_key(rule_id, user_context, attributes, namespace)
+        return self._lookup(key)
 
+    def _lookup(self, key: Tuple) -> Optional[Any]:
+        """Look up a pre-built key, updating recency and hit statistics."""
         with self._lock:
             if key in self._cache:
                 entry = self._cache[key]
@@ -130,7 +244,7 @@ class EvaluationCache:
                 # Check if expired
                 if time.time() > entry.expires_at:
                     # Remove expired entry
-                    del self._cache[key]
+                    self._remove(key)
                     self._misses += 1
                     return None
 
@@ -146,8 +260,10 @@ class EvaluationCache:
         self,
         rule_id: str,
         user_context: Dict[str, Any],
-        result: bool,
-        ttl: Optional[float] = None
+        result: Any,
+        ttl: Optional[float] = None,
+        attributes: Optional[Iterable[str]] = None,
+        namespace: Optional[str] = None
     ):
         """
         Store evaluation result in cache.
@@ -157,34 +273,115 @@ class EvaluationCache:
             user_context: User context dictionary
             result: Evaluation result to cache
             ttl: Optional custom TTL (defaults to default_ttl)
+            attributes: Context attributes the rule reads (defaults to all)
+            namespace: Optional key qualifier, e.g. a digest of the rule configuration
         """
-        key = self.generate_key(rule_id, user_context)
-        ttl = ttl if ttl is not None else self.default_ttl
+        key = self._build_key(rule_id, user_context, attributes, namespace)
+        self._store(key, self._new_entry(rule_id, user_context, result, ttl))
 
+    def _new_entry(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        result: Any,
+        ttl: Optional[float]
+    ) -> CacheEntry:
+        """Create a cache entry expiring after ttl (or default_ttl) seconds."""
+        ttl = ttl if ttl is not None else self.default_ttl
         current_time = time.time()
-        user_id = user_context.get("user_id")
 
-        entry = CacheEntry(
+        return CacheEntry(
             result=result,
             created_at=current_time,
             expires_at=current_time + ttl,
             rule_id=rule_id,
-            user_id=user_id
+            user_id=user_context.get("user_id")
         )
 
+    def _store(self, key: Tuple, entry: CacheEntry):
+        """Store an entry under a pre-built key, evicting as needed."""
+        current_time = entry.created_at
+
         with self._lock:
             # Add/update entry
             if key in self._cache:
                 # Update existing entry
-                del self._cache[key]
+                self._remove(key)
 
             self._cache[key] = entry
-            self._cache.move_to_end(key)
+            self._index(key, entry)
+
+            # Drop entries whose TTL has passed before evicting live ones
+            self._expire(current_time)
 
             # Evict oldest if over size limit
             while len(self._cache) > self.max_size:
-                self._cache.popitem(last=False)
-                self._evictions += 1
+                self._evict_one()
+
+            if len(self._expiry_heap) > self.EXPIRY_HEAP_COMPACT_FACTOR * max(len(self._cache), self.max_size):
+                self._compact_expiry_heap()
+
+    def _evict_one(self):
+        """Evict the least recently used entry. Caller holds the lock."""
+        evicted_key, evicted_entry = self._cache.popitem(last=False)
+        self._unindex(evicted_key, evicted_entry)
+        self._evictions += 1
+
+    def _index(self, key: Tuple, entry: CacheEntry):
+        """Add an entry to the rule/user indexes and the expiry heap. Caller holds the lock."""
+        self._rule_index.setdefault(entry.rule_id, set()).add(key)
+        if entry.user_id is not None:
+            try:
+                self._user_index.setdefault(entry.user_id, set()).add(key)
+            except TypeError:
+                # Unhashable user_id; such entries can only be dropped by rule, TTL or LRU
+                pass
+        heapq.heappush(self._expiry_heap, (entry.expires_at, next(self._expiry_sequence), key))
+
+    def _unindex(self, key: Tuple, entry: CacheEntry):
+        """Remove an entry from the rule/user indexes. Caller holds the lock."""
+        self._discard_from_index(self._rule_index, entry.rule_id, key)
+        if entry.user_id is not None:
+            try:
+                self._discard_from_index(self._user_index, entry.user_id, key)
+            except TypeError:
+                pass
+
+    @staticmethod
+    def _discard_from_index(index: Dict[Any, Set[Tuple]], index_key: Any, key: Tuple):
+        keys = index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[index_key]
+
+    def _remove(self, key: Tuple) -> Optional[CacheEntry]:
+        """Remove an entry and its index references. Caller holds the lock."""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._unindex(key, entry)
+        return entry
+
+    def _expire(self, current_time: float) -> int:
+        """Pop expired entries off the expiry heap. Caller holds the lock."""
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] < current_time:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # Skip stale items for entries that were replaced or already removed
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def _compact_expiry_heap(self):
+        """Rebuild the expiry heap from live entries, dropping stale items. Caller holds the lock."""
+        self._expiry_heap = [
+            (entry.expires_at, next(self._expiry_sequence), key)
+            for key, entry in self._cache.items()
+        ]
+        heapq.heapify(self._expiry_heap)
 
     def invalidate_rule(self, rule_id: str):
         """
@@ -194,15 +391,17 @@ class EvaluationCache:
             rule_id: Rule identifier
         """
         with self._lock:
-            keys_to_remove = [
-                key for key, entry in self._cache.items()
-                if entry.rule_id == rule_id
-            ]
+            keys_to_remove = self._rule_index.pop(rule_id, ())
 
             for key in keys_to_remove:
-                del self._cache[key]
+                entry = self._cache.pop(key)
+                if entry.user_id is not None:
+                    try:
+                        self._discard_from_index(self._user_index, entry.user_id, key)
+                    except TypeError:
+                        pass
 
-            logger.info(f"Invalidated {len(keys_to_remove)} cache entries for rule {rule_id}")
+        logger.info(f"Invalidated {len(keys_to_remove)} cache entries for rule {rule_id}")
 
     def invalidate_user(self, user_id: str):
         """
@@ -212,24 +411,27 @@ class EvaluationCache:
             user_id: User identifier
         """
         with self._lock:
-            keys_to_remove = [
-                key for key, entry in self._cache.items()
-                if entry.user_id == user_id
-            ]
+            keys_to_remove = self._user_index.pop(user_id, ())
 
             for key in keys_to_remove:
-                del self._cache[key]
+                entry = self._cache.pop(key)
+                self._discard_from_index(self._rule_index, entry.rule_id, key)
 
-            logger.info(f"Invalidated {len(keys_to_remove)} cache entries for user {user_id}")
+        logger.info(f"Invalidated {len(keys_to_remove)} cache entries for user {user_id}")
 
     def clear(self):
         """Clear entire cache."""
         with self._lock:
             self._cache.clear()
+            self._rule_index.clear()
+            self._user_index.clear()
+            self._expiry_heap = []
             # Reset statistics
             self._hits = 0
             self._misses = 0
             self._evictions = 0
+            self._key_builds = 0
+            self._key_build_ns = 0
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -249,7 +451,11 @@ class EvaluationCache:
                 "misses": self._misses,
                 "hit_rate": hit_rate,
                 "evictions": self._evictions,
-                "total_requests": total_requests
+                "total_requests": total_requests,
+                "key_build_time_ms": self._key_build_ns / 1e6,
+                "avg_key_build_time_us": (
+                    self._key_build_ns / self._key_builds / 1e3 if self._key_builds else 0.0
+                )
             }
 
     def cleanup_expired(self):
@@ -257,15 +463,244 @@ class EvaluationCache:
         current_time = time.time()
 
         with self._lock:
-            keys_to_remove = [
-                key for key, entry in self._cache.items()
-                if current_time > entry.expires_at
-            ]
+            removed = self._expire(current_time)
 
-            for key in keys_to_remove:
-                del self._cache[key]
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired cache entries")
+
+        return removed
+
+
+class ClockEvaluationCache(EvaluationCache):
+    """
+    EvaluationCache with CLOCK (second-chance) eviction instead of strict LRU.
+
+    A hit only sets the entry's reference bit rather than reordering the
+    cache, so lookups of live entries don't take the lock. Eviction walks
+    entries in insertion order, giving referenced entries a second chance.
+    Hit/miss counters are updated without the lock and may undercount
+    slightly under heavy concurrency.
+    """
+
+    def _lookup(self, key: Tuple) -> Optional[Any]:
+        """Look up a pre-built key without locking unless the entry has expired."""
+        # Single dict lookup, atomic under the GIL
+        entry = self._cache.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if time.time() > entry.expires_at:
+            with self._lock:
+                if self._cache.get(key) is entry:
+                    self._remove(key)
+            self._misses += 1
+            return None
+
+        entry.referenced = True
+        self._hits += 1
+        return entry.result
+
+    def _evict_one(self):
+        """Evict the oldest entry not referenced since the hand last passed. Caller holds the lock."""
+        while True:
+            key, entry = self._cache.popitem(last=False)
+            if not entry.referenced:
+                break
+            # Second chance: clear the bit and move behind the hand
+            entry.referenced = False
+            self._cache[key] = entry
+
+        self._unindex(key, entry)
+        self._evictions += 1
+
+
+class ShardedEvaluationCache:
+    """
+    Evaluation cache split into independently locked segments.
+
+    Keys are assigned to one of num_shards ClockEvaluationCache segments by
+    hash, so writers on different shards never contend and readers of live
+    entries don't lock at all. Eviction is per shard, approximating LRU over
+    the whole cache. Exposes the same interface and get_stats keys as
+    EvaluationCache, aggregated across shards.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        default_ttl: float = 300.0,
+        num_shards: int = 16
+    ):
+        """
+        Initialize sharded evaluation cache.
+
+        Args:
+            max_size: Maximum number of entries to cache across all shards
+            default_ttl: Default TTL in seconds for cache entries
+            num_shards: Number of independently locked segments
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.num_shards = num_shards
+
+        shard_size = max(1, -(-max_size // num_shards))
+        self._shards: List[ClockEvaluationCache] = [
+            ClockEvaluationCache(max_size=shard_size, default_ttl=default_ttl)
+            for _ in range(num_shards)
+        ]
+
+        self._key_builds = 0
+        self._key_build_ns = 0
+
+    @property
+    def size(self) -> int:
+        """Get current cache size."""
+        return sum(shard.size for shard in self._shards)
+
+    def generate_key(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None
+    ) -> str:
+        """
+        Generate a printable cache key for rule and user context.
+
+        Args:
+            rule_id: Rule identifier
+            user_context: User context dictionary
+            attributes: Context attributes the rule reads (defaults to all)
+
+        Returns:
+            Cache key string
+        """
+        return str(CacheKey(rule_id, user_context, attributes))
+
+    def _build_key(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]],
+        namespace: Optional[str]
+    ) -> Tuple:
+        """Build the internal key, recording how long key construction took."""
+        start = time.perf_counter_ns()
+        key = build_cache_key(rule_id, user_context, attributes, namespace)
+        elapsed = time.perf_counter_ns() - start
+
+        # Unsynchronized; a lost update only skews the timing stats slightly
+        self._key_builds += 1
+        self._key_build_ns += elapsed
+        return key
+
+    def _shard(self, key: Tuple) -> ClockEvaluationCache:
+        return self._shards[hash(key) % self.num_shards]
+
+    def get(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None,
+        namespace: Optional[str] = None
+    ) -> Optional[Any]:
+        """
+        Get cached evaluation result.
+
+        Args:
+            rule_id: Rule identifier
+            user_context: User context dictionary
+            attributes: Context attributes the rule reads (defaults to all)
+            namespace: Optional key qualifier, must match the one used in set()
+
+        Returns:
+            Cached result or None if not found/expired
+        """
+        key = self._build_key(rule_id, user_context, attributes, namespace)
+        return self._shard(key)._lookup(key)
+
+    def set(
+        self,
+        rule_id: str,
+        user_context: Dict[str, Any],
+        result: Any,
+        ttl: Optional[float] = None,
+        attributes: Optional[Iterable[str]] = None,
+        namespace: Optional[str] = None
+    ):
+        """
+        Store evaluation result in cache.
+
+        Args:
+            rule_id: Rule identifier
+            user_context: User context dictionary
+            result: Evaluation result to cache
+            ttl: Optional custom TTL (defaults to default_ttl)
+            attributes: Context attributes the rule reads (defaults to all)
+            namespace: Optional key qualifier, e.g. a digest of the rule configuration
+        """
+        key = self._build_key(rule_id, user_context, attributes, namespace)
+        shard = self._shard(key)
+        shard._store(key, shard._new_entry(rule_id, user_context, result, ttl))
 
-            if keys_to_remove:
-                logger.debug(f"Cleaned up {len(keys_to_remove)} expired cache entries")
+    def invalidate_rule(self, rule_id: str):
+        """
+        Invalidate all cache entries for a specific rule.
 
-            return len(keys_to_remove)
+        Args:
+            rule_id: Rule identifier
+        """
+        for shard in self._shards:
+            shard.invalidate_rule(rule_id)
+
+    def invalidate_user(self, user_id: str):
+        """
+        Invalidate all cache entries for a specific user.
+
+        Args:
+            user_id: User identifier
+        """
+        for shard in self._shards:
+            shard.invalidate_user(user_id)
+
+    def clear(self):
+        """Clear entire cache."""
+        for shard in self._shards:
+            shard.clear()
+        self._key_builds = 0
+        self._key_build_ns = 0
+
+    def cleanup_expired(self) -> int:
+        """Remove all expired entries from cache."""
+        return sum(shard.cleanup_expired() for shard in self._shards)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics aggregated across shards.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        shard_stats = [shard.get_stats() for shard in self._shards]
+        hits = sum(stats["hits"] for stats in shard_stats)
+        misses = sum(stats["misses"] for stats in shard_stats)
+        total_requests = hits + misses
+
+        return {
+            "size": sum(stats["size"] for stats in shard_stats),
+            "max_size": self.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total_requests if total_requests > 0 else 0.0,
+            "evictions": sum(stats["evictions"] for stats in shard_stats),
+            "total_requests": total_requests,
+            "key_build_time_ms": self._key_build_ns / 1e6,
+            "avg_key_build_time_us": (
+                self._key_build_ns / self._key_builds / 1e3 if self._key_builds else 0.0
+            ),
+            "shards": self.num_shards,
+        }
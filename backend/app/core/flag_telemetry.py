@@ -0,0 +1,341 @@
+"""
+Buffered telemetry for feature flag evaluations.
+
+Evaluations are pre-aggregated in memory per (flag, targeting rule, segment,
+minute) and written as bulk inserts of raw metrics by a background task,
+either every flush interval or as soon as the buffer reaches its flush
+threshold. Recording only touches memory, so evaluation latency does not
+include database writes. The buffer is bounded: evaluations for new keys and
+errors beyond the limits are dropped and counted.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from backend.app.db.session import SessionLocal
+from backend.app.models.metrics.metric import MetricType
+from backend.app.services.metrics_service import MetricsService
+from backend.app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# (feature flag ID, targeting rule ID, segment ID, minute)
+BucketKey = Tuple[UUID, Optional[str], Optional[UUID], datetime]
+
+
+@dataclass
+class _EvaluationBucket:
+    """Running totals of the evaluations sharing a bucket key."""
+
+    count: int = 0
+    enabled: int = 0
+    latency_count: int = 0
+    latency_sum: float = 0.0
+    latency_min: Optional[float] = None
+    latency_max: Optional[float] = None
+
+    def add(self, value: Any, latency_ms: Optional[float]):
+        self.count += 1
+        if value:
+            self.enabled += 1
+        if latency_ms is not None:
+            self.latency_count += 1
+            self.latency_sum += latency_ms
+            if self.latency_min is None or latency_ms < self.latency_min:
+                self.latency_min = latency_ms
+            if self.latency_max is None or latency_ms > self.latency_max:
+                self.latency_max = latency_ms
+
+
+class FlagTelemetryBuffer:
+    """Bounded in-process buffer of flag evaluation metrics with background flushing."""
+
+    def __init__(
+        self,
+        flush_interval_seconds: float = 10.0,
+        flush_threshold: int = 1000,
+        max_buckets: int = 10000,
+        max_errors: int = 1000,
+    ):
+        """
+        Initialize the telemetry buffer.
+
+        Args:
+            flush_interval_seconds: How often to flush buffered metrics
+            flush_threshold: Number of buckets that triggers an early flush
+            max_buckets: Number of buckets kept before evaluations are dropped
+            max_errors: Number of error logs kept before errors are dropped
+        """
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_threshold = flush_threshold
+        self.max_buckets = max_buckets
+        self.max_errors = max_errors
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[BucketKey, _EvaluationBucket] = {}
+        self._errors: List[Dict[str, Any]] = []
+
+        self.dropped_evaluations = 0
+        self.dropped_errors = 0
+        self.failed_rows = 0
+        self.flushed_rows = 0
+
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+
+    def record_evaluation(
+        self,
+        feature_flag_id: UUID,
+        value: Any,
+        targeting_rule_id: Optional[str] = None,
+        segment_id: Optional[UUID] = None,
+        latency_ms: Optional[float] = None,
+    ) -> bool:
+        """
+        Add a flag evaluation to the buffer.
+
+        Args:
+            feature_flag_id: ID of the evaluated feature flag
+            value: Result of the evaluation
+            targeting_rule_id: ID of the matched targeting rule if any
+            segment_id: ID of the matched segment if any
+            latency_ms: Time taken to evaluate the flag in milliseconds
+
+        Returns:
+            False if the evaluation was dropped because the buffer is full
+        """
+        minute = datetime.utcnow().replace(second=0, microsecond=0)
+        key = (feature_flag_id, targeting_rule_id, segment_id, minute)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self.dropped_evaluations += 1
+                    return False
+                bucket = self._buckets[key] = _EvaluationBucket()
+            bucket.add(value, latency_ms)
+            should_flush = len(self._buckets) >= self.flush_threshold
+
+        if should_flush:
+            self._request_flush()
+        return True
+
+    def record_error(
+        self,
+        error_type: str,
+        message: str,
+        feature_flag_id: Optional[UUID] = None,
+        user_id: Optional[str] = None,
+        request_data: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Add an evaluation error to the buffer.
+
+        Args:
+            error_type: Type of the error
+            message: Error message
+            feature_flag_id: ID of the feature flag being evaluated
+            user_id: ID of the user
+            request_data: Context of the request
+
+        Returns:
+            False if the error was dropped because the buffer is full
+        """
+        with self._lock:
+            if len(self._errors) >= self.max_errors:
+                self.dropped_errors += 1
+                return False
+            self._errors.append(
+                {
+                    "error_type": error_type,
+                    "timestamp": datetime.utcnow(),
+                    "feature_flag_id": feature_flag_id,
+                    "user_id": user_id,
+                    "message": message[:1000],
+                    "request_data": request_data,
+                }
+            )
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Get buffer sizes and counters."""
+        with self._lock:
+            return {
+                "buffered_buckets": len(self._buckets),
+                "buffered_errors": len(self._errors),
+                "dropped_evaluations": self.dropped_evaluations,
+                "dropped_errors": self.dropped_errors,
+                "failed_rows": self.failed_rows,
+                "flushed_rows": self.flushed_rows,
+            }
+
+    def flush(self) -> int:
+        """
+        Write the buffered metrics and errors in one transaction.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+            errors, self._errors = self._errors, []
+
+        if not buckets and not errors:
+            return 0
+
+        metric_rows = self._metric_rows(buckets)
+
+        db = SessionLocal()
+        try:
+            MetricsService.bulk_insert_raw_metrics(db, metric_rows)
+            MetricsService.bulk_insert_error_logs(db, errors)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.failed_rows += len(metric_rows) + len(errors)
+            logger.error(f"Error flushing flag telemetry: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+        written = len(metric_rows) + len(errors)
+        with self._lock:
+            self.flushed_rows += written
+        return written
+
+    @staticmethod
+    def _metric_rows(
+        buckets: Dict[BucketKey, _EvaluationBucket]
+    ) -> List[Dict[str, Any]]:
+        """Expand buckets into raw metric rows, one per metric type."""
+        rows = []
+        for (flag_id, rule_id, segment_id, minute), bucket in buckets.items():
+            common = {"timestamp": minute, "feature_flag_id": flag_id, "user_id": None}
+            rows.append(
+                {
+                    **common,
+                    "metric_type": MetricType.FLAG_EVALUATION.value,
+                    "targeting_rule_id": rule_id,
+                    "segment_id": segment_id,
+                    "value": None,
+                    "count": bucket.count,
+                    "meta_data": {"enabled": bucket.enabled},
+                }
+            )
+            if bucket.latency_count:
+                # Mean latency weighted by count keeps sums and averages exact
+                rows.append(
+                    {
+                        **common,
+                        "metric_type": MetricType.LATENCY.value,
+                        "targeting_rule_id": None,
+                        "segment_id": None,
+                        "value": bucket.latency_sum / bucket.latency_count,
+                        "count": bucket.latency_count,
+                        "meta_data": {
+                            "min_value": bucket.latency_min,
+                            "max_value": bucket.latency_max,
+                        },
+                    }
+                )
+            if rule_id:
+                rows.append(
+                    {
+                        **common,
+                        "metric_type": MetricType.RULE_MATCH.value,
+                        "targeting_rule_id": rule_id,
+                        "segment_id": None,
+                        "value": None,
+                        "count": bucket.count,
+                        "meta_data": None,
+                    }
+                )
+            if segment_id:
+                rows.append(
+                    {
+                        **common,
+                        "metric_type": MetricType.SEGMENT_MATCH.value,
+                        "targeting_rule_id": None,
+                        "segment_id": segment_id,
+                        "value": None,
+                        "count": bucket.count,
+                        "meta_data": None,
+                    }
+                )
+        return rows
+
+    def _request_flush(self):
+        """Wake the flush task from any thread."""
+        if self._loop is not None and self._flush_requested is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._flush_requested.set)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    async def start(self):
+        """Start the background flush task."""
+        if self.is_running:
+            logger.warning("Flag telemetry buffer is already running")
+            return
+
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._flush_requested = asyncio.Event()
+        self.task = asyncio.create_task(self._run_flusher())
+        logger.info(
+            "Flag telemetry buffer started with "
+            f"{self.flush_interval_seconds} second interval"
+        )
+
+    async def stop(self):
+        """Stop the background flush task and write what is left."""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self._loop = None
+        self._flush_requested = None
+
+        await asyncio.to_thread(self.flush)
+        logger.info("Flag telemetry buffer stopped")
+
+    async def _run_flusher(self):
+        """Flush on the interval or when the buffer asks for it."""
+        while self.is_running:
+            try:
+                try:
+                    await asyncio.wait_for(
+                        self._flush_requested.wait(),
+                        timeout=self.flush_interval_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_requested.clear()
+
+                # Database writes run off the event loop
+                await asyncio.to_thread(self.flush)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in flag telemetry flusher: {str(e)}")
+                await asyncio.sleep(1)
+
+
+# Create a singleton instance of the buffer
+flag_telemetry = FlagTelemetryBuffer()
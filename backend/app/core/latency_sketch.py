@@ -0,0 +1,252 @@
+"""
+Streaming latency quantiles.
+
+This module provides a mergeable, fixed-accuracy quantile sketch in the style
+of DDSketch: values are counted in logarithmically sized buckets, so recording
+is O(1) and any quantile is within a relative error of the true value. A
+rolling variant keeps a sketch per time slice for windowed views.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+
+class LatencySketch:
+    """
+    Log-bucketed quantile sketch with bounded relative error.
+
+    Provides:
+    - O(1) recording
+    - Quantiles computed on read, within relative_accuracy of the true value
+    - Merging of sketches from other threads, workers or time slices
+    - Serialization to plain dictionaries for shipping between processes
+    """
+
+    # Values at or below this are counted as zero
+    MIN_INDEXABLE_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of reported quantiles (0 < a < 1)
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self._bins: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1):
+        """
+        Record a value.
+
+        Args:
+            value: Non-negative value, e.g. a latency in milliseconds
+            weight: Number of occurrences to record
+        """
+        if value <= self.MIN_INDEXABLE_VALUE:
+            self._zero_count += weight
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._bins[index] = self._bins.get(index, 0) + weight
+
+        self.count += weight
+        self.sum += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def avg(self) -> float:
+        """Mean of recorded values (0.0 if empty)."""
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: Quantile in [0, 1], e.g. 0.99
+
+        Returns:
+            Estimated value (0.0 if the sketch is empty)
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if seen > rank:
+            return max(self.min, 0.0)
+
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                estimate = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        """Estimate several quantiles at once."""
+        return {q: self.quantile(q) for q in qs}
+
+    def merge(self, other: "LatencySketch"):
+        """
+        Add another sketch's values into this one.
+
+        Args:
+            other: Sketch built with the same relative accuracy
+
+        Raises:
+            ValueError: If the sketches use different accuracies
+        """
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if other.count == 0:
+            return
+
+        bins = self._bins
+        # list() copies in one step, so a concurrent add() to other can't break iteration
+        for index, count in list(other._bins.items()):
+            bins[index] = bins.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "LatencySketch":
+        """Return an independent copy of this sketch."""
+        sketch = LatencySketch(self.relative_accuracy)
+        sketch.merge(self)
+        return sketch
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Summarize the distribution.
+
+        Returns:
+            Dictionary with count, avg, min, max and p50/p95/p99
+        """
+        return {
+            "count": self.count,
+            "avg": self.avg,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the sketch, e.g. to merge sketches from several workers."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self._bins.items()},
+            "zero_count": self._zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        """Rebuild a sketch serialized with to_dict."""
+        sketch = cls(data["relative_accuracy"])
+        sketch._bins = {int(index): count for index, count in data["bins"].items()}
+        sketch._zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class RollingLatencySketch:
+    """
+    Quantile sketch over a sliding time window.
+
+    The window is split into slices, each with its own LatencySketch; slices
+    that fall out of the window are dropped, and reads merge the live ones.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        slices: int = 6,
+        relative_accuracy: float = 0.01
+    ):
+        """
+        Initialize an empty rolling sketch.
+
+        Args:
+            window_seconds: Length of the window
+            slices: Number of slices the window is divided into; the window
+                start moves in steps of window_seconds / slices
+            relative_accuracy: Relative accuracy of the per-slice sketches
+        """
+        self.window_seconds = window_seconds
+        self.relative_accuracy = relative_accuracy
+        self._slice_seconds = window_seconds / slices
+        self._slices: Deque[Tuple[float, LatencySketch]] = deque()
+
+    def add(self, value: float, now: Optional[float] = None):
+        """
+        Record a value in the current slice.
+
+        Args:
+            value: Non-negative value
+            now: Monotonic timestamp (defaults to time.monotonic())
+        """
+        now = time.monotonic() if now is None else now
+        slice_start = now - now % self._slice_seconds
+
+        if not self._slices or self._slices[-1][0] != slice_start:
+            self._slices.append((slice_start, LatencySketch(self.relative_accuracy)))
+            self._expire(now)
+
+        self._slices[-1][1].add(value)
+
+    def _expire(self, now: float):
+        """Drop slices that ended before the window start."""
+        window_start = now - self.window_seconds
+        while self._slices and self._slices[0][0] + self._slice_seconds <= window_start:
+            self._slices.popleft()
+
+    def snapshot(self, now: Optional[float] = None) -> LatencySketch:
+        """
+        Merge the slices inside the window.
+
+        Args:
+            now: Monotonic timestamp (defaults to time.monotonic())
+
+        Returns:
+            A new sketch of the values recorded in the window
+        """
+        now = time.monotonic() if now is None else now
+        window_start = now - self.window_seconds
+
+        merged = LatencySketch(self.relative_accuracy)
+        for slice_start, sketch in list(self._slices):
+            if slice_start + self._slice_seconds > window_start:
+                merged.merge(sketch)
+        return merged
@@ -0,0 +1,190 @@
+"""
+Parsed operand caching for rule evaluation.
+
+Rule operands such as regex patterns, semantic versions, dates and geo points
+are literals that repeat across evaluations, so they are parsed once and the
+result is interned in a bounded cache keyed by the literal. The compiled and
+interpreted evaluation paths share one process-wide cache.
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, Optional, Pattern, Tuple
+
+import semver
+
+from backend.app.core.evaluation_cache import _freeze
+
+# Marks a literal not yet in the cache (None is a cached parse failure)
+_MISSING = object()
+
+
+class OperandCache:
+    """
+    Bounded cache of parsed operands, keyed by operand kind and literal.
+
+    Provides:
+    - Lock-free lookups; a lock is only taken to insert
+    - Negative caching, so invalid literals are not re-parsed
+    - FIFO eviction once max_size entries are held
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        """
+        Initialize operand cache.
+
+        Args:
+            max_size: Maximum number of parsed operands to keep
+        """
+        self.max_size = max_size
+        self._entries: Dict[Tuple[str, Any], Any] = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, literal: Any, parse: Callable[[Any], Any]) -> Any:
+        """
+        Get the parsed form of a literal, parsing it on first use.
+
+        Args:
+            kind: Operand kind, keeping e.g. regexes and versions of the same string apart
+            literal: The operand as written in the rule or user context
+            parse: Parser returning the parsed value, or None if the literal is invalid
+
+        Returns:
+            The parsed value, or None if the literal is invalid
+        """
+        try:
+            key = (kind, _freeze(literal))
+            value = self._entries.get(key, _MISSING)
+        except TypeError:
+            # Unhashable inside a frozen container, parse without caching
+            return parse(literal)
+
+        if value is not _MISSING:
+            self._hits += 1
+            return value
+
+        self._misses += 1
+        value = parse(literal)
+
+        with self._lock:
+            entries = self._entries
+            while len(entries) >= self.max_size > 0:
+                del entries[next(iter(entries))]
+            if self.max_size > 0:
+                entries[key] = value
+
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        total_requests = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total_requests if total_requests > 0 else 0.0,
+        }
+
+    def clear(self):
+        """Clear all cached operands and statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+_operand_cache = OperandCache()
+
+
+def get_operand_cache() -> OperandCache:
+    """Get the process-wide operand cache."""
+    return _operand_cache
+
+
+def _compile_pattern(pattern: Any) -> Optional[Pattern]:
+    try:
+        return re.compile(pattern)
+    except (re.error, TypeError):
+        return None
+
+
+# SemVer precedence key: (major, minor, patch, prerelease), where a release
+# sorts after its pre-releases and numeric identifiers before alphanumeric ones
+SemverKey = Tuple[int, int, int, Tuple]
+
+
+def _parse_semver_key(version: str) -> Optional[SemverKey]:
+    try:
+        # Leading 'v' is accepted (be lenient)
+        parsed = semver.Version.parse(version.lstrip('v'))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+    if not parsed.prerelease:
+        return parsed.major, parsed.minor, parsed.patch, (1,)
+
+    identifiers = tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in parsed.prerelease.split('.')
+    )
+    return parsed.major, parsed.minor, parsed.patch, (0, identifiers)
+
+
+def _parse_version_tuple(version: Any) -> Optional[Tuple[int, ...]]:
+    try:
+        parts = str(version).split('-')[0].split('+')[0].split('.')
+        return tuple(int(x) for x in parts[:3])
+    except (ValueError, TypeError):
+        return None
+
+
+def compile_regex(pattern: Any) -> Optional[Pattern]:
+    """
+    Get a compiled regex for a pattern.
+
+    Args:
+        pattern: Regular expression source
+
+    Returns:
+        Compiled pattern, or None if the pattern is invalid
+    """
+    return _operand_cache.get("regex", pattern, _compile_pattern)
+
+
+def parse_semver_key(version: str) -> Optional[SemverKey]:
+    """
+    Get the SemVer 2.0 precedence key of a version string.
+
+    Keys compare like the versions they came from, with build metadata
+    ignored, so comparisons are plain tuple comparisons.
+
+    Args:
+        version: Version string, optionally prefixed with 'v'
+
+    Returns:
+        Precedence key, or None if the string is not a valid semantic version
+    """
+    return _operand_cache.get("semver", version, _parse_semver_key)
+
+
+def parse_version_tuple(version: Any) -> Optional[Tuple[int, ...]]:
+    """
+    Get the numeric core of a version, ignoring pre-release and build.
+
+    Args:
+        version: Version string such as "1.2.3-beta"
+
+    Returns:
+        Tuple of up to three integers, or None if the core is not numeric
+    """
+    return _operand_cache.get("version_tuple", version, _parse_version_tuple)
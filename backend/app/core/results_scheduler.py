@@ -0,0 +1,90 @@
+"""
+Scheduler for experiment results materialization.
+
+This module provides scheduling functionality for incrementally folding new
+events into the experiment results rollup, so that results are read from
+precomputed statistics plus a short unprocessed tail.
+"""
+
+import asyncio
+from typing import Optional
+
+from backend.app.db.session import SessionLocal
+from backend.app.services.results_rollup_service import ResultsRollupService
+from backend.app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResultsScheduler:
+    """Handles scheduled tasks for experiment results materialization."""
+
+    def __init__(self, interval_minutes: int = 5):
+        """
+        Initialize the results scheduler.
+
+        Args:
+            interval_minutes: How often to refresh the results rollup (in minutes)
+        """
+        self.interval_minutes = interval_minutes
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the scheduler."""
+        if self.is_running:
+            logger.warning("Results scheduler is already running")
+            return
+
+        self.is_running = True
+        self.task = asyncio.create_task(self._run_scheduler())
+        logger.info(f"Results scheduler started with {self.interval_minutes} minute interval")
+
+    async def stop(self):
+        """Stop the scheduler."""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        logger.info("Results scheduler stopped")
+
+    async def _run_scheduler(self):
+        """Run the scheduler loop."""
+        while self.is_running:
+            try:
+                # Fold new events into the rollup
+                await self.refresh_results()
+
+                # Wait for the next interval
+                await asyncio.sleep(self.interval_minutes * 60)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in results scheduler: {str(e)}")
+                # Wait a bit before trying again
+                await asyncio.sleep(60)
+
+    async def refresh_results(self):
+        """Advance the results rollup of every active experiment."""
+        logger.info("Refreshing experiment results rollup")
+
+        # Use a new database session for this task
+        db = SessionLocal()
+        try:
+            rows = ResultsRollupService(db).refresh_active_experiments()
+            logger.info(f"Results rollup refreshed, {rows} daily statistics rows updated")
+        except Exception as e:
+            logger.error(f"Error refreshing experiment results rollup: {str(e)}")
+        finally:
+            db.close()
+
+
+# Create a singleton instance of the scheduler
+results_scheduler = ResultsScheduler()
@@ -6,27 +6,57 @@ This module provides compilation and validation of targeting rules, including:
 - Operator-value compatibility checking
 - Redundancy and contradiction detection
 - Metadata extraction
+- Compilation into executable closure trees
 - Compilation result caching
 """
 
 import hashlib
 import json
 import logging
-from typing import Dict, Any, List, Set, Optional
+import threading
+import weakref
+from operator import eq, ge, gt, le, lt
+from typing import Dict, Any, List, Set, FrozenSet, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from collections import OrderedDict
 
 from backend.app.schemas.targeting_rule import (
     TargetingRule,
+    TargetingRules,
     RuleGroup,
     Condition,
     OperatorType,
     LogicalOperator
 )
+from backend.app.core.evaluation_cache import _freeze
+from backend.app.core.operand_cache import SemverKey, compile_regex, parse_semver_key
+from backend.app.core.rules_engine import (
+    STABLE_ID_FIELDS,
+    UserContext,
+    apply_operator,
+    should_include_in_rollout,
+    _extract_coordinates_operand,
+    _parse_datetime,
+    _parse_datetime_operand,
+)
 
 logger = logging.getLogger(__name__)
 
+# Compiled predicate over a whole user context
+ContextPredicate = Callable[[UserContext], bool]
+
+# Compiled test of a single attribute value
+ValuePredicate = Callable[[Any], bool]
+
+# Builds a ValuePredicate for a condition, pre-parsing its operands once
+OperatorCompiler = Callable[[Condition], ValuePredicate]
+
+# Sentinel for attributes missing from the user context
+_MISSING = object()
+
+_STABLE_ID_FIELD_SET = frozenset(STABLE_ID_FIELDS)
+
 
 class RuleValidationError(Exception):
     """Raised when rule validation fails."""
@@ -57,6 +87,69 @@ class CompiledRule:
     # Original rule for reference
     original_rule: Optional[TargetingRule] = None
 
+    # Executable closure tree for the rule's conditions (None if it could not be built)
+    evaluator: Optional[ContextPredicate] = None
+
+    def matches(self, user_context: UserContext) -> bool:
+        """Run the compiled conditions against a user context."""
+        return self.evaluator(user_context)
+
+
+@dataclass
+class CompiledRuleSet:
+    """
+    Executable form of a TargetingRules configuration.
+
+    Rules are pre-sorted by priority and rules with a 0% rollout are dropped,
+    so evaluation is a straight walk over pre-built closures.
+    """
+
+    rules: List[Tuple[TargetingRule, CompiledRule]] = field(default_factory=list)
+    default_rule: Optional[TargetingRule] = None
+
+    # Context attributes read by the conditions of any rule in the set
+    required_attributes: FrozenSet[str] = frozenset()
+
+    # Whether any rule has a partial rollout, making results depend on the user's stable id
+    uses_rollout: bool = False
+
+    # Digest of the rule contents, for namespacing cached results of this configuration
+    fingerprint: str = ""
+
+    def key_attributes(self, user_context: UserContext) -> Optional[FrozenSet[str]]:
+        """
+        Get the context attributes that determine this rule set's result for a user.
+
+        Args:
+            user_context: Dictionary containing user attributes
+
+        Returns:
+            Attribute names, or None if the result may depend on the whole context
+        """
+        if not self.uses_rollout:
+            return self.required_attributes
+
+        # Without a stable id field, rollout bucketing hashes the whole context
+        if not any(user_context.get(name) for name in STABLE_ID_FIELDS):
+            return None
+
+        return self.required_attributes | _STABLE_ID_FIELD_SET
+
+    def evaluate(self, user_context: UserContext) -> Optional[TargetingRule]:
+        """
+        Return the first matching rule included in its rollout, else the default rule.
+
+        Args:
+            user_context: Dictionary containing user attributes
+
+        Returns:
+            The matched targeting rule, or the default rule if none match
+        """
+        for rule, compiled in self.rules:
+            if compiled.evaluator(user_context) and should_include_in_rollout(rule, user_context):
+                return rule
+        return self.default_rule
+
 
 class RuleCompiler:
     """
@@ -66,35 +159,77 @@ class RuleCompiler:
     - Rule validation
     - Metadata extraction
     - Optimization hints
+    - Executable closure trees with pre-parsed operands
     - LRU caching of compiled rules
+
+    A compiler may be shared between threads; the compilation cache is
+    guarded by a lock.
     """
 
-    def __init__(self, max_depth: int = 50, cache_max_size: int = 1000):
+    def __init__(
+        self,
+        max_depth: int = 50,
+        cache_max_size: int = 1000,
+        operator_compilers: Optional[Dict[OperatorType, OperatorCompiler]] = None
+    ):
         """
         Initialize rule compiler.
 
         Args:
             max_depth: Maximum allowed rule nesting depth
             cache_max_size: Maximum number of compiled rules to cache
+            operator_compilers: Per-operator overrides of the default condition
+                compilers, for callers with their own operator semantics
         """
         self.max_depth = max_depth
         self.cache_max_size = cache_max_size
 
+        self._operator_compilers: Dict[OperatorType, OperatorCompiler] = dict(DEFAULT_OPERATOR_COMPILERS)
+        if operator_compilers:
+            self._operator_compilers.update(operator_compilers)
+
         # LRU cache for compiled rules
         self._cache: OrderedDict[str, CompiledRule] = OrderedDict()
         self._cache_hits = 0
         self._cache_misses = 0
+        self._lock = threading.RLock()
+
+        # Compiled rule sets by id() of live TargetingRules objects
+        self._rule_set_memo: Dict[int, Tuple[weakref.ref, CompiledRuleSet]] = {}
 
     @property
     def cache_hits(self) -> int:
         """Get number of cache hits."""
         return self._cache_hits
 
+    @property
+    def cache_misses(self) -> int:
+        """Get number of cache misses."""
+        return self._cache_misses
+
     @property
     def cache_size(self) -> int:
         """Get current cache size."""
         return len(self._cache)
 
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get compilation cache statistics.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            total_requests = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.cache_max_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / total_requests if total_requests > 0 else 0.0,
+                "memoized_rule_sets": len(self._rule_set_memo),
+            }
+
     def compile(self, rule: TargetingRule, force_recompile: bool = False) -> CompiledRule:
         """
         Compile and validate a targeting rule.
@@ -111,32 +246,120 @@ class RuleCompiler:
         cache_key = f"{rule.id}:{rule_hash}"
 
         # Check cache
-        if not force_recompile and cache_key in self._cache:
-            self._cache_hits += 1
-            # Move to end (mark as recently used)
+        with self._lock:
+            compiled = None if force_recompile else self._cache.get(cache_key)
+            if compiled is not None:
+                self._cache_hits += 1
+                # Move to end (mark as recently used)
+                self._cache.move_to_end(cache_key)
+                return compiled
+            self._cache_misses += 1
+
+        # Compile rule outside the lock; a concurrent compile of the same rule is harmless
+        compiled = self._compile_rule(rule, rule_hash)
+
+        with self._lock:
+            # Add to cache
+            self._cache[cache_key] = compiled
             self._cache.move_to_end(cache_key)
-            return self._cache[cache_key]
 
-        self._cache_misses += 1
+            # Evict oldest if cache too large
+            while len(self._cache) > self.cache_max_size:
+                self._cache.popitem(last=False)
 
-        # Compile rule
-        compiled = self._compile_rule(rule, rule_hash)
+        return compiled
 
-        # Add to cache
-        self._cache[cache_key] = compiled
-        self._cache.move_to_end(cache_key)
+    def compile_rule_set(
+        self,
+        targeting_rules: TargetingRules,
+        force_recompile: bool = False
+    ) -> CompiledRuleSet:
+        """
+        Compile a full targeting rules configuration into an executable rule set.
 
-        # Evict oldest if cache too large
-        if len(self._cache) > self.cache_max_size:
-            self._cache.popitem(last=False)
+        Each rule goes through the compilation cache, so unchanged rules are
+        not rebuilt. The compiled set is also memoized by object identity for
+        as long as the TargetingRules object is alive, so re-evaluating the same
+        object skips rule hashing entirely; pass force_recompile after mutating
+        a TargetingRules object in place.
 
-        return compiled
+        Args:
+            targeting_rules: The targeting rules configuration
+            force_recompile: Ignore the identity memo and per-rule cache
+
+        Returns:
+            Compiled rule set, ready to evaluate
+
+        Raises:
+            RuleValidationError: If a rule could not be compiled into an evaluator
+        """
+        memo_key = id(targeting_rules)
+        if not force_recompile:
+            memoized = self._rule_set_memo.get(memo_key)
+            if memoized is not None and memoized[0]() is targeting_rules:
+                return memoized[1]
+
+        compiled_rule_set = self._compile_rule_set(targeting_rules, force_recompile)
+
+        memo = self._rule_set_memo
+        memo[memo_key] = (
+            weakref.ref(targeting_rules, lambda _, key=memo_key: memo.pop(key, None)),
+            compiled_rule_set
+        )
+        return compiled_rule_set
+
+    def _compile_rule_set(self, targeting_rules: TargetingRules, force_recompile: bool) -> CompiledRuleSet:
+        """Compile each rule of a configuration and assemble the rule set."""
+        compiled_rules = []
+        required_attributes: Set[str] = set()
+        uses_rollout = False
+        fingerprint = hashlib.md5()
+
+        for rule in sorted(targeting_rules.rules, key=lambda r: r.priority):
+            if rule.rollout_percentage == 0:
+                continue
+
+            compiled = self.compile(rule, force_recompile=force_recompile)
+            if compiled.evaluator is None:
+                raise RuleValidationError(
+                    f"Rule {rule.id} could not be compiled: {compiled.validation_errors}"
+                )
+            compiled_rules.append((rule, compiled))
+            required_attributes.update(compiled.required_attributes)
+            uses_rollout = uses_rollout or rule.rollout_percentage < 100
+            fingerprint.update(compiled.rule_hash.encode())
+
+        if targeting_rules.default_rule is not None:
+            fingerprint.update(f"default:{targeting_rules.default_rule.id}".encode())
+
+        return CompiledRuleSet(
+            rules=compiled_rules,
+            default_rule=targeting_rules.default_rule,
+            required_attributes=frozenset(required_attributes),
+            uses_rollout=uses_rollout,
+            fingerprint=fingerprint.hexdigest()
+        )
+
+    def compile_condition(self, condition: Condition) -> ValuePredicate:
+        """
+        Compile a condition into a test of a single attribute value.
+
+        Args:
+            condition: The condition to compile
+
+        Returns:
+            Predicate over the attribute's value (the attribute must be present)
+        """
+        compile_operator = self._operator_compilers.get(condition.operator, _compile_with_apply_operator)
+        return compile_operator(condition)
 
     def clear_cache(self):
         """Clear the compilation cache."""
-        self._cache.clear()
-        self._cache_hits = 0
-        self._cache_misses = 0
+        with self._lock:
+            self._cache.clear()
+            self._rule_set_memo.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
 
     def _hash_rule(self, rule: TargetingRule) -> str:
         """
@@ -169,11 +392,12 @@ class RuleCompiler:
 
     def _serialize_condition(self, condition: Condition) -> Dict[str, Any]:
         """Serialize condition for hashing."""
+        # Values are type-tagged, so e.g. 5 and "5" compile to different evaluators
         return {
             "attribute": condition.attribute,
             "operator": condition.operator.value,
-            "value": str(condition.value),  # Convert to string for consistent hashing
-            "additional_value": str(condition.additional_value) if condition.additional_value else None
+            "value": repr(_freeze(condition.value)),
+            "additional_value": repr(_freeze(condition.additional_value))
         }
 
     def _compile_rule(self, rule: TargetingRule, rule_hash: str) -> CompiledRule:
@@ -206,8 +430,96 @@ class RuleCompiler:
         # Check for contradictions
         self._check_contradictions(rule.rule, compiled)
 
+        # Build the executable closure tree (metadata is incomplete past the depth limit)
+        if compiled.max_depth > self.max_depth:
+            return compiled
+
+        try:
+            compiled.evaluator = self._build_group(rule.rule)
+        except Exception as e:
+            compiled.is_valid = False
+            compiled.validation_errors.append(f"Code generation error: {str(e)}")
+            logger.error(f"Error building evaluator for rule {rule.id}: {e}")
+
         return compiled
 
+    def _build_group(self, group: RuleGroup) -> ContextPredicate:
+        """
+        Build a short-circuiting predicate for a rule group.
+
+        Args:
+            group: The rule group to build
+
+        Returns:
+            Predicate over a user context
+        """
+        children = [self._build_condition(c) for c in group.conditions]
+        children.extend(self._build_group(g) for g in (group.groups or []))
+
+        # A group with no conditions or groups always matches
+        if not children:
+            return _always_true
+
+        operator = group.operator
+
+        if operator == LogicalOperator.AND:
+            if len(children) == 1:
+                return children[0]
+
+            def evaluate_and(user_context: UserContext) -> bool:
+                for child in children:
+                    if not child(user_context):
+                        return False
+                return True
+
+            return evaluate_and
+
+        if operator == LogicalOperator.OR:
+            if len(children) == 1:
+                return children[0]
+
+            def evaluate_or(user_context: UserContext) -> bool:
+                for child in children:
+                    if child(user_context):
+                        return True
+                return False
+
+            return evaluate_or
+
+        if operator == LogicalOperator.NOT:
+            # Multiple children are combined with AND before negation
+            def evaluate_not(user_context: UserContext) -> bool:
+                for child in children:
+                    if not child(user_context):
+                        return True
+                return False
+
+            return evaluate_not
+
+        logger.warning(f"Unknown logical operator: {operator}")
+        return _always_false
+
+    def _build_condition(self, condition: Condition) -> ContextPredicate:
+        """
+        Build a predicate for a single condition.
+
+        Args:
+            condition: The condition to build
+
+        Returns:
+            Predicate over a user context; False when the attribute is missing
+        """
+        test = self.compile_condition(condition)
+        attribute = condition.attribute
+
+        def evaluate_condition(user_context: UserContext) -> bool:
+            actual_value = user_context.get(attribute, _MISSING)
+            if actual_value is _MISSING:
+                return False
+            return test(actual_value)
+
+        return evaluate_condition
+
     def _analyze_rule_group(
         self,
         group: RuleGroup,
@@ -347,3 +659,306 @@ class RuleCompiler:
         # Recursively check nested groups
         for nested_group in (group.groups or []):
             self._check_contradictions(nested_group, compiled)
+
+
+def _always_true(_: Any) -> bool:
+    return True
+
+
+def _always_false(_: Any) -> bool:
+    return False
+
+
+def bind_operator(
+    apply: Callable[[OperatorType, Any, Any, Optional[Any]], bool]
+) -> OperatorCompiler:
+    """
+    Create an operator compiler that delegates to an apply_operator-style function.
+
+    Used for operators without a specialized compiler; the condition's operands
+    are bound once, but the operator itself is interpreted per evaluation.
+
+    Args:
+        apply: Function taking (operator, actual_value, expected_value, additional_value)
+
+    Returns:
+        Operator compiler
+    """
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        operator = condition.operator
+        expected_value = condition.value
+        additional_value = condition.additional_value
+
+        def test(actual_value: Any) -> bool:
+            return apply(operator, actual_value, expected_value, additional_value)
+
+        return test
+
+    return compile_condition
+
+
+_compile_with_apply_operator = bind_operator(apply_operator)
+
+
+def _is_numeric_like(value: Any) -> bool:
+    """Match the numeric detection used by the BETWEEN operator in the rules engine."""
+    return isinstance(value, (int, float)) or (
+        isinstance(value, str) and value.replace('.', '', 1).isdigit()
+    )
+
+
+def _compile_equals(condition: Condition) -> ValuePredicate:
+    expected_value = condition.value
+    return lambda actual_value: actual_value == expected_value
+
+
+def _compile_not_equals(condition: Condition) -> ValuePredicate:
+    expected_value = condition.value
+    return lambda actual_value: actual_value != expected_value
+
+
+def _compile_membership(negate: bool) -> OperatorCompiler:
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        expected_value = condition.value
+        if not isinstance(expected_value, (list, tuple, set)):
+            logger.warning(
+                f"Expected value for {condition.operator.value} operator should be a collection, "
+                f"got {type(expected_value)}"
+            )
+            return _always_false
+
+        members = tuple(expected_value)
+        try:
+            member_set = frozenset(members)
+        except TypeError:
+            # Unhashable members, fall back to linear scans
+            member_set = None
+
+        def test(actual_value: Any) -> bool:
+            if actual_value is None:
+                return False
+            if member_set is not None:
+                try:
+                    return (actual_value in member_set) != negate
+                except TypeError:
+                    pass  # Unhashable actual value
+            return (actual_value in members) != negate
+
+        return test
+
+    return compile_condition
+
+
+def _compile_string(match: Callable[[str, str], bool]) -> OperatorCompiler:
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        expected_value = condition.value
+        if not isinstance(expected_value, str):
+            expected_value = str(expected_value)
+
+        def test(actual_value: Any) -> bool:
+            if actual_value is None:
+                return False
+            if not isinstance(actual_value, str):
+                actual_value = str(actual_value)
+            return match(actual_value, expected_value)
+
+        return test
+
+    return compile_condition
+
+
+def _compile_regex(condition: Condition) -> ValuePredicate:
+    pattern = compile_regex(condition.value)
+    if pattern is None:
+        logger.warning(f"Invalid regex pattern: {condition.value}")
+        return _always_false
+
+    search = pattern.search
+
+    def test(actual_value: Any) -> bool:
+        if actual_value is None:
+            return False
+        if not isinstance(actual_value, str):
+            actual_value = str(actual_value)
+        return search(actual_value) is not None
+
+    return test
+
+
+def _compile_numeric(compare: Callable[[float, float], bool]) -> OperatorCompiler:
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        try:
+            threshold = float(condition.value)
+        except (ValueError, TypeError):
+            logger.warning(f"Non-numeric value for {condition.operator.value} operator: {condition.value}")
+            return _always_false
+
+        def test(actual_value: Any) -> bool:
+            if actual_value is None:
+                return False
+            try:
+                return compare(float(actual_value), threshold)
+            except (ValueError, TypeError):
+                logger.warning(f"Failed to compare {actual_value} with {threshold}")
+                return False
+
+        return test
+
+    return compile_condition
+
+
+def _compile_date(compare: Callable[[datetime, datetime], bool]) -> OperatorCompiler:
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        expected_date = _parse_datetime_operand(condition.value)
+        if expected_date is None:
+            logger.warning(f"Unsupported date format for expected value: {condition.value}")
+            return _always_false
+
+        def test(actual_value: Any) -> bool:
+            actual_date = _parse_datetime(actual_value)
+            if actual_date is None:
+                return False
+            try:
+                return compare(actual_date, expected_date)
+            except TypeError:
+                # Naive and aware datetimes cannot be compared
+                logger.warning(f"Failed to compare dates: {actual_value} and {condition.value}")
+                return False
+
+        return test
+
+    return compile_condition
+
+
+def _compile_between(condition: Condition) -> ValuePredicate:
+    lower_value = condition.value
+    upper_value = condition.additional_value
+    if upper_value is None:
+        logger.warning("BETWEEN operator requires additional_value")
+        return _always_false
+
+    numeric_bounds = None
+    if _is_numeric_like(lower_value) and _is_numeric_like(upper_value):
+        try:
+            numeric_bounds = (float(lower_value), float(upper_value))
+        except ValueError:
+            pass
+
+    lower_date = _parse_datetime_operand(lower_value)
+    upper_date = _parse_datetime_operand(upper_value)
+
+    def test(actual_value: Any) -> bool:
+        if actual_value is None:
+            return False
+
+        if numeric_bounds is not None and _is_numeric_like(actual_value):
+            try:
+                return numeric_bounds[0] <= float(actual_value) <= numeric_bounds[1]
+            except ValueError:
+                return False
+
+        if lower_date is None or upper_date is None:
+            return False
+        actual_date = _parse_datetime(actual_value)
+        if actual_date is None:
+            return False
+        try:
+            return lower_date <= actual_date <= upper_date
+        except TypeError:
+            return False
+
+    return test
+
+
+def _compile_contains_collection(require_all: bool) -> OperatorCompiler:
+    def compile_condition(condition: Condition) -> ValuePredicate:
+        expected_value = condition.value
+        if not isinstance(expected_value, (list, tuple, set)):
+            logger.warning(
+                f"Expected value for {condition.operator.value} should be a collection, "
+                f"got {type(expected_value)}"
+            )
+            return _always_false
+
+        items = tuple(expected_value)
+        combine = all if require_all else any
+
+        def test(actual_value: Any) -> bool:
+            if not isinstance(actual_value, (list, tuple, set, str)):
+                return False
+            return combine(item in actual_value for item in items)
+
+        return test
+
+    return compile_condition
+
+
+# Precedence keys exclude build metadata, which SemVer 2.0 ignores
+_SEMVER_COMPARATORS: Dict[str, Callable[[SemverKey, SemverKey], bool]] = {
+    "eq": eq,
+    "gt": gt,
+    "gte": ge,
+    "lt": lt,
+    "lte": le,
+}
+
+
+def _compile_semantic_version(condition: Condition) -> ValuePredicate:
+    expected_value = condition.value
+    if not isinstance(expected_value, str):
+        return _always_false
+
+    expected_version = parse_semver_key(expected_value)
+    if expected_version is None:
+        logger.warning(f"Invalid semantic version format: {expected_value}")
+        return _always_false
+
+    comparison_type = condition.additional_value if condition.additional_value else "eq"
+    compare = _SEMVER_COMPARATORS.get(comparison_type)
+    if compare is None:
+        logger.warning(f"Unknown semantic version comparison type: {comparison_type}")
+        return _always_false
+
+    def test(actual_value: Any) -> bool:
+        if not isinstance(actual_value, str):
+            return False
+        # Client versions repeat heavily, so parsed actual values are cached too
+        actual_version = parse_semver_key(actual_value)
+        if actual_version is None:
+            return False
+        return compare(actual_version, expected_version)
+
+    return test
+
+
+def _compile_geo_distance(condition: Condition) -> ValuePredicate:
+    # Distance checks stay in apply_operator; parsing the target point here
+    # puts it in the operand cache before the first evaluation
+    _extract_coordinates_operand(condition.value)
+    return _compile_with_apply_operator(condition)
+
+
+# Specialized compilers, matching the semantics of rules_engine.apply_operator.
+# Operators not listed here fall back to apply_operator with pre-bound operands.
+DEFAULT_OPERATOR_COMPILERS: Dict[OperatorType, OperatorCompiler] = {
+    OperatorType.EQUALS: _compile_equals,
+    OperatorType.NOT_EQUALS: _compile_not_equals,
+    OperatorType.IN: _compile_membership(negate=False),
+    OperatorType.NOT_IN: _compile_membership(negate=True),
+    OperatorType.CONTAINS: _compile_string(lambda actual, expected: expected in actual),
+    OperatorType.NOT_CONTAINS: _compile_string(lambda actual, expected: expected not in actual),
+    OperatorType.STARTS_WITH: _compile_string(str.startswith),
+    OperatorType.ENDS_WITH: _compile_string(str.endswith),
+    OperatorType.MATCH_REGEX: _compile_regex,
+    OperatorType.GREATER_THAN: _compile_numeric(gt),
+    OperatorType.GREATER_THAN_OR_EQUAL: _compile_numeric(ge),
+    OperatorType.LESS_THAN: _compile_numeric(lt),
+    OperatorType.LESS_THAN_OR_EQUAL: _compile_numeric(le),
+    OperatorType.BEFORE: _compile_date(lt),
+    OperatorType.AFTER: _compile_date(gt),
+    OperatorType.BETWEEN: _compile_between,
+    OperatorType.CONTAINS_ALL: _compile_contains_collection(require_all=True),
+    OperatorType.CONTAINS_ANY: _compile_contains_collection(require_all=False),
+    OperatorType.SEMANTIC_VERSION: _compile_semantic_version,
+    OperatorType.GEO_DISTANCE: _compile_geo_distance,
+}
@@ -4,19 +4,19 @@ Rules engine for evaluating targeting rules.
 This module provides functions for evaluating targeting rules against user contexts.
 """
 
-import re
 import logging
 import hashlib
 import math
 from typing import Dict, Any, List, Optional, Union, Callable
 from datetime import datetime, time as datetime_time
-import semver
 try:
     import pytz
     HAS_PYTZ = True
 except ImportError:
     HAS_PYTZ = False
 
+from backend.app.core.bucketing import bucket
+from backend.app.core.operand_cache import compile_regex, get_operand_cache, parse_semver_key
 from backend.app.schemas.targeting_rule import (
     LogicalOperator,
     OperatorType,
@@ -31,6 +31,9 @@ logger = logging.getLogger(__name__)
 # Type alias for user context
 UserContext = Dict[str, Any]
 
+# Context fields tried, in order, to find a stable identifier for rollout bucketing
+STABLE_ID_FIELDS = ('user_id', 'id', 'email', 'username', 'device_id', 'client_id', 'session_id')
+
 
 def evaluate_targeting_rules(targeting_rules: TargetingRules, user_context: UserContext) -> Optional[TargetingRule]:
     """
@@ -229,12 +232,11 @@ def apply_operator(
     elif operator == OperatorType.MATCH_REGEX:
         if not isinstance(actual_value, str):
             actual_value = str(actual_value)
-        try:
-            pattern = re.compile(expected_value)
-            return bool(pattern.search(actual_value))
-        except (re.error, TypeError):
+        pattern = compile_regex(expected_value)
+        if pattern is None:
             logger.warning(f"Invalid regex pattern: {expected_value}")
             return False
+        return pattern.search(actual_value) is not None
 
     # Numeric comparison operators
     elif operator == OperatorType.GREATER_THAN:
@@ -276,13 +278,8 @@ def apply_operator(
                 logger.warning(f"Unsupported date format for actual value: {actual_value}")
                 return False
 
-            if isinstance(expected_value, str):
-                expected_date = datetime.fromisoformat(expected_value.replace('Z', '+00:00'))
-            elif isinstance(expected_value, (int, float)):
-                expected_date = datetime.fromtimestamp(expected_value)
-            elif isinstance(expected_value, datetime):
-                expected_date = expected_value
-            else:
+            expected_date = _parse_datetime_operand(expected_value)
+            if expected_date is None:
                 logger.warning(f"Unsupported date format for expected value: {expected_value}")
                 return False
 
@@ -322,23 +319,13 @@ def apply_operator(
                 logger.warning(f"Unsupported format for BETWEEN operator: {actual_value}")
                 return False
 
-            if isinstance(expected_value, datetime):
-                lower_date = expected_value
-            elif isinstance(expected_value, str):
-                lower_date = datetime.fromisoformat(expected_value.replace('Z', '+00:00'))
-            elif isinstance(expected_value, (int, float)):
-                lower_date = datetime.fromtimestamp(expected_value)
-            else:
+            lower_date = _parse_datetime_operand(expected_value)
+            if lower_date is None:
                 logger.warning(f"Unsupported format for BETWEEN lower bound: {expected_value}")
                 return False
 
-            if isinstance(additional_value, datetime):
-                upper_date = additional_value
-            elif isinstance(additional_value, str):
-                upper_date = datetime.fromisoformat(additional_value.replace('Z', '+00:00'))
-            elif isinstance(additional_value, (int, float)):
-                upper_date = datetime.fromtimestamp(additional_value)
-            else:
+            upper_date = _parse_datetime_operand(additional_value)
+            if upper_date is None:
                 logger.warning(f"Unsupported format for BETWEEN upper bound: {additional_value}")
                 return False
 
@@ -387,29 +374,20 @@ def apply_operator(
                 logger.warning(f"Semantic version requires string values, got {type(actual_value)} and {type(expected_value)}")
                 return False
 
-            # Remove leading 'v' if present (be lenient)
-            actual_clean = actual_value.lstrip('v')
-            expected_clean = expected_value.lstrip('v')
-
-            # Validate format
-            try:
-                actual_ver = semver.Version.parse(actual_clean)
-                expected_ver = semver.Version.parse(expected_clean)
-            except ValueError as e:
-                logger.warning(f"Invalid semantic version format: {e}")
+            # Parsed versions are cached; a leading 'v' is accepted (be lenient)
+            actual_ver = parse_semver_key(actual_value)
+            expected_ver = parse_semver_key(expected_value)
+            if actual_ver is None or expected_ver is None:
+                logger.warning(f"Invalid semantic version format: {actual_value} or {expected_value}")
                 return False
 
             # Determine comparison type from additional_value
             comparison_type = additional_value if additional_value else "eq"
 
             # According to SemVer 2.0 spec, build metadata should be ignored when determining version precedence
-            # We compare major, minor, patch, and prerelease, but not build
+            # The precedence keys hold major, minor, patch, and prerelease, but not build
             if comparison_type == "eq":
-                # For equality, we ignore build metadata per SemVer spec
-                return (actual_ver.major == expected_ver.major and
-                        actual_ver.minor == expected_ver.minor and
-                        actual_ver.patch == expected_ver.patch and
-                        actual_ver.prerelease == expected_ver.prerelease)
+                return actual_ver == expected_ver
             elif comparison_type == "gt":
                 return actual_ver > expected_ver
             elif comparison_type == "gte":
@@ -512,7 +490,7 @@ def apply_operator(
                 return False
 
             # Extract coordinates from expected_value
-            expected_coords = _extract_coordinates(expected_value)
+            expected_coords = _extract_coordinates_operand(expected_value)
             if not expected_coords:
                 logger.debug(f"Failed to extract coordinates from expected value: {expected_value}")
                 return False
@@ -773,6 +751,21 @@ def _parse_datetime(value: Any) -> Optional[datetime]:
         return None
 
 
+def _parse_datetime_operand(value: Any) -> Optional[datetime]:
+    """
+    Parse a rule operand into a datetime, caching the result by literal.
+
+    Args:
+        value: ISO format string, Unix timestamp or datetime
+
+    Returns:
+        datetime object or None if parsing fails
+    """
+    if isinstance(value, datetime) or value is None:
+        return value
+    return get_operand_cache().get("datetime", value, _parse_datetime)
+
+
 def _parse_time(value: str) -> Optional[datetime_time]:
     """
     Parse time string in HH:MM format.
@@ -879,6 +872,21 @@ def _extract_coordinates(value: Any) -> Optional[Dict[str, float]]:
         return None
 
 
+def _extract_coordinates_operand(value: Any) -> Optional[Dict[str, float]]:
+    """
+    Extract coordinates from a rule operand, caching the result by literal.
+
+    The returned dictionary is shared and must not be modified.
+
+    Args:
+        value: The value to extract coordinates from
+
+    Returns:
+        Dictionary with 'lat' and 'lon' keys, or None if extraction fails
+    """
+    return get_operand_cache().get("geo_point", value, _extract_coordinates)
+
+
 def _validate_coordinates(coords: Dict[str, float]) -> bool:
     """
     Validate that coordinates are within valid ranges.
@@ -987,15 +995,9 @@ def should_include_in_rollout(rule: TargetingRule, user_context: UserContext) ->
     # Get a unique, stable identifier for the user
     user_id = get_stable_user_id(user_context)
 
-    # Create a hash of the user ID and rule ID for deterministic bucketing
-    hash_input = f"{user_id}:{rule.id}"
-    hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-
-    # Calculate the bucket (0-99)
-    bucket = hash_value % 100
-
-    # User is included if their bucket is less than the rollout percentage
-    return bucket < rollout_percentage
+    # Bucket (0-99) from the hash of the user ID and rule ID; the user is
+    # included if their bucket is less than the rollout percentage
+    return bucket(user_id, salt=rule.id) < rollout_percentage
 
 
 def get_stable_user_id(user_context: UserContext) -> str:
@@ -1009,7 +1011,7 @@ def get_stable_user_id(user_context: UserContext) -> str:
         A string identifier for the user
     """
     # Try common user identifier fields
-    for field in ['user_id', 'id', 'email', 'username', 'device_id', 'client_id', 'session_id']:
+    for field in STABLE_ID_FIELDS:
         if field in user_context and user_context[field]:
             return str(user_context[field])
 
@@ -0,0 +1,319 @@
+"""
+Sequential testing with always-valid p-values and confidence sequences.
+
+Results are computed from running sufficient statistics (count, sum and sum
+of squares) per variant, so each update is O(1) and evaluation does not
+depend on sample size. Tests use the mixture sequential probability ratio
+test (mSPRT) with a normal mixing distribution over the effect: for an
+estimate with variance V and mixing variance tau^2 the likelihood ratio is
+
+    sqrt(V / (V + tau^2)) * exp(estimate^2 * tau^2 / (2 * V * (V + tau^2)))
+
+Its reciprocal is a p-value that stays valid however often it is looked at,
+and inverting it gives a confidence sequence that holds uniformly over time.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+# Default false positive rate
+DEFAULT_ALPHA = 0.05
+
+# Default standard deviation of the mixing distribution, in units of the
+# per-observation standard deviation (a standardized effect size)
+DEFAULT_MIXING_EFFECT_SIZE = 0.1
+
+
+@dataclass
+class SufficientStats:
+    """Count, sum and sum of squares of observed values, enough for means and variances."""
+
+    count: int = 0
+    sum_value: float = 0.0
+    sum_squares: float = 0.0
+
+    def add(self, count: int, sum_value: float, sum_squares: float):
+        """Fold in the statistics of more observations."""
+        self.count += count
+        self.sum_value += sum_value
+        self.sum_squares += sum_squares
+
+    @property
+    def mean(self) -> float:
+        """Mean observed value."""
+        return self.sum_value / self.count if self.count > 0 else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of observed values."""
+        if self.count < 2:
+            return 0.0
+        return max(0.0, (self.sum_squares - self.sum_value * self.mean) / (self.count - 1))
+
+    @classmethod
+    def from_proportion(cls, trials: int, successes: int) -> "SufficientStats":
+        """Statistics of 0/1 outcomes, e.g. users and conversions."""
+        successes = min(successes, trials)
+        return cls(trials, float(successes), float(successes))
+
+
+@dataclass
+class SequentialResult:
+    """Always-valid inference for one estimate."""
+
+    estimate: float
+    p_value: float
+    confidence_interval: Tuple[float, float]
+    is_significant: bool
+
+
+def mixture_likelihood_ratio(estimate: float, variance: float, tau_squared: float) -> float:
+    """
+    Get the normal-mixture likelihood ratio against a zero effect.
+
+    Args:
+        estimate: Observed effect
+        variance: Variance of the estimate
+        tau_squared: Variance of the mixing distribution
+
+    Returns:
+        Likelihood ratio (1.0 when there is no information yet)
+    """
+    if variance <= 0 or tau_squared <= 0:
+        return 1.0
+
+    total = variance + tau_squared
+    log_ratio = 0.5 * math.log(variance / total) + (
+        estimate * estimate * tau_squared / (2 * variance * total)
+    )
+    # Beyond ~1e300 the p-value is 0 anyway
+    return math.exp(min(log_ratio, 690.0))
+
+
+def confidence_radius(variance: float, tau_squared: float, alpha: float) -> float:
+    """
+    Get the half-width of the always-valid confidence interval.
+
+    Args:
+        variance: Variance of the estimate
+        tau_squared: Variance of the mixing distribution
+        alpha: False positive rate
+
+    Returns:
+        Half-width, infinite when there is no information yet
+    """
+    if variance <= 0 or tau_squared <= 0:
+        return math.inf
+
+    total = variance + tau_squared
+    return math.sqrt(
+        2 * variance * total / tau_squared
+        * (math.log(1 / alpha) + 0.5 * math.log(total / variance))
+    )
+
+
+def _pooled_variance(*samples: SufficientStats) -> float:
+    """Per-observation variance pooled over samples."""
+    degrees = sum(s.count - 1 for s in samples if s.count > 1)
+    if degrees <= 0:
+        return 0.0
+    return sum(s.variance * (s.count - 1) for s in samples if s.count > 1) / degrees
+
+
+def mean_test(
+    sample: SufficientStats,
+    alpha: float = DEFAULT_ALPHA,
+    mixing_effect_size: float = DEFAULT_MIXING_EFFECT_SIZE,
+) -> SequentialResult:
+    """
+    Get an always-valid confidence interval for the mean of one sample.
+
+    Args:
+        sample: Statistics of the sample
+        alpha: False positive rate
+        mixing_effect_size: Mixing standard deviation in per-observation standard deviations
+
+    Returns:
+        SequentialResult for the mean (the p-value tests a zero mean)
+    """
+    observation_variance = sample.variance
+    variance = observation_variance / sample.count if sample.count > 0 else 0.0
+    tau_squared = mixing_effect_size ** 2 * observation_variance
+
+    return _result(sample.mean, variance, tau_squared, alpha)
+
+
+def difference_test(
+    control: SufficientStats,
+    treatment: SufficientStats,
+    alpha: float = DEFAULT_ALPHA,
+    mixing_effect_size: float = DEFAULT_MIXING_EFFECT_SIZE,
+) -> SequentialResult:
+    """
+    Test the difference in means between treatment and control.
+
+    Args:
+        control: Statistics of the control sample
+        treatment: Statistics of the treatment sample
+        alpha: False positive rate
+        mixing_effect_size: Mixing standard deviation in per-observation standard deviations
+
+    Returns:
+        SequentialResult for treatment mean minus control mean
+    """
+    if control.count == 0 or treatment.count == 0:
+        return _result(treatment.mean - control.mean, 0.0, 0.0, alpha)
+
+    variance = control.variance / control.count + treatment.variance / treatment.count
+    tau_squared = mixing_effect_size ** 2 * _pooled_variance(control, treatment)
+
+    return _result(treatment.mean - control.mean, variance, tau_squared, alpha)
+
+
+def _result(estimate: float, variance: float, tau_squared: float, alpha: float) -> SequentialResult:
+    p_value = min(1.0, 1.0 / mixture_likelihood_ratio(estimate, variance, tau_squared))
+    radius = confidence_radius(variance, tau_squared, alpha)
+    return SequentialResult(
+        estimate=estimate,
+        p_value=p_value,
+        confidence_interval=(estimate - radius, estimate + radius),
+        is_significant=p_value < alpha,
+    )
+
+
+class SequentialTest:
+    """
+    Running always-valid comparison of variants against a control.
+
+    Keeps per-variant sufficient statistics, the running minimum p-value and
+    the running intersection of confidence intervals, so memory and the cost
+    of each update are independent of sample size. The state can be stored
+    with to_dict and restored with from_dict between batches.
+    """
+
+    def __init__(
+        self,
+        control_id: str,
+        alpha: float = DEFAULT_ALPHA,
+        mixing_effect_size: float = DEFAULT_MIXING_EFFECT_SIZE,
+    ):
+        """
+        Initialize sequential test.
+
+        Args:
+            control_id: ID of the control variant
+            alpha: False positive rate
+            mixing_effect_size: Mixing standard deviation in per-observation standard deviations
+        """
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1")
+        if mixing_effect_size <= 0:
+            raise ValueError("mixing_effect_size must be positive")
+
+        self.control_id = control_id
+        self.alpha = alpha
+        self.mixing_effect_size = mixing_effect_size
+        self.stats: Dict[str, SufficientStats] = {}
+        self._min_p_values: Dict[str, float] = {}
+        self._intervals: Dict[str, Tuple[float, float]] = {}
+
+    def update(self, variant_id: str, count: int, sum_value: float, sum_squares: float):
+        """
+        Fold a batch of observations for a variant into the running statistics.
+
+        Args:
+            variant_id: ID of the variant
+            count: Number of observations in the batch
+            sum_value: Sum of the observed values
+            sum_squares: Sum of the squared observed values
+        """
+        self.stats.setdefault(variant_id, SufficientStats()).add(count, sum_value, sum_squares)
+
+    def set_proportion(self, variant_id: str, trials: int, successes: int):
+        """
+        Bring a variant's 0/1 statistics up to cumulative totals.
+
+        Only the difference from the statistics already folded in is added,
+        so a stored test can be advanced with current counts in O(1).
+
+        Args:
+            variant_id: ID of the variant
+            trials: Cumulative number of trials, e.g. assigned users
+            successes: Cumulative number of successes, e.g. conversions
+        """
+        target = SufficientStats.from_proportion(trials, successes)
+        current = self.stats.get(variant_id, SufficientStats())
+        self.update(
+            variant_id,
+            target.count - current.count,
+            target.sum_value - current.sum_value,
+            target.sum_squares - current.sum_squares,
+        )
+
+    def evaluate(self) -> Dict[str, SequentialResult]:
+        """
+        Compare every variant with the control at the current sample sizes.
+
+        P-values only decrease and intervals only shrink across calls, which
+        keeps the results consistent for anyone checking repeatedly.
+
+        Returns:
+            Dictionary mapping treatment variant IDs to their results
+        """
+        control = self.stats.get(self.control_id, SufficientStats())
+        results = {}
+
+        for variant_id, treatment in self.stats.items():
+            if variant_id == self.control_id:
+                continue
+
+            current = difference_test(control, treatment, self.alpha, self.mixing_effect_size)
+
+            p_value = min(current.p_value, self._min_p_values.get(variant_id, 1.0))
+            lower, upper = current.confidence_interval
+            previous = self._intervals.get(variant_id)
+            if previous is not None:
+                # Disjoint intervals only happen under the alpha-probability failure; keep the new one
+                if max(lower, previous[0]) <= min(upper, previous[1]):
+                    lower, upper = max(lower, previous[0]), min(upper, previous[1])
+
+            self._min_p_values[variant_id] = p_value
+            self._intervals[variant_id] = (lower, upper)
+            results[variant_id] = SequentialResult(
+                estimate=current.estimate,
+                p_value=p_value,
+                confidence_interval=(lower, upper),
+                is_significant=p_value < self.alpha,
+            )
+
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the test state."""
+        return {
+            "control_id": self.control_id,
+            "alpha": self.alpha,
+            "mixing_effect_size": self.mixing_effect_size,
+            "stats": {
+                variant_id: [s.count, s.sum_value, s.sum_squares]
+                for variant_id, s in self.stats.items()
+            },
+            "min_p_values": dict(self._min_p_values),
+            # An unbounded interval carries no information and is not valid JSON
+            "intervals": {
+                k: list(v) for k, v in self._intervals.items() if not math.isinf(v[1] - v[0])
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SequentialTest":
+        """Restore a test from to_dict output."""
+        test = cls(data["control_id"], data["alpha"], data["mixing_effect_size"])
+        test.stats = {
+            variant_id: SufficientStats(int(count), float(sum_value), float(sum_squares))
+            for variant_id, (count, sum_value, sum_squares) in data["stats"].items()
+        }
+        test._min_p_values = {k: float(v) for k, v in data["min_p_values"].items()}
+        test._intervals = {k: (float(v[0]), float(v[1])) for k, v in data["intervals"].items()}
+        return test
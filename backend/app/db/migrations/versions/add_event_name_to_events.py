@@ -0,0 +1,45 @@
+"""Add event name to events
+
+Revision ID: 3f8c1d2b7a64
+Revises: 9d3b6f0e2a17
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '3f8c1d2b7a64'
+down_revision = '9d3b6f0e2a17'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+
+def upgrade() -> None:
+    # Metric results group conversions by event name; existing events are
+    # named after their type
+    op.add_column(
+        'events',
+        sa.Column('event_name', sa.String(100), nullable=True),
+        schema=schema
+    )
+    op.execute(f"UPDATE {schema}.events SET event_name = event_type")
+    op.alter_column('events', 'event_name', nullable=False, schema=schema)
+    op.create_index(
+        f'{schema}_event_experiment_name',
+        'events',
+        ['experiment_id', 'event_name'],
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        f'{schema}_event_experiment_name',
+        table_name='events',
+        schema=schema
+    )
+    op.drop_column('events', 'event_name', schema=schema)
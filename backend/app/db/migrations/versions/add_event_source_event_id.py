@@ -0,0 +1,45 @@
+"""Add the archived event ID to events for deduplicating bulk loads
+
+Revision ID: 4d7f2b9e6a18
+Revises: 8e4a1c7d2f95
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '4d7f2b9e6a18'
+down_revision = '8e4a1c7d2f95'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+
+def upgrade() -> None:
+    # Bulk loads insert with ON CONFLICT DO NOTHING on this key, so replaying
+    # an archive after a partial load does not duplicate events. Events
+    # loaded before this revision have no key and are not deduplicated.
+    op.add_column(
+        'events',
+        sa.Column('source_event_id', sa.String(255), nullable=True),
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_event_source_event_id',
+        'events',
+        ['source_event_id'],
+        unique=True,
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        f'{schema}_event_source_event_id',
+        table_name='events',
+        schema=schema
+    )
+    op.drop_column('events', 'source_event_id', schema=schema)
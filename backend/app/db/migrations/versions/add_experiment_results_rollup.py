@@ -0,0 +1,93 @@
+"""Add experiment results rollup tables
+
+Revision ID: 5c2e8a7f41d9
+Revises: 64e15548d39c
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '5c2e8a7f41d9'
+down_revision = '64e15548d39c'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+
+def upgrade() -> None:
+    # Create daily sufficient statistics table
+    op.create_table(
+        'experiment_daily_stats',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('experiment_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('variant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_name', sa.String(100), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('sum_value', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.Column('sum_squares', sa.Float(), nullable=False, server_default=sa.text('0')),
+        sa.ForeignKeyConstraint(['experiment_id'], [f'{schema}.experiments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['variant_id'], [f'{schema}.variants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_experiment_daily_stats_unique',
+        'experiment_daily_stats',
+        ['experiment_id', 'variant_id', 'event_name', 'day'],
+        unique=True,
+        schema=schema
+    )
+    op.create_index(
+        op.f(f'ix_{schema}_experiment_daily_stats_created_at'),
+        'experiment_daily_stats',
+        ['created_at'],
+        schema=schema
+    )
+
+    # Create watermark table
+    op.create_table(
+        'experiment_results_watermarks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('experiment_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('events_processed_until', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['experiment_id'], [f'{schema}.experiments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('experiment_id'),
+        schema=schema
+    )
+    op.create_index(
+        op.f(f'ix_{schema}_experiment_results_watermarks_created_at'),
+        'experiment_results_watermarks',
+        ['created_at'],
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f(f'ix_{schema}_experiment_results_watermarks_created_at'),
+        table_name='experiment_results_watermarks',
+        schema=schema
+    )
+    op.drop_table('experiment_results_watermarks', schema=schema)
+    op.drop_index(
+        op.f(f'ix_{schema}_experiment_daily_stats_created_at'),
+        table_name='experiment_daily_stats',
+        schema=schema
+    )
+    op.drop_index(
+        f'{schema}_experiment_daily_stats_unique',
+        table_name='experiment_daily_stats',
+        schema=schema
+    )
+    op.drop_table('experiment_daily_stats', schema=schema)
@@ -0,0 +1,62 @@
+"""Add experiment sequential test state table
+
+Revision ID: 2a6d9e4f8c31
+Revises: 7b1e4c9a2d53
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '2a6d9e4f8c31'
+down_revision = '7b1e4c9a2d53'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+
+def upgrade() -> None:
+    # Create sequential test state table
+    op.create_table(
+        'experiment_sequential_tests',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('experiment_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_name', sa.String(100), nullable=False),
+        sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['experiment_id'], [f'{schema}.experiments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_experiment_sequential_tests_unique',
+        'experiment_sequential_tests',
+        ['experiment_id', 'event_name'],
+        unique=True,
+        schema=schema
+    )
+    op.create_index(
+        op.f(f'ix_{schema}_experiment_sequential_tests_created_at'),
+        'experiment_sequential_tests',
+        ['created_at'],
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f(f'ix_{schema}_experiment_sequential_tests_created_at'),
+        table_name='experiment_sequential_tests',
+        schema=schema
+    )
+    op.drop_index(
+        f'{schema}_experiment_sequential_tests_unique',
+        table_name='experiment_sequential_tests',
+        schema=schema
+    )
+    op.drop_table('experiment_sequential_tests', schema=schema)
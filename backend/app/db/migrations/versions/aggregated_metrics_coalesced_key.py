@@ -0,0 +1,84 @@
+"""Make the aggregated metrics key treat NULLs as equal
+
+Revision ID: 9d3b6f0e2a17
+Revises: 5c2e8a7f41d9
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '9d3b6f0e2a17'
+down_revision = '5c2e8a7f41d9'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+# Stand-in for NULL flag and segment IDs in the key
+null_uuid = "'00000000-0000-0000-0000-000000000000'::uuid"
+
+# Aggregation key, NULLs coalesced since unique indexes treat them as
+# distinct (NULLS NOT DISTINCT needs PostgreSQL 15)
+key_expressions = [
+    'metric_type',
+    'period',
+    'period_start',
+    f'coalesce(feature_flag_id, {null_uuid})',
+    "coalesce(targeting_rule_id, '')",
+    f'coalesce(segment_id, {null_uuid})',
+]
+
+# Aggregation key columns
+key_columns = [
+    'metric_type',
+    'period',
+    'period_start',
+    'feature_flag_id',
+    'targeting_rule_id',
+    'segment_id',
+]
+
+
+def upgrade() -> None:
+    # Remove duplicates of the coalesced key, keeping the latest row
+    op.execute(f"""
+        DELETE FROM {schema}.aggregated_metrics a
+        USING {schema}.aggregated_metrics b
+        WHERE {' AND '.join(
+            f'a.{e} IS NOT DISTINCT FROM b.{e}' for e in key_columns
+        )}
+        AND (a.updated_at, a.id) < (b.updated_at, b.id)
+    """)
+
+    # Recreate the unique index so rows without flag, rule or segment are
+    # conflict targets for aggregation upserts
+    op.drop_index(
+        f'{schema}_agg_metric_unique',
+        table_name='aggregated_metrics',
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_agg_metric_unique',
+        'aggregated_metrics',
+        [sa.text(e) for e in key_expressions],
+        unique=True,
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        f'{schema}_agg_metric_unique',
+        table_name='aggregated_metrics',
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_agg_metric_unique',
+        'aggregated_metrics',
+        key_columns,
+        unique=True,
+        schema=schema
+    )
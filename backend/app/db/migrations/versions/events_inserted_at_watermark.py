@@ -0,0 +1,64 @@
+"""Watermark the experiment results rollup on a server-assigned insert time
+
+Revision ID: 8e4a1c7d2f95
+Revises: 2a6d9e4f8c31
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '8e4a1c7d2f95'
+down_revision = '2a6d9e4f8c31'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+# Rollup state derived from the watermark
+rollup_tables = [
+    'experiment_daily_stats',
+    'experiment_sequential_tests',
+    'experiment_results_watermarks',
+]
+
+
+def upgrade() -> None:
+    # created_at is set by clients and may lie before the watermark; the
+    # rollup scans events by the time the server wrote them instead.
+    # Existing rows take the migration time without a table rewrite.
+    op.add_column(
+        'events',
+        sa.Column(
+            'inserted_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False
+        ),
+        schema=schema
+    )
+    op.create_index(
+        f'{schema}_event_experiment_inserted',
+        'events',
+        ['experiment_id', 'inserted_at'],
+        schema=schema
+    )
+
+    # The old watermarks are created_at times and may have skipped events;
+    # drop the rollup so the next refresh rebuilds it from every event
+    for table in rollup_tables:
+        op.execute(f"DELETE FROM {schema}.{table}")
+
+
+def downgrade() -> None:
+    for table in rollup_tables:
+        op.execute(f"DELETE FROM {schema}.{table}")
+
+    op.drop_index(
+        f'{schema}_event_experiment_inserted',
+        table_name='events',
+        schema=schema
+    )
+    op.drop_column('events', 'inserted_at', schema=schema)
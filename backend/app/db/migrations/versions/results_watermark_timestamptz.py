@@ -0,0 +1,43 @@
+"""Store the experiment results watermark as a timestamp
+
+Revision ID: 7b1e4c9a2d53
+Revises: 3f8c1d2b7a64
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '7b1e4c9a2d53'
+down_revision = '3f8c1d2b7a64'
+branch_labels = None
+depends_on = None
+
+# Schema name
+schema = "experimentation"
+
+
+def upgrade() -> None:
+    # Event timestamps are compared with the watermark as points in time,
+    # not as ISO strings
+    op.alter_column(
+        'experiment_results_watermarks',
+        'events_processed_until',
+        type_=sa.DateTime(timezone=True),
+        postgresql_using='events_processed_until::timestamptz',
+        schema=schema
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'experiment_results_watermarks',
+        'events_processed_until',
+        type_=sa.String(),
+        postgresql_using=(
+            "to_char(events_processed_until AT TIME ZONE 'UTC', "
+            "'YYYY-MM-DD\"T\"HH24:MI:SS.US\"+00:00\"')"
+        ),
+        schema=schema
+    )
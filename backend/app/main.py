@@ -24,6 +24,8 @@ from backend.app.core.scheduler import experiment_scheduler
 from backend.app.core.rollout_scheduler import rollout_scheduler
 from backend.app.core.metrics_scheduler import metrics_scheduler
 from backend.app.core.safety_scheduler import safety_scheduler
+from backend.app.core.results_scheduler import results_scheduler
+from backend.app.core.flag_telemetry import flag_telemetry
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -78,6 +80,12 @@ async def startup_event():
     logger.info("Starting safety monitoring scheduler")
     await safety_scheduler.start()
 
+    logger.info("Starting results scheduler")
+    await results_scheduler.start()
+
+    logger.info("Starting flag telemetry buffer")
+    await flag_telemetry.start()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop background tasks on application shutdown."""
@@ -93,6 +101,12 @@ async def shutdown_event():
     logger.info("Stopping safety monitoring scheduler")
     await safety_scheduler.stop()
 
+    logger.info("Stopping results scheduler")
+    await results_scheduler.stop()
+
+    logger.info("Stopping flag telemetry buffer")
+    await flag_telemetry.stop()
+
 # Add OpenAPI documentation routes
 @app.get("/api/v1/openapi.json", include_in_schema=False)
 async def get_openapi_schema():
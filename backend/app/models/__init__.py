@@ -20,6 +20,11 @@ from .experiment import (
 from .feature_flag import FeatureFlag, FeatureFlagOverride, FeatureFlagStatus
 from .event import Event, EventType
 from .assignment import Assignment
+from .experiment_results import (
+    ExperimentDailyStats,
+    ExperimentResultsWatermark,
+    ExperimentSequentialTest,
+)
 from .api_key import APIKey
 from .segment import Segment
 from .rollout_schedule import (
@@ -53,6 +58,9 @@ __all__ = [
     "FeatureFlagOverride",
     "Event",
     "Assignment",
+    "ExperimentDailyStats",
+    "ExperimentResultsWatermark",
+    "ExperimentSequentialTest",
     "APIKey",
     "Segment",
     "user_role_association",
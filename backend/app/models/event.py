@@ -1,5 +1,5 @@
 # models/event.py
-from sqlalchemy import Column, String, Float, ForeignKey, Index
+from sqlalchemy import Column, DateTime, String, Float, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declared_attr
@@ -19,12 +19,20 @@ class EventType(str, Enum):
     CUSTOM = "custom"  # Custom event type
 
 
+def _default_event_name(context):
+    """Name events after their type unless a name is given."""
+    return context.get_current_parameters()["event_type"]
+
+
 class Event(Base, BaseModel):
     """Event model for tracking user interactions and metric data."""
 
     __tablename__ = "events"
 
     event_type = Column(String(100), nullable=False, index=True)
+    event_name = Column(
+        String(100), nullable=False, default=_default_event_name
+    )  # Name metrics are defined on, e.g. "purchase_completed"
     user_id = Column(
         String(255), nullable=False, index=True
     )  # External user identifier
@@ -44,10 +52,16 @@ class Event(Base, BaseModel):
         nullable=True,
     )
     value = Column(Float)  # Numeric value if applicable
+    source_event_id = Column(
+        String(255)
+    )  # ID the event was archived under, set by bulk loads to deduplicate replays
     event_metadata = Column(JSONB)  # Additional data
     created_at = Column(
         String, nullable=False, index=True
     )  # Timestamp for when the event was created
+    inserted_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )  # Server time the row was written, for incremental processing
 
     # Relationships
     experiment = relationship("Experiment", back_populates="events")
@@ -64,6 +78,10 @@ class Event(Base, BaseModel):
             Index(
                 f"{schema_name}_event_experiment_type", "experiment_id", "event_type"
             ),
+            # Composite index for experiment + event_name for metric results
+            Index(
+                f"{schema_name}_event_experiment_name", "experiment_id", "event_name"
+            ),
             # Composite index for feature flag + event_type for quick metric calculations
             Index(
                 f"{schema_name}_event_feature_flag_type",
@@ -76,6 +94,18 @@ class Event(Base, BaseModel):
                 "experiment_id",
                 "created_at",
             ),
+            # Archived events are loaded at most once
+            Index(
+                f"{schema_name}_event_source_event_id",
+                "source_event_id",
+                unique=True,
+            ),
+            # Composite index for scanning an experiment's newly written events
+            Index(
+                f"{schema_name}_event_experiment_inserted",
+                "experiment_id",
+                "inserted_at",
+            ),
             {"schema": schema_name},
         )
 
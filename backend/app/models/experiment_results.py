@@ -0,0 +1,111 @@
+"""
+Materialized experiment result statistics.
+
+Conversion events are rolled up incrementally into per experiment, variant,
+event name and day sufficient statistics. A per-experiment watermark records
+how far the events table has been folded in, by the server-assigned
+inserted_at, so results only need to scan events inserted after it. The state of each sequential test is advanced with
+every rollup, next to the watermark.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.declarative import declared_attr
+
+from .base import Base, BaseModel
+from backend.app.core.database_config import get_schema_name
+
+
+class ExperimentDailyStats(Base, BaseModel):
+    """Sufficient statistics of conversion events per experiment, variant, event name and day."""
+
+    __tablename__ = "experiment_daily_stats"
+
+    experiment_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(f"{get_schema_name()}.experiments.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    variant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(f"{get_schema_name()}.variants.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    event_name = Column(String(100), nullable=False)
+    day = Column(Date, nullable=False)  # UTC day the events were created on
+    count = Column(Integer, nullable=False, default=0)  # Number of events
+    sum_value = Column(Float, nullable=False, default=0.0)  # Sum of event values
+    sum_squares = Column(Float, nullable=False, default=0.0)  # Sum of squared event values
+
+    @declared_attr
+    def __table_args__(cls):
+        schema_name = get_schema_name()
+        return (
+            # One row per experiment, variant, event name and day; also the upsert target
+            Index(
+                f"{schema_name}_experiment_daily_stats_unique",
+                "experiment_id",
+                "variant_id",
+                "event_name",
+                "day",
+                unique=True,
+            ),
+            {"schema": schema_name},
+        )
+
+    def __repr__(self):
+        return f"<ExperimentDailyStats {self.experiment_id}: {self.event_name} on {self.day}>"
+
+
+class ExperimentResultsWatermark(Base, BaseModel):
+    """High-water mark of the events rolled up into ExperimentDailyStats for an experiment."""
+
+    __tablename__ = "experiment_results_watermarks"
+
+    experiment_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(f"{get_schema_name()}.experiments.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    # Events with inserted_at up to and including this time are rolled up
+    events_processed_until = Column(DateTime(timezone=True), nullable=False)
+
+    @declared_attr
+    def __table_args__(cls):
+        schema_name = get_schema_name()
+        return ({"schema": schema_name},)
+
+    def __repr__(self):
+        return f"<ExperimentResultsWatermark {self.experiment_id}: {self.events_processed_until}>"
+
+
+class ExperimentSequentialTest(Base, BaseModel):
+    """Sequential test state of an experiment's conversion metric, as of its watermark."""
+
+    __tablename__ = "experiment_sequential_tests"
+
+    experiment_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(f"{get_schema_name()}.experiments.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    event_name = Column(String(100), nullable=False)
+    state = Column(JSONB, nullable=False)  # SequentialTest.to_dict()
+
+    @declared_attr
+    def __table_args__(cls):
+        schema_name = get_schema_name()
+        return (
+            # One test per experiment and event name
+            Index(
+                f"{schema_name}_experiment_sequential_tests_unique",
+                "experiment_id",
+                "event_name",
+                unique=True,
+            ),
+            {"schema": schema_name},
+        )
+
+    def __repr__(self):
+        return f"<ExperimentSequentialTest {self.experiment_id}: {self.event_name}>"
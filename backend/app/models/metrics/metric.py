@@ -7,6 +7,7 @@ and error tracking.
 """
 
 from sqlalchemy import Column, String, Integer, Float, ForeignKey, Index, DateTime, Enum as SQLAEnum
+from sqlalchemy import func, literal_column
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declared_attr
@@ -17,6 +18,35 @@ from backend.app.models.base import Base, BaseModel
 from backend.app.core.database_config import get_schema_name
 
 
+# Stand-ins for NULL flag, rule and segment IDs in the aggregation key; unique
+# indexes treat NULLs as distinct, and NULLS NOT DISTINCT needs PostgreSQL 15
+NULL_KEY_UUID = "00000000-0000-0000-0000-000000000000"
+NULL_KEY_STRING = ""
+
+
+def aggregation_key(columns) -> list:
+    """
+    Get the unique aggregation key expressions of aggregated metrics.
+
+    Used both for the unique index and as the conflict target of
+    aggregation upserts, which must match the index expressions.
+
+    Args:
+        columns: Object with the key columns as attributes (model class)
+
+    Returns:
+        List of column and COALESCE expressions
+    """
+    return [
+        columns.metric_type,
+        columns.period,
+        columns.period_start,
+        func.coalesce(columns.feature_flag_id, literal_column(f"'{NULL_KEY_UUID}'::uuid")),
+        func.coalesce(columns.targeting_rule_id, literal_column(f"'{NULL_KEY_STRING}'")),
+        func.coalesce(columns.segment_id, literal_column(f"'{NULL_KEY_UUID}'::uuid")),
+    ]
+
+
 class MetricType(str, Enum):
     """Types of metrics that can be collected."""
 
@@ -137,15 +167,11 @@ class AggregatedMetric(Base, BaseModel):
     def __table_args__(cls):
         schema_name = get_schema_name()
         return (
-            # Unique constraint for no duplicate aggregation rows
+            # Unique aggregation key, the conflict target of aggregation upserts
+            # (NULL flag, rule and segment IDs are keys too)
             Index(
                 f"{schema_name}_agg_metric_unique",
-                "metric_type",
-                "period",
-                "period_start",
-                "feature_flag_id",
-                "targeting_rule_id",
-                "segment_id",
+                *aggregation_key(cls),
                 unique=True
             ),
             # Composite index for time-based queries
@@ -177,10 +177,23 @@ class EventRequest(BaseModel):
     )
 
 
+class EventBatchItem(BaseModel):
+    """Model for one event of a batch, referencing experiments and flags by key."""
+    event_type: str = Field(..., min_length=1, max_length=100)
+    user_id: str = Field(..., min_length=1, max_length=255)
+    experiment_key: Optional[str] = None
+    feature_flag_key: Optional[str] = None
+    value: Optional[float] = None
+    metadata: Optional[Dict[str, Any]] = None
+    timestamp: Optional[datetime] = None
+
+
 class EventBatchRequest(BaseModel):
     """Model for batch tracking multiple events."""
-    events: List[EventRequest] = Field(
-        ..., min_length=1, max_length=100, description="List of events to track"
+    events: List[EventBatchItem] = Field(
+        ...,
+        min_length=1,
+        description="List of events to track (size limit depends on the API key)",
     )
 
     model_config = ConfigDict(
@@ -2,6 +2,8 @@
 import logging
 import math
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
@@ -9,16 +11,78 @@ from uuid import UUID
 import pandas as pd
 import numpy as np
 from scipy import stats
-from sqlalchemy import func, and_, or_, desc, text
+import pytz
+from sqlalchemy import TIMESTAMP, bindparam, cast, func, and_, or_, desc, text
 from sqlalchemy.orm import Session, joinedload
 
 from backend.app.models.experiment import Experiment, Variant, Metric, ExperimentStatus
 from backend.app.models.event import Event, EventType
 from backend.app.models.assignment import Assignment
 from backend.app.core.config import settings
+from backend.app.core.continuous_analysis import (
+    DEFAULT_NUM_RESAMPLES,
+    bootstrap_difference,
+    bootstrap_means,
+    cuped_adjust,
+    percentile_interval,
+)
+from backend.app.core.sequential_testing import SequentialTest, SufficientStats, mean_test
+from backend.app.services.results_rollup_service import ResultsRollupService
 
 logger = logging.getLogger(__name__)
 
+# Period lengths supported by get_daily_results (PostgreSQL date_trunc fields)
+PERIOD_GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# Analysis modes of calculate_metric_results
+ANALYSIS_MODE_FIXED_HORIZON = "fixed_horizon"
+ANALYSIS_MODE_SEQUENTIAL = "sequential"
+ANALYSIS_MODES = (ANALYSIS_MODE_FIXED_HORIZON, ANALYSIS_MODE_SEQUENTIAL)
+
+# Per-user aggregations of event values for continuous metrics (SQL aggregate,
+# value for users without events in the window; None leaves them out)
+USER_AGGREGATIONS = {
+    "sum": ("SUM", 0),
+    "count": ("COUNT", 0),
+    "average": ("AVG", None),
+}
+
+# Days before the experiment start used for the CUPED covariate
+DEFAULT_PRE_PERIOD_DAYS = 14
+
+# Rows fetched per round trip when streaming per-user aggregates
+USER_VALUES_BATCH_SIZE = 10000
+
+# Segment value reporting the segments beyond get_segmented_results' max_segments
+OTHER_SEGMENT = "other"
+
+
+def _parse_utc(value: Union[str, datetime]) -> datetime:
+    """Get an aware datetime from a datetime or ISO 8601 timestamp, treating naive values as UTC."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _truncate_period(value: datetime, granularity: str) -> datetime:
+    """Truncate a wall-clock time to the start of its period, like date_trunc."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return value
+    value = value.replace(hour=0)
+    if granularity == "week":
+        # ISO weeks start on Monday
+        value -= timedelta(days=value.weekday())
+    return value
+
 
 class AnalysisService:
     """
@@ -35,12 +99,17 @@ class AnalysisService:
         """Initialize with a database session."""
         self.db = db
 
-    def get_experiment_results(self, experiment_id: Union[str, UUID]) -> Dict[str, Any]:
+    def get_experiment_results(
+        self,
+        experiment_id: Union[str, UUID],
+        analysis_mode: str = ANALYSIS_MODE_FIXED_HORIZON,
+    ) -> Dict[str, Any]:
         """
         Get comprehensive results for an experiment.
 
         Args:
             experiment_id: ID of the experiment
+            analysis_mode: "fixed_horizon" or "sequential", see calculate_metric_results
 
         Returns:
             Dictionary containing experiment results data
@@ -56,10 +125,18 @@ class AnalysisService:
         if not experiment:
             raise ValueError(f"Experiment {experiment_id} not found")
 
+        # Fetch the counts for all metrics in one grouped query each
+        assignment_counts = self._get_assignment_counts(experiment)
+        conversion_counts = self._get_conversion_counts(
+            experiment, [metric.event_name for metric in experiment.metrics]
+        )
+
         # Calculate results for each metric
         metrics_results = []
         for metric in experiment.metrics:
-            metric_result = self.calculate_metric_results(experiment, metric)
+            metric_result = self.calculate_metric_results(
+                experiment, metric, assignment_counts, conversion_counts, analysis_mode
+            )
             metrics_results.append(metric_result)
 
         # Calculate overall summary statistics
@@ -81,18 +158,41 @@ class AnalysisService:
         }
 
     def calculate_metric_results(
-        self, experiment: Experiment, metric: Metric
+        self,
+        experiment: Experiment,
+        metric: Metric,
+        assignment_counts: Optional[Dict[str, int]] = None,
+        conversion_counts: Optional[Dict[Tuple[str, str], int]] = None,
+        analysis_mode: str = ANALYSIS_MODE_FIXED_HORIZON,
     ) -> Dict[str, Any]:
         """
         Calculate results for a specific metric in an experiment.
 
+        In "fixed_horizon" mode p-values come from Fisher's exact test and are
+        only valid when checked once, at the planned sample size. In
+        "sequential" mode they are mSPRT always-valid p-values computed from
+        the per-variant conversion statistics, which stay valid however often
+        results are refreshed; confidence intervals are then confidence
+        sequences and each treatment also gets an interval for its difference
+        from control.
+
         Args:
             experiment: Experiment model object
             metric: Metric model object
+            assignment_counts: Assignments per variant ID, queried if not given
+            conversion_counts: Conversions per (variant ID, event name), queried if not given
+            analysis_mode: "fixed_horizon" or "sequential"
 
         Returns:
             Dictionary containing metric results
         """
+        if analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(
+                f"Invalid analysis mode: {analysis_mode}. "
+                f"Must be one of {', '.join(ANALYSIS_MODES)}"
+            )
+        sequential = analysis_mode == ANALYSIS_MODE_SEQUENTIAL
+
         # Get variant IDs for the experiment
         variant_ids = [str(v.id) for v in experiment.variants]
 
@@ -101,35 +201,19 @@ class AnalysisService:
         if not control_variant:
             raise ValueError(f"Experiment {experiment.id} has no control variant")
 
-        # Get assignment counts per variant
-        assignments = {}
-        for variant_id in variant_ids:
-            count = (
-                self.db.query(func.count(Assignment.id))
-                .filter(
-                    Assignment.experiment_id == experiment.id,
-                    Assignment.variant_id == variant_id,
-                )
-                .scalar()
-                or 0
-            )
-            assignments[variant_id] = count
+        if assignment_counts is None:
+            assignment_counts = self._get_assignment_counts(experiment)
+        if conversion_counts is None:
+            conversion_counts = self._get_conversion_counts(experiment, [metric.event_name])
 
-        # Get conversion counts per variant
-        conversions = {}
-        for variant_id in variant_ids:
-            count = (
-                self.db.query(func.count(Event.id))
-                .filter(
-                    Event.experiment_id == experiment.id,
-                    Event.variant_id == variant_id,
-                    Event.event_type == EventType.CONVERSION.value,
-                    Event.event_name == metric.event_name,
-                )
-                .scalar()
-                or 0
-            )
-            conversions[variant_id] = count
+        # Get assignment and conversion counts per variant
+        assignments = {
+            variant_id: assignment_counts.get(variant_id, 0) for variant_id in variant_ids
+        }
+        conversions = {
+            variant_id: conversion_counts.get((variant_id, metric.event_name), 0)
+            for variant_id in variant_ids
+        }
 
         # Calculate conversion rates
         rates = {}
@@ -147,6 +231,26 @@ class AnalysisService:
             assignments[str(control_variant.id)] - control_conversions
         )
 
+        if sequential:
+            # Per-user 0/1 conversion statistics, O(1) per variant
+            variant_stats = {
+                variant_id: SufficientStats.from_proportion(
+                    assignments[variant_id], conversions[variant_id]
+                )
+                for variant_id in variant_ids
+            }
+            # Resume the test the rollup keeps and add only the unrolled tail
+            sequential_test = ResultsRollupService(self.db).get_sequential_test(
+                experiment.id, metric.event_name
+            )
+            if sequential_test is None or sequential_test.control_id != str(control_variant.id):
+                sequential_test = SequentialTest(str(control_variant.id))
+            for variant_id in variant_ids:
+                sequential_test.set_proportion(
+                    variant_id, assignments[variant_id], conversions[variant_id]
+                )
+            sequential_results = sequential_test.evaluate()
+
         for variant in experiment.variants:
             variant_id = str(variant.id)
 
@@ -155,6 +259,14 @@ class AnalysisService:
                 p_value = 1.0
                 is_significant = False
                 relative_improvement = 0
+            elif sequential:
+                # Always-valid p-value of the difference in conversion rates
+                sequential_result = sequential_results[variant_id]
+                p_value = sequential_result.p_value
+                is_significant = sequential_result.is_significant
+                relative_improvement = self._relative_improvement(
+                    rates[str(control_variant.id)], rates[variant_id]
+                )
             else:
                 # Calculate p-value using Fisher's exact test
                 variant_conversions = conversions[variant_id]
@@ -172,23 +284,22 @@ class AnalysisService:
                     is_significant = p_value < 0.05  # Using 95% confidence level
 
                     # Calculate relative improvement
-                    if rates[str(control_variant.id)] > 0:
-                        relative_improvement = (
-                            (rates[variant_id] - rates[str(control_variant.id)])
-                            / rates[str(control_variant.id)]
-                        ) * 100
-                    else:
-                        relative_improvement = (
-                            float("inf") if rates[variant_id] > 0 else 0
-                        )
+                    relative_improvement = self._relative_improvement(
+                        rates[str(control_variant.id)], rates[variant_id]
+                    )
                 except Exception as e:
                     logger.error(f"Error calculating statistics: {str(e)}")
                     p_value = None
                     is_significant = False
                     relative_improvement = None
 
+            if sequential and assignments[variant_id] > 0:
+                # Confidence sequence for the conversion rate
+                lower, upper = mean_test(variant_stats[variant_id]).confidence_interval
+                ci_lower = max(0, lower * 100)
+                ci_upper = min(100, upper * 100)
             # Calculate confidence interval using normal approximation
-            if assignments[variant_id] > 0:
+            elif assignments[variant_id] > 0:
                 proportion = rates[variant_id] / 100  # Convert percentage to proportion
                 z = 1.96  # For 95% confidence level
 
@@ -218,6 +329,17 @@ class AnalysisService:
                 "relative_improvement": relative_improvement,
             }
 
+            if sequential:
+                # Difference from control in percentage points
+                variant_result["effect_confidence_interval"] = (
+                    None
+                    if variant.is_control
+                    else [
+                        bound * 100
+                        for bound in sequential_results[variant_id].confidence_interval
+                    ]
+                )
+
             results.append(variant_result)
 
         # Format metric result
@@ -231,6 +353,48 @@ class AnalysisService:
             "best_variant": self._find_best_variant(results),
         }
 
+    def _get_assignment_counts(self, experiment: Experiment) -> Dict[str, int]:
+        """
+        Count assignments for every variant of an experiment in one grouped query.
+
+        Args:
+            experiment: Experiment model object
+
+        Returns:
+            Dictionary mapping variant ID strings to assignment counts
+        """
+        rows = (
+            self.db.query(Assignment.variant_id, func.count(Assignment.id))
+            .filter(Assignment.experiment_id == experiment.id)
+            .group_by(Assignment.variant_id)
+            .all()
+        )
+        return {str(variant_id): count for variant_id, count in rows}
+
+    def _get_conversion_counts(
+        self, experiment: Experiment, event_names: List[str]
+    ) -> Dict[Tuple[str, str], int]:
+        """
+        Count conversions per variant and event name.
+
+        Counts come from the materialized results rollup plus the events
+        created after its watermark, so only the unprocessed tail is scanned.
+
+        Args:
+            experiment: Experiment model object
+            event_names: Event names of the metrics to count
+
+        Returns:
+            Dictionary mapping (variant ID string, event name) to conversion counts
+        """
+        if not event_names:
+            return {}
+
+        conversion_stats = ResultsRollupService(self.db).get_conversion_stats(
+            experiment.id, event_names
+        )
+        return {key: stats.count for key, stats in conversion_stats.items()}
+
     def calculate_experiment_summary(self, experiment: Experiment) -> Dict[str, Any]:
         """
         Calculate overall summary statistics for an experiment.
@@ -297,17 +461,34 @@ class AnalysisService:
         self,
         experiment_id: Union[str, UUID],
         metric_id: Optional[Union[str, UUID]] = None,
+        granularity: str = "day",
+        time_zone: str = "UTC",
     ) -> List[Dict[str, Any]]:
         """
-        Get daily results for an experiment or specific metric.
+        Get results over time for an experiment or specific metric.
+
+        Assignments and conversions are each counted in one query grouped by
+        time period and variant; cumulative series are computed in memory.
 
         Args:
             experiment_id: ID of the experiment
             metric_id: Optional ID of the metric to filter by
+            granularity: Period length, one of "hour", "day" or "week"
+            time_zone: Time zone name the periods are aligned to
 
         Returns:
-            List of daily result dictionaries
+            List of result dictionaries, one per period
         """
+        if granularity not in PERIOD_GRANULARITIES:
+            raise ValueError(
+                f"Invalid granularity: {granularity}. "
+                f"Must be one of {', '.join(PERIOD_GRANULARITIES)}"
+            )
+        try:
+            tz = pytz.timezone(time_zone)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown time zone: {time_zone}")
+
         # Get experiment with variants and metrics
         experiment = (
             self.db.query(Experiment)
@@ -323,20 +504,13 @@ class AnalysisService:
         if not experiment.start_date:
             return []
 
-        start_dt = datetime.fromisoformat(experiment.start_date.replace("Z", "+00:00"))
+        start_dt = _parse_utc(experiment.start_date)
         end_dt = (
-            datetime.fromisoformat(experiment.end_date.replace("Z", "+00:00"))
+            _parse_utc(experiment.end_date)
             if experiment.end_date
             else datetime.now(timezone.utc)
         )
 
-        # Generate list of dates
-        dates = []
-        current_dt = start_dt
-        while current_dt <= end_dt:
-            dates.append(current_dt.strftime("%Y-%m-%d"))
-            current_dt += timedelta(days=1)
-
         # Filter metrics if metric_id is provided
         metrics = [
             m
@@ -347,38 +521,45 @@ class AnalysisService:
         if not metrics:
             return []
 
-        # Get daily assignments (can be optimized with a single query)
-        daily_assignments = {}
-        for date in dates:
-            daily_variant_assignments = {}
-
-            # Get counts by variant for this date
-            for variant in experiment.variants:
-                # Convert date string to datetime range
-                date_start = datetime.fromisoformat(f"{date}T00:00:00+00:00")
-                date_end = datetime.fromisoformat(f"{date}T23:59:59+00:00")
-
-                # Query assignments for this variant on this date
-                count = (
-                    self.db.query(func.count(Assignment.id))
-                    .filter(
-                        Assignment.experiment_id == experiment.id,
-                        Assignment.variant_id == variant.id,
-                        Assignment.created_at >= date_start,
-                        Assignment.created_at <= date_end,
-                    )
-                    .scalar()
-                    or 0
-                )
+        # Period starts as local wall-clock times, matching the grouped queries
+        periods = []
+        current = _truncate_period(
+            start_dt.astimezone(tz).replace(tzinfo=None), granularity
+        )
+        last = end_dt.astimezone(tz).replace(tzinfo=None)
+        while current <= last:
+            periods.append(current)
+            current += PERIOD_GRANULARITIES[granularity]
 
-                daily_variant_assignments[str(variant.id)] = count
+        assignment_counts = self._get_period_assignment_counts(
+            experiment, granularity, time_zone, start_dt, end_dt
+        )
+        conversion_counts = self._get_period_conversion_counts(
+            experiment,
+            [metric.event_name for metric in metrics],
+            granularity,
+            time_zone,
+            start_dt,
+            end_dt,
+        )
 
-            daily_assignments[date] = daily_variant_assignments
+        label_format = "%Y-%m-%dT%H:00" if granularity == "hour" else "%Y-%m-%d"
+        variant_ids = [str(variant.id) for variant in experiment.variants]
+        cumulative_assignments = dict.fromkeys(variant_ids, 0)
+        cumulative_conversions = {
+            (variant_id, metric.event_name): 0
+            for variant_id in variant_ids
+            for metric in metrics
+        }
 
-        # Get daily conversions by metric and variant
         results = []
-        for date in dates:
-            date_results = {"date": date, "metrics": []}
+        for period in periods:
+            for variant_id in variant_ids:
+                cumulative_assignments[variant_id] += assignment_counts.get(
+                    (period, variant_id), 0
+                )
+
+            date_results = {"date": period.strftime(label_format), "metrics": []}
 
             for metric in metrics:
                 metric_result = {
@@ -388,36 +569,34 @@ class AnalysisService:
                 }
 
                 for variant in experiment.variants:
-                    # Convert date string to datetime range
-                    date_start = datetime.fromisoformat(f"{date}T00:00:00+00:00")
-                    date_end = datetime.fromisoformat(f"{date}T23:59:59+00:00")
-
-                    # Query conversions for this variant and metric on this date
-                    conversions = (
-                        self.db.query(func.count(Event.id))
-                        .filter(
-                            Event.experiment_id == experiment.id,
-                            Event.variant_id == variant.id,
-                            Event.event_type == EventType.CONVERSION.value,
-                            Event.event_name == metric.event_name,
-                            Event.timestamp >= date_start.isoformat(),
-                            Event.timestamp <= date_end.isoformat(),
-                        )
-                        .scalar()
-                        or 0
+                    variant_id = str(variant.id)
+                    assignments = assignment_counts.get((period, variant_id), 0)
+                    conversions = conversion_counts.get(
+                        (period, variant_id, metric.event_name), 0
                     )
+                    cumulative_key = (variant_id, metric.event_name)
+                    cumulative_conversions[cumulative_key] += conversions
+                    total_assignments = cumulative_assignments[variant_id]
+                    total_conversions = cumulative_conversions[cumulative_key]
 
-                    # Calculate conversion rate
-                    assignments = daily_assignments[date][str(variant.id)]
+                    # Calculate conversion rates
                     rate = (conversions / assignments) * 100 if assignments > 0 else 0
+                    cumulative_rate = (
+                        (total_conversions / total_assignments) * 100
+                        if total_assignments > 0
+                        else 0
+                    )
 
                     variant_result = {
-                        "variant_id": str(variant.id),
+                        "variant_id": variant_id,
                         "variant_name": variant.name,
                         "is_control": variant.is_control,
                         "assignments": assignments,
                         "conversions": conversions,
                         "conversion_rate": rate,
+                        "cumulative_assignments": total_assignments,
+                        "cumulative_conversions": total_conversions,
+                        "cumulative_conversion_rate": cumulative_rate,
                     }
 
                     metric_result["variants"].append(variant_result)
@@ -428,6 +607,97 @@ class AnalysisService:
 
         return results
 
+    def _get_period_assignment_counts(
+        self,
+        experiment: Experiment,
+        granularity: str,
+        time_zone: str,
+        start_dt: datetime,
+        end_dt: datetime,
+    ) -> Dict[Tuple[datetime, str], int]:
+        """
+        Count assignments per time period and variant in one grouped query.
+
+        Args:
+            experiment: Experiment model object
+            granularity: Period length, one of "hour", "day" or "week"
+            time_zone: Time zone name the periods are aligned to
+            start_dt: Start of the time range (aware)
+            end_dt: End of the time range (aware)
+
+        Returns:
+            Dictionary mapping (local period start, variant ID string) to counts
+        """
+        # created_at is stored as naive UTC
+        period = func.date_trunc(
+            granularity,
+            func.timezone(time_zone, func.timezone("UTC", Assignment.created_at)),
+        )
+        rows = (
+            self.db.query(period, Assignment.variant_id, func.count(Assignment.id))
+            .filter(
+                Assignment.experiment_id == experiment.id,
+                Assignment.created_at >= start_dt.astimezone(timezone.utc).replace(tzinfo=None),
+                Assignment.created_at <= end_dt.astimezone(timezone.utc).replace(tzinfo=None),
+            )
+            .group_by(period, Assignment.variant_id)
+            .all()
+        )
+        return {
+            (period_start, str(variant_id)): count
+            for period_start, variant_id, count in rows
+        }
+
+    def _get_period_conversion_counts(
+        self,
+        experiment: Experiment,
+        event_names: List[str],
+        granularity: str,
+        time_zone: str,
+        start_dt: datetime,
+        end_dt: datetime,
+    ) -> Dict[Tuple[datetime, str, str], int]:
+        """
+        Count conversions per time period, variant and event name in one grouped query.
+
+        Args:
+            experiment: Experiment model object
+            event_names: Event names of the metrics to count
+            granularity: Period length, one of "hour", "day" or "week"
+            time_zone: Time zone name the periods are aligned to
+            start_dt: Start of the time range (aware)
+            end_dt: End of the time range (aware)
+
+        Returns:
+            Dictionary mapping (local period start, variant ID string, event name) to counts
+        """
+        # created_at is stored as an ISO 8601 string; compare it as a point in
+        # time, since offsets and "Z" suffixes do not sort as text
+        created_at = cast(Event.created_at, TIMESTAMP(timezone=True))
+        period = func.date_trunc(granularity, func.timezone(time_zone, created_at))
+        rows = (
+            self.db.query(period, Event.variant_id, Event.event_name, func.count(Event.id))
+            .filter(
+                Event.experiment_id == experiment.id,
+                Event.event_type == EventType.CONVERSION.value,
+                Event.event_name.in_(set(event_names)),
+                created_at >= start_dt,
+                created_at <= end_dt,
+            )
+            .group_by(period, Event.variant_id, Event.event_name)
+            .all()
+        )
+        return {
+            (period_start, str(variant_id), event_name): count
+            for period_start, variant_id, event_name, count in rows
+        }
+
+    def _relative_improvement(self, control_rate: float, variant_rate: float) -> float:
+        """Get the relative improvement of a variant's rate over control, in percent."""
+        if control_rate > 0:
+            return ((variant_rate - control_rate) / control_rate) * 100
+        return float("inf") if variant_rate > 0 else 0
+
     def _find_best_variant(
         self, variant_results: List[Dict[str, Any]]
     ) -> Optional[Dict[str, Any]]:
@@ -473,18 +743,27 @@ class AnalysisService:
         experiment_id: Union[str, UUID],
         segment_by: str,
         metric_id: Optional[Union[str, UUID]] = None,
+        max_segments: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Get experiment results segmented by a specific property.
 
+        Sample sizes and conversions are each counted for all segments in one
+        grouped query. With max_segments, only the largest segments are kept
+        and the rest are folded into one "other" segment.
+
         Args:
             experiment_id: ID of the experiment
             segment_by: Property to segment results by (e.g., 'country', 'device')
             metric_id: Optional ID of specific metric to analyze
+            max_segments: Optional number of largest segments to report separately
 
         Returns:
             Dictionary containing segmented results
         """
+        if max_segments is not None and max_segments < 1:
+            raise ValueError("max_segments must be at least 1")
+
         # Get experiment with variants and metrics
         experiment = (
             self.db.query(Experiment)
@@ -506,32 +785,51 @@ class AnalysisService:
         if not metrics:
             return {"segments": []}
 
-        # Get segment values from event properties
-        segment_values_query = text(
-            f"""
-            SELECT DISTINCT jsonb_extract_path_text(properties, :segment_key) as segment_value
-            FROM events
-            WHERE experiment_id = :experiment_id
-            AND properties ? :segment_key
-            AND jsonb_extract_path_text(properties, :segment_key) IS NOT NULL
-            AND jsonb_extract_path_text(properties, :segment_key) != ''
-        """
+        sample_sizes, total_segments = self._get_segment_sample_sizes(
+            experiment_id, segment_by, max_segments
         )
-
-        segment_values_result = self.db.execute(
-            segment_values_query,
-            {"segment_key": segment_by, "experiment_id": str(experiment_id)},
+        # Segments beyond the largest max_segments are folded in the database
+        top_segments = None
+        if max_segments is not None and total_segments > max_segments:
+            top_segments = sorted({key[0] for key in sample_sizes if key[0] is not None})
+        conversion_counts = self._get_segment_conversion_counts(
+            experiment_id,
+            segment_by,
+            [metric.event_name for metric in metrics],
+            top_segments,
         )
 
-        segment_values = [row[0] for row in segment_values_result]
+        segment_values = {key[0] for key in sample_sizes} | {
+            key[0] for key in conversion_counts
+        }
 
         if not segment_values:
             return {"segments": []}
 
+        # Segments with conversions but no assigned users are only seen here
+        if top_segments is None:
+            total_segments += len(
+                {key[0] for key in conversion_counts} - {key[0] for key in sample_sizes}
+            )
+
+        # Largest segments first, then "other", which is keyed on None
+        segment_totals = dict.fromkeys(segment_values, 0)
+        for (segment_value, _), count in sample_sizes.items():
+            segment_totals[segment_value] += count
+        ranked = sorted(
+            segment_values - {None}, key=lambda value: (-segment_totals[value], value)
+        )
+        if None in segment_values:
+            ranked.append(None)
+
         # Process each segment
         segments = []
-        for segment_value in segment_values:
-            segment_result = {"segment_value": segment_value, "metrics": []}
+        for segment in ranked:
+            segment_result = {
+                "segment_value": segment if segment is not None else OTHER_SEGMENT,
+                "is_other": segment is None,
+                "metrics": [],
+            }
 
             for metric in metrics:
                 metric_result = {
@@ -541,67 +839,17 @@ class AnalysisService:
                 }
 
                 for variant in experiment.variants:
-                    # Get assignments count for this variant in this segment
-                    # This is an approximation - ideally would track segment with the assignment
-                    segment_assignments_query = text(
-                        f"""
-                        SELECT COUNT(DISTINCT a.user_id)
-                        FROM assignments a
-                        JOIN events e ON a.user_id = e.user_id AND a.experiment_id = e.experiment_id
-                        WHERE a.experiment_id = :experiment_id
-                        AND a.variant_id = :variant_id
-                        AND e.properties ? :segment_key
-                        AND jsonb_extract_path_text(e.properties, :segment_key) = :segment_value
-                    """
-                    )
-
-                    assignments = (
-                        self.db.execute(
-                            segment_assignments_query,
-                            {
-                                "experiment_id": str(experiment_id),
-                                "variant_id": str(variant.id),
-                                "segment_key": segment_by,
-                                "segment_value": segment_value,
-                            },
-                        ).scalar()
-                        or 0
-                    )
-
-                    # Get conversions for this variant and segment
-                    segment_conversions_query = text(
-                        f"""
-                        SELECT COUNT(*)
-                        FROM events
-                        WHERE experiment_id = :experiment_id
-                        AND variant_id = :variant_id
-                        AND event_type = :event_type
-                        AND event_name = :event_name
-                        AND properties ? :segment_key
-                        AND jsonb_extract_path_text(properties, :segment_key) = :segment_value
-                    """
-                    )
-
-                    conversions = (
-                        self.db.execute(
-                            segment_conversions_query,
-                            {
-                                "experiment_id": str(experiment_id),
-                                "variant_id": str(variant.id),
-                                "event_type": EventType.CONVERSION.value,
-                                "event_name": metric.event_name,
-                                "segment_key": segment_by,
-                                "segment_value": segment_value,
-                            },
-                        ).scalar()
-                        or 0
+                    variant_id = str(variant.id)
+                    assignments = sample_sizes.get((segment, variant_id), 0)
+                    conversions = conversion_counts.get(
+                        (segment, variant_id, metric.event_name), 0
                     )
 
                     # Calculate conversion rate
                     rate = (conversions / assignments) * 100 if assignments > 0 else 0
 
                     variant_result = {
-                        "variant_id": str(variant.id),
+                        "variant_id": variant_id,
                         "variant_name": variant.name,
                         "is_control": variant.is_control,
                         "sample_size": assignments,
@@ -615,4 +863,417 @@ class AnalysisService:
 
             segments.append(segment_result)
 
-        return {"segments": segments}
+        return {"segments": segments, "total_segments": total_segments}
+
+    def _get_segment_sample_sizes(
+        self,
+        experiment_id: Union[str, UUID],
+        segment_by: str,
+        max_segments: Optional[int] = None,
+    ) -> Tuple[Dict[Tuple[Optional[str], str], int], int]:
+        """
+        Count assigned users per segment value and variant in one grouped query.
+
+        A user belongs to every segment value found on their events in the
+        experiment; this is an approximation, as segments are not tracked
+        with the assignment. With max_segments, values beyond the largest
+        ones are folded into one segment before counting, so a user in
+        several folded segments is counted once.
+
+        Args:
+            experiment_id: ID of the experiment
+            segment_by: Property to segment by
+            max_segments: Optional number of largest segments to count separately
+
+        Returns:
+            Tuple of a dictionary mapping (segment value, variant ID string) to
+            user counts, with None as the value of the folded segment, and the
+            number of segment values with assigned users
+        """
+        sample_sizes_query = text(
+            """
+            WITH user_segments AS (
+                SELECT DISTINCT user_id,
+                    jsonb_extract_path_text(event_metadata, :segment_key) as segment_value
+                FROM events
+                WHERE experiment_id = :experiment_id
+                AND event_metadata ? :segment_key
+                AND jsonb_extract_path_text(event_metadata, :segment_key) IS NOT NULL
+                AND jsonb_extract_path_text(event_metadata, :segment_key) != ''
+            ),
+            segment_users AS (
+                SELECT s.segment_value, a.variant_id, a.user_id
+                FROM assignments a
+                JOIN user_segments s ON a.user_id = s.user_id
+                WHERE a.experiment_id = :experiment_id
+            ),
+            top_segments AS (
+                SELECT segment_value
+                FROM segment_users
+                GROUP BY segment_value
+                ORDER BY COUNT(DISTINCT user_id) DESC, segment_value
+                LIMIT :max_segments
+            )
+            SELECT t.segment_value, u.variant_id, COUNT(DISTINCT u.user_id),
+                (SELECT COUNT(DISTINCT segment_value) FROM segment_users)
+            FROM segment_users u
+            LEFT JOIN top_segments t ON t.segment_value = u.segment_value
+            GROUP BY t.segment_value, u.variant_id
+        """
+        )
+
+        rows = self.db.execute(
+            sample_sizes_query,
+            {
+                "segment_key": segment_by,
+                "experiment_id": str(experiment_id),
+                "max_segments": max_segments,
+            },
+        )
+        sample_sizes = {}
+        total_segments = 0
+        for segment_value, variant_id, count, segment_count in rows:
+            sample_sizes[(segment_value, str(variant_id))] = count
+            total_segments = segment_count
+        return sample_sizes, total_segments
+
+    def _get_segment_conversion_counts(
+        self,
+        experiment_id: Union[str, UUID],
+        segment_by: str,
+        event_names: List[str],
+        top_segments: Optional[List[str]] = None,
+    ) -> Dict[Tuple[Optional[str], str, str], int]:
+        """
+        Count conversions per segment value, variant and event name in one grouped query.
+
+        Args:
+            experiment_id: ID of the experiment
+            segment_by: Property to segment by
+            event_names: Event names of the metrics to count
+            top_segments: Optional segment values to count separately; the
+                others are counted together under None
+
+        Returns:
+            Dictionary mapping (segment value, variant ID string, event name) to counts
+        """
+        conversions_query = text(
+            """
+            SELECT CASE
+                    WHEN CAST(:top_segments AS text[]) IS NULL
+                    OR jsonb_extract_path_text(event_metadata, :segment_key)
+                        = ANY(CAST(:top_segments AS text[]))
+                    THEN jsonb_extract_path_text(event_metadata, :segment_key)
+                END as segment_value,
+                variant_id, event_name, COUNT(*)
+            FROM events
+            WHERE experiment_id = :experiment_id
+            AND event_type = :event_type
+            AND event_name IN :event_names
+            AND event_metadata ? :segment_key
+            AND jsonb_extract_path_text(event_metadata, :segment_key) IS NOT NULL
+            AND jsonb_extract_path_text(event_metadata, :segment_key) != ''
+            GROUP BY 1, variant_id, event_name
+        """
+        ).bindparams(bindparam("event_names", expanding=True))
+
+        rows = self.db.execute(
+            conversions_query,
+            {
+                "experiment_id": str(experiment_id),
+                "event_type": EventType.CONVERSION.value,
+                "event_names": sorted(set(event_names)),
+                "segment_key": segment_by,
+                "top_segments": top_segments,
+            },
+        )
+        return {
+            (segment_value, str(variant_id), event_name): count
+            for segment_value, variant_id, event_name, count in rows
+        }
+
+    def get_continuous_metric_results(
+        self,
+        experiment_id: Union[str, UUID],
+        metric_id: Union[str, UUID],
+        use_cuped: bool = True,
+        pre_period_days: int = DEFAULT_PRE_PERIOD_DAYS,
+        num_resamples: int = DEFAULT_NUM_RESAMPLES,
+        workers: int = 1,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get results for a continuous metric such as revenue or latency.
+
+        Event values are aggregated per assigned user according to the
+        metric's aggregation_method and streamed into arrays. With CUPED, each
+        user's value is adjusted by the same aggregate over the
+        pre_period_days before the experiment started. Confidence intervals
+        and p-values come from a Poisson bootstrap.
+
+        Args:
+            experiment_id: ID of the experiment
+            metric_id: ID of the metric
+            use_cuped: Whether to apply CUPED variance reduction
+            pre_period_days: Length of the pre-experiment covariate window
+            num_resamples: Number of bootstrap resamples
+            workers: Number of processes to run the bootstrap on
+            seed: Optional seed for reproducible resamples
+
+        Returns:
+            Dictionary containing metric results and the duration of each stage
+        """
+        if num_resamples < 1:
+            raise ValueError("num_resamples must be at least 1")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if pre_period_days < 1:
+            raise ValueError("pre_period_days must be at least 1")
+
+        experiment = (
+            self.db.query(Experiment)
+            .options(joinedload(Experiment.variants), joinedload(Experiment.metrics))
+            .filter(Experiment.id == experiment_id)
+            .first()
+        )
+
+        if not experiment:
+            raise ValueError(f"Experiment {experiment_id} not found")
+
+        metric = next(
+            (m for m in experiment.metrics if str(m.id) == str(metric_id)), None
+        )
+        if not metric:
+            raise ValueError(
+                f"Metric {metric_id} not found in experiment {experiment_id}"
+            )
+
+        control_variant = next((v for v in experiment.variants if v.is_control), None)
+        if not control_variant:
+            raise ValueError(f"Experiment {experiment.id} has no control variant")
+
+        aggregation = metric.aggregation_method or "average"
+        if aggregation not in USER_AGGREGATIONS:
+            raise ValueError(
+                f"Invalid aggregation method: {aggregation}. "
+                f"Must be one of {', '.join(USER_AGGREGATIONS)}"
+            )
+
+        # A covariate needs a pre-experiment window
+        use_cuped = use_cuped and experiment.start_date is not None
+        timings = {}
+
+        stage_start = time.perf_counter()
+        user_values = self._stream_user_values(
+            experiment,
+            metric.event_name,
+            aggregation,
+            pre_period_days if use_cuped else None,
+        )
+        timings["load"] = time.perf_counter() - stage_start
+
+        variant_ids = [str(v.id) for v in experiment.variants]
+        empty = np.zeros(0)
+        values = {
+            variant_id: user_values.get(variant_id, (empty, empty))[0]
+            for variant_id in variant_ids
+        }
+        covariates = {
+            variant_id: user_values.get(variant_id, (empty, empty))[1]
+            for variant_id in variant_ids
+        }
+
+        stage_start = time.perf_counter()
+        if use_cuped:
+            cuped = cuped_adjust(values, covariates)
+            analyzed = cuped.adjusted
+        else:
+            cuped = None
+            analyzed = values
+        timings["cuped"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        seeds = np.random.SeedSequence(seed).generate_state(len(variant_ids))
+        variant_seeds = dict(zip(variant_ids, seeds))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                resampled = {
+                    variant_id: bootstrap_means(
+                        analyzed[variant_id],
+                        num_resamples,
+                        variant_seeds[variant_id],
+                        executor,
+                        workers,
+                    )
+                    for variant_id in variant_ids
+                }
+        else:
+            resampled = {
+                variant_id: bootstrap_means(
+                    analyzed[variant_id], num_resamples, variant_seeds[variant_id]
+                )
+                for variant_id in variant_ids
+            }
+        timings["bootstrap"] = time.perf_counter() - stage_start
+
+        def mean(array: np.ndarray) -> float:
+            return float(array.mean()) if array.size > 0 else 0.0
+
+        control_id = str(control_variant.id)
+        results = []
+        for variant in experiment.variants:
+            variant_id = str(variant.id)
+
+            if (
+                variant.is_control
+                or analyzed[variant_id].size == 0
+                or analyzed[control_id].size == 0
+            ):
+                p_value = 1.0
+                is_significant = False
+                relative_improvement = 0
+                effect_ci = None
+            else:
+                comparison = bootstrap_difference(
+                    resampled[control_id],
+                    resampled[variant_id],
+                    mean(analyzed[variant_id]) - mean(analyzed[control_id]),
+                )
+                p_value = comparison.p_value
+                is_significant = p_value < 0.05  # Using 95% confidence level
+                relative_improvement = self._relative_improvement(
+                    mean(analyzed[control_id]), mean(analyzed[variant_id])
+                )
+                effect_ci = list(comparison.confidence_interval)
+
+            results.append(
+                {
+                    "variant_id": variant_id,
+                    "variant_name": variant.name,
+                    "is_control": variant.is_control,
+                    "sample_size": int(values[variant_id].size),
+                    "mean": mean(values[variant_id]),
+                    "adjusted_mean": mean(analyzed[variant_id]),
+                    "confidence_interval": list(
+                        percentile_interval(resampled[variant_id])
+                    ),
+                    "effect_confidence_interval": effect_ci,
+                    "p_value": p_value,
+                    "is_significant": is_significant,
+                    "relative_improvement": relative_improvement,
+                }
+            )
+
+        return {
+            "metric_id": str(metric.id),
+            "metric_name": metric.name,
+            "event_name": metric.event_name,
+            "aggregation_method": aggregation,
+            "lower_is_better": bool(metric.lower_is_better),
+            "variant_results": results,
+            "has_significant_results": any(r["is_significant"] for r in results),
+            "cuped": {
+                "enabled": cuped is not None,
+                "theta": cuped.theta if cuped else None,
+                "variance_reduction": cuped.variance_reduction if cuped else None,
+            },
+            "num_resamples": num_resamples,
+            "timings": timings,
+        }
+
+    def _stream_user_values(
+        self,
+        experiment: Experiment,
+        event_name: str,
+        aggregation: str,
+        pre_period_days: Optional[int] = None,
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Aggregate event values per assigned user and stream them into arrays.
+
+        Rows are read through a server-side cursor in batches of
+        USER_VALUES_BATCH_SIZE, so only the arrays are held in memory.
+
+        Args:
+            experiment: Experiment model object
+            event_name: Event name of the metric
+            aggregation: Key of USER_AGGREGATIONS
+            pre_period_days: Length of the covariate window before the start
+                date, or None for no covariate (all zeros)
+
+        Returns:
+            Dictionary mapping variant ID strings to (values, covariates) arrays
+        """
+        aggregate, fill = USER_AGGREGATIONS[aggregation]
+        params = {"experiment_id": str(experiment.id), "event_name": event_name}
+        value_column = "e.value" if aggregate != "COUNT" else "e.id"
+
+        # Metric values come from this experiment's events only; the
+        # pre-period covariate reads the user's events before it started
+        window = []
+        in_experiment = "e.experiment_id = a.experiment_id"
+        if experiment.start_date is not None:
+            params["start_date"] = experiment.start_date.replace(tzinfo=timezone.utc)
+            in_experiment += " AND e.created_at::timestamptz >= :start_date"
+        if experiment.end_date is not None:
+            params["end_date"] = experiment.end_date.replace(tzinfo=timezone.utc)
+            window.append("AND e.created_at::timestamptz < :end_date")
+
+        if pre_period_days is not None:
+            params["pre_period_start"] = params["start_date"] - timedelta(
+                days=pre_period_days
+            )
+            window.append("AND e.created_at::timestamptz >= :pre_period_start")
+            covariate = (
+                f"COALESCE({aggregate}({value_column}) FILTER "
+                f"(WHERE e.created_at::timestamptz < :start_date), 0)"
+            )
+        else:
+            window.append(f"AND {in_experiment}")
+            covariate = "0"
+
+        user_values_query = text(
+            f"""
+            SELECT a.variant_id,
+                {aggregate}({value_column}) FILTER (WHERE {in_experiment}) as metric_value,
+                {covariate} as covariate
+            FROM assignments a
+            LEFT JOIN events e ON e.user_id = a.user_id
+                AND e.event_name = :event_name
+                {" ".join(window)}
+            WHERE a.experiment_id = :experiment_id
+            GROUP BY a.variant_id, a.user_id
+        """
+        )
+
+        result = self.db.execute(
+            user_values_query,
+            params,
+            execution_options={
+                "stream_results": True,
+                "yield_per": USER_VALUES_BATCH_SIZE,
+            },
+        )
+
+        batches: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        for rows in result.partitions():
+            row_variants = np.array([str(row[0]) for row in rows])
+            # NULL aggregates (users without events) become NaN
+            metric_values = np.array([row[1] for row in rows], dtype=np.float64)
+            covariate_values = np.array([row[2] for row in rows], dtype=np.float64)
+
+            if fill is not None:
+                metric_values = np.nan_to_num(metric_values, nan=fill)
+            for variant_id in np.unique(row_variants):
+                mask = (row_variants == variant_id) & ~np.isnan(metric_values)
+                batches.setdefault(str(variant_id), []).append(
+                    (metric_values[mask], covariate_values[mask])
+                )
+
+        return {
+            variant_id: (
+                np.concatenate([batch[0] for batch in variant_batches]),
+                np.concatenate([batch[1] for batch in variant_batches]),
+            )
+            for variant_id, variant_batches in batches.items()
+        }
@@ -2,23 +2,28 @@
 # Analysis and reporting service
 # backend/app/services/assignment_service.py
 import logging
-import json
-import hashlib
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 from sqlalchemy import func, and_, or_, desc
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, joinedload
 
+from backend.app.core.bucketing import AllocationTable, bucket_many
 from backend.app.models.experiment import Experiment, Variant, ExperimentStatus
 from backend.app.models.assignment import Assignment
 from backend.app.services.event_service import EventService
-from backend.app.services.rules_evaluation_service import RulesEvaluationService
-from backend.app.schemas.targeting_rule import TargetingRules
+from backend.app.services.rules_evaluation_service import (
+    RulesEvaluationService,
+    get_rules_evaluation_service,
+)
 
 logger = logging.getLogger(__name__)
 
+# Users handled per round trip by bulk_assign_users
+DEFAULT_BULK_CHUNK_SIZE = 1000
+
 
 class AssignmentService:
     """
@@ -31,11 +36,22 @@ class AssignmentService:
     - Managing sticky assignments
     """
 
-    def __init__(self, db: Session):
-        """Initialize with a database session."""
+    def __init__(
+        self,
+        db: Session,
+        rules_evaluation_service: Optional[RulesEvaluationService] = None,
+    ):
+        """
+        Initialize with a database session.
+
+        Args:
+            db: Database session
+            rules_evaluation_service: Rules engine to evaluate targeting with;
+                defaults to the process-wide shared instance
+        """
         self.db = db
         self.event_service = EventService(db)
-        self.rules_evaluation_service = RulesEvaluationService()
+        self.rules_evaluation_service = rules_evaluation_service or get_rules_evaluation_service()
 
     def get_assignment(
         self, user_id: str, experiment_id: Union[str, UUID]
@@ -284,15 +300,26 @@ class AssignmentService:
         experiment_id: Union[str, UUID],
         track_exposure: bool = True,
         context: Optional[Dict[str, Any]] = None,
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+        progress_callback: Optional[Callable[[Dict[str, int]], None]] = None,
     ) -> Dict[str, Any]:
         """
         Assign multiple users to an experiment in bulk.
 
+        Users are processed in chunks, each in its own transaction: one query
+        finds the users already assigned, the rest are hashed to variants and
+        written with a single multi-row insert (ON CONFLICT DO NOTHING, so users
+        assigned concurrently are skipped), followed by a single insert of
+        their exposure events.
+
         Args:
             user_ids: List of user IDs to assign
             experiment_id: ID of the experiment
             track_exposure: Whether to track exposure events
-            context: Optional context data for targeting
+            context: Optional context data for targeting, stored with exposure events
+            chunk_size: Number of users per chunk
+            progress_callback: Called after each chunk with running counts
+                (processed, total, assigned, skipped, errors)
 
         Returns:
             Dictionary with counts of assignments
@@ -300,6 +327,9 @@ class AssignmentService:
         if not user_ids:
             return {"assigned": 0, "skipped": 0, "errors": 0}
 
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
         # Get experiment to verify it exists and is active
         experiment = (
             self.db.query(Experiment)
@@ -317,65 +347,103 @@ class AssignmentService:
                 f"Cannot assign users to experiment with status: {experiment.status}"
             )
 
-        # Track counts
-        assigned = 0
-        skipped = 0
-        errors = 0
+        # Repeated user IDs are counted as skipped, like already-assigned users
+        unique_user_ids = list(dict.fromkeys(user_ids))
+        duplicates = len(user_ids) - len(unique_user_ids)
+        progress = {
+            "processed": duplicates,
+            "total": len(user_ids),
+            "assigned": 0,
+            "skipped": duplicates,
+            "errors": 0,
+        }
 
-        # Process each user
-        for user_id in user_ids:
+        for start in range(0, len(unique_user_ids), chunk_size):
+            chunk = unique_user_ids[start:start + chunk_size]
             try:
-                # Check for existing assignment
-                existing_assignment = (
-                    self.db.query(Assignment)
-                    .filter(
-                        Assignment.user_id == user_id,
-                        Assignment.experiment_id == experiment_id,
-                    )
-                    .first()
-                )
-
-                if existing_assignment:
-                    # Skip users who already have an assignment
-                    skipped += 1
-                    continue
-
-                # Assign user
-                variant_id = self._hash_user_to_variant(user_id, experiment)
-
-                # Create new assignment
-                assignment = Assignment(
-                    user_id=user_id,
-                    experiment_id=experiment_id,
-                    variant_id=variant_id,
+                assigned = self._bulk_assign_chunk(
+                    chunk, experiment, track_exposure, context
                 )
-
-                self.db.add(assignment)
-                assigned += 1
-
-                # Track exposure if requested (needs to happen after commit)
-                if track_exposure:
-                    self.event_service.track_exposure(
-                        user_id=user_id,
-                        experiment_id=str(experiment_id),
-                        variant_id=str(variant_id),
-                        properties=context,
-                    )
-
+                self.db.commit()
+                progress["assigned"] += assigned
+                progress["skipped"] += len(chunk) - assigned
             except Exception as e:
+                self.db.rollback()
                 logger.error(
-                    f"Error assigning user {user_id} to experiment {experiment_id}: {str(e)}"
+                    f"Error assigning {len(chunk)} users to experiment {experiment_id}: {str(e)}"
                 )
-                errors += 1
+                progress["errors"] += len(chunk)
 
-        # Commit all assignments in a single transaction
-        self.db.commit()
+            progress["processed"] += len(chunk)
+            if progress_callback:
+                progress_callback(dict(progress))
 
         logger.info(
-            f"Bulk assigned {assigned} users to experiment {experiment_id} (skipped: {skipped}, errors: {errors})"
+            f"Bulk assigned {progress['assigned']} users to experiment {experiment_id} "
+            f"(skipped: {progress['skipped']}, errors: {progress['errors']})"
         )
 
-        return {"assigned": assigned, "skipped": skipped, "errors": errors}
+        return {
+            "assigned": progress["assigned"],
+            "skipped": progress["skipped"],
+            "errors": progress["errors"],
+        }
+
+    def _bulk_assign_chunk(
+        self,
+        user_ids: List[str],
+        experiment: Experiment,
+        track_exposure: bool,
+        context: Optional[Dict[str, Any]],
+    ) -> int:
+        """
+        Assign one chunk of distinct users, without committing.
+
+        Args:
+            user_ids: Distinct user IDs
+            experiment: Experiment model object with variants
+            track_exposure: Whether to insert exposure events
+            context: Optional properties for the exposure events
+
+        Returns:
+            Number of users newly assigned
+        """
+        already_assigned = {
+            user_id
+            for (user_id,) in self.db.query(Assignment.user_id)
+            .filter(
+                Assignment.experiment_id == experiment.id,
+                Assignment.user_id.in_(user_ids),
+            )
+            .all()
+        }
+        unassigned = [user_id for user_id in user_ids if user_id not in already_assigned]
+        if not unassigned:
+            return 0
+
+        variant_ids = self._hash_users_to_variants(unassigned, experiment)
+        inserted = self.db.execute(
+            insert(Assignment)
+            .on_conflict_do_nothing(index_elements=["experiment_id", "user_id"])
+            .returning(Assignment.user_id, Assignment.variant_id),
+            [
+                {
+                    "user_id": user_id,
+                    "experiment_id": experiment.id,
+                    "variant_id": variant_id,
+                }
+                for user_id, variant_id in zip(unassigned, variant_ids)
+            ],
+        ).all()
+
+        if track_exposure and inserted:
+            self.event_service.insert_exposures(
+                experiment_id=experiment.id,
+                exposures=[(user_id, variant_id) for user_id, variant_id in inserted],
+                properties=context,
+            )
+
+        return len(inserted)
 
     def assign_user_with_targeting(
         self,
@@ -545,12 +613,12 @@ class AssignmentService:
                     'validation_passed': True,
                 }
 
-            # Parse targeting rules (assuming JSON stored in database)
-            if isinstance(experiment.targeting_rules, str):
-                targeting_rules_data = json.loads(experiment.targeting_rules)
-                targeting_rules = TargetingRules(**targeting_rules_data)
-            elif isinstance(experiment.targeting_rules, dict):
-                targeting_rules = TargetingRules(**experiment.targeting_rules)
+            # Parse targeting rules (assuming JSON stored in database); parsed
+            # rules are reused until the experiment is updated
+            if isinstance(experiment.targeting_rules, (str, dict)):
+                targeting_rules = self.rules_evaluation_service.get_targeting_rules(
+                    experiment.id, experiment.updated_at, experiment.targeting_rules
+                )
             else:
                 # Assume it's already a TargetingRules object
                 targeting_rules = experiment.targeting_rules
@@ -689,33 +757,37 @@ class AssignmentService:
         Returns:
             ID of the assigned variant
         """
-        if not experiment.variants:
-            raise ValueError(f"Experiment {experiment.id} has no variants")
+        return self._hash_users_to_variants([user_id], experiment)[0]
 
-        # Create a hash using user ID and experiment ID
-        hash_input = f"{user_id}:{experiment.id}"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
+    def _hash_users_to_variants(
+        self, user_ids: List[str], experiment: Experiment
+    ) -> List[Union[str, UUID]]:
+        """
+        Determine variant assignments for many users of one experiment.
 
-        # Get variants with their traffic allocations
-        variants = experiment.variants
+        The traffic allocation table is built once and all users are bucketed
+        in one batch.
 
-        # Create cumulative distribution based on traffic allocation
-        total = 0
-        distribution = []
-        for variant in variants:
-            total += variant.traffic_allocation
-            distribution.append((total, variant.id))
+        Args:
+            user_ids: IDs of the users to assign
+            experiment: Experiment model object with variants
 
-        # Normalize hash to be within range [0, 100)
-        bucket = hash_value % 100
+        Returns:
+            IDs of the assigned variants, in the order of user_ids
+        """
+        if not experiment.variants:
+            raise ValueError(f"Experiment {experiment.id} has no variants")
 
-        # Find the assigned variant
-        for threshold, variant_id in distribution:
-            if bucket < threshold:
-                return variant_id
+        # Cumulative distribution based on traffic allocation; buckets past
+        # the last threshold (allocations under 100) fall back to the last variant
+        variants = experiment.variants
+        table = AllocationTable(
+            [variant.traffic_allocation for variant in variants],
+            [variant.id for variant in variants],
+        )
 
-        # Fallback to last variant (should not happen if allocations sum to 100)
-        return variants[-1].id if variants else None
+        # Bucket in [0, 100) from the hash of user ID and experiment ID
+        return table.lookup_many(bucket_many(user_ids, salt=str(experiment.id)))
 
     def delete_assignments_by_experiment(self, experiment_id: Union[str, UUID]) -> int:
         """
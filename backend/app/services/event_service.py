@@ -1,23 +1,115 @@
 # Event tracking service
 # backend/app/services/event_service.py
+import gzip
+import io
 import logging
 import json
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
-from uuid import UUID
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, insert
 from sqlalchemy.orm import Session, joinedload
 
 from backend.app.models.event import Event, EventType
 from backend.app.models.experiment import Experiment, Variant
 from backend.app.models.assignment import Assignment
-from backend.app.schemas.tracking import EventCreate, EventResponse
+from backend.app.models.feature_flag import FeatureFlag
+from backend.app.schemas.tracking import EventBatchItem, EventCreate, EventResponse
 from backend.app.core.config import settings
 from backend.app.core.logging import logger
 
 logger = logging.getLogger(__name__)
 
+# Number of events written per COPY statement by the bulk loader
+COPY_CHUNK_SIZE = 10000
+
+# Characters of decompressed archive read at a time
+ARCHIVE_READ_SIZE = 1 << 16
+
+# Columns written by the bulk loader, in COPY order
+COPY_COLUMNS = (
+    "id",
+    "created_at",
+    "updated_at",
+    "event_type",
+    "event_name",
+    "user_id",
+    "experiment_id",
+    "feature_flag_id",
+    "variant_id",
+    "value",
+    "event_metadata",
+    "source_event_id",
+)
+
+# Per-transaction table each bulk load chunk is copied into before insertion
+COPY_STAGING_TABLE = "events_load_staging"
+
+_ARRAY_SEPARATORS = frozenset(" \t\r\n[,")
+
+
+def iter_archived_events(
+    archive: Union[str, BinaryIO], read_size: int = ARCHIVE_READ_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events from a gzip JSON archive written by the event processor.
+
+    The archive holds one JSON array of events; it is decoded one event at a
+    time, so memory is bounded by the read size and the largest event.
+
+    Args:
+        archive: Path or binary file object of the archive
+        read_size: Characters of decompressed text read at a time
+
+    Yields:
+        Event dictionaries in archive order
+    """
+    decoder = json.JSONDecoder()
+    with gzip.open(archive, "rt", encoding="utf-8") as stream:
+        buffer, position, eof = "", 0, False
+        while True:
+            while position < len(buffer) and buffer[position] in _ARRAY_SEPARATORS:
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+
+            try:
+                event, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    if position < len(buffer):
+                        raise ValueError("Archive is not a valid JSON array of events")
+                    return
+                chunk = stream.read(read_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+            yield event
+
+
+def _utc_isoformat(value: Any) -> Optional[str]:
+    """Format a datetime or ISO timestamp in UTC; naive ones are taken as UTC."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _csv_field(value: Any) -> str:
+    """Format a value for COPY CSV; only unquoted empty fields are NULL."""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
 
 class EventService:
     """
@@ -134,6 +226,46 @@ class EventService:
         # Track the event
         return self.track_event(event_data)
 
+    def insert_exposures(
+        self,
+        experiment_id: Union[str, UUID],
+        exposures: List[Tuple[str, Union[str, UUID]]],
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Insert exposure events for many users with a single statement.
+
+        The rows are added to the current transaction; the caller commits.
+
+        Args:
+            experiment_id: ID of the experiment
+            exposures: (user_id, variant_id) pairs
+            properties: Optional properties stored with every event
+
+        Returns:
+            Number of events inserted
+        """
+        if not exposures:
+            return 0
+
+        timestamp = datetime.now(timezone.utc).isoformat()
+        self.db.execute(
+            insert(Event),
+            [
+                {
+                    "event_type": EventType.EXPOSURE.value,
+                    "event_name": "variant_exposure",
+                    "user_id": user_id,
+                    "experiment_id": experiment_id,
+                    "variant_id": variant_id,
+                    "event_metadata": properties or {},
+                    "created_at": timestamp,
+                }
+                for user_id, variant_id in exposures
+            ],
+        )
+        return len(exposures)
+
     def get_events_by_experiment(
         self,
         experiment_id: Union[str, UUID],
@@ -292,29 +424,297 @@ class EventService:
             for event in events
         ]
 
-    def track_events_batch(self, events_data: List[EventCreate]) -> List[Event]:
-        """Track multiple events in a batch."""
-        try:
-            events = []
-            for event_data in events_data:
-                # Convert Pydantic model to dict and create DB model
-                event_dict = event_data.model_dump()
-                event = Event(**event_dict)
-                events.append(event)
-
-            # Add all events and commit
-            self.db.add_all(events)
-            self.db.commit()
+    def track_events_batch(
+        self, events: List[EventBatchItem]
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Track a batch of events referencing experiments and flags by key.
 
-            # Refresh all events
-            for event in events:
-                self.db.refresh(event)
+        Experiment keys, feature flag keys and the assignments of the users
+        are resolved with one IN query each, and all valid events are written
+        with one multi-row insert, without reloading the rows.
 
-            return events
-        except Exception as e:
-            logger.error(f"Error tracking events batch: {str(e)}")
-            self.db.rollback()
-            raise
+        Args:
+            events: Events to track
+
+        Returns:
+            Tuple of the number of events tracked and errors for the events
+            that were skipped, each with the event's index in the batch
+        """
+        experiment_keys = {e.experiment_key for e in events if e.experiment_key}
+        flag_keys = {e.feature_flag_key for e in events if e.feature_flag_key}
+
+        experiment_ids = {}
+        if experiment_keys:
+            experiment_ids = dict(
+                self.db.query(Experiment.key, Experiment.id).filter(
+                    Experiment.key.in_(experiment_keys)
+                )
+            )
+
+        flag_ids = {}
+        if flag_keys:
+            flag_ids = dict(
+                self.db.query(FeatureFlag.key, FeatureFlag.id).filter(
+                    FeatureFlag.key.in_(flag_keys)
+                )
+            )
+
+        # Assignments are unique per (experiment, user)
+        variant_ids = {}
+        assignment_users = {
+            e.user_id for e in events if experiment_ids.get(e.experiment_key)
+        }
+        if assignment_users:
+            assignments = (
+                self.db.query(
+                    Assignment.experiment_id, Assignment.user_id, Assignment.variant_id
+                )
+                .filter(
+                    Assignment.experiment_id.in_(set(experiment_ids.values())),
+                    Assignment.user_id.in_(assignment_users),
+                )
+            )
+            variant_ids = {
+                (experiment_id, user_id): variant_id
+                for experiment_id, user_id, variant_id in assignments
+            }
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        errors = []
+        for index, event in enumerate(events):
+            experiment_id = experiment_ids.get(event.experiment_key)
+            feature_flag_id = flag_ids.get(event.feature_flag_key)
+
+            if not experiment_id and not feature_flag_id:
+                errors.append(
+                    {
+                        "index": index,
+                        "event_type": event.event_type,
+                        "user_id": event.user_id,
+                        "error": (
+                            f"Neither experiment key '{event.experiment_key}' nor "
+                            f"feature flag key '{event.feature_flag_key}' found"
+                        ),
+                    }
+                )
+                continue
+
+            rows.append(
+                {
+                    "event_type": event.event_type,
+                    "user_id": event.user_id,
+                    "experiment_id": experiment_id,
+                    "feature_flag_id": feature_flag_id,
+                    "variant_id": variant_ids.get((experiment_id, event.user_id)),
+                    "value": event.value,
+                    "event_metadata": event.metadata,
+                    "created_at": (event.timestamp or now).isoformat(),
+                }
+            )
+
+        if rows:
+            try:
+                self.db.execute(insert(Event), rows)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Error tracking events batch: {str(e)}")
+                self.db.rollback()
+                raise
+
+        return len(rows), errors
+
+    def load_events(
+        self,
+        events: Iterable[Dict[str, Any]],
+        chunk_size: int = COPY_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Bulk load events with COPY, for backfills and archive replays.
+
+        Events are in the format archived by the event processor (see
+        iter_archived_events). Experiments, variants and feature flags are
+        preloaded into maps once, so references are resolved in memory, and
+        the events are written in chunks of chunk_size rows. Each chunk is
+        copied into a staging table with COPY FROM STDIN, inserted with
+        ON CONFLICT DO NOTHING on the archived event_id, and committed, so
+        memory stays bounded and a failed load can be resumed by loading the
+        same events again: events already loaded are counted as duplicates.
+        Events without an event_id cannot be deduplicated. Unknown or
+        malformed experiment, variant and feature flag references are stored
+        as NULL. Timestamps are stored in UTC; events with an unparseable
+        timestamp are skipped.
+
+        Args:
+            events: Iterable of event dictionaries
+            chunk_size: Number of events per COPY
+
+        Returns:
+            Dictionary with the number of events loaded, skipped and already
+            loaded before, the elapsed seconds and the load rate in rows per
+            second
+        """
+        start = time.perf_counter()
+
+        experiment_ids = {}
+        for experiment_id, experiment_key in self.db.query(
+            Experiment.id, Experiment.key
+        ):
+            experiment_ids[str(experiment_id)] = experiment_id
+            if experiment_key:
+                experiment_ids[experiment_key] = experiment_id
+
+        variant_ids = {}
+        for variant_id, experiment_id, name in self.db.query(
+            Variant.id, Variant.experiment_id, Variant.name
+        ):
+            variant_ids[(experiment_id, name)] = variant_id
+            variant_ids[(experiment_id, str(variant_id))] = variant_id
+
+        flag_ids = {}
+        for flag_id, flag_key in self.db.query(FeatureFlag.id, FeatureFlag.key):
+            flag_ids[str(flag_id)] = flag_id
+            flag_ids[flag_key] = flag_id
+
+        table = self.db.get_bind().dialect.identifier_preparer.format_table(
+            Event.__table__
+        )
+        columns = ", ".join(COPY_COLUMNS)
+        # The staging table outlives a chunk's commit when the session runs
+        # inside an outer transaction, so it is reused and emptied per chunk
+        staging_sql = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {COPY_STAGING_TABLE} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        truncate_sql = f"TRUNCATE {COPY_STAGING_TABLE}"
+        copy_sql = (
+            f"COPY {COPY_STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        )
+        insert_sql = (
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT {columns} FROM {COPY_STAGING_TABLE} "
+            "ON CONFLICT (source_event_id) DO NOTHING"
+        )
+        now = datetime.now(timezone.utc)
+        updated_at = now.replace(tzinfo=None).isoformat()
+
+        loaded = 0
+        skipped = 0
+        duplicates = 0
+        buffer = io.StringIO()
+        buffered = 0
+
+        def flush():
+            nonlocal buffer, buffered, loaded, duplicates
+            buffer.seek(0)
+            try:
+                cursor = self.db.connection().connection.cursor()
+                try:
+                    cursor.execute(staging_sql)
+                    cursor.execute(truncate_sql)
+                    cursor.copy_expert(copy_sql, buffer)
+                    cursor.execute(insert_sql)
+                    inserted = cursor.rowcount
+                finally:
+                    cursor.close()
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Error bulk loading events: {str(e)}")
+                self.db.rollback()
+                raise
+            loaded += inserted
+            duplicates += buffered - inserted
+            buffer, buffered = io.StringIO(), 0
+
+        for event in events:
+            event_type = event.get("event_type")
+            user_id = event.get("user_id")
+            created_at = _utc_isoformat(event.get("timestamp") or now)
+            if not event_type or not user_id or not created_at:
+                skipped += 1
+                continue
+
+            experiment_id = experiment_ids.get(
+                event.get("experiment_id")
+            ) or experiment_ids.get(event.get("experiment_key"))
+            variant = event.get("variant_id") or event.get("variant")
+            variant_id = (
+                variant_ids.get((experiment_id, variant)) if variant else None
+            )
+            feature_flag_id = flag_ids.get(
+                event.get("feature_flag_id")
+            ) or flag_ids.get(event.get("feature_flag_key"))
+
+            properties = event.get("properties") or {}
+            value = event.get("value", properties.get("value"))
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                value = None
+
+            metadata = dict(properties)
+            if event.get("metadata"):
+                metadata["metadata"] = event["metadata"]
+            event_id = event.get("event_id") or None
+            if event_id:
+                metadata["event_id"] = event_id
+
+            buffer.write(
+                ",".join(
+                    (
+                        _csv_field(uuid4()),
+                        _csv_field(created_at),
+                        _csv_field(updated_at),
+                        _csv_field(event_type),
+                        _csv_field(event.get("event_name") or event_type),
+                        _csv_field(user_id),
+                        _csv_field(experiment_id),
+                        _csv_field(feature_flag_id),
+                        _csv_field(variant_id),
+                        _csv_field(value),
+                        _csv_field(json.dumps(metadata, default=str)),
+                        _csv_field(event_id),
+                    )
+                )
+            )
+            buffer.write("\n")
+            buffered += 1
+            if buffered >= chunk_size:
+                flush()
+
+        if buffered:
+            flush()
+
+        elapsed = time.perf_counter() - start
+        rows_per_second = loaded / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Bulk loaded {loaded} events ({skipped} skipped, "
+            f"{duplicates} already loaded) in {elapsed:.2f}s, "
+            f"{rows_per_second:.0f} rows/sec"
+        )
+        return {
+            "loaded": loaded,
+            "skipped": skipped,
+            "duplicates": duplicates,
+            "elapsed_seconds": elapsed,
+            "rows_per_second": rows_per_second,
+        }
+
+    def load_events_from_archive(
+        self,
+        archive: Union[str, BinaryIO],
+        chunk_size: int = COPY_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Bulk load the events of a gzip JSON archive written by the event processor.
+
+        Args:
+            archive: Path or binary file object of the archive
+            chunk_size: Number of events per COPY
+
+        Returns:
+            Load statistics, see load_events
+        """
+        return self.load_events(iter_archived_events(archive), chunk_size)
 
     def delete_events_by_experiment(self, experiment_id: Union[str, UUID]) -> int:
         """
@@ -1,7 +1,6 @@
 # Feature flag management service
 # backend/app/services/feature_flag_service.py
 import logging
-import hashlib
 import json
 import time
 from datetime import datetime, timezone
@@ -11,10 +10,14 @@ from uuid import UUID
 from sqlalchemy import func, and_, or_, desc
 from sqlalchemy.orm import Session, joinedload
 
+from backend.app.core.bucketing import bucket
+from backend.app.core.flag_telemetry import FlagTelemetryBuffer, flag_telemetry
 from backend.app.models.feature_flag import FeatureFlag, FeatureFlagStatus
 from backend.app.schemas.feature_flag import FeatureFlagCreate, FeatureFlagUpdate
-from backend.app.services.metrics_service import MetricsService
-from backend.app.schemas.metrics import ErrorLogCreate
+from backend.app.services.rules_evaluation_service import (
+    RulesEvaluationService,
+    get_rules_evaluation_service,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -30,9 +33,25 @@ class FeatureFlagService:
     - Managing targeting rules and rollout percentages
     """
 
-    def __init__(self, db: Session):
-        """Initialize with a database session."""
+    def __init__(
+        self,
+        db: Session,
+        rules_evaluation_service: Optional[RulesEvaluationService] = None,
+        telemetry: Optional[FlagTelemetryBuffer] = None,
+    ):
+        """
+        Initialize with a database session.
+
+        Args:
+            db: Database session
+            rules_evaluation_service: Rules engine for TargetingRules-style flag
+                rules; defaults to the process-wide shared instance
+            telemetry: Buffer for evaluation metrics; defaults to the
+                process-wide buffer
+        """
         self.db = db
+        self.rules_evaluation_service = rules_evaluation_service or get_rules_evaluation_service()
+        self.telemetry = telemetry or flag_telemetry
 
     def get_feature_flag(self, flag_id: Union[str, UUID]) -> Optional[Dict[str, Any]]:
         """
@@ -134,6 +153,8 @@ class FeatureFlagService:
             if not flag:
                 return None
 
+            previous_rules = flag.targeting_rules
+
             # Update flag with new data
             update_data = flag_data.model_dump(exclude_unset=True)
 
@@ -154,6 +175,9 @@ class FeatureFlagService:
             self.db.commit()
             self.db.refresh(flag)
 
+            if "targeting_rules" in update_data:
+                self._invalidate_targeting_cache(previous_rules)
+
             return self._feature_flag_to_dict(flag)
         except Exception as e:
             logger.error(f"Error updating feature flag: {str(e)}")
@@ -169,10 +193,13 @@ class FeatureFlagService:
         """
         flag_id = str(flag.id)
         flag_name = flag.name
+        targeting_rules = flag.targeting_rules
 
         self.db.delete(flag)
         self.db.commit()
 
+        self._invalidate_targeting_cache(targeting_rules)
+
         logger.info(f"Deleted feature flag {flag_id}: {flag_name}")
 
     def activate_feature_flag(self, flag: FeatureFlag) -> Dict[str, Any]:
@@ -289,6 +316,26 @@ class FeatureFlagService:
                             flag, user_id, rule.get("percentage", 100)
                         )
                         return result
+            elif isinstance(rules, dict) and rules.get("rules"):
+                # TargetingRules configuration; the rule's own rollout percentage
+                # is applied by the rules engine
+                targeting_rules = self.rules_evaluation_service.get_targeting_rules(
+                    flag.id, flag.updated_at, rules
+                )
+                evaluation = self.rules_evaluation_service.evaluate(
+                    targeting_rules, {**context, "user_id": user_id}
+                )
+                if evaluation.error:
+                    raise ValueError(evaluation.error)
+                # The engine returns the default rule when no rule matches;
+                # the flag's own rollout percentage applies instead
+                default_rule = targeting_rules.default_rule
+                if evaluation.matched and not (
+                    default_rule and evaluation.matched_rule_id == default_rule.id
+                ):
+                    targeting_rule_id = evaluation.matched_rule_id
+                    result = True
+                    return result
 
             # If no rules match, use the default value
             result = self._evaluate_percentage_rollout(flag, user_id)
@@ -308,29 +355,23 @@ class FeatureFlagService:
             latency_ms = (time.time() - start_time) * 1000  # Convert to milliseconds
 
             try:
-                # Record metrics (in a separate try-except to avoid affecting the main flow)
-                MetricsService.record_flag_evaluation(
-                    db=self.db,
+                # Buffer metrics in memory; they are written in bulk in the background
+                self.telemetry.record_evaluation(
                     feature_flag_id=flag.id,
-                    user_id=user_id,
                     value=result,
                     targeting_rule_id=targeting_rule_id,
                     latency_ms=latency_ms,
-                    metadata={
-                        "context": context,
-                    }
                 )
 
                 # If there was an error, log it separately
                 if error:
-                    error_data = ErrorLogCreate(
+                    self.telemetry.record_error(
                         error_type="flag_evaluation_error",
+                        message=error,
                         feature_flag_id=flag.id,
                         user_id=user_id,
-                        message=error,
-                        request_data={"context": context}
+                        request_data={"context": context},
                     )
-                    MetricsService.log_error(db=self.db, data=error_data)
             except Exception as metrics_error:
                 # Don't let metrics collection errors affect flag evaluation
                 logger.error(f"Failed to record metrics: {str(metrics_error)}")
@@ -406,6 +447,20 @@ class FeatureFlagService:
         # Unknown rule type
         return False
 
+    def _invalidate_targeting_cache(self, targeting_rules: Any) -> None:
+        """
+        Drop cached rule evaluations for a flag whose rules changed or were removed.
+
+        Args:
+            targeting_rules: The flag's previous targeting_rules value
+        """
+        if not isinstance(targeting_rules, dict):
+            return
+
+        for rule in targeting_rules.get("rules") or []:
+            if isinstance(rule, dict) and rule.get("id"):
+                self.rules_evaluation_service.invalidate_rule_cache(rule["id"])
+
     def _evaluate_percentage_rollout(
         self, flag: FeatureFlag, user_id: str, percentage: Optional[int] = None
     ) -> bool:
@@ -430,15 +485,9 @@ class FeatureFlagService:
         if percentage >= 100:
             return True
 
-        # Create a hash using user ID and flag key for deterministic assignment
-        hash_input = f"{user_id}:{flag.key}"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-
-        # Get bucket (0-99)
-        bucket = hash_value % 100
-
-        # User is in the rollout if their bucket is less than the percentage
-        return bucket < percentage
+        # Bucket (0-99) from the hash of user ID and flag key, for deterministic assignment;
+        # the user is in the rollout if their bucket is less than the percentage
+        return bucket(user_id, salt=flag.key) < percentage
 
     def _feature_flag_to_dict(self, flag: FeatureFlag) -> Dict[str, Any]:
         """
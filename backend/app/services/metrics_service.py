@@ -6,10 +6,10 @@ feature flag evaluation and querying aggregated metrics for analysis.
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any, Union, Tuple
 from uuid import UUID
-from sqlalchemy import func, and_, or_, desc, text
+from sqlalchemy import func, and_, or_, desc, literal, select, text
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import extract
 from sqlalchemy.dialects.postgresql import insert
@@ -20,6 +20,7 @@ from backend.app.models.metrics.metric import (
     ErrorLog,
     MetricType,
     AggregationPeriod,
+    aggregation_key,
 )
 from backend.app.schemas.metrics import (
     RawMetricCreate,
@@ -32,6 +33,13 @@ from backend.app.core.logging import get_logger
 logger = get_logger(__name__)
 
 
+def _to_naive_utc(value: datetime) -> datetime:
+    """Convert a datetime to naive UTC, as stored in metric timestamps."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class MetricsService:
     """
     Service for managing metrics collection and querying.
@@ -184,6 +192,38 @@ class MetricsService:
 
         return error_log
 
+    @staticmethod
+    def bulk_insert_raw_metrics(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many raw metrics in one statement, without committing.
+
+        Args:
+            db: Database session
+            rows: Raw metric column values
+
+        Returns:
+            Number of rows inserted
+        """
+        if rows:
+            db.execute(insert(RawMetric), rows)
+        return len(rows)
+
+    @staticmethod
+    def bulk_insert_error_logs(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many error logs in one statement, without committing.
+
+        Args:
+            db: Database session
+            rows: Error log column values
+
+        Returns:
+            Number of rows inserted
+        """
+        if rows:
+            db.execute(insert(ErrorLog), rows)
+        return len(rows)
+
     @staticmethod
     def aggregate_metrics(
         db: Session,
@@ -196,6 +236,13 @@ class MetricsService:
         """
         Aggregate raw metrics into summary data.
 
+        Runs as a single INSERT ... SELECT ... ON CONFLICT DO UPDATE on the
+        aggregation key. Aggregation resumes from the latest period_start
+        already aggregated for the period, so each run only rescans the last,
+        possibly incomplete period and newer raw metrics; raw metrics arriving
+        for older periods are not picked up. Periods are always recomputed
+        from their start, so start_time is rounded down to a period boundary.
+
         Args:
             db: Database session
             period: Aggregation period (minute, hour, day, etc.)
@@ -205,38 +252,54 @@ class MetricsService:
             metric_type: Optional filter by metric type
 
         Returns:
-            Number of aggregation records created
+            Number of aggregation records created or updated
         """
-        end_time = end_time or datetime.utcnow()
+        end_time = _to_naive_utc(end_time or datetime.utcnow())
+        start_time = _to_naive_utc(start_time) if start_time else None
 
         # Define the SQL truncation function based on the period
-        trunc_func = None
-        if period == AggregationPeriod.MINUTE:
-            trunc_func = func.date_trunc('minute', RawMetric.timestamp)
-        elif period == AggregationPeriod.HOUR:
-            trunc_func = func.date_trunc('hour', RawMetric.timestamp)
-        elif period == AggregationPeriod.DAY:
-            trunc_func = func.date_trunc('day', RawMetric.timestamp)
-        elif period == AggregationPeriod.WEEK:
-            trunc_func = func.date_trunc('week', RawMetric.timestamp)
-        elif period == AggregationPeriod.MONTH:
-            trunc_func = func.date_trunc('month', RawMetric.timestamp)
-        elif period == AggregationPeriod.TOTAL:
+        if period == AggregationPeriod.TOTAL:
             # For total, we use a fixed date as the period start
             trunc_func = func.to_timestamp(0)
+        else:
+            trunc_func = func.date_trunc(period.value, RawMetric.timestamp)
 
-        # Build the base query
-        query = db.query(
+        # Resume from the latest aggregated period
+        last_query = db.query(func.max(AggregatedMetric.period_start)).filter(
+            AggregatedMetric.period == period
+        )
+        if feature_flag_id:
+            last_query = last_query.filter(
+                AggregatedMetric.feature_flag_id == feature_flag_id
+            )
+        if metric_type:
+            last_query = last_query.filter(
+                AggregatedMetric.metric_type == metric_type
+            )
+        last_period_start = last_query.scalar()
+
+        if last_period_start and (
+            start_time is None or last_period_start > start_time
+        ):
+            start_time = last_period_start
+
+        # Build the aggregation query
+        now = datetime.utcnow()
+        query = select(
+            func.gen_random_uuid(),
+            literal(now),
+            literal(now),
             RawMetric.metric_type,
+            literal(period.value),
             trunc_func.label('period_start'),
             RawMetric.feature_flag_id,
             RawMetric.targeting_rule_id,
             RawMetric.segment_id,
-            func.sum(RawMetric.count).label('count'),
-            func.sum(RawMetric.value * RawMetric.count).label('sum_value'),
-            func.min(RawMetric.value).label('min_value'),
-            func.max(RawMetric.value).label('max_value'),
-            func.count(func.distinct(RawMetric.user_id)).label('distinct_users')
+            func.sum(RawMetric.count),
+            func.sum(RawMetric.value * RawMetric.count),
+            func.min(RawMetric.value),
+            func.max(RawMetric.value),
+            func.count(func.distinct(RawMetric.user_id))
         ).group_by(
             RawMetric.metric_type,
             'period_start',
@@ -247,62 +310,53 @@ class MetricsService:
 
         # Apply filters
         if start_time:
-            query = query.filter(RawMetric.timestamp >= start_time)
+            if period != AggregationPeriod.TOTAL:
+                start_time = func.date_trunc(period.value, literal(start_time))
+            query = query.where(RawMetric.timestamp >= start_time)
 
-        query = query.filter(RawMetric.timestamp < end_time)
+        query = query.where(RawMetric.timestamp < end_time)
 
         if feature_flag_id:
-            query = query.filter(RawMetric.feature_flag_id == feature_flag_id)
+            query = query.where(RawMetric.feature_flag_id == feature_flag_id)
 
         if metric_type:
-            query = query.filter(RawMetric.metric_type == metric_type)
-
-        # Execute query to get aggregation results
-        aggregation_results = query.all()
-
-        # Insert aggregated data
-        metrics_created = 0
-
-        for result in aggregation_results:
-            # Check if an aggregation record already exists
-            existing = db.query(AggregatedMetric).filter(
-                AggregatedMetric.metric_type == result.metric_type,
-                AggregatedMetric.period == period,
-                AggregatedMetric.period_start == result.period_start,
-                AggregatedMetric.feature_flag_id == result.feature_flag_id,
-                AggregatedMetric.targeting_rule_id == result.targeting_rule_id,
-                AggregatedMetric.segment_id == result.segment_id
-            ).first()
-
-            if existing:
-                # Update existing record
-                existing.count = result.count
-                existing.sum_value = result.sum_value
-                existing.min_value = result.min_value
-                existing.max_value = result.max_value
-                existing.distinct_users = result.distinct_users
-                db.add(existing)
-            else:
-                # Create new aggregation record
-                agg_metric = AggregatedMetric(
-                    metric_type=result.metric_type,
-                    period=period,
-                    period_start=result.period_start,
-                    feature_flag_id=result.feature_flag_id,
-                    targeting_rule_id=result.targeting_rule_id,
-                    segment_id=result.segment_id,
-                    count=result.count,
-                    sum_value=result.sum_value,
-                    min_value=result.min_value,
-                    max_value=result.max_value,
-                    distinct_users=result.distinct_users
-                )
-                db.add(agg_metric)
-                metrics_created += 1
+            query = query.where(RawMetric.metric_type == metric_type)
+
+        stmt = insert(AggregatedMetric).from_select(
+            [
+                'id',
+                'created_at',
+                'updated_at',
+                'metric_type',
+                'period',
+                'period_start',
+                'feature_flag_id',
+                'targeting_rule_id',
+                'segment_id',
+                'count',
+                'sum_value',
+                'min_value',
+                'max_value',
+                'distinct_users',
+            ],
+            query,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=aggregation_key(AggregatedMetric),
+            set_={
+                'count': stmt.excluded.count,
+                'sum_value': stmt.excluded.sum_value,
+                'min_value': stmt.excluded.min_value,
+                'max_value': stmt.excluded.max_value,
+                'distinct_users': stmt.excluded.distinct_users,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
 
+        result = db.execute(stmt)
         db.commit()
 
-        return metrics_created
+        return result.rowcount
 
     @staticmethod
     def get_metrics_summary(
@@ -0,0 +1,463 @@
+# Experiment results rollup service
+# backend/app/services/results_rollup_service.py
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import TIMESTAMP, Date, and_, cast, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from backend.app.core.sequential_testing import SequentialTest, SufficientStats
+from backend.app.models.assignment import Assignment
+from backend.app.models.event import Event, EventType
+from backend.app.models.experiment import Experiment, ExperimentStatus, Variant
+from backend.app.models.experiment_results import (
+    ExperimentDailyStats,
+    ExperimentResultsWatermark,
+    ExperimentSequentialTest,
+)
+
+logger = logging.getLogger(__name__)
+
+# Events inserted more recently than this are left for the next run, so that
+# rows committed late with an earlier inserted_at (the start time of their
+# transaction) are not skipped by the watermark
+DEFAULT_SETTLE_SECONDS = 60
+
+
+class ResultsRollupService:
+    """
+    Service for incrementally materializing experiment result statistics.
+
+    This service:
+    - Folds conversion events inserted after an experiment's watermark into
+      per variant, event name and day sufficient statistics
+    - Scans by the server-assigned inserted_at, so events with client or
+      archived timestamps older than the watermark are still folded in
+    - Advances the experiment's sequential tests with the same delta
+    - Advances the watermark in the same transaction
+    - Reads statistics as the rollup plus the events past the watermark
+    """
+
+    def __init__(self, db: Session):
+        """Initialize with a database session."""
+        self.db = db
+
+    def refresh_experiment(
+        self,
+        experiment_id: Union[str, UUID],
+        up_to: Optional[datetime] = None,
+    ) -> int:
+        """
+        Fold the events inserted since the last refresh into the rollup.
+
+        Args:
+            experiment_id: ID of the experiment
+            up_to: Fold events inserted up to this time; defaults to
+                DEFAULT_SETTLE_SECONDS before now
+
+        Returns:
+            Number of daily statistics rows inserted or updated
+        """
+        cutoff = self._cutoff(up_to)
+
+        try:
+            # Lock the watermark so concurrent refreshes fold each event once
+            watermark = self._lock_watermark(experiment_id)
+            after = watermark.events_processed_until if watermark else None
+            if after is not None and after >= cutoff:
+                # Release the lock, there is nothing new to fold in
+                self.db.rollback()
+                return 0
+
+            count = self._fold_events(experiment_id, watermark, after, cutoff)
+            self.db.commit()
+            return count
+
+        except Exception as e:
+            logger.error(f"Error refreshing results rollup for experiment {experiment_id}: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def rebuild_experiment(
+        self,
+        experiment_id: Union[str, UUID],
+        up_to: Optional[datetime] = None,
+    ) -> int:
+        """
+        Discard an experiment's rollup and fold all of its events in again.
+
+        Events written by backfills are picked up by the next refresh, since
+        they are inserted after the watermark. A rebuild is needed when
+        events were deleted or rewritten in place. Sequential tests restart
+        from the rebuilt totals.
+
+        Args:
+            experiment_id: ID of the experiment
+            up_to: Fold events inserted up to this time; see refresh_experiment
+
+        Returns:
+            Number of daily statistics rows inserted
+        """
+        cutoff = self._cutoff(up_to)
+
+        try:
+            watermark = self._lock_watermark(experiment_id)
+            self.db.query(ExperimentDailyStats).filter(
+                ExperimentDailyStats.experiment_id == experiment_id
+            ).delete(synchronize_session=False)
+            self.db.query(ExperimentSequentialTest).filter(
+                ExperimentSequentialTest.experiment_id == experiment_id
+            ).delete(synchronize_session=False)
+
+            count = self._fold_events(experiment_id, watermark, None, cutoff)
+            self.db.commit()
+            logger.info(f"Rebuilt results rollup for experiment {experiment_id}")
+            return count
+
+        except Exception as e:
+            logger.error(f"Error rebuilding results rollup for experiment {experiment_id}: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def refresh_active_experiments(self, up_to: Optional[datetime] = None) -> int:
+        """
+        Refresh the rollup of every active experiment.
+
+        Args:
+            up_to: Fold events inserted up to this time; see refresh_experiment
+
+        Returns:
+            Total number of daily statistics rows inserted or updated
+        """
+        experiment_ids = [
+            experiment_id
+            for (experiment_id,) in self.db.query(Experiment.id)
+            .filter(Experiment.status == ExperimentStatus.ACTIVE)
+            .all()
+        ]
+
+        total_rows = 0
+        for experiment_id in experiment_ids:
+            try:
+                total_rows += self.refresh_experiment(experiment_id, up_to)
+            except Exception:
+                # Already logged and rolled back; continue with the next experiment
+                continue
+
+        return total_rows
+
+    def get_conversion_stats(
+        self, experiment_id: Union[str, UUID], event_names: List[str]
+    ) -> Dict[Tuple[str, str], SufficientStats]:
+        """
+        Get conversion statistics per variant and event name.
+
+        The rollup and the experiment's watermark are read in one statement,
+        then only events inserted after that watermark are scanned.
+
+        Args:
+            experiment_id: ID of the experiment
+            event_names: Event names of the metrics
+
+        Returns:
+            Dictionary mapping (variant ID string, event name) to statistics
+        """
+        if not event_names:
+            return {}
+        event_names = set(event_names)
+
+        rows = (
+            self.db.query(
+                ExperimentResultsWatermark.events_processed_until,
+                ExperimentDailyStats.variant_id,
+                ExperimentDailyStats.event_name,
+                func.sum(ExperimentDailyStats.count),
+                func.sum(ExperimentDailyStats.sum_value),
+                func.sum(ExperimentDailyStats.sum_squares),
+            )
+            .select_from(ExperimentResultsWatermark)
+            .outerjoin(
+                ExperimentDailyStats,
+                and_(
+                    ExperimentDailyStats.experiment_id == ExperimentResultsWatermark.experiment_id,
+                    ExperimentDailyStats.event_name.in_(event_names),
+                ),
+            )
+            .filter(ExperimentResultsWatermark.experiment_id == experiment_id)
+            .group_by(
+                ExperimentResultsWatermark.events_processed_until,
+                ExperimentDailyStats.variant_id,
+                ExperimentDailyStats.event_name,
+            )
+            .all()
+        )
+
+        stats: Dict[Tuple[str, str], SufficientStats] = {}
+        after = None
+        for watermark, variant_id, event_name, count, sum_value, sum_squares in rows:
+            after = watermark
+            if variant_id is not None:
+                stats.setdefault((str(variant_id), event_name), SufficientStats()).add(
+                    int(count), float(sum_value), float(sum_squares)
+                )
+
+        # Events not yet rolled up
+        for variant_id, event_name, count, sum_value, sum_squares in self._aggregate_events(
+            experiment_id, after, None, event_names=event_names
+        ):
+            stats.setdefault((str(variant_id), event_name), SufficientStats()).add(
+                int(count), float(sum_value), float(sum_squares)
+            )
+
+        return stats
+
+    def get_sequential_test(
+        self, experiment_id: Union[str, UUID], event_name: str
+    ) -> Optional[SequentialTest]:
+        """
+        Get the stored sequential test of a conversion metric.
+
+        Args:
+            experiment_id: ID of the experiment
+            event_name: Event name of the metric
+
+        Returns:
+            SequentialTest as of the watermark, None if none has been stored yet
+        """
+        state = (
+            self.db.query(ExperimentSequentialTest.state)
+            .filter(
+                ExperimentSequentialTest.experiment_id == experiment_id,
+                ExperimentSequentialTest.event_name == event_name,
+            )
+            .scalar()
+        )
+        return SequentialTest.from_dict(state) if state else None
+
+    @staticmethod
+    def _cutoff(up_to: Optional[datetime]) -> datetime:
+        """Get the aware upper bound of a refresh, DEFAULT_SETTLE_SECONDS ago by default."""
+        if up_to is None:
+            return datetime.now(timezone.utc) - timedelta(seconds=DEFAULT_SETTLE_SECONDS)
+        if up_to.tzinfo is None:
+            # Naive times are UTC
+            return up_to.replace(tzinfo=timezone.utc)
+        return up_to
+
+    def _lock_watermark(
+        self, experiment_id: Union[str, UUID]
+    ) -> Optional[ExperimentResultsWatermark]:
+        """Get the experiment's watermark row locked for update, None if it has none."""
+        return (
+            self.db.query(ExperimentResultsWatermark)
+            .filter(ExperimentResultsWatermark.experiment_id == experiment_id)
+            .with_for_update()
+            .first()
+        )
+
+    def _fold_events(
+        self,
+        experiment_id: Union[str, UUID],
+        watermark: Optional[ExperimentResultsWatermark],
+        after: Optional[datetime],
+        cutoff: datetime,
+    ) -> int:
+        """
+        Upsert the events inserted in (after, cutoff] into the rollup and move the watermark.
+
+        The caller holds the watermark lock and commits.
+
+        Args:
+            experiment_id: ID of the experiment
+            watermark: The experiment's locked watermark row, or None
+            after: Exclusive lower bound on inserted_at, or None for no bound
+            cutoff: Inclusive upper bound on inserted_at, the new watermark
+
+        Returns:
+            Number of daily statistics rows inserted or updated
+        """
+        rows = self._aggregate_events(experiment_id, after, cutoff, by_day=True)
+
+        if rows:
+            now = datetime.utcnow()
+            stmt = insert(ExperimentDailyStats)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["experiment_id", "variant_id", "event_name", "day"],
+                set_={
+                    "count": ExperimentDailyStats.count + stmt.excluded["count"],
+                    "sum_value": ExperimentDailyStats.sum_value + stmt.excluded["sum_value"],
+                    "sum_squares": ExperimentDailyStats.sum_squares + stmt.excluded["sum_squares"],
+                    "updated_at": now,
+                },
+            )
+            self.db.execute(
+                stmt,
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "created_at": now,
+                        "updated_at": now,
+                        "experiment_id": experiment_id,
+                        "variant_id": variant_id,
+                        "event_name": event_name,
+                        "day": day,
+                        "count": count,
+                        "sum_value": sum_value,
+                        "sum_squares": sum_squares,
+                    }
+                    for variant_id, event_name, day, count, sum_value, sum_squares in rows
+                ],
+            )
+
+        self._advance_sequential_tests(experiment_id, rows)
+
+        if watermark:
+            watermark.events_processed_until = cutoff
+        else:
+            self.db.add(
+                ExperimentResultsWatermark(
+                    experiment_id=experiment_id, events_processed_until=cutoff
+                )
+            )
+
+        return len(rows)
+
+    def _advance_sequential_tests(
+        self, experiment_id: Union[str, UUID], rows: List[tuple]
+    ) -> None:
+        """
+        Fold a refresh's conversions into the experiment's sequential tests.
+
+        Each test takes the rolled up conversion totals, which include this
+        refresh's delta, and the current assignment counts, then is evaluated,
+        so every refresh is one look of the test. Event names seen for the
+        first time get a new test, as do tests whose control variant changed.
+
+        Args:
+            experiment_id: ID of the experiment
+            rows: Rollup delta rows of (variant_id, event_name, day, count, sum, sum of squares)
+        """
+        variants = (
+            self.db.query(Variant.id, Variant.is_control)
+            .filter(Variant.experiment_id == experiment_id)
+            .all()
+        )
+        control_id = next((str(v) for v, is_control in variants if is_control), None)
+        if control_id is None:
+            return
+
+        # Event names with conversions in this refresh
+        new_event_names = {event_name for _, event_name, _, _, _, _ in rows}
+
+        stored = {
+            row.event_name: row
+            for row in self.db.query(ExperimentSequentialTest).filter(
+                ExperimentSequentialTest.experiment_id == experiment_id
+            )
+        }
+        if not new_event_names and not stored:
+            return
+
+        # Tests that are new or whose control changed start over
+        tests: Dict[str, SequentialTest] = {}
+        for event_name in set(stored) | new_event_names:
+            row = stored.get(event_name)
+            test = SequentialTest.from_dict(row.state) if row else None
+            if test is None or test.control_id != control_id:
+                test = SequentialTest(control_id)
+            tests[event_name] = test
+
+        assignments = {
+            str(variant_id): count
+            for variant_id, count in self.db.query(
+                Assignment.variant_id, func.count(Assignment.id)
+            )
+            .filter(Assignment.experiment_id == experiment_id)
+            .group_by(Assignment.variant_id)
+        }
+
+        # Proportions are rebuilt from the rolled up totals, which include this
+        # delta; the stored proportions are capped at the assignment counts
+        totals = {
+            (event_name, str(variant_id)): int(count)
+            for variant_id, event_name, count in self.db.query(
+                ExperimentDailyStats.variant_id,
+                ExperimentDailyStats.event_name,
+                func.sum(ExperimentDailyStats.count),
+            )
+            .filter(
+                ExperimentDailyStats.experiment_id == experiment_id,
+                ExperimentDailyStats.event_name.in_(list(tests)),
+            )
+            .group_by(ExperimentDailyStats.variant_id, ExperimentDailyStats.event_name)
+        }
+
+        for event_name, test in tests.items():
+            for variant_id, _ in variants:
+                variant_id = str(variant_id)
+                conversions = totals.get((event_name, variant_id), 0)
+                test.set_proportion(variant_id, assignments.get(variant_id, 0), conversions)
+            test.evaluate()
+
+            row = stored.get(event_name)
+            if row:
+                row.state = test.to_dict()
+            else:
+                self.db.add(
+                    ExperimentSequentialTest(
+                        experiment_id=experiment_id,
+                        event_name=event_name,
+                        state=test.to_dict(),
+                    )
+                )
+
+    def _aggregate_events(
+        self,
+        experiment_id: Union[str, UUID],
+        after: Optional[datetime],
+        up_to: Optional[datetime],
+        event_names: Optional[set] = None,
+        by_day: bool = False,
+    ) -> List[tuple]:
+        """
+        Aggregate conversion events in an inserted_at range in one grouped query.
+
+        Args:
+            experiment_id: ID of the experiment
+            after: Exclusive lower bound on inserted_at, or None for no bound
+            up_to: Inclusive upper bound on inserted_at, or None for no bound
+            event_names: Optional event names to restrict to
+            by_day: Also group by the UTC day of created_at
+
+        Returns:
+            Rows of (variant_id, event_name[, day], count, sum, sum of squares)
+        """
+        group_columns = [Event.variant_id, Event.event_name]
+        if by_day:
+            # created_at is stored as an ISO 8601 string; events are counted
+            # on the UTC day they happened, not the day they were written
+            created_at = cast(Event.created_at, TIMESTAMP(timezone=True))
+            group_columns.append(cast(func.timezone("UTC", created_at), Date))
+
+        query = self.db.query(
+            *group_columns,
+            func.count(Event.id),
+            func.coalesce(func.sum(Event.value), 0.0),
+            func.coalesce(func.sum(Event.value * Event.value), 0.0),
+        ).filter(
+            Event.experiment_id == experiment_id,
+            Event.event_type == EventType.CONVERSION.value,
+            Event.variant_id.isnot(None),
+        )
+        if after is not None:
+            query = query.filter(Event.inserted_at > after)
+        if up_to is not None:
+            query = query.filter(Event.inserted_at <= up_to)
+        if event_names is not None:
+            query = query.filter(Event.event_name.in_(event_names))
+
+        return query.group_by(*group_columns).all()
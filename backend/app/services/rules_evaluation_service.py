@@ -7,17 +7,17 @@ This service provides advanced rule evaluation capabilities with:
 - Error tracking and logging
 - Integration with assignment service
 - Rule compilation and caching for performance
-- Batch evaluation support
+- Batch evaluation support, including columnar evaluation of large batches
 """
 
 import json
 import logging
+import threading
 import time
-import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 import re
 import math
 
@@ -35,8 +35,17 @@ from backend.app.core.rules_engine import (
     apply_operator as base_apply_operator,
     UserContext,
 )
-from backend.app.core.rule_compiler import RuleCompiler
-from backend.app.core.evaluation_cache import EvaluationCache
+from backend.app.core.rule_compiler import (
+    CompiledRuleSet,
+    RuleCompiler,
+    ValuePredicate,
+    bind_operator,
+)
+from backend.app.core.evaluation_cache import EvaluationCache, ShardedEvaluationCache
+from backend.app.core.bucketing import bucket
+from backend.app.core.columnar_evaluator import ColumnarBatchResult, ColumnarEvaluator
+from backend.app.core.latency_sketch import LatencySketch, RollingLatencySketch
+from backend.app.core.operand_cache import get_operand_cache, parse_version_tuple
 
 logger = logging.getLogger(__name__)
 
@@ -74,47 +83,72 @@ class EvaluationResult:
 
 @dataclass
 class EvaluationMetrics:
-    """Metrics collected during rule evaluation."""
+    """
+    Metrics collected during rule evaluation.
+
+    Latencies go into streaming sketches, so recording is O(1) and
+    percentiles are only computed when read. The avg/p95/p99 properties
+    cover the recent window; latency_sketch is cumulative.
+    """
     total_evaluations: int = 0
     cache_hits: int = 0
     cache_misses: int = 0
     total_errors: int = 0
-    avg_latency_ms: float = 0.0
-    p95_latency_ms: float = 0.0
-    p99_latency_ms: float = 0.0
-    latency_samples: deque = field(default_factory=lambda: deque(maxlen=1000))
+    latency_sketch: LatencySketch = field(default_factory=LatencySketch)
+    recent_latency: RollingLatencySketch = field(default_factory=RollingLatencySketch)
 
     def record_latency(self, latency_ms: float):
         """Record a latency sample."""
-        self.latency_samples.append(latency_ms)
-        self._update_percentiles()
+        self.latency_sketch.add(latency_ms)
+        self.recent_latency.add(latency_ms)
 
-    def _update_percentiles(self):
-        """Update percentile calculations."""
-        if not self.latency_samples:
-            return
+    @property
+    def avg_latency_ms(self) -> float:
+        """Mean latency over the recent window."""
+        return self.recent_latency.snapshot().avg
 
-        sorted_samples = sorted(self.latency_samples)
-        n = len(sorted_samples)
+    @property
+    def p95_latency_ms(self) -> float:
+        """95th percentile latency over the recent window."""
+        return self.recent_latency.snapshot().quantile(0.95)
 
-        self.avg_latency_ms = sum(sorted_samples) / n
+    @property
+    def p99_latency_ms(self) -> float:
+        """99th percentile latency over the recent window."""
+        return self.recent_latency.snapshot().quantile(0.99)
 
-        if n > 0:
-            p95_idx = int(n * 0.95)
-            p99_idx = int(n * 0.99)
-            self.p95_latency_ms = sorted_samples[min(p95_idx, n - 1)]
-            self.p99_latency_ms = sorted_samples[min(p99_idx, n - 1)]
+    def latency_stats(self) -> Dict[str, Any]:
+        """
+        Summarize recorded latencies.
+
+        Returns:
+            Dictionary with cumulative and windowed latency summaries (ms)
+        """
+        return {
+            'cumulative': self.latency_sketch.summary(),
+            'window': self.recent_latency.snapshot().summary(),
+            'window_seconds': self.recent_latency.window_seconds,
+        }
 
 
 class RulesEvaluationService:
-    """Enhanced rules evaluation service with validation and monitoring."""
+    """
+    Enhanced rules evaluation service with validation and monitoring.
+
+    The service is safe to share between threads, and the API uses a single
+    process-wide instance (see get_rules_evaluation_service) so compiled rules
+    and cached results outlive individual requests. Memory is bounded by the
+    cache sizes and max_metrics_history.
+    """
 
     def __init__(
         self,
         cache_max_size: int = 10000,
         cache_ttl: float = 300.0,
         compiler_cache_size: int = 1000,
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        max_metrics_history: int = 10000,
+        cache_shards: int = 1
     ):
         """
         Initialize the service.
@@ -122,23 +156,45 @@ class RulesEvaluationService:
         Args:
             cache_max_size: Maximum number of evaluation results to cache
             cache_ttl: Time-to-live for cached results in seconds
-            compiler_cache_size: Maximum number of compiled rules to cache
+            compiler_cache_size: Maximum number of compiled rules, and of parsed
+                rule configurations, to cache
             enable_metrics: Whether to collect metrics
+            max_metrics_history: Number of recent validated evaluations kept for
+                get_performance_stats
+            cache_shards: Number of independently locked evaluation cache segments;
+                use more than one when many threads share the service
         """
         # Legacy attributes
-        self.evaluation_metrics: List[RuleEvaluationMetrics] = []
+        self.evaluation_metrics: deque = deque(maxlen=max_metrics_history)
         self.attribute_cache: Dict[str, Any] = {}
         self.error_counts = defaultdict(int)
-        self.performance_stats = defaultdict(list)
+        self.performance_stats = defaultdict(lambda: deque(maxlen=max_metrics_history))
 
         # New caching and compilation components
-        self.evaluation_cache = EvaluationCache(
-            max_size=cache_max_size,
-            default_ttl=cache_ttl
+        if cache_shards > 1:
+            self.evaluation_cache = ShardedEvaluationCache(
+                max_size=cache_max_size,
+                default_ttl=cache_ttl,
+                num_shards=cache_shards
+            )
+        else:
+            self.evaluation_cache = EvaluationCache(
+                max_size=cache_max_size,
+                default_ttl=cache_ttl
+            )
+        self.rule_compiler = RuleCompiler(
+            cache_max_size=compiler_cache_size,
+            operator_compilers=self._enhanced_operator_compilers()
         )
-        self.rule_compiler = RuleCompiler(cache_max_size=compiler_cache_size)
+        self.columnar_evaluator = ColumnarEvaluator(self.rule_compiler)
+
+        # Parsed stored rule configurations by (owner id, version), see get_targeting_rules
+        self._parsed_rules: OrderedDict[Tuple[Any, Any], TargetingRules] = OrderedDict()
+        self._parsed_rules_max_size = compiler_cache_size
+        self._parsed_rules_lock = threading.Lock()
         self.enable_metrics = enable_metrics
         self.metrics = EvaluationMetrics()
+        self._metrics_lock = threading.Lock()
 
         logger.info(
             f"RulesEvaluationService initialized: "
@@ -352,6 +408,38 @@ class RulesEvaluationService:
                 error_message=f"Validation error for attribute '{attr_name}': {str(e)}",
             )
 
+    def _enhanced_operator_compilers(self) -> Dict[OperatorType, Any]:
+        """Operator compilers that give compiled rules this service's operator semantics."""
+        enhanced = bind_operator(self._apply_operator_enhanced)
+        compilers = {
+            operator: enhanced
+            for operator in (
+                OperatorType.GEO_DISTANCE,
+                OperatorType.TIME_WINDOW,
+                OperatorType.PERCENTAGE_BUCKET,
+                OperatorType.JSON_PATH,
+                OperatorType.ARRAY_LENGTH,
+            )
+        }
+        compilers[OperatorType.SEMANTIC_VERSION] = self._compile_semantic_version
+        return compilers
+
+    def _compile_semantic_version(self, condition: Condition) -> ValuePredicate:
+        """Compile a SEMANTIC_VERSION condition with the expected version parsed once."""
+        expected_version = condition.value
+        expected_parts = parse_version_tuple(expected_version)
+        if expected_parts is None:
+            return lambda actual_version: self._compare_semantic_versions(actual_version, expected_version)
+
+        def test(actual_version: Any) -> bool:
+            actual_parts = parse_version_tuple(actual_version)
+            if actual_parts is None:
+                logger.warning(f"Failed to compare semantic versions: {actual_version} and {expected_version}")
+                return False
+            return actual_parts >= expected_parts
+
+        return test
+
     def _evaluate_targeting_rules_enhanced(
         self, targeting_rules: TargetingRules, user_context: UserContext
     ) -> Optional[TargetingRule]:
@@ -359,6 +447,16 @@ class RulesEvaluationService:
         if not targeting_rules or not targeting_rules.rules:
             return targeting_rules.default_rule
 
+        compiled_rules = self._compile_rule_set(targeting_rules)
+        if compiled_rules is not None:
+            return compiled_rules.evaluate(user_context)
+
+        return self._interpret_targeting_rules_enhanced(targeting_rules, user_context)
+
+    def _interpret_targeting_rules_enhanced(
+        self, targeting_rules: TargetingRules, user_context: UserContext
+    ) -> Optional[TargetingRule]:
+        """Evaluate targeting rules by walking the rule models directly."""
         # Sort rules by priority (lower number = higher priority)
         sorted_rules = sorted(targeting_rules.rules, key=lambda r: r.priority)
 
@@ -462,20 +560,14 @@ class RulesEvaluationService:
 
     def _compare_semantic_versions(self, actual_version: str, expected_version: str) -> bool:
         """Compare semantic versions."""
-        try:
-            def parse_version(version: str) -> Tuple[int, int, int]:
-                # Simple semantic version parsing
-                parts = version.split('-')[0].split('+')[0].split('.')
-                return tuple(int(x) for x in parts[:3])
-
-            actual_parts = parse_version(str(actual_version))
-            expected_parts = parse_version(str(expected_version))
-
-            return actual_parts >= expected_parts
-        except (ValueError, TypeError):
+        actual_parts = parse_version_tuple(actual_version)
+        expected_parts = parse_version_tuple(expected_version)
+        if actual_parts is None or expected_parts is None:
             logger.warning(f"Failed to compare semantic versions: {actual_version} and {expected_version}")
             return False
 
+        return actual_parts >= expected_parts
+
     def _evaluate_geo_distance(self, actual_coords: Any, target_coords: Any, max_distance_km: Any) -> bool:
         """Evaluate if coordinates are within distance."""
         try:
@@ -544,12 +636,8 @@ class RulesEvaluationService:
     def _evaluate_percentage_bucket(self, user_id: Any, percentage: Any) -> bool:
         """Evaluate if user falls within percentage bucket."""
         try:
-            # Create deterministic hash
-            hash_input = str(user_id)
-            hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-            bucket = hash_value % 100
-
-            return bucket < float(percentage)
+            # Deterministic bucket (0-99) from the hash of the user ID alone
+            return bucket(user_id) < float(percentage)
 
         except (ValueError, TypeError):
             logger.warning(f"Failed to evaluate percentage bucket")
@@ -642,21 +730,56 @@ class RulesEvaluationService:
         return complexity
 
     def get_performance_stats(self) -> Dict[str, Any]:
-        """Get performance statistics."""
-        if not self.evaluation_metrics:
-            return {}
+        """
+        Get performance statistics.
 
-        evaluation_times = [m.evaluation_time_ms for m in self.evaluation_metrics]
+        Evaluation statistics cover the most recent max_metrics_history validated
+        evaluations; cache statistics cover the lifetime of the caches. Latency
+        percentiles of evaluate() calls are reported both cumulatively and for
+        the recent window.
+        """
+        stats = self.get_cache_stats()
+        if self.enable_metrics:
+            with self._metrics_lock:
+                stats['latency'] = self.metrics.latency_stats()
 
-        return {
-            'total_evaluations': len(self.evaluation_metrics),
+        # Snapshot, other threads may be appending
+        evaluation_metrics = list(self.evaluation_metrics)
+        if not evaluation_metrics:
+            return stats
+
+        evaluation_times = [m.evaluation_time_ms for m in evaluation_metrics]
+
+        stats.update({
+            'total_evaluations': len(evaluation_metrics),
             'avg_evaluation_time_ms': sum(evaluation_times) / len(evaluation_times),
             'min_evaluation_time_ms': min(evaluation_times),
             'max_evaluation_time_ms': max(evaluation_times),
-            'error_count': sum(1 for m in self.evaluation_metrics if m.error),
-            'match_rate': sum(1 for m in self.evaluation_metrics if m.matched) / len(self.evaluation_metrics),
-            'avg_complexity_score': sum(m.complexity_score for m in self.evaluation_metrics) / len(self.evaluation_metrics),
+            'error_count': sum(1 for m in evaluation_metrics if m.error),
+            'match_rate': sum(1 for m in evaluation_metrics if m.matched) / len(evaluation_metrics),
+            'avg_complexity_score': sum(m.complexity_score for m in evaluation_metrics) / len(evaluation_metrics),
             'error_breakdown': dict(self.error_counts),
+        })
+        return stats
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit rates and sizes of the evaluation result and rule compilation caches.
+
+        The operand cache is process-wide, so its statistics are shared by all services.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        evaluation_cache_stats = self.evaluation_cache.get_stats()
+        compiler_cache_stats = self.rule_compiler.get_stats()
+
+        return {
+            'cache_hit_rate': evaluation_cache_stats['hit_rate'],
+            'compiler_cache_hit_rate': compiler_cache_stats['hit_rate'],
+            'evaluation_cache': evaluation_cache_stats,
+            'compiler_cache': compiler_cache_stats,
+            'operand_cache': get_operand_cache().get_stats(),
         }
 
     def clear_metrics(self):
@@ -688,26 +811,30 @@ class RulesEvaluationService:
         start_time = time.time()
 
         try:
+            # Compile rules (served from the compiler cache after the first call)
+            compiled_rules = self._compile_rule_set(rules) if rules.rules else None
+
+            # Key the cache on only the attributes the rules read
+            cache_attributes = compiled_rules.key_attributes(user_context) if compiled_rules else None
+
+            # Results are namespaced by rule contents, since rule ids are not
+            # unique across flags and experiments sharing this service
+            cache_namespace = compiled_rules.fingerprint if compiled_rules else None
+
             # Check cache first (unless skipped)
             if not skip_cache:
-                cached_result = self._check_cache(rules, user_context)
+                cached_result = self._check_cache(rules, user_context, cache_attributes, cache_namespace)
                 if cached_result:
                     cached_result.evaluation_time_ms = (time.time() - start_time) * 1000
                     if self.enable_metrics:
-                        self.metrics.total_evaluations += 1
-                        self.metrics.cache_hits += 1
-                        self.metrics.record_latency(cached_result.evaluation_time_ms)
+                        self._record_evaluation(cached_result.evaluation_time_ms, cache_hit=True)
                     return cached_result
 
-            # Cache miss - perform evaluation
-            if self.enable_metrics:
-                self.metrics.cache_misses += 1
-
-            # Compile rules if needed
-            self._compile_rules(rules)
-
-            # Evaluate rules using existing enhanced evaluation
-            matched_rule = self._evaluate_targeting_rules_enhanced(rules, user_context)
+            # Evaluate rules using the compiled closure tree
+            if compiled_rules is not None:
+                matched_rule = compiled_rules.evaluate(user_context)
+            else:
+                matched_rule = self._evaluate_targeting_rules_enhanced(rules, user_context)
 
             # Build result
             result = EvaluationResult(
@@ -717,14 +844,13 @@ class RulesEvaluationService:
                 evaluation_time_ms=(time.time() - start_time) * 1000
             )
 
-            # Cache result
-            if not skip_cache and matched_rule:
-                self._cache_result(rules, user_context, result)
+            # Cache result (non-matches too, they are as common as matches)
+            if not skip_cache:
+                self._cache_result(rules, user_context, result, cache_attributes, cache_namespace)
 
             # Record metrics
             if self.enable_metrics:
-                self.metrics.total_evaluations += 1
-                self.metrics.record_latency(result.evaluation_time_ms)
+                self._record_evaluation(result.evaluation_time_ms, cache_hit=False)
 
             return result
 
@@ -732,8 +858,7 @@ class RulesEvaluationService:
             logger.error(f"Error evaluating rules: {e}", exc_info=True)
 
             if self.enable_metrics:
-                self.metrics.total_errors += 1
-                self.metrics.total_evaluations += 1
+                self._record_evaluation(None, cache_hit=False, error=True)
 
             return EvaluationResult(
                 matched=False,
@@ -750,7 +875,7 @@ class RulesEvaluationService:
         Evaluate rules for multiple users in batch.
 
         Optimizations:
-        - Compile rules once, reuse for all evaluations
+        - Compile rules once, reuse the compiled rule set for all evaluations
         - Leverage cache for repeated contexts
         - Process efficiently in single pass
 
@@ -761,8 +886,8 @@ class RulesEvaluationService:
         Returns:
             List of EvaluationResults in same order as input
         """
-        # Pre-compile rules once
-        self._compile_rules(rules)
+        # Pre-compile rules once; per-user evaluations hit the compiler cache
+        self._compile_rule_set(rules)
 
         results = []
         for user_context in user_contexts:
@@ -771,6 +896,76 @@ class RulesEvaluationService:
 
         return results
 
+    def batch_evaluate_columnar(
+        self,
+        rules: TargetingRules,
+        user_contexts: List[Dict[str, Any]]
+    ) -> ColumnarBatchResult:
+        """
+        Evaluate rules for a large batch of users in columnar form.
+
+        Unlike batch_evaluate, contexts are pivoted into per-attribute columns
+        and each condition is evaluated as a mask over the whole batch. The
+        evaluation cache is bypassed; use this for offline re-targeting jobs.
+
+        Args:
+            rules: The targeting rules to evaluate
+            user_contexts: List of user contexts
+
+        Returns:
+            ColumnarBatchResult with the matched rule index per user
+        """
+        start_time = time.time()
+        result = self.columnar_evaluator.evaluate(rules, user_contexts)
+
+        if self.enable_metrics:
+            with self._metrics_lock:
+                self.metrics.total_evaluations += len(user_contexts)
+
+        logger.info(
+            f"Columnar batch evaluation of {len(user_contexts)} contexts took "
+            f"{(time.time() - start_time) * 1000:.1f}ms"
+        )
+        return result
+
+    def get_targeting_rules(self, owner_id: Any, version: Any, data: Any) -> TargetingRules:
+        """
+        Get the parsed targeting rules stored on a flag or experiment.
+
+        Parsed configurations are cached per owner and version, so every
+        evaluation of an unchanged configuration gets the same TargetingRules
+        object. The rule compiler memoizes compiled rule sets by object, so
+        cached configurations are neither re-validated nor re-hashed.
+
+        Args:
+            owner_id: ID of the flag or experiment the rules belong to
+            version: Value that changes whenever the rules do, e.g. updated_at;
+                None disables caching
+            data: Stored configuration, a dictionary or JSON string
+
+        Returns:
+            Parsed targeting rules
+        """
+        key = (owner_id, version)
+        if version is not None:
+            with self._parsed_rules_lock:
+                parsed = self._parsed_rules.get(key)
+                if parsed is not None:
+                    self._parsed_rules.move_to_end(key)
+                    return parsed
+
+        if isinstance(data, str):
+            data = json.loads(data)
+        parsed = TargetingRules(**data)
+
+        if version is not None:
+            with self._parsed_rules_lock:
+                self._parsed_rules[key] = parsed
+                while len(self._parsed_rules) > self._parsed_rules_max_size:
+                    self._parsed_rules.popitem(last=False)
+
+        return parsed
+
     def invalidate_rule_cache(self, rule_id: str):
         """
         Invalidate all cached evaluations for a specific rule.
@@ -802,13 +997,43 @@ class RulesEvaluationService:
 
     def reset_metrics(self):
         """Reset metrics counters."""
-        self.metrics = EvaluationMetrics()
+        with self._metrics_lock:
+            self.metrics = EvaluationMetrics()
         logger.info("Metrics reset")
 
+    def _record_evaluation(
+        self,
+        latency_ms: Optional[float],
+        cache_hit: bool,
+        error: bool = False
+    ):
+        """
+        Update evaluation counters and latency samples.
+
+        Args:
+            latency_ms: Evaluation latency, or None if it should not be sampled
+            cache_hit: Whether the result was served from the cache
+            error: Whether the evaluation failed
+        """
+        with self._metrics_lock:
+            metrics = self.metrics
+            metrics.total_evaluations += 1
+            if error:
+                metrics.total_errors += 1
+                metrics.cache_misses += 1
+            elif cache_hit:
+                metrics.cache_hits += 1
+            else:
+                metrics.cache_misses += 1
+            if latency_ms is not None:
+                metrics.record_latency(latency_ms)
+
     def _check_cache(
         self,
         rules: TargetingRules,
-        user_context: Dict[str, Any]
+        user_context: Dict[str, Any],
+        attributes: Optional[FrozenSet[str]] = None,
+        namespace: Optional[str] = None
     ) -> Optional[EvaluationResult]:
         """
         Check cache for existing evaluation result.
@@ -816,6 +1041,8 @@ class RulesEvaluationService:
         Args:
             rules: Targeting rules
             user_context: User context
+            attributes: Context attributes the result depends on (defaults to all)
+            namespace: Cache key qualifier identifying the rule configuration
 
         Returns:
             Cached EvaluationResult or None
@@ -824,13 +1051,15 @@ class RulesEvaluationService:
         if not rules.rules:
             return None
 
-        rule_id = rules.rules[0].id
-        cached = self.evaluation_cache.get(rule_id, user_context)
+        cached = self.evaluation_cache.get(
+            self._cache_rule_id(rules), user_context, attributes, namespace
+        )
 
         if cached is not None:
+            matched, matched_rule_id = cached
             return EvaluationResult(
-                matched=cached,
-                matched_rule_id=rule_id if cached else None,
+                matched=matched,
+                matched_rule_id=matched_rule_id,
                 cached=True
             )
 
@@ -840,7 +1069,9 @@ class RulesEvaluationService:
         self,
         rules: TargetingRules,
         user_context: Dict[str, Any],
-        result: EvaluationResult
+        result: EvaluationResult,
+        attributes: Optional[FrozenSet[str]] = None,
+        namespace: Optional[str] = None
     ):
         """
         Cache evaluation result.
@@ -849,30 +1080,75 @@ class RulesEvaluationService:
             rules: Targeting rules
             user_context: User context
             result: Evaluation result to cache
+            attributes: Context attributes the result depends on (defaults to all)
+            namespace: Cache key qualifier identifying the rule configuration
         """
-        if not rules.rules or not result.matched_rule_id:
+        if not rules.rules:
             return
 
-        rule_id = result.matched_rule_id
-        self.evaluation_cache.set(rule_id, user_context, result.matched)
+        self.evaluation_cache.set(
+            self._cache_rule_id(rules),
+            user_context,
+            (result.matched, result.matched_rule_id),
+            attributes=attributes,
+            namespace=namespace
+        )
+
+    @staticmethod
+    def _cache_rule_id(rules: TargetingRules) -> str:
+        """
+        Get the rule id evaluation results of a rule set are cached under.
+
+        The same id is used for reads and writes whichever rule matched, so
+        every outcome, including no match, can be served from the cache. The
+        matched rule is stored in the cached value.
+        """
+        return rules.rules[0].id
 
-    def _compile_rules(self, rules: TargetingRules) -> List:
+    def _compile_rule_set(self, rules: TargetingRules) -> Optional[CompiledRuleSet]:
         """
-        Compile targeting rules for optimized evaluation.
+        Compile targeting rules into an executable rule set.
 
         Args:
             rules: Targeting rules to compile
 
         Returns:
-            List of compiled rules
-        """
-        compiled = []
-        for rule in rules.rules:
-            try:
-                compiled_rule = self.rule_compiler.compile(rule)
-                compiled.append(compiled_rule)
-            except Exception as e:
-                logger.warning(f"Failed to compile rule {rule.id}: {e}")
-                # Continue with other rules
-
-        return compiled
\ No newline at end of file
+            Compiled rule set, or None if a rule could not be compiled and
+            evaluation should fall back to interpreting the rule models
+        """
+        try:
+            return self.rule_compiler.compile_rule_set(rules)
+        except Exception as e:
+            logger.warning(f"Failed to compile rule set, falling back to interpretation: {e}")
+            return None
+
+
+# Process-wide service shared by request-scoped services
+_shared_service: Optional[RulesEvaluationService] = None
+_SHARED_SERVICE_CACHE_SHARDS = 16
+_shared_service_lock = threading.Lock()
+
+
+def get_rules_evaluation_service() -> RulesEvaluationService:
+    """
+    Get the process-wide rules evaluation service, creating it on first use.
+
+    Request-scoped services (AssignmentService, FeatureFlagService) use this
+    instance so the rule compiler and evaluation caches survive across requests.
+
+    Returns:
+        The shared RulesEvaluationService
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = RulesEvaluationService(cache_shards=_SHARED_SERVICE_CACHE_SHARDS)
+    return _shared_service
+
+
+def reset_rules_evaluation_service() -> None:
+    """Drop the process-wide service, so the next caller starts with empty caches."""
+    global _shared_service
+    with _shared_service_lock:
+        _shared_service = None
@@ -13,6 +13,7 @@ import uuid
 # Add shared module to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "shared"))
 
+from config_cache import ConfigCache
 from consistent_hash import get_hasher
 from models import ExperimentConfig, ExperimentStatus, Assignment
 from utils import get_dynamodb_resource, get_logger, get_env_variable
@@ -35,13 +36,9 @@ class AssignmentService:
             default='experimently-experiments'
         )
 
-        # Cache for experiment configurations (Lambda warm-start optimization)
-        self._experiment_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_ttl = 300  # 5 minutes in seconds
-
-        # Cache hit rate tracking
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # Cache for experiment configurations (Lambda warm-start optimization),
+        # also tracks the cache hit rate
+        self._config_cache = ConfigCache(ttl=300)  # 5 minutes in seconds
 
     def evaluate_targeting_rules(
         self,
@@ -212,70 +209,81 @@ class AssignmentService:
             ExperimentConfig if found, None otherwise
         """
         try:
-            dynamodb = get_dynamodb_resource()
-            table = dynamodb.Table(self.experiments_table_name)
-
-            response = table.get_item(
-                Key={'key': experiment_key}
+            return self._fetch_experiment_config(experiment_key)
+        except Exception as e:
+            logger.error(
+                f"Failed to get experiment config: {str(e)}",
+                extra={'experiment_key': experiment_key}
             )
+            return None
 
-            if 'Item' not in response:
-                logger.warning(f"Experiment not found: {experiment_key}")
-                return None
+    def _fetch_experiment_config(self, experiment_key: str) -> Optional[ExperimentConfig]:
+        """
+        Fetch experiment configuration from DynamoDB, raising on errors.
 
-            item = response['Item']
+        Args:
+            experiment_key: Unique experiment key
 
-            # Parse DynamoDB item into ExperimentConfig
-            config = ExperimentConfig(
-                experiment_id=item['experiment_id'],
-                key=item['key'],
-                status=ExperimentStatus(item['status']),
-                variants=item['variants'],
-                traffic_allocation=item.get('traffic_allocation', 1.0),
-                targeting_rules=item.get('targeting_rules'),
-                salt=item.get('salt')
-            )
+        Returns:
+            ExperimentConfig if found, None otherwise
+        """
+        dynamodb = get_dynamodb_resource()
+        table = dynamodb.Table(self.experiments_table_name)
 
-            logger.info(f"Retrieved experiment config: {experiment_key}")
-            return config
+        response = table.get_item(
+            Key={'key': experiment_key}
+        )
 
-        except Exception as e:
-            logger.error(
-                f"Failed to get experiment config: {str(e)}",
-                extra={'experiment_key': experiment_key}
-            )
+        if 'Item' not in response:
+            logger.warning(f"Experiment not found: {experiment_key}")
             return None
 
+        item = response['Item']
+
+        # Parse DynamoDB item into ExperimentConfig
+        config = ExperimentConfig(
+            experiment_id=item['experiment_id'],
+            key=item['key'],
+            status=ExperimentStatus(item['status']),
+            variants=item['variants'],
+            traffic_allocation=item.get('traffic_allocation', 1.0),
+            targeting_rules=item.get('targeting_rules'),
+            salt=item.get('salt')
+        )
+
+        logger.info(f"Retrieved experiment config: {experiment_key}")
+        return config
+
     def get_experiment_config_cached(self, experiment_key: str) -> Optional[ExperimentConfig]:
         """
         Fetch experiment configuration with Lambda warm-start caching.
 
+        An expired entry is still served for a grace window while a single
+        background refresh reloads it, and concurrent misses for the same
+        experiment share one DynamoDB read.
+
         Args:
             experiment_key: Unique experiment key
 
         Returns:
             ExperimentConfig if found, None otherwise
         """
-        # Check cache first
-        if experiment_key in self._experiment_cache:
-            if self._is_cache_valid(experiment_key):
-                self._record_cache_hit()
-                logger.debug(f"Cache hit for experiment: {experiment_key}")
-                return self._experiment_cache[experiment_key]['config']
-            else:
-                # Cache expired, remove it
-                del self._experiment_cache[experiment_key]
+        # Cache the result (even if None to avoid repeated lookups)
+        return self._config_cache.get(experiment_key, self._fetch_experiment_config)
 
-        # Cache miss - fetch from DynamoDB
-        self._record_cache_miss()
-        logger.debug(f"Cache miss for experiment: {experiment_key}")
+    @property
+    def cache_ttl(self) -> float:
+        """Seconds a cached experiment config stays fresh."""
+        return self._config_cache.ttl
 
-        config = self.get_experiment_config(experiment_key)
+    @cache_ttl.setter
+    def cache_ttl(self, value: float) -> None:
+        self._config_cache.ttl = value
 
-        # Cache the result (even if None to avoid repeated lookups)
-        self._cache_experiment_config(experiment_key, config)
-
-        return config
+    @property
+    def _experiment_cache(self) -> Dict[str, Any]:
+        """Cache entries by experiment key."""
+        return self._config_cache.entries
 
     def _is_cache_valid(self, experiment_key: str) -> bool:
         """
@@ -287,15 +295,7 @@ class AssignmentService:
         Returns:
             True if cache entry is valid, False otherwise
         """
-        if experiment_key not in self._experiment_cache:
-            return False
-
-        cache_entry = self._experiment_cache[experiment_key]
-        cached_timestamp = cache_entry['timestamp']
-        current_timestamp = datetime.now(timezone.utc).timestamp()
-
-        # Check if cache has expired
-        return (current_timestamp - cached_timestamp) < self.cache_ttl
+        return self._config_cache.is_fresh(experiment_key)
 
     def _cache_experiment_config(
         self,
@@ -303,36 +303,41 @@ class AssignmentService:
         config: Optional[ExperimentConfig]
     ) -> None:
         """
-        Store experiment config in cache with timestamp.
+        Store experiment config in cache with a jittered expiry.
 
         Args:
             experiment_key: Experiment key
             config: Experiment configuration (can be None)
         """
-        self._experiment_cache[experiment_key] = {
-            'config': config,
-            'timestamp': datetime.now(timezone.utc).timestamp()
-        }
+        self._config_cache.put(experiment_key, config)
 
     def _record_cache_hit(self) -> None:
         """Record a cache hit for metrics tracking."""
-        self._cache_hits += 1
+        self._config_cache.record_hit()
 
     def _record_cache_miss(self) -> None:
         """Record a cache miss for metrics tracking."""
-        self._cache_misses += 1
+        self._config_cache.record_miss()
 
     def get_cache_hit_rate(self) -> float:
         """
         Calculate cache hit rate percentage.
 
+        Stale entries served while they are refreshed count as hits.
+
         Returns:
             Hit rate as a decimal (0.0 to 1.0)
         """
-        total_requests = self._cache_hits + self._cache_misses
-        if total_requests == 0:
-            return 0.0
-        return self._cache_hits / total_requests
+        return self._config_cache.hit_rate()
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Get cache counters: hits, stale hits, misses, refreshes and refresh errors.
+
+        Returns:
+            Dictionary of cache counters
+        """
+        return self._config_cache.get_stats()
 
     def create_assignment(
         self,
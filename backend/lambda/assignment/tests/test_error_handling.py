@@ -214,7 +214,7 @@ class TestInternalServerErrors:
 
         # None result should be cached
         assert "test_exp" in service._experiment_cache
-        assert service._experiment_cache["test_exp"]["config"] is None
+        assert service._experiment_cache["test_exp"].value is None
 
     def test_hasher_error_handling(self):
         """Test handling of errors from consistent hasher."""
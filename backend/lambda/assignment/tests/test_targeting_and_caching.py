@@ -7,7 +7,6 @@ Tests targeting rule evaluation and Lambda warm-start caching.
 import pytest
 import sys
 from pathlib import Path
-from datetime import datetime, timezone
 from unittest.mock import Mock, patch, MagicMock
 from time import sleep
 
@@ -268,10 +267,7 @@ class TestLambdaCaching:
         service.cache_ttl = 0.1  # 100ms
 
         # Add item to cache
-        service._experiment_cache["test_key"] = {
-            "config": "test_config",
-            "timestamp": datetime.now(timezone.utc).timestamp()
-        }
+        service._cache_experiment_config("test_key", "test_config")
 
         # Immediately check - should be valid
         assert service._is_cache_valid("test_key") is True
@@ -304,8 +300,8 @@ class TestLambdaCaching:
         # Verify it's in cache
         assert "test" in service._experiment_cache
         cached_entry = service._experiment_cache["test"]
-        assert cached_entry["config"].experiment_id == "exp_123"
-        assert "timestamp" in cached_entry
+        assert cached_entry.value.experiment_id == "exp_123"
+        assert cached_entry.expires_at > cached_entry.fetched_at
 
     def test_cache_hit_rate_tracking(self):
         """Test that cache hit rate is tracked."""
@@ -313,18 +309,14 @@ class TestLambdaCaching:
 
         service = AssignmentService()
 
-        # Initialize counters
-        service._cache_hits = 0
-        service._cache_misses = 0
-
         # Simulate cache miss
         service._record_cache_miss()
-        assert service._cache_misses == 1
+        assert service.get_cache_stats()["misses"] == 1
 
         # Simulate cache hits
         service._record_cache_hit()
         service._record_cache_hit()
-        assert service._cache_hits == 2
+        assert service.get_cache_stats()["hits"] == 2
 
         # Calculate hit rate
         hit_rate = service.get_cache_hit_rate()
@@ -380,4 +372,4 @@ class TestLambdaCaching:
         # Should be in cache
         assert "missing_exp" in service._experiment_cache
         cached_entry = service._experiment_cache["missing_exp"]
-        assert cached_entry["config"] is None
+        assert cached_entry.value is None
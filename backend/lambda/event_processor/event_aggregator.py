@@ -7,13 +7,17 @@ This module provides real-time metric aggregation to DynamoDB:
 - Time-windowed aggregation (hourly, daily)
 - Conditional writes to prevent race conditions
 - Retry logic for concurrent updates
+- Batch pre-aggregation: events sharing a key are reduced in memory and
+  written with one update, with distinct keys updated concurrently
 
 Follows TDD (Test-Driven Development) - GREEN phase implementation.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
@@ -21,6 +25,14 @@ logger = logging.getLogger(__name__)
 # Placeholder for DynamoDB table - will be initialized in Lambda handler
 dynamodb_table = None
 
+# Concurrent update_item calls per batch
+MAX_UPDATE_WORKERS = 16
+
+# Updates go through the table's low-level client, which unlike the Table
+# resource is safe to share across the batch worker threads
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
 
 def create_aggregation_key(
     experiment_id: str,
@@ -106,40 +118,87 @@ def aggregate_event(
     # User ID for unique user tracking
     user_id = enriched_event.get('user_id')
 
-    # Attempt update with retries
+    try:
+        attributes = _update_aggregate(
+            partition_key,
+            sort_key,
+            event_count=1,
+            user_ids={user_id} if user_id else set(),
+            max_retries=max_retries,
+            return_values=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to aggregate event {enriched_event.get('event_id')}: {e}")
+        raise
+
+    if attributes is None:
+        return None
+
+    logger.debug(f"Aggregated event {enriched_event.get('event_id')} to {partition_key}")
+    return {
+        "event_count": attributes.get("event_count", 0),
+        "unique_users": len(attributes.get("unique_user_ids", set())),
+        "partition_key": partition_key
+    }
+
+
+def _update_aggregate(
+    partition_key: str,
+    sort_key: str,
+    event_count: int,
+    user_ids: Set[str],
+    max_retries: int = 3,
+    return_values: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Add events and users to one aggregation item with an atomic update.
+
+    Args:
+        partition_key: Aggregation partition key
+        sort_key: Aggregation sort key (event type)
+        event_count: Number of events to add
+        user_ids: User IDs to add to the unique user set
+        max_retries: Maximum retry attempts for conditional write failures
+        return_values: If True, return the updated item attributes
+
+    Returns:
+        Updated attributes if return_values is True, otherwise an empty dict;
+        None if all retries were exhausted
+    """
+    # Use DynamoDB atomic ADD operation
+    update_expression = "ADD event_count :inc"
+    expression_attribute_values: Dict[str, Any] = {":inc": event_count}
+
+    # Add unique users to set (if provided)
+    if user_ids:
+        update_expression += ", unique_user_ids :user_set"
+        expression_attribute_values[":user_set"] = set(user_ids)
+
+    update_kwargs: Dict[str, Any] = {
+        "TableName": dynamodb_table.name,
+        "Key": {
+            "partition_key": _serializer.serialize(partition_key),
+            "sort_key": _serializer.serialize(sort_key)
+        },
+        "UpdateExpression": update_expression,
+        "ExpressionAttributeValues": {
+            name: _serializer.serialize(value)
+            for name, value in expression_attribute_values.items()
+        }
+    }
+    if return_values:
+        update_kwargs["ReturnValues"] = "ALL_NEW"
+
     for attempt in range(max_retries):
         try:
-            # Use DynamoDB atomic ADD operation
-            update_expression = "ADD event_count :inc"
-            expression_attribute_values = {":inc": 1}
-
-            # Add unique user to set (if provided)
-            if user_id:
-                update_expression += ", unique_user_ids :user_set"
-                expression_attribute_values[":user_set"] = {user_id}
-
-            # Perform atomic update
-            response = dynamodb_table.update_item(
-                Key={
-                    "partition_key": partition_key,
-                    "sort_key": sort_key
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_attribute_values,
-                ReturnValues="ALL_NEW"
-            )
-
-            # Extract updated attributes
-            attributes = response.get("Attributes", {})
-            result = {
-                "event_count": attributes.get("event_count", 0),
-                "unique_users": len(attributes.get("unique_user_ids", set())),
-                "partition_key": partition_key
+            response = dynamodb_table.meta.client.update_item(**update_kwargs)
+            if not return_values:
+                return {}
+            return {
+                name: _deserializer.deserialize(value)
+                for name, value in response.get("Attributes", {}).items()
             }
 
-            logger.debug(f"Aggregated event {enriched_event.get('event_id')} to {partition_key}")
-            return result
-
         except ClientError as e:
             error_code = e.response.get("Error", {}).get("Code", "")
 
@@ -147,13 +206,7 @@ def aggregate_event(
                 # Retry on conditional check failure
                 logger.warning(f"Conditional check failed, retrying ({attempt + 1}/{max_retries})")
                 continue
-            else:
-                # Re-raise for other errors or max retries exceeded
-                logger.error(f"Failed to aggregate event {enriched_event.get('event_id')}: {e}")
-                raise
-
-        except Exception as e:
-            logger.error(f"Unexpected error aggregating event {enriched_event.get('event_id')}: {e}")
+            # Re-raise for other errors or max retries exceeded
             raise
 
     # Should not reach here, but return None if all retries exhausted
@@ -163,42 +216,113 @@ def aggregate_event(
 def aggregate_events_batch(
     enriched_events: List[Dict[str, Any]],
     window: str = "hourly",
-    return_summary: bool = False
+    return_summary: bool = False,
+    return_values: bool = False,
+    max_workers: int = MAX_UPDATE_WORKERS
 ) -> Any:
     """
     Aggregate a batch of enriched events to DynamoDB.
 
+    Events are first reduced in memory per (experiment, variant, time window,
+    event type): counts are summed and user IDs unioned. Each distinct key is
+    then written with a single update_item, and independent keys are updated
+    concurrently through a bounded thread pool.
+
     Args:
         enriched_events: List of enriched event dictionaries
         window: Time window for aggregation ('hourly' or 'daily')
         return_summary: If True, return summary dict instead of individual results
+        return_values: If True, read back updated totals (ReturnValues=ALL_NEW)
+        max_workers: Maximum concurrent DynamoDB updates
 
     Returns:
-        If return_summary=False: List of aggregation results
-        If return_summary=True: Dict with success_count, failure_count, total_events
+        If return_summary=False: List of aggregation results, one per event.
+            Each aggregated event gets the result of its key: partition_key,
+            batch_event_count and batch_unique_users, plus event_count and
+            unique_users totals when return_values is True
+        If return_summary=True: Dict with success_count, failure_count,
+            total_events and update_count
     """
-    results = []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(enriched_events)
     success_count = 0
     failure_count = 0
 
-    for event in enriched_events:
-        try:
-            result = aggregate_event(event, window=window)
-
-            if result and not result.get("skipped"):
-                success_count += 1
-            results.append(result)
+    # Reduce the batch: (partition_key, sort_key) -> event indexes and users
+    groups: Dict[Tuple[str, str], Tuple[List[int], Set[str]]] = {}
+    for index, event in enumerate(enriched_events):
+        experiment_id = event.get('experiment_id')
+        variant = event.get('variant')
+        if not experiment_id or not variant:
+            logger.debug(f"Skipping aggregation for event {event.get('event_id')} - no experiment/variant")
+            results[index] = {"skipped": True}
+            continue
 
+        try:
+            partition_key = create_aggregation_key(
+                experiment_id, variant, event.get('timestamp'), window
+            )
         except Exception as e:
             logger.error(f"Failed to aggregate event {event.get('event_id')}: {e}")
             failure_count += 1
-            results.append({"error": str(e)})
+            results[index] = {"error": str(e)}
+            continue
+
+        sort_key = f"event_type#{event.get('event_type', 'unknown')}"
+        indexes, user_ids = groups.setdefault((partition_key, sort_key), ([], set()))
+        indexes.append(index)
+        if event.get('user_id'):
+            user_ids.add(event['user_id'])
+
+    def update(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        indexes, user_ids = groups[key]
+        return _update_aggregate(
+            key[0],
+            key[1],
+            event_count=len(indexes),
+            user_ids=user_ids,
+            return_values=return_values
+        )
+
+    if groups:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as executor:
+            futures = {key: executor.submit(update, key) for key in groups}
+
+        for (partition_key, sort_key), future in futures.items():
+            indexes, user_ids = groups[(partition_key, sort_key)]
+            try:
+                attributes = future.result()
+                if attributes is None:
+                    raise RuntimeError("Retries exhausted")
+            except Exception as e:
+                logger.error(
+                    f"Failed to aggregate {len(indexes)} events to {partition_key} {sort_key}: {e}"
+                )
+                failure_count += len(indexes)
+                for index in indexes:
+                    results[index] = {"error": str(e)}
+                continue
+
+            result = {
+                "partition_key": partition_key,
+                "batch_event_count": len(indexes),
+                "batch_unique_users": len(user_ids)
+            }
+            if return_values:
+                result["event_count"] = attributes.get("event_count", 0)
+                result["unique_users"] = len(attributes.get("unique_user_ids", set()))
+
+            success_count += len(indexes)
+            for index in indexes:
+                results[index] = result
+
+    logger.debug(f"Aggregated {len(enriched_events)} events with {len(groups)} updates")
 
     if return_summary:
         return {
             "success_count": success_count,
             "failure_count": failure_count,
             "total_events": len(enriched_events),
+            "update_count": len(groups),
             "results": results
         }
 
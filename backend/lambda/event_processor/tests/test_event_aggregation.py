@@ -41,26 +41,28 @@ class TestEventAggregation:
 
         from event_aggregator import aggregate_event
 
-        # Mock DynamoDB update_item call
+        # Mock DynamoDB update_item call (low-level client attribute values)
         mock_dynamodb_response = {
             "Attributes": {
-                "event_count": 1,
-                "unique_users": {"user_456"}
+                "event_count": {"N": "1"},
+                "unique_user_ids": {"SS": ["user_456"]}
             }
         }
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.return_value = mock_dynamodb_response
+            mock_table.meta.client.update_item.return_value = mock_dynamodb_response
             result = aggregate_event(enriched_event)
 
         # Assert
-        assert mock_table.update_item.called
+        assert mock_table.meta.client.update_item.called
         # Verify atomic increment was used (UpdateExpression with ADD)
-        call_args = mock_table.update_item.call_args
+        call_args = mock_table.meta.client.update_item.call_args
+        assert call_args[1]["TableName"] == mock_table.name
         assert "UpdateExpression" in call_args[1]
         assert "ADD" in call_args[1]["UpdateExpression"]
         assert result["event_count"] == 1
+        assert result["unique_users"] == 1
 
     def test_aggregate_multiple_events_same_experiment(self):
         """
@@ -68,7 +70,7 @@ class TestEventAggregation:
 
         Given: 3 events for the same experiment and variant
         When: aggregate_events_batch() is called
-        Then: Counter is incremented by 3, unique users tracked
+        Then: Counter is incremented by 3 with one update, unique users tracked
         """
         # Arrange
         enriched_events = [
@@ -100,22 +102,24 @@ class TestEventAggregation:
 
         from event_aggregator import aggregate_events_batch
 
-        # Mock DynamoDB responses
-        mock_responses = [
-            {"Attributes": {"event_count": 1, "unique_user_ids": {"user_1"}}},
-            {"Attributes": {"event_count": 2, "unique_user_ids": {"user_1", "user_2"}}},
-            {"Attributes": {"event_count": 3, "unique_user_ids": {"user_1", "user_2"}}}  # Same user count
-        ]
+        # Mock DynamoDB response
+        mock_response = {
+            "Attributes": {"event_count": {"N": "3"}, "unique_user_ids": {"SS": ["user_1", "user_2"]}}
+        }
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.side_effect = mock_responses
-            results = aggregate_events_batch(enriched_events)
+            mock_table.meta.client.update_item.return_value = mock_response
+            results = aggregate_events_batch(enriched_events, return_values=True)
 
         # Assert
         assert len(results) == 3
-        assert mock_table.update_item.call_count == 3
-        # Last result should show 3 events, 2 unique users
+        # Events sharing a key are pre-aggregated into a single update
+        assert mock_table.meta.client.update_item.call_count == 1
+        values = mock_table.meta.client.update_item.call_args[1]["ExpressionAttributeValues"]
+        assert values[":inc"] == {"N": "3"}
+        assert sorted(values[":user_set"]["SS"]) == ["user_1", "user_2"]
+        # Result should show 3 events, 2 unique users
         assert results[-1]["event_count"] == 3
         assert results[-1]["unique_users"] == 2
 
@@ -151,13 +155,13 @@ class TestEventAggregation:
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.return_value = {"Attributes": {"event_count": 1}}
+            mock_table.meta.client.update_item.return_value = {"Attributes": {"event_count": {"N": "1"}}}
             results = aggregate_events_batch(enriched_events)
 
         # Assert
-        assert mock_table.update_item.call_count == 2
+        assert mock_table.meta.client.update_item.call_count == 2
         # Check that different partition keys were used for different hours
-        call_args_list = mock_table.update_item.call_args_list
+        call_args_list = mock_table.meta.client.update_item.call_args_list
         key_1 = call_args_list[0][1]["Key"]
         key_2 = call_args_list[1][1]["Key"]
         # Keys should be different because of different time windows
@@ -195,12 +199,12 @@ class TestEventAggregation:
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.return_value = {"Attributes": {"event_count": 1}}
+            mock_table.meta.client.update_item.return_value = {"Attributes": {"event_count": {"N": "1"}}}
             results = aggregate_events_batch(enriched_events, window='daily')
 
         # Assert
-        assert mock_table.update_item.call_count == 2
-        call_args_list = mock_table.update_item.call_args_list
+        assert mock_table.meta.client.update_item.call_count == 2
+        call_args_list = mock_table.meta.client.update_item.call_args_list
         key_1 = call_args_list[0][1]["Key"]
         key_2 = call_args_list[1][1]["Key"]
         assert key_1 != key_2
@@ -227,11 +231,11 @@ class TestEventAggregation:
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.return_value = {"Attributes": {"event_count": 1}}
+            mock_table.meta.client.update_item.return_value = {"Attributes": {"event_count": {"N": "1"}}}
             result = aggregate_event(enriched_event)
 
         # Assert
-        call_args = mock_table.update_item.call_args
+        call_args = mock_table.meta.client.update_item.call_args
         # Should use atomic ADD operation which is naturally atomic
         assert "ADD" in call_args[1]["UpdateExpression"]
 
@@ -264,14 +268,14 @@ class TestEventAggregation:
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.side_effect = [
+            mock_table.meta.client.update_item.side_effect = [
                 mock_error,  # First call fails
-                {"Attributes": {"event_count": 2}}  # Retry succeeds
+                {"Attributes": {"event_count": {"N": "2"}}}  # Retry succeeds
             ]
             result = aggregate_event(enriched_event, max_retries=2)
 
         # Assert
-        assert mock_table.update_item.call_count == 2  # Called twice (1 fail + 1 success)
+        assert mock_table.meta.client.update_item.call_count == 2  # Called twice (1 fail + 1 success)
         assert result["event_count"] == 2
 
     def test_aggregate_creates_partition_key_from_experiment_variant_time(self):
@@ -340,16 +344,16 @@ class TestEventAggregation:
 
         # Act
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.side_effect = [
-                {"Attributes": {"event_count": 1, "unique_users": 1}},
-                {"Attributes": {"event_count": 1, "unique_users": 1}}
+            mock_table.meta.client.update_item.side_effect = [
+                {"Attributes": {"event_count": {"N": "1"}}},
+                {"Attributes": {"event_count": {"N": "1"}}}
             ]
             results = aggregate_events_batch(enriched_events)
 
         # Assert
-        assert mock_table.update_item.call_count == 2
+        assert mock_table.meta.client.update_item.call_count == 2
         # Each variant should have its own aggregation
-        call_args_list = mock_table.update_item.call_args_list
+        call_args_list = mock_table.meta.client.update_item.call_args_list
         key_1 = call_args_list[0][1]["Key"]
         key_2 = call_args_list[1][1]["Key"]
         # Keys should be different due to different variants
@@ -379,7 +383,7 @@ class TestEventAggregation:
             result = aggregate_event(enriched_event)
 
         # Assert
-        assert not mock_table.update_item.called
+        assert not mock_table.meta.client.update_item.called
         assert result is None or result.get("skipped") is True
 
     def test_aggregate_batch_returns_success_and_failure_counts(self):
@@ -414,8 +418,8 @@ class TestEventAggregation:
 
         # Act - Mock one success, one failure
         with patch('event_aggregator.dynamodb_table') as mock_table:
-            mock_table.update_item.side_effect = [
-                {"Attributes": {"event_count": 1}},  # Success
+            mock_table.meta.client.update_item.side_effect = [
+                {"Attributes": {"event_count": {"N": "1"}}},  # Success
                 Exception("DynamoDB error")  # Failure
             ]
             results = aggregate_events_batch(enriched_events, return_summary=True)
@@ -424,3 +428,106 @@ class TestEventAggregation:
         assert results["success_count"] == 1
         assert results["failure_count"] == 1
         assert results["total_events"] == 2
+
+
+class TestBatchPreAggregation:
+    """Test suite for pre-aggregating a batch before writing to DynamoDB."""
+
+    @staticmethod
+    def make_event(index: int, event_type: str = "page_view", variant: str = "control") -> Dict[str, Any]:
+        """Build an enriched event for the batch tests."""
+        return {
+            "event_id": f"evt_{index}",
+            "event_type": event_type,
+            "user_id": f"user_{index % 10}",
+            "experiment_id": "exp_batch",
+            "variant": variant,
+            "timestamp": "2024-12-19T10:30:00Z"
+        }
+
+    def test_one_update_per_distinct_key_without_return_values(self):
+        """
+        Given: 300 events spread over 2 variants and 2 event types
+        When: aggregate_events_batch() is called
+        Then: 4 updates are made, none reading back the item
+        """
+        enriched_events = [
+            self.make_event(i, event_type=("page_view", "click")[i % 2], variant=("control", "treatment")[i // 150])
+            for i in range(300)
+        ]
+
+        from event_aggregator import aggregate_events_batch
+
+        with patch('event_aggregator.dynamodb_table') as mock_table:
+            mock_table.meta.client.update_item.return_value = {}
+            summary = aggregate_events_batch(enriched_events, return_summary=True)
+
+        assert mock_table.meta.client.update_item.call_count == 4
+        assert summary["update_count"] == 4
+        assert summary["success_count"] == 300
+        for call in mock_table.meta.client.update_item.call_args_list:
+            assert "ReturnValues" not in call[1]
+            assert call[1]["ExpressionAttributeValues"][":inc"] == {"N": "75"}
+        assert summary["results"][0]["batch_event_count"] == 75
+        assert summary["results"][0]["batch_unique_users"] == 5
+
+    def test_failed_key_fails_only_its_events(self):
+        """
+        Given: Events for two keys where one update fails
+        When: aggregate_events_batch() is called
+        Then: Only the events of the failed key are counted as failures
+        """
+        enriched_events = (
+            [self.make_event(i, variant="control") for i in range(3)]
+            + [self.make_event(i, variant="treatment") for i in range(2)]
+            + [{"event_id": "evt_no_exp", "event_type": "page_view", "timestamp": "2024-12-19T10:30:00Z"}]
+        )
+
+        from event_aggregator import aggregate_events_batch
+
+        def update_item(**kwargs):
+            if "treatment" in kwargs["Key"]["partition_key"]["S"]:
+                raise Exception("DynamoDB error")
+            return {}
+
+        with patch('event_aggregator.dynamodb_table') as mock_table:
+            mock_table.meta.client.update_item.side_effect = update_item
+            summary = aggregate_events_batch(enriched_events, return_summary=True)
+
+        assert summary["success_count"] == 3
+        assert summary["failure_count"] == 2
+        assert [r.get("error") for r in summary["results"][3:5]] == ["DynamoDB error"] * 2
+        assert summary["results"][5] == {"skipped": True}
+
+    def test_updates_are_bounded_by_max_workers(self):
+        """
+        Given: 20 distinct keys and max_workers=4
+        When: aggregate_events_batch() is called
+        Then: At most 4 updates are in flight at once
+        """
+        import threading
+        import time
+
+        enriched_events = [self.make_event(i, event_type=f"type_{i}") for i in range(20)]
+
+        from event_aggregator import aggregate_events_batch
+
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def update_item(**kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return {}
+
+        with patch('event_aggregator.dynamodb_table') as mock_table:
+            mock_table.meta.client.update_item.side_effect = update_item
+            summary = aggregate_events_batch(enriched_events, return_summary=True, max_workers=4)
+
+        assert summary["success_count"] == 20
+        assert 1 < peak[0] <= 4
@@ -6,24 +6,34 @@ Provides core logic for evaluating feature flags with:
 - Targeting rules evaluation
 - Variant assignment (if configured)
 - Lambda warm-start caching for performance
+- Optional snapshot mode: all flags preloaded, refreshed by delta
 
 Following TDD (Test-Driven Development) - GREEN phase: Implementation to pass tests.
 """
 
 import sys
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any
-from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
 
 # Add shared module to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "shared"))
 
+from config_cache import ConfigCache
 from consistent_hash import get_hasher
+from flag_snapshot import FlagSnapshotStore
 from models import FeatureFlagConfig, VariantConfig
 from utils import get_dynamodb_resource, get_logger, get_env_variable
 
 logger = get_logger(__name__)
 
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+
+# Retries of UnprocessedKeys before giving up, with exponential backoff
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_BASE_DELAY_SECONDS = 0.05
+
 
 class FeatureFlagEvaluator:
     """
@@ -41,13 +51,31 @@ class FeatureFlagEvaluator:
             default='experimently-feature-flags'
         )
 
-        # Cache for flag configurations (Lambda warm-start optimization)
-        self._flag_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_ttl = 300  # 5 minutes in seconds
+        # Cache for flag configurations (Lambda warm-start optimization),
+        # also tracks the cache hit rate
+        self._config_cache = ConfigCache(ttl=300)  # 5 minutes in seconds
+
+        # Snapshot mode: serve every flag from a preloaded, delta-refreshed index
+        self.snapshot_store: Optional[FlagSnapshotStore] = None
+        if get_env_variable('FLAG_SNAPSHOT_ENABLED', default='false').lower() == 'true':
+            self.snapshot_store = FlagSnapshotStore(
+                self.flags_table_name,
+                self._parse_flag_item,
+                refresh_interval_seconds=float(
+                    get_env_variable('FLAG_SNAPSHOT_REFRESH_SECONDS', default='30')
+                ),
+                full_reload_interval_seconds=float(
+                    get_env_variable('FLAG_SNAPSHOT_FULL_RELOAD_SECONDS', default='900')
+                ),
+                index_name=get_env_variable('FLAG_SNAPSHOT_INDEX', default='status-index')
+            )
+            # Start the first load in the background on cold start
+            self.snapshot_store.get_snapshot()
 
-        # Cache hit rate tracking
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # DynamoDB call tracking for batch fetches
+        self._dynamodb_calls = 0
+        self._dynamodb_calls_saved = 0
+        self.last_batch_stats: Dict[str, int] = {}
 
     def evaluate(
         self,
@@ -259,40 +287,7 @@ class FeatureFlagEvaluator:
             FeatureFlagConfig if found, None otherwise
         """
         try:
-            dynamodb = get_dynamodb_resource()
-            table = dynamodb.Table(self.flags_table_name)
-
-            response = table.get_item(
-                Key={'key': flag_key}
-            )
-
-            if 'Item' not in response:
-                logger.warning(f"Feature flag not found: {flag_key}")
-                return None
-
-            item = response['Item']
-
-            # Parse variants if present
-            variants = None
-            if 'variants' in item and item['variants']:
-                variants = [
-                    VariantConfig(**v) for v in item['variants']
-                ]
-
-            # Parse DynamoDB item into FeatureFlagConfig
-            config = FeatureFlagConfig(
-                flag_id=item['flag_id'],
-                key=item['key'],
-                enabled=item.get('enabled', False),
-                rollout_percentage=item.get('rollout_percentage', 0.0),
-                targeting_rules=item.get('targeting_rules'),
-                default_variant=item.get('default_variant'),
-                variants=variants
-            )
-
-            logger.info(f"Retrieved feature flag config: {flag_key}")
-            return config
-
+            return self._fetch_flag_config(flag_key)
         except Exception as e:
             logger.error(
                 f"Failed to get flag config: {str(e)}",
@@ -300,9 +295,9 @@ class FeatureFlagEvaluator:
             )
             return None
 
-    def get_flag_config_cached(self, flag_key: str) -> Optional[FeatureFlagConfig]:
+    def _fetch_flag_config(self, flag_key: str) -> Optional[FeatureFlagConfig]:
         """
-        Fetch feature flag configuration with Lambda warm-start caching.
+        Fetch feature flag configuration from DynamoDB, raising on errors.
 
         Args:
             flag_key: Unique flag key
@@ -310,26 +305,197 @@ class FeatureFlagEvaluator:
         Returns:
             FeatureFlagConfig if found, None otherwise
         """
-        # Check cache first
-        if flag_key in self._flag_cache:
-            if self._is_cache_valid(flag_key):
-                self._record_cache_hit()
-                logger.debug(f"Cache hit for flag: {flag_key}")
-                return self._flag_cache[flag_key]['config']
+        dynamodb = get_dynamodb_resource()
+        table = dynamodb.Table(self.flags_table_name)
+
+        response = table.get_item(
+            Key={'key': flag_key}
+        )
+
+        if 'Item' not in response:
+            logger.warning(f"Feature flag not found: {flag_key}")
+            return None
+
+        config = self._parse_flag_item(response['Item'])
+
+        logger.info(f"Retrieved feature flag config: {flag_key}")
+        return config
+
+    @staticmethod
+    def _parse_flag_item(item: Dict[str, Any]) -> FeatureFlagConfig:
+        """
+        Parse a DynamoDB flag item into a FeatureFlagConfig.
+
+        Args:
+            item: Item from the flags table
+
+        Returns:
+            FeatureFlagConfig for the item
+        """
+        # Parse variants if present
+        variants = None
+        if 'variants' in item and item['variants']:
+            variants = [
+                VariantConfig(**v) for v in item['variants']
+            ]
+
+        return FeatureFlagConfig(
+            flag_id=item['flag_id'],
+            key=item['key'],
+            enabled=item.get('enabled', False),
+            rollout_percentage=item.get('rollout_percentage', 0.0),
+            targeting_rules=item.get('targeting_rules'),
+            default_variant=item.get('default_variant'),
+            variants=variants
+        )
+
+    def get_flag_configs(self, flag_keys: List[str]) -> Dict[str, Optional[FeatureFlagConfig]]:
+        """
+        Fetch many feature flag configurations with chunked BatchGetItem.
+
+        Keys are requested BATCH_GET_MAX_KEYS at a time. UnprocessedKeys
+        returned by DynamoDB are retried with exponential backoff.
+
+        Args:
+            flag_keys: Unique flag keys
+
+        Returns:
+            Dictionary mapping flag keys to their config, or None for flags
+            that do not exist. Keys that could not be fetched are left out.
+        """
+        configs: Dict[str, Optional[FeatureFlagConfig]] = {}
+        dynamodb = get_dynamodb_resource()
+
+        for start in range(0, len(flag_keys), BATCH_GET_MAX_KEYS):
+            chunk = flag_keys[start:start + BATCH_GET_MAX_KEYS]
+            request = {
+                self.flags_table_name: {'Keys': [{'key': key} for key in chunk]}
+            }
+            fetched = set()
+
+            for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+                if attempt:
+                    time.sleep(BATCH_GET_BASE_DELAY_SECONDS * (2 ** (attempt - 1)))
+
+                try:
+                    response = dynamodb.batch_get_item(RequestItems=request)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to batch get flag configs: {str(e)}",
+                        extra={'flag_count': len(chunk)}
+                    )
+                    break
+                self._dynamodb_calls += 1
+
+                for item in response.get('Responses', {}).get(self.flags_table_name, []):
+                    try:
+                        configs[item['key']] = self._parse_flag_item(item)
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to parse flag config: {str(e)}",
+                            extra={'flag_key': item.get('key')}
+                        )
+                        configs[item['key']] = None
+                    fetched.add(item['key'])
+
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    # Every requested key was processed; the rest do not exist
+                    for key in chunk:
+                        if key not in fetched:
+                            configs[key] = None
+                    break
             else:
-                # Cache expired, remove it
-                del self._flag_cache[flag_key]
+                logger.error(
+                    "Gave up on unprocessed flag keys",
+                    extra={'flag_count': len(chunk) - len(fetched)}
+                )
+
+        return configs
+
+    def get_flag_configs_cached(self, flag_keys: List[str]) -> Dict[str, Optional[FeatureFlagConfig]]:
+        """
+        Fetch many feature flag configurations, fetching all cache misses in one step.
 
-        # Cache miss - fetch from DynamoDB
-        self._record_cache_miss()
-        logger.debug(f"Cache miss for flag: {flag_key}")
+        Stale entries are served while one background BatchGetItem refreshes them.
 
-        config = self.get_flag_config(flag_key)
+        Args:
+            flag_keys: Flag keys, duplicates are ignored
+
+        Returns:
+            Dictionary mapping each flag key to its config (None if not found)
+        """
+        snapshot = self.snapshot_store.get_snapshot() if self.snapshot_store else None
+        if snapshot is not None:
+            configs: Dict[str, Optional[FeatureFlagConfig]] = {}
+            for flag_key in dict.fromkeys(flag_keys):
+                self._record_cache_hit()
+                configs[flag_key] = snapshot.get(flag_key)
+            self.last_batch_stats = {
+                'cache_hits': len(configs),
+                'cache_misses': 0,
+                'dynamodb_calls': 0,
+                'dynamodb_calls_saved': 0
+            }
+            return configs
+
+        misses_before = self._config_cache.misses
+        calls_before = self._dynamodb_calls
+
+        # Missing flags are cached as None to avoid repeated lookups
+        configs = self._config_cache.get_many(flag_keys, self.get_flag_configs)
+
+        # One GetItem per miss is what fetching the flags one by one would cost
+        misses = self._config_cache.misses - misses_before
+        dynamodb_calls = self._dynamodb_calls - calls_before
+        self.last_batch_stats = {
+            'cache_hits': len(configs) - misses,
+            'cache_misses': misses,
+            'dynamodb_calls': dynamodb_calls,
+            'dynamodb_calls_saved': max(0, misses - dynamodb_calls)
+        }
+        self._dynamodb_calls_saved += self.last_batch_stats['dynamodb_calls_saved']
+
+        return configs
+
+    def get_flag_config_cached(self, flag_key: str) -> Optional[FeatureFlagConfig]:
+        """
+        Fetch feature flag configuration with Lambda warm-start caching.
+
+        An expired entry is still served for a grace window while a single
+        background refresh reloads it, and concurrent misses for the same flag
+        share one DynamoDB read. In snapshot mode the flag is read from the
+        current snapshot; the per-key cache is only used until the first
+        snapshot is loaded.
+
+        Args:
+            flag_key: Unique flag key
+
+        Returns:
+            FeatureFlagConfig if found, None otherwise
+        """
+        # In snapshot mode the snapshot holds every active flag
+        snapshot = self.snapshot_store.get_snapshot() if self.snapshot_store else None
+        if snapshot is not None:
+            self._record_cache_hit()
+            return snapshot.get(flag_key)
 
         # Cache the result (even if None to avoid repeated lookups)
-        self._cache_flag_config(flag_key, config)
+        return self._config_cache.get(flag_key, self._fetch_flag_config)
 
-        return config
+    @property
+    def cache_ttl(self) -> float:
+        """Seconds a cached flag config stays fresh."""
+        return self._config_cache.ttl
+
+    @cache_ttl.setter
+    def cache_ttl(self, value: float) -> None:
+        self._config_cache.ttl = value
+
+    @property
+    def _flag_cache(self) -> Dict[str, Any]:
+        """Cache entries by flag key."""
+        return self._config_cache.entries
 
     def _is_cache_valid(self, flag_key: str) -> bool:
         """
@@ -341,15 +507,7 @@ class FeatureFlagEvaluator:
         Returns:
             True if cache entry is valid, False otherwise
         """
-        if flag_key not in self._flag_cache:
-            return False
-
-        cache_entry = self._flag_cache[flag_key]
-        cached_timestamp = cache_entry['timestamp']
-        current_timestamp = datetime.now(timezone.utc).timestamp()
-
-        # Check if cache has expired
-        return (current_timestamp - cached_timestamp) < self.cache_ttl
+        return self._config_cache.is_fresh(flag_key)
 
     def _cache_flag_config(
         self,
@@ -357,36 +515,50 @@ class FeatureFlagEvaluator:
         config: Optional[FeatureFlagConfig]
     ) -> None:
         """
-        Store flag config in cache with timestamp.
+        Store flag config in cache with a jittered expiry.
 
         Args:
             flag_key: Flag key
             config: Feature flag configuration (can be None)
         """
-        self._flag_cache[flag_key] = {
-            'config': config,
-            'timestamp': datetime.now(timezone.utc).timestamp()
-        }
+        self._config_cache.put(flag_key, config)
 
     def _record_cache_hit(self) -> None:
         """Record a cache hit for metrics tracking."""
-        self._cache_hits += 1
+        self._config_cache.record_hit()
 
     def _record_cache_miss(self) -> None:
         """Record a cache miss for metrics tracking."""
-        self._cache_misses += 1
+        self._config_cache.record_miss()
 
     def get_cache_hit_rate(self) -> float:
         """
         Calculate cache hit rate percentage.
 
+        Stale entries served while they are refreshed count as hits.
+
         Returns:
             Hit rate as a decimal (0.0 to 1.0)
         """
-        total_requests = self._cache_hits + self._cache_misses
-        if total_requests == 0:
-            return 0.0
-        return self._cache_hits / total_requests
+        return self._config_cache.hit_rate()
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Get cache counters: hits, stale hits, misses, refreshes and refresh errors.
+
+        Returns:
+            Dictionary of cache counters
+        """
+        return self._config_cache.get_stats()
+
+    def get_dynamodb_calls_saved(self) -> int:
+        """
+        Get the DynamoDB calls saved by batch fetches compared to one GetItem per flag.
+
+        Returns:
+            Number of calls saved since the evaluator was created
+        """
+        return self._dynamodb_calls_saved
 
     def batch_evaluate(
         self,
@@ -398,7 +570,9 @@ class FeatureFlagEvaluator:
         Evaluate multiple feature flags for a user in a single call.
 
         This is optimized for SDK use cases where multiple flags need to be
-        evaluated at once. Uses cached configurations when available.
+        evaluated at once. Uses cached configurations when available and
+        fetches all cache misses with chunked BatchGetItem, so a cold start
+        costs one DynamoDB call per 100 flags instead of one per flag.
 
         Args:
             user_id: Unique user identifier
@@ -432,9 +606,16 @@ class FeatureFlagEvaluator:
 
         results = {}
 
+        # Get all flag configs at once (with caching)
+        flag_configs = self.get_flag_configs_cached(flag_keys)
+        logger.info(
+            f"Batch flag fetch: {self.last_batch_stats['cache_misses']} misses, "
+            f"{self.last_batch_stats['dynamodb_calls']} DynamoDB calls, "
+            f"{self.last_batch_stats['dynamodb_calls_saved']} saved"
+        )
+
         for flag_key in flag_keys:
-            # Get flag config (with caching)
-            flag_config = self.get_flag_config_cached(flag_key)
+            flag_config = flag_configs.get(flag_key)
 
             if not flag_config:
                 # Flag doesn't exist
@@ -0,0 +1,390 @@
+"""
+Full flag snapshot with versioned delta refresh for the evaluation Lambda.
+
+Instead of filling the cache flag by flag, the container loads every active
+flag once with a paged Scan into an immutable index. Afterwards it only pulls
+the flags whose updated_at is at or after the newest one already seen, with a
+Query per status on the (status, updated_at) index of the flags table:
+- Evaluation reads the current snapshot and makes no DynamoDB calls; loads
+  and refreshes run on a background thread while the current snapshot keeps
+  being served (until the first load completes there is no snapshot)
+- A refresh builds a new snapshot and swaps it in; readers never see a
+  partially applied update
+- Archived or deleted flags in a delta are removed from the index, and a
+  periodic full reload drops flags that were deleted from the table or whose
+  status is outside FLAG_STATUSES
+- If a refresh fails the previous snapshot keeps being served
+
+Note: Lambda freezes the container between invocations, so a refresh started
+at the end of one invocation may finish in the next one.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+# Add shared module to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "shared"))
+
+from boto3.dynamodb.conditions import Key
+
+from models import FeatureFlagConfig
+from utils import get_dynamodb_resource, get_logger
+
+logger = get_logger(__name__)
+
+# Flag statuses that remove a flag from the snapshot
+INACTIVE_STATUSES = frozenset({'archived', 'deleted'})
+
+# Statuses queried for changed flags, and the index keyed on (status, updated_at)
+FLAG_STATUSES = ('active', 'inactive', 'archived', 'deleted')
+STATUS_INDEX = 'status-index'
+
+# (version, updated_at) of a flag item; newer items compare greater
+FlagVersion = Tuple[int, str]
+
+
+def item_version(item: Dict[str, Any]) -> FlagVersion:
+    """
+    Get the version of a flag item.
+
+    Args:
+        item: Item from the flags table
+
+    Returns:
+        Tuple of the numeric version and updated_at (missing values sort first)
+    """
+    return (int(item.get('version') or 0), str(item.get('updated_at') or ''))
+
+
+def is_active(item: Dict[str, Any]) -> bool:
+    """Check whether a flag item belongs in the snapshot."""
+    if item.get('deleted'):
+        return False
+    return str(item.get('status') or '').lower() not in INACTIVE_STATUSES
+
+
+def _paginate(operation: Callable[..., Dict[str, Any]], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """Yield the items of every page of a Scan or Query."""
+    while True:
+        response = operation(**kwargs)
+        yield from response.get('Items', [])
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def scan_flag_items(table: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Scan the flags table page by page.
+
+    Args:
+        table: DynamoDB table resource
+
+    Yields:
+        Flag items
+    """
+    yield from _paginate(table.scan)
+
+
+def query_changed_flag_items(
+    table: Any,
+    updated_since: str,
+    index_name: str = STATUS_INDEX,
+    statuses: Iterable[str] = FLAG_STATUSES
+) -> Iterator[Dict[str, Any]]:
+    """
+    Query the flags changed since a time, one status partition at a time.
+
+    Only the changed items are read, unlike a filtered Scan which reads (and
+    is billed for) the whole table.
+
+    Args:
+        table: DynamoDB table resource
+        updated_since: Only return items with updated_at at or after this value
+        index_name: Index with status as partition key and updated_at as sort key
+        statuses: Status partitions to query
+
+    Yields:
+        Flag items
+    """
+    for status in statuses:
+        yield from _paginate(
+            table.query,
+            IndexName=index_name,
+            KeyConditionExpression=Key('status').eq(status) & Key('updated_at').gte(updated_since)
+        )
+
+
+@dataclass(frozen=True)
+class FlagSnapshot:
+    """Immutable index of flag configurations by key."""
+
+    flags: Mapping[str, FeatureFlagConfig] = field(default_factory=lambda: MappingProxyType({}))
+    versions: Mapping[str, FlagVersion] = field(default_factory=lambda: MappingProxyType({}))
+    watermark: str = ''
+    loaded_at: float = 0.0
+    refreshed_at: float = 0.0
+
+    def get(self, flag_key: str) -> Optional[FeatureFlagConfig]:
+        """Get the configuration of a flag, None if it is not in the snapshot."""
+        return self.flags.get(flag_key)
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[Dict[str, Any]],
+        parse_item: Callable[[Dict[str, Any]], FeatureFlagConfig],
+        now: float
+    ) -> "FlagSnapshot":
+        """
+        Build a snapshot from a full set of flag items.
+
+        Args:
+            items: Every item of the flags table
+            parse_item: Parser from item to FeatureFlagConfig
+            now: Load time (monotonic seconds)
+
+        Returns:
+            New snapshot
+        """
+        return cls(loaded_at=now).apply(items, parse_item, now)
+
+    def apply(
+        self,
+        items: Iterable[Dict[str, Any]],
+        parse_item: Callable[[Dict[str, Any]], FeatureFlagConfig],
+        now: float
+    ) -> "FlagSnapshot":
+        """
+        Get a new snapshot with changed flag items applied.
+
+        Items that are not newer than the version in the snapshot are ignored,
+        so re-reading the same items is harmless.
+
+        Args:
+            items: Changed flag items
+            parse_item: Parser from item to FeatureFlagConfig
+            now: Refresh time (monotonic seconds)
+
+        Returns:
+            New snapshot (self is left unchanged)
+        """
+        flags = dict(self.flags)
+        versions = dict(self.versions)
+        watermark = self.watermark
+
+        for item in items:
+            flag_key = item.get('key')
+            if not flag_key:
+                continue
+
+            version = item_version(item)
+            watermark = max(watermark, version[1])
+            if flag_key in versions and version <= versions[flag_key]:
+                continue
+
+            versions[flag_key] = version
+            if not is_active(item):
+                flags.pop(flag_key, None)
+                continue
+
+            try:
+                flags[flag_key] = parse_item(item)
+            except Exception as e:
+                logger.error(
+                    f"Failed to parse flag config: {str(e)}",
+                    extra={'flag_key': flag_key}
+                )
+                flags.pop(flag_key, None)
+
+        return FlagSnapshot(
+            flags=MappingProxyType(flags),
+            versions=MappingProxyType(versions),
+            watermark=watermark,
+            loaded_at=self.loaded_at,
+            refreshed_at=now
+        )
+
+
+class FlagSnapshotStore:
+    """
+    Holds the current flag snapshot of a Lambda container and keeps it fresh.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        parse_item: Callable[[Dict[str, Any]], FeatureFlagConfig],
+        refresh_interval_seconds: float = 30.0,
+        full_reload_interval_seconds: float = 900.0,
+        index_name: str = STATUS_INDEX
+    ):
+        """
+        Initialize the snapshot store.
+
+        Args:
+            table_name: Name of the flags table
+            parse_item: Parser from item to FeatureFlagConfig
+            refresh_interval_seconds: Time between delta refreshes
+            full_reload_interval_seconds: Time between full reloads
+            index_name: Index of the flags table on (status, updated_at)
+        """
+        self.table_name = table_name
+        self.parse_item = parse_item
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.full_reload_interval_seconds = full_reload_interval_seconds
+        self.index_name = index_name
+
+        self.snapshot: Optional[FlagSnapshot] = None
+
+        # After a failed load or refresh, keep serving what we have until this time
+        self._retry_at = 0.0
+
+        # Background load or refresh in flight
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+
+        # Refresh tracking
+        self.full_loads = 0
+        self.delta_refreshes = 0
+        self.delta_items = 0
+        self.refresh_errors = 0
+
+    def get_snapshot(self) -> Optional[FlagSnapshot]:
+        """
+        Get the current snapshot, starting a background load or refresh when due.
+
+        Never waits for DynamoDB: the snapshot is returned as it is while it
+        is being updated.
+
+        Returns:
+            Current snapshot, None if no snapshot has been loaded yet
+        """
+        now = time.monotonic()
+        snapshot = self.snapshot
+
+        if now >= self._retry_at and (
+            snapshot is None
+            or now - snapshot.loaded_at >= self.full_reload_interval_seconds
+            or now - snapshot.refreshed_at >= self.refresh_interval_seconds
+        ):
+            self._submit_update()
+
+        return snapshot
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the background load or refresh in flight, if any.
+
+        Args:
+            timeout: Longest time to wait in seconds
+        """
+        pending = self._pending
+        if pending is not None:
+            wait([pending], timeout=timeout)
+
+    def load(self, now: Optional[float] = None) -> bool:
+        """
+        Replace the snapshot with the full flag set.
+
+        Args:
+            now: Load time (monotonic seconds), defaults to the current time
+
+        Returns:
+            True if the snapshot was loaded
+        """
+        now = time.monotonic() if now is None else now
+        try:
+            table = get_dynamodb_resource().Table(self.table_name)
+            snapshot = FlagSnapshot.build(scan_flag_items(table), self.parse_item, now)
+        except Exception as e:
+            self._record_error(now)
+            logger.error(f"Failed to load flag snapshot: {str(e)}")
+            return False
+
+        self.snapshot = snapshot
+        self.full_loads += 1
+        logger.info(f"Loaded flag snapshot with {len(snapshot.flags)} flags")
+        return True
+
+    def refresh(self, now: Optional[float] = None) -> bool:
+        """
+        Apply the flags changed since the snapshot's watermark.
+
+        Falls back to a full load when there is no snapshot or no watermark.
+
+        Args:
+            now: Refresh time (monotonic seconds), defaults to the current time
+
+        Returns:
+            True if the snapshot was refreshed
+        """
+        now = time.monotonic() if now is None else now
+        snapshot = self.snapshot
+        if snapshot is None or not snapshot.watermark:
+            return self.load(now)
+
+        try:
+            table = get_dynamodb_resource().Table(self.table_name)
+            items = list(query_changed_flag_items(
+                table, snapshot.watermark, index_name=self.index_name
+            ))
+        except Exception as e:
+            self._record_error(now)
+            logger.error(f"Failed to refresh flag snapshot: {str(e)}")
+            return False
+
+        self.snapshot = snapshot.apply(items, self.parse_item, now)
+        self.delta_refreshes += 1
+        self.delta_items += len(items)
+        logger.debug(f"Refreshed flag snapshot with {len(items)} changed flags")
+        return True
+
+    def _submit_update(self) -> None:
+        """Start a load or refresh on the background thread unless one is running."""
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix='flag-snapshot-refresh'
+                )
+            try:
+                self._pending = self._executor.submit(self._update)
+            except RuntimeError:
+                # Executor shut down (interpreter exiting); skip the refresh
+                self._pending = None
+
+    def _update(self) -> None:
+        """Reload the snapshot when a full reload is due, otherwise refresh it."""
+        now = time.monotonic()
+        snapshot = self.snapshot
+        if snapshot is None or now - snapshot.loaded_at >= self.full_reload_interval_seconds:
+            self.load(now)
+        else:
+            self.refresh(now)
+
+    def _record_error(self, now: float) -> None:
+        """Count a failed load or refresh and back off until the next interval."""
+        self.refresh_errors += 1
+        self._retry_at = now + self.refresh_interval_seconds
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get snapshot size and refresh counters."""
+        return {
+            'flags': len(self.snapshot.flags) if self.snapshot else 0,
+            'full_loads': self.full_loads,
+            'delta_refreshes': self.delta_refreshes,
+            'delta_items': self.delta_items,
+            'refresh_errors': self.refresh_errors
+        }
@@ -9,7 +9,6 @@ Following TDD (Test-Driven Development) - GREEN phase: Implementation to pass te
 import sys
 import json
 import os
-import boto3
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone
@@ -19,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "shared"))
 sys.path.insert(0, str(Path(__file__).parent))
 
 from evaluator import FeatureFlagEvaluator
+from kinesis_emitter import flush_after_invocation, get_kinesis_emitter
 from models import FeatureFlagConfig
 from utils import get_logger
 
@@ -108,6 +108,8 @@ def record_evaluation_event_async(
     Record evaluation event to Kinesis asynchronously.
 
     This is a fire-and-forget operation - it should not block the response.
+    The event is appended to the container's buffered emitter, which sends
+    events in batches with PutRecords from a background thread.
     Failures are logged but do not raise exceptions.
 
     Args:
@@ -125,8 +127,6 @@ def record_evaluation_event_async(
             logger.warning("KINESIS_STREAM_NAME not set, skipping evaluation tracking")
             return
 
-        kinesis = boto3.client('kinesis')
-
         # Build event data
         event_data = {
             'event_type': 'feature_flag_evaluation',
@@ -140,15 +140,16 @@ def record_evaluation_event_async(
             'context': context
         }
 
-        # Send to Kinesis
-        kinesis.put_record(
-            StreamName=stream_name,
-            Data=json.dumps(event_data),
-            PartitionKey=user_id
-        )
+        # Buffer for the next batched send to Kinesis
+        if not get_kinesis_emitter(stream_name).emit(event_data, partition_key=user_id):
+            logger.warning(
+                "Evaluation event dropped by Kinesis emitter",
+                extra={'flag_key': flag_config.key, 'user_id': user_id}
+            )
+            return
 
         logger.debug(
-            f"Evaluation event recorded to Kinesis",
+            f"Evaluation event buffered for Kinesis",
             extra={
                 'flag_key': flag_config.key,
                 'user_id': user_id,
@@ -168,6 +169,7 @@ def record_evaluation_event_async(
         )
 
 
+@flush_after_invocation
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler for feature flag evaluation.
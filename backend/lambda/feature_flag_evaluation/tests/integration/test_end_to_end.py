@@ -446,3 +446,60 @@ class TestFeatureFlagEndToEnd:
             body = json.loads(response['body'])
             assert body['enabled'] is False
             assert body['reason'] == 'not_in_rollout'
+
+
+class TestBatchEvaluateWithDynamoDB:
+    """Batch evaluation against a moto-backed flags table."""
+
+    @pytest.fixture
+    def flags_table(self, monkeypatch):
+        """Create the flags table in moto and route the evaluator to it."""
+        import boto3
+        from moto import mock_dynamodb
+
+        for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+            monkeypatch.setenv(name, 'testing')
+
+        with mock_dynamodb():
+            dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+            table = dynamodb.create_table(
+                TableName='experimently-feature-flags',
+                KeySchema=[{'AttributeName': 'key', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'key', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            with patch('evaluator.get_dynamodb_resource', return_value=dynamodb):
+                yield table
+
+    def test_cold_start_fetches_flags_in_chunks(self, flags_table):
+        """Test that 250 cold flags cost three BatchGetItem calls."""
+        from evaluator import FeatureFlagEvaluator
+
+        with flags_table.batch_writer() as batch:
+            for i in range(240):
+                batch.put_item(Item={
+                    'flag_id': f'flag_{i}',
+                    'key': f'flag_{i}',
+                    'enabled': i % 2 == 0,
+                    'rollout_percentage': 100
+                })
+
+        flag_keys = [f'flag_{i}' for i in range(250)]
+        evaluator = FeatureFlagEvaluator()
+        results = evaluator.batch_evaluate(user_id="user_123", flag_keys=flag_keys)
+
+        assert results['flag_0']['enabled'] is True
+        assert results['flag_1']['reason'] == 'flag_disabled'
+        assert results['flag_245']['reason'] == 'flag_not_found'
+        assert evaluator.last_batch_stats == {
+            'cache_hits': 0,
+            'cache_misses': 250,
+            'dynamodb_calls': 3,
+            'dynamodb_calls_saved': 247
+        }
+
+        # Warm cache serves everything, including the missing flags
+        evaluator.batch_evaluate(user_id="user_456", flag_keys=flag_keys)
+        assert evaluator.last_batch_stats['cache_hits'] == 250
+        assert evaluator.last_batch_stats['dynamodb_calls'] == 0
+        assert evaluator.get_dynamodb_calls_saved() == 247
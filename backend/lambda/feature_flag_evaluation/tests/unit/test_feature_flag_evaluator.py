@@ -639,31 +639,21 @@ class TestFeatureFlagEvaluator:
         """Test batch evaluation of multiple flags."""
         from evaluator import FeatureFlagEvaluator
 
-        # Mock DynamoDB to return different flags
-        def get_item_side_effect(**kwargs):
-            flag_key = kwargs['Key']['key']
-            if flag_key == "flag1":
-                return {'Item': {
-                    'flag_id': 'flag_1', 'key': 'flag1',
-                    'enabled': True, 'rollout_percentage': 100.0
-                }}
-            elif flag_key == "flag2":
-                return {'Item': {
-                    'flag_id': 'flag_2', 'key': 'flag2',
-                    'enabled': False, 'rollout_percentage': 100.0
-                }}
-            elif flag_key == "flag3":
-                return {'Item': {
-                    'flag_id': 'flag_3', 'key': 'flag3',
-                    'enabled': True, 'rollout_percentage': 50.0
-                }}
-            else:
-                return {}  # Flag not found
-
-        mock_table = Mock()
-        mock_table.get_item = Mock(side_effect=get_item_side_effect)
+        # Mock DynamoDB to return the existing flags in one batch
         mock_resource = Mock()
-        mock_resource.Table.return_value = mock_table
+        mock_resource.batch_get_item.return_value = {
+            'Responses': {
+                'experimently-feature-flags': [
+                    {'flag_id': 'flag_1', 'key': 'flag1',
+                     'enabled': True, 'rollout_percentage': 100.0},
+                    {'flag_id': 'flag_2', 'key': 'flag2',
+                     'enabled': False, 'rollout_percentage': 100.0},
+                    {'flag_id': 'flag_3', 'key': 'flag3',
+                     'enabled': True, 'rollout_percentage': 50.0},
+                ]
+            },
+            'UnprocessedKeys': {}
+        }
         mock_get_resource.return_value = mock_resource
 
         evaluator = FeatureFlagEvaluator()
@@ -692,20 +682,24 @@ class TestFeatureFlagEvaluator:
         assert results["flag4"]["enabled"] is False
         assert results["flag4"]["reason"] == "flag_not_found"
 
+        # All misses fetched with one call instead of four
+        assert mock_resource.batch_get_item.call_count == 1
+        assert evaluator.last_batch_stats["dynamodb_calls_saved"] == 3
+
     @patch('evaluator.get_dynamodb_resource')
     def test_batch_evaluate_uses_cache(self, mock_get_resource):
         """Test that batch evaluation benefits from caching."""
         from evaluator import FeatureFlagEvaluator
 
-        mock_table = Mock()
-        mock_table.get_item.return_value = {
-            'Item': {
-                'flag_id': 'cached_flag', 'key': 'cached',
-                'enabled': True, 'rollout_percentage': 100.0
+        mock_resource = Mock()
+        mock_resource.batch_get_item.return_value = {
+            'Responses': {
+                'experimently-feature-flags': [{
+                    'flag_id': 'cached_flag', 'key': 'cached',
+                    'enabled': True, 'rollout_percentage': 100.0
+                }]
             }
         }
-        mock_resource = Mock()
-        mock_resource.Table.return_value = mock_table
         mock_get_resource.return_value = mock_resource
 
         evaluator = FeatureFlagEvaluator()
@@ -715,18 +709,69 @@ class TestFeatureFlagEvaluator:
             user_id="user_123",
             flag_keys=["cached"]
         )
-        assert mock_table.get_item.call_count == 1
+        assert mock_resource.batch_get_item.call_count == 1
 
         # Second batch - cache hit
         results2 = evaluator.batch_evaluate(
             user_id="user_123",
             flag_keys=["cached"]
         )
-        assert mock_table.get_item.call_count == 1  # No additional call
+        assert mock_resource.batch_get_item.call_count == 1  # No additional call
 
         # Results should be consistent
         assert results1["cached"]["enabled"] == results2["cached"]["enabled"]
 
+    @patch('evaluator.time.sleep')
+    @patch('evaluator.get_dynamodb_resource')
+    def test_batch_evaluate_retries_unprocessed_keys(self, mock_get_resource, mock_sleep):
+        """Test that UnprocessedKeys are retried with backoff."""
+        from evaluator import FeatureFlagEvaluator
+
+        table = 'experimently-feature-flags'
+        mock_resource = Mock()
+        mock_resource.batch_get_item.side_effect = [
+            {
+                'Responses': {table: [{'flag_id': 'flag_1', 'key': 'flag1', 'enabled': True}]},
+                'UnprocessedKeys': {table: {'Keys': [{'key': 'flag2'}]}}
+            },
+            {
+                'Responses': {table: [{'flag_id': 'flag_2', 'key': 'flag2', 'enabled': True}]},
+                'UnprocessedKeys': {}
+            },
+        ]
+        mock_get_resource.return_value = mock_resource
+
+        evaluator = FeatureFlagEvaluator()
+        configs = evaluator.get_flag_configs_cached(["flag1", "flag2"])
+
+        assert configs["flag1"].flag_id == "flag_1"
+        assert configs["flag2"].flag_id == "flag_2"
+        assert mock_resource.batch_get_item.call_args_list[1].kwargs == {
+            'RequestItems': {table: {'Keys': [{'key': 'flag2'}]}}
+        }
+        mock_sleep.assert_called_once()
+
+    @patch('evaluator.time.sleep')
+    @patch('evaluator.get_dynamodb_resource')
+    def test_batch_evaluate_does_not_cache_unfetched_keys(self, mock_get_resource, mock_sleep):
+        """Test that keys still unprocessed after all retries are fetched again later."""
+        from evaluator import FeatureFlagEvaluator, BATCH_GET_MAX_RETRIES
+
+        table = 'experimently-feature-flags'
+        mock_resource = Mock()
+        mock_resource.batch_get_item.return_value = {
+            'Responses': {},
+            'UnprocessedKeys': {table: {'Keys': [{'key': 'flag1'}]}}
+        }
+        mock_get_resource.return_value = mock_resource
+
+        evaluator = FeatureFlagEvaluator()
+        configs = evaluator.get_flag_configs_cached(["flag1"])
+
+        assert configs == {"flag1": None}
+        assert mock_resource.batch_get_item.call_count == BATCH_GET_MAX_RETRIES + 1
+        assert "flag1" not in evaluator._flag_cache
+
     def test_batch_evaluate_empty_list(self):
         """Test batch evaluate with empty flag list."""
         from evaluator import FeatureFlagEvaluator
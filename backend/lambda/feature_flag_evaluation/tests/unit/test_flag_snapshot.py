@@ -0,0 +1,251 @@
+"""
+Unit tests for the flag snapshot with delta refresh.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add parent directories to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "shared"))
+
+from flag_snapshot import FlagSnapshot, FlagSnapshotStore, query_changed_flag_items, scan_flag_items
+
+
+def flag_item(key, enabled=True, version=1, updated_at='2025-01-01T00:00:00', **extra):
+    """Build a flags table item."""
+    return {
+        'flag_id': f'id_{key}',
+        'key': key,
+        'status': 'active',
+        'enabled': enabled,
+        'rollout_percentage': 100,
+        'version': version,
+        'updated_at': updated_at,
+        **extra
+    }
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    """Create the flags table in moto and route snapshot loads to it."""
+    import boto3
+    from moto import mock_dynamodb
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+
+    with mock_dynamodb():
+        resource = boto3.resource('dynamodb', region_name='us-east-1')
+        resource.create_table(
+            TableName='experimently-feature-flags',
+            KeySchema=[{'AttributeName': 'key', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'key', 'AttributeType': 'S'},
+                {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'updated_at', 'AttributeType': 'S'},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'status-index',
+                'KeySchema': [
+                    {'AttributeName': 'status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'updated_at', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        with patch('flag_snapshot.get_dynamodb_resource', return_value=resource), \
+                patch('evaluator.get_dynamodb_resource', return_value=resource):
+            yield resource
+
+
+@pytest.fixture
+def flags_table(dynamodb):
+    """Flags table with two active flags and one archived flag."""
+    table = dynamodb.Table('experimently-feature-flags')
+    table.put_item(Item=flag_item('checkout'))
+    table.put_item(Item=flag_item('dark_mode', enabled=False))
+    table.put_item(Item=flag_item('old', status='archived'))
+    return table
+
+
+def make_store():
+    """Create a snapshot store for the flags table."""
+    from evaluator import FeatureFlagEvaluator
+    return FlagSnapshotStore('experimently-feature-flags', FeatureFlagEvaluator._parse_flag_item)
+
+
+class TestFlagSnapshot:
+    """Test the immutable snapshot."""
+
+    def test_apply_returns_new_snapshot(self):
+        """Test that applying changes leaves the original snapshot untouched."""
+        from evaluator import FeatureFlagEvaluator
+        parse = FeatureFlagEvaluator._parse_flag_item
+
+        first = FlagSnapshot.build([flag_item('a')], parse, now=1.0)
+        second = first.apply(
+            [flag_item('a', enabled=False, version=2, updated_at='2025-01-02T00:00:00')],
+            parse,
+            now=2.0
+        )
+
+        assert first.get('a').enabled is True
+        assert second.get('a').enabled is False
+        assert second.watermark == '2025-01-02T00:00:00'
+        assert second.loaded_at == 1.0
+        with pytest.raises(TypeError):
+            second.flags['b'] = None
+
+    def test_older_versions_are_ignored(self):
+        """Test that re-reading an older item does not roll a flag back."""
+        from evaluator import FeatureFlagEvaluator
+        parse = FeatureFlagEvaluator._parse_flag_item
+
+        snapshot = FlagSnapshot.build(
+            [flag_item('a', enabled=False, version=3)], parse, now=1.0
+        )
+        snapshot = snapshot.apply([flag_item('a', version=2)], parse, now=2.0)
+
+        assert snapshot.get('a').enabled is False
+
+    def test_scan_follows_pages(self):
+        """Test that every page of a scan is read."""
+        table = Mock()
+        table.scan.side_effect = [
+            {'Items': [flag_item('a')], 'LastEvaluatedKey': {'key': 'a'}},
+            {'Items': [flag_item('b')]},
+        ]
+
+        items = list(scan_flag_items(table))
+
+        assert [item['key'] for item in items] == ['a', 'b']
+        assert table.scan.call_args_list[1].kwargs == {'ExclusiveStartKey': {'key': 'a'}}
+
+    def test_changed_flags_are_queried_not_scanned(self, flags_table):
+        """Test that the delta reads only the changed items of each status."""
+        flags_table.put_item(Item=flag_item('checkout', version=2, updated_at='2025-02-01T00:00:00'))
+        flags_table.put_item(Item=flag_item('old', version=2, updated_at='2025-02-01T00:00:00', status='archived'))
+
+        with patch.object(flags_table, 'scan') as scan:
+            items = list(query_changed_flag_items(flags_table, '2025-01-15T00:00:00'))
+
+        scan.assert_not_called()
+        assert sorted(item['key'] for item in items) == ['checkout', 'old']
+
+
+class TestFlagSnapshotStore:
+    """Test loading and refreshing snapshots."""
+
+    def test_cold_start_loads_active_flags(self, flags_table):
+        """Test that the full load runs in the background and skips archived flags."""
+        store = make_store()
+
+        assert store.get_snapshot() is None
+        store.wait_for_refresh()
+        snapshot = store.get_snapshot()
+
+        assert set(snapshot.flags) == {'checkout', 'dark_mode'}
+        assert store.get_stats()['full_loads'] == 1
+
+    @patch('flag_snapshot.time.monotonic')
+    def test_delta_refresh_applies_changes_only(self, mock_monotonic, flags_table):
+        """Test that a refresh pulls flags changed since the watermark."""
+        mock_monotonic.return_value = 1000.0
+        store = make_store()
+        store.get_snapshot()
+        store.wait_for_refresh()
+
+        flags_table.put_item(Item=flag_item(
+            'checkout', enabled=False, version=2, updated_at='2025-02-01T00:00:00'
+        ))
+        flags_table.put_item(Item=flag_item(
+            'dark_mode', enabled=False, version=2, updated_at='2025-02-01T00:00:00',
+            status='archived'
+        ))
+        flags_table.put_item(Item=flag_item('search', updated_at='2025-02-01T00:00:00'))
+
+        # Within the refresh interval the snapshot is served as is
+        mock_monotonic.return_value = 1010.0
+        assert store.get_snapshot().get('checkout').enabled is True
+
+        # A due refresh runs in the background; the current snapshot is served meanwhile
+        mock_monotonic.return_value = 1031.0
+        assert store.get_snapshot().get('checkout').enabled is True
+        store.wait_for_refresh()
+        snapshot = store.get_snapshot()
+
+        assert snapshot.get('checkout').enabled is False
+        assert snapshot.get('dark_mode') is None
+        assert snapshot.get('search') is not None
+        # The unchanged flag at the watermark is re-read and ignored
+        assert store.get_stats() == {
+            'flags': 2,
+            'full_loads': 1,
+            'delta_refreshes': 1,
+            'delta_items': 4,
+            'refresh_errors': 0
+        }
+
+    @patch('flag_snapshot.time.monotonic')
+    def test_failed_refresh_keeps_serving_snapshot(self, mock_monotonic, flags_table):
+        """Test that DynamoDB errors do not drop the snapshot."""
+        mock_monotonic.return_value = 1000.0
+        store = make_store()
+        store.get_snapshot()
+        store.wait_for_refresh()
+        loaded = store.get_snapshot()
+
+        mock_monotonic.return_value = 1031.0
+        with patch('flag_snapshot.get_dynamodb_resource', side_effect=Exception("throttled")) as failing:
+            assert store.get_snapshot() is loaded
+            store.wait_for_refresh()
+            # Backs off until the next interval instead of retrying every call
+            mock_monotonic.return_value = 1040.0
+            assert store.get_snapshot() is loaded
+            store.wait_for_refresh()
+            assert failing.call_count == 1
+
+        assert store.get_stats()['refresh_errors'] == 1
+
+
+class TestEvaluatorSnapshotMode:
+    """Test the evaluator serving flags from the snapshot."""
+
+    def test_flags_are_served_without_dynamodb_reads(self, flags_table, monkeypatch):
+        """Test that lookups after the cold start load hit only memory."""
+        from evaluator import FeatureFlagEvaluator
+
+        monkeypatch.setenv('FLAG_SNAPSHOT_ENABLED', 'true')
+        evaluator = FeatureFlagEvaluator()
+        evaluator.snapshot_store.wait_for_refresh()
+
+        results = evaluator.batch_evaluate('user_1', ['checkout', 'dark_mode', 'old', 'missing'])
+
+        assert results['checkout']['enabled'] is True
+        assert results['dark_mode']['reason'] == 'flag_disabled'
+        assert results['old']['reason'] == 'flag_not_found'
+        assert results['missing']['reason'] == 'flag_not_found'
+
+        with patch('flag_snapshot.get_dynamodb_resource') as resource, \
+                patch('evaluator.get_dynamodb_resource') as evaluator_resource:
+            assert evaluator.get_flag_config_cached('checkout').flag_id == 'id_checkout'
+            resource.assert_not_called()
+            evaluator_resource.assert_not_called()
+
+    def test_falls_back_to_key_cache_without_snapshot(self, monkeypatch):
+        """Test that a failed snapshot load falls back to per-key fetches."""
+        from evaluator import FeatureFlagEvaluator
+
+        monkeypatch.setenv('FLAG_SNAPSHOT_ENABLED', 'true')
+
+        with patch('flag_snapshot.get_dynamodb_resource', side_effect=Exception("down")):
+            evaluator = FeatureFlagEvaluator()
+            evaluator.snapshot_store.wait_for_refresh()
+            with patch.object(evaluator, '_fetch_flag_config', return_value=None) as fetch_flag_config:
+                assert evaluator.get_flag_config_cached('checkout') is None
+
+        fetch_flag_config.assert_called_once_with('checkout')
@@ -709,3 +709,22 @@ class TestFeatureFlagLambdaHandler:
         assert 'flag_config' in call_kwargs
         assert 'evaluation_result' in call_kwargs
         assert call_kwargs['evaluation_result']['reason'] == 'not_in_rollout'
+
+    @patch.dict('os.environ', {'KINESIS_STREAM_NAME': 'evaluation-events'})
+    @patch('handler.get_kinesis_emitter')
+    def test_evaluation_event_is_buffered_in_emitter(self, mock_get_emitter):
+        """Test that the evaluation event is handed to the buffered emitter."""
+        from handler import record_evaluation_event_async
+
+        mock_get_emitter.return_value.emit.return_value = True
+
+        record_evaluation_event_async(
+            user_id='user_123',
+            flag_config=self.enabled_flag,
+            evaluation_result={"enabled": True, "reason": "enabled", "variant": None}
+        )
+
+        mock_get_emitter.assert_called_once_with('evaluation-events')
+        event_data = mock_get_emitter.return_value.emit.call_args.args[0]
+        assert event_data['flag_key'] == 'new_checkout'
+        assert mock_get_emitter.return_value.emit.call_args.kwargs == {'partition_key': 'user_123'}
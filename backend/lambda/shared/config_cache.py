@@ -0,0 +1,284 @@
+"""
+In-memory configuration cache for Lambda warm starts.
+
+Shared by the feature flag and assignment Lambdas to cache configs read from
+DynamoDB:
+- Stale-while-revalidate: an expired entry is still served for a grace
+  window while a single background refresh reloads it
+- Single-flight: concurrent misses for the same key wait for one load
+  instead of all calling DynamoDB
+- Negative caching: missing configs (and failed loads) are cached as None
+  with a shorter TTL
+- Jittered expiry: TTLs are shortened by a random fraction so entries loaded
+  together do not all expire at the same moment
+
+Note: Lambda freezes the container between invocations, so a background
+refresh started at the end of one invocation may finish in the next one.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with its load and expiry times (monotonic seconds)."""
+
+    value: Any
+    fetched_at: float
+    expires_at: float
+
+
+class ConfigCache:
+    """
+    Thread-safe TTL cache with stale-while-revalidate and single-flight loads.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        stale_grace: float = 60.0,
+        jitter: float = 0.1,
+        max_refresh_workers: int = 2
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a found config stays fresh
+            negative_ttl: Seconds a missing config (None) stays fresh
+            stale_grace: Seconds an expired entry is still served while refreshing
+            jitter: Largest fraction a TTL is randomly shortened by
+            max_refresh_workers: Threads running background refreshes
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_grace = stale_grace
+        self.jitter = jitter
+        self.max_refresh_workers = max_refresh_workers
+
+        self.entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, using the negative TTL for None.
+
+        Args:
+            key: Cache key
+            value: Value to cache (None caches a missing config)
+        """
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def is_fresh(self, key: str) -> bool:
+        """Check whether a key has an entry that has not expired."""
+        entry = self.entries.get(key)
+        return entry is not None and time.monotonic() < entry.expires_at
+
+    def record_hit(self) -> None:
+        """Count a lookup served without loading, e.g. from a snapshot."""
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        """Count a lookup that needed a load outside the cache."""
+        with self._lock:
+            self.misses += 1
+
+    def get(self, key: str, load: Callable[[str], Any]) -> Any:
+        """
+        Get a value, loading it on a miss.
+
+        Args:
+            key: Cache key
+            load: Loads the value for a key; raises on errors
+
+        Returns:
+            Cached or loaded value, None if it does not exist or failed to load
+        """
+        return self.get_many([key], lambda keys: {keys[0]: load(keys[0])})[key]
+
+    def get_many(
+        self,
+        keys: Iterable[str],
+        load_many: Callable[[List[str]], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Get many values, loading all misses with one call.
+
+        Fresh entries are returned as is. Stale entries within the grace window
+        are returned too, and refreshed with one background call. Misses that
+        another thread is already loading are waited for, the rest are loaded
+        here.
+
+        Args:
+            keys: Cache keys, duplicates are ignored
+            load_many: Loads values for a list of keys; keys left out of the
+                result could not be loaded and are not cached
+
+        Returns:
+            Dictionary mapping each key to its value (None if missing)
+        """
+        now = time.monotonic()
+        results: Dict[str, Any] = {}
+        refresh_keys: List[str] = []
+        load_keys: List[str] = []
+        waiting: Dict[str, Future] = {}
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self.entries.get(key)
+                if entry is not None and now < entry.expires_at:
+                    self.hits += 1
+                    results[key] = entry.value
+                elif entry is not None and now < entry.expires_at + self.stale_grace:
+                    self.stale_hits += 1
+                    results[key] = entry.value
+                    if key not in self._inflight:
+                        self._inflight[key] = Future()
+                        refresh_keys.append(key)
+                else:
+                    self.misses += 1
+                    if key in self._inflight:
+                        waiting[key] = self._inflight[key]
+                    else:
+                        self._inflight[key] = Future()
+                        load_keys.append(key)
+
+        if refresh_keys:
+            self._submit_refresh(refresh_keys, load_many)
+
+        if load_keys:
+            results.update(self._load(load_keys, load_many, refresh=False))
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return results
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for loads and refreshes that are in flight.
+
+        Args:
+            timeout: Longest time to wait in seconds
+        """
+        with self._lock:
+            futures = list(self._inflight.values())
+        wait(futures, timeout=timeout)
+
+    def hit_rate(self) -> float:
+        """
+        Calculate the share of lookups served from the cache, stale or not.
+
+        Returns:
+            Hit rate as a decimal (0.0 to 1.0)
+        """
+        served = self.hits + self.stale_hits
+        total = served + self.misses
+        if total == 0:
+            return 0.0
+        return served / total
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache size and counters."""
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors
+            }
+
+    def _store(self, key: str, value: Any, now: float) -> None:
+        """Store an entry with a jittered expiry; the caller holds the lock."""
+        ttl = self.negative_ttl if value is None else self.ttl
+        ttl *= 1 - self.jitter * random.random()
+        self.entries[key] = CacheEntry(value=value, fetched_at=now, expires_at=now + ttl)
+
+    def _submit_refresh(
+        self,
+        keys: List[str],
+        load_many: Callable[[List[str]], Dict[str, Any]]
+    ) -> None:
+        """Refresh stale keys on the background executor."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_refresh_workers,
+                        thread_name_prefix='config-cache-refresh'
+                    )
+        try:
+            self._executor.submit(self._load, keys, load_many, True)
+        except RuntimeError:
+            # Executor shut down (interpreter exiting); refresh inline instead
+            self._load(keys, load_many, True)
+
+    def _load(
+        self,
+        keys: List[str],
+        load_many: Callable[[List[str]], Dict[str, Any]],
+        refresh: bool
+    ) -> Dict[str, Any]:
+        """
+        Load keys, store the results and release their waiters.
+
+        A failed load on a miss caches None with the negative TTL; a failed
+        refresh keeps the stale entry.
+        """
+        try:
+            values = load_many(keys)
+            failed = False
+        except Exception as e:
+            logger.error(f"Failed to load configs: {str(e)}", extra={'keys': len(keys)})
+            values = {}
+            failed = True
+
+        now = time.monotonic()
+        results = {}
+        with self._lock:
+            for key in keys:
+                if key in values:
+                    self._store(key, values[key], now)
+                    results[key] = values[key]
+                elif refresh:
+                    entry = self.entries.get(key)
+                    results[key] = entry.value if entry is not None else None
+                else:
+                    if failed:
+                        self._store(key, None, now)
+                    results[key] = None
+
+            if refresh:
+                self.refreshes += 1
+                if failed or len(values) < len(keys):
+                    self.refresh_errors += 1
+
+            for key in keys:
+                future = self._inflight.pop(key, None)
+                if future is not None:
+                    future.set_result(results[key])
+
+        return results
@@ -0,0 +1,330 @@
+"""
+Buffered Kinesis emitter for Lambda functions.
+
+Records are appended to an in-memory buffer and sent with PutRecords by a
+background thread, so emitting a record costs no network call:
+- The buffer is flushed when it reaches the PutRecords limits (500 records
+  or 5 MB), or when its oldest record is older than the age limit
+- Only the records PutRecords reports as failed are retried, with backoff;
+  records still failing after the last retry are dropped and counted
+- The buffer is bounded; records emitted while it is full are dropped
+
+Lambda freezes the container once the handler returns, which also stops the
+background thread. Handlers decorated with flush_after_invocation send the
+buffer before returning when its oldest record reached the age limit or the
+invocation is about to time out. Younger records wait for the next invocation
+and are lost if Lambda reclaims the container while it is idle.
+"""
+
+import functools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import DecimalEncoder, get_kinesis_client, get_logger
+
+logger = get_logger(__name__)
+
+# PutRecords limits
+MAX_RECORDS_PER_REQUEST = 500
+MAX_BYTES_PER_REQUEST = 5 * 1024 * 1024
+MAX_BYTES_PER_RECORD = 1024 * 1024
+
+# Remaining invocation time below which every buffered record is sent
+FLUSH_REMAINING_TIME_MS = 1000
+
+# (data, partition key, size in bytes, time added)
+BufferedRecord = Tuple[bytes, str, int, float]
+
+
+class KinesisEmitter:
+    """Per-container buffer of Kinesis records with background batched sends."""
+
+    def __init__(
+        self,
+        stream_name: str,
+        max_buffer_age_seconds: float = 1.0,
+        max_buffered_records: int = 10000,
+        max_retries: int = 3,
+        retry_base_delay_seconds: float = 0.1
+    ):
+        """
+        Initialize the emitter.
+
+        Args:
+            stream_name: Kinesis stream name
+            max_buffer_age_seconds: Longest time a record waits in the buffer
+            max_buffered_records: Records kept before new ones are dropped
+            max_retries: Retries of failed records per flush
+            retry_base_delay_seconds: Delay before the first retry, doubled after each
+        """
+        self.stream_name = stream_name
+        self.max_buffer_age_seconds = max_buffer_age_seconds
+        self.max_buffered_records = max_buffered_records
+        self.max_retries = max_retries
+        self.retry_base_delay_seconds = retry_base_delay_seconds
+
+        self._buffer: List[BufferedRecord] = []
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retried = 0
+        self.requests = 0
+
+    def emit(self, data: Dict[str, Any], partition_key: str) -> bool:
+        """
+        Add a record to the buffer.
+
+        Args:
+            data: Record data (will be JSON encoded)
+            partition_key: Partition key for sharding
+
+        Returns:
+            False if the record was dropped (too large or buffer full)
+        """
+        payload = json.dumps(data, cls=DecimalEncoder).encode('utf-8')
+        partition_key = str(partition_key)
+        size = len(payload) + len(partition_key.encode('utf-8'))
+
+        if size > MAX_BYTES_PER_RECORD:
+            logger.warning(f"Dropping Kinesis record of {size} bytes", extra={'stream': self.stream_name})
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered_records:
+                self.dropped += 1
+                return False
+
+            self._buffer.append((payload, partition_key, size, time.monotonic()))
+            self._buffer_bytes += size
+            # Wake the flusher to start the age timer or to send a full batch
+            wake = len(self._buffer) == 1 or self._is_full()
+
+        self._ensure_thread()
+        if wake:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Send every buffered record.
+
+        Returns:
+            Number of records sent
+        """
+        sent = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return sent
+                sent += self._send(batch)
+
+    def is_due(self) -> bool:
+        """Check whether the buffer is full or its oldest record reached the age limit."""
+        with self._lock:
+            if not self._buffer:
+                return False
+            return (
+                self._is_full()
+                or time.monotonic() - self._buffer[0][3] >= self.max_buffer_age_seconds
+            )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get buffer size and counters."""
+        with self._lock:
+            return {
+                'buffered': len(self._buffer),
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'retried': self.retried,
+                'requests': self.requests
+            }
+
+    def _is_full(self) -> bool:
+        """Check whether the buffer holds a full PutRecords request; the caller holds the lock."""
+        return (
+            len(self._buffer) >= MAX_RECORDS_PER_REQUEST
+            or self._buffer_bytes >= MAX_BYTES_PER_REQUEST
+        )
+
+    def _take_batch(self) -> List[BufferedRecord]:
+        """Remove the next PutRecords-sized batch from the buffer."""
+        with self._lock:
+            count = 0
+            size = 0
+            for _, _, record_size, _ in self._buffer:
+                if count == MAX_RECORDS_PER_REQUEST or size + record_size > MAX_BYTES_PER_REQUEST:
+                    break
+                count += 1
+                size += record_size
+
+            batch = self._buffer[:count]
+            del self._buffer[:count]
+            self._buffer_bytes -= size
+            return batch
+
+    def _send(self, batch: List[BufferedRecord]) -> int:
+        """Send one batch with PutRecords, retrying only the failed records."""
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_base_delay_seconds * (2 ** (attempt - 1)))
+                with self._lock:
+                    self.retried += len(pending)
+
+            try:
+                response = get_kinesis_client().put_records(
+                    StreamName=self.stream_name,
+                    Records=[
+                        {'Data': payload, 'PartitionKey': partition_key}
+                        for payload, partition_key, _, _ in pending
+                    ]
+                )
+                results = response.get('Records', [])
+                failed = [
+                    record for record, result in zip(pending, results)
+                    if result.get('ErrorCode')
+                ]
+            except Exception as e:
+                logger.warning(
+                    f"Failed to put records in Kinesis: {str(e)}",
+                    extra={'stream': self.stream_name}
+                )
+                failed = pending
+
+            with self._lock:
+                self.requests += 1
+                self.sent += len(pending) - len(failed)
+
+            if not failed:
+                return len(batch)
+            pending = failed
+
+        logger.error(
+            f"Dropping {len(pending)} Kinesis records after {self.max_retries} retries",
+            extra={'stream': self.stream_name}
+        )
+        with self._lock:
+            self.failed += len(pending)
+        return len(batch) - len(pending)
+
+    def _ensure_thread(self) -> None:
+        """Start the background flush thread on first use."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='kinesis-emitter', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Flush when woken by a full buffer or when the oldest record is due."""
+        while True:
+            with self._lock:
+                full = self._is_full()
+                oldest_at = self._buffer[0][3] if self._buffer else None
+
+            timeout = None
+            if oldest_at is not None:
+                timeout = oldest_at + self.max_buffer_age_seconds - time.monotonic()
+
+            if not full and (timeout is None or timeout > 0):
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error in Kinesis emitter: {str(e)}", extra={'stream': self.stream_name})
+
+
+_emitters: Dict[str, KinesisEmitter] = {}
+_emitters_lock = threading.Lock()
+
+
+def get_kinesis_emitter(stream_name: str) -> KinesisEmitter:
+    """
+    Get the emitter for a stream (one per container).
+
+    Args:
+        stream_name: Kinesis stream name
+
+    Returns:
+        KinesisEmitter for the stream
+    """
+    with _emitters_lock:
+        emitter = _emitters.get(stream_name)
+        if emitter is None:
+            emitter = _emitters[stream_name] = KinesisEmitter(stream_name)
+        return emitter
+
+
+def flush_due_emitters(
+    context: Any = None,
+    min_remaining_time_ms: int = FLUSH_REMAINING_TIME_MS
+) -> int:
+    """
+    Send buffered records that should not wait for the next invocation.
+
+    Emitters that are due are flushed; when the invocation has less than
+    min_remaining_time_ms left, every emitter is.
+
+    Args:
+        context: Lambda context
+        min_remaining_time_ms: Remaining time below which all emitters are flushed
+
+    Returns:
+        Number of records sent
+    """
+    get_remaining_time = getattr(context, 'get_remaining_time_in_millis', None)
+    remaining_time_ms = get_remaining_time() if callable(get_remaining_time) else None
+    running_out = (
+        isinstance(remaining_time_ms, (int, float))
+        and remaining_time_ms < min_remaining_time_ms
+    )
+
+    sent = 0
+    for emitter in list(_emitters.values()):
+        if not (running_out or emitter.is_due()):
+            continue
+        try:
+            sent += emitter.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush Kinesis emitter: {str(e)}", extra={'stream': emitter.stream_name})
+    return sent
+
+
+def flush_after_invocation(handler: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """
+    Decorate a Lambda handler to flush due emitters before it returns.
+
+    Args:
+        handler: Lambda handler taking (event, context)
+
+    Returns:
+        Wrapped handler
+    """
+    @functools.wraps(handler)
+    def wrapper(event: Any, context: Any) -> Any:
+        try:
+            return handler(event, context)
+        finally:
+            flush_due_emitters(context)
+
+    return wrapper
@@ -0,0 +1,173 @@
+"""
+Unit tests for the shared Lambda config cache.
+
+Tests stale-while-revalidate, single-flight loads, negative caching and
+jittered expiry.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add parent directory to path to import shared modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config_cache import ConfigCache
+
+
+@pytest.fixture
+def clock():
+    """Controllable monotonic clock for the cache."""
+    with patch('config_cache.time.monotonic') as monotonic:
+        monotonic.return_value = 1000.0
+        yield monotonic
+
+
+class TestConfigCache:
+    """Test cache lookups and expiry."""
+
+    def test_hit_after_miss(self, clock):
+        """Test that a loaded value is served from the cache."""
+        cache = ConfigCache(ttl=60, jitter=0)
+        load = Mock(return_value="config")
+
+        assert cache.get("key", load) == "config"
+        assert cache.get("key", load) == "config"
+
+        load.assert_called_once_with("key")
+        assert cache.hit_rate() == 0.5
+
+    def test_negative_entries_use_shorter_ttl(self, clock):
+        """Test that missing configs are cached for the negative TTL."""
+        cache = ConfigCache(ttl=60, negative_ttl=5, stale_grace=0, jitter=0)
+        load = Mock(return_value=None)
+
+        assert cache.get("missing", load) is None
+        clock.return_value = 1004.0
+        assert cache.get("missing", load) is None
+        assert load.call_count == 1
+
+        clock.return_value = 1006.0
+        cache.get("missing", load)
+        assert load.call_count == 2
+
+    def test_failed_load_is_cached_as_missing(self, clock):
+        """Test that an error on a miss caches None instead of raising."""
+        cache = ConfigCache(jitter=0)
+        load = Mock(side_effect=Exception("throttled"))
+
+        assert cache.get("key", load) is None
+        assert cache.entries["key"].value is None
+        assert cache.get("key", load) is None
+        assert load.call_count == 1
+
+    def test_expiry_is_jittered(self, clock):
+        """Test that entries expire at different times within the TTL."""
+        cache = ConfigCache(ttl=100, jitter=0.2)
+
+        for i in range(50):
+            cache.put(f"key_{i}", i)
+
+        expiries = {entry.expires_at for entry in cache.entries.values()}
+        assert len(expiries) > 1
+        assert all(1080.0 <= expiry <= 1100.0 for expiry in expiries)
+
+
+class TestStaleWhileRevalidate:
+    """Test serving stale entries during a background refresh."""
+
+    def test_stale_entry_served_while_refreshing(self, clock):
+        """Test that an expired entry is returned and refreshed once in the background."""
+        cache = ConfigCache(ttl=60, stale_grace=30, jitter=0)
+        cache.put("key", "old")
+        clock.return_value = 1070.0
+
+        release = threading.Event()
+
+        def slow_load(key):
+            release.wait(5)
+            return "new"
+
+        assert cache.get("key", slow_load) == "old"
+        assert cache.get("key", slow_load) == "old"
+
+        release.set()
+        cache.wait_for_refreshes(5)
+
+        assert cache.get("key", slow_load) == "new"
+        assert cache.get_stats() == {
+            'entries': 1,
+            'hits': 1,
+            'stale_hits': 2,
+            'misses': 0,
+            'refreshes': 1,
+            'refresh_errors': 0
+        }
+
+    def test_failed_refresh_keeps_stale_entry(self, clock):
+        """Test that a refresh error does not replace the stale value."""
+        cache = ConfigCache(ttl=60, stale_grace=30, jitter=0)
+        cache.put("key", "old")
+        clock.return_value = 1070.0
+
+        assert cache.get("key", Mock(side_effect=Exception("throttled"))) == "old"
+        cache.wait_for_refreshes(5)
+
+        assert cache.entries["key"].value == "old"
+        assert cache.get_stats()['refresh_errors'] == 1
+
+    def test_entry_past_grace_is_loaded_synchronously(self, clock):
+        """Test that an entry beyond the grace window is a miss."""
+        cache = ConfigCache(ttl=60, stale_grace=30, jitter=0)
+        cache.put("key", "old")
+        clock.return_value = 1100.0
+
+        assert cache.get("key", Mock(return_value="new")) == "new"
+        assert cache.get_stats()['misses'] == 1
+
+
+class TestSingleFlight:
+    """Test that concurrent misses share one load."""
+
+    def test_concurrent_misses_load_once(self):
+        """Test that threads missing the same key wait for one load."""
+        cache = ConfigCache(jitter=0)
+        calls = []
+        started = threading.Event()
+
+        def slow_load(key):
+            calls.append(key)
+            started.set()
+            time.sleep(0.05)
+            return f"config_{key}"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("key", slow_load)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == ["key"]
+        assert results == ["config_key"] * 10
+
+    def test_get_many_loads_misses_in_one_call(self, clock):
+        """Test that all misses of a batch are loaded together."""
+        cache = ConfigCache(jitter=0)
+        cache.put("cached", "value")
+        load_many = Mock(return_value={"a": 1, "b": None})
+
+        results = cache.get_many(["cached", "a", "b", "c", "a"], load_many)
+
+        load_many.assert_called_once_with(["a", "b", "c"])
+        assert results == {"cached": "value", "a": 1, "b": None, "c": None}
+        # Keys the loader left out are not cached
+        assert "b" in cache.entries
+        assert "c" not in cache.entries
@@ -0,0 +1,212 @@
+"""
+Unit tests for the buffered Kinesis emitter.
+
+Tests batching by count and size, age-based flushing and retrying of
+failed records.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add parent directory to path to import shared modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import kinesis_emitter
+from kinesis_emitter import (
+    KinesisEmitter,
+    flush_after_invocation,
+    flush_due_emitters,
+    get_kinesis_emitter,
+)
+
+
+def ok_response(records):
+    """PutRecords response with every record accepted."""
+    return {'FailedRecordCount': 0, 'Records': [{'SequenceNumber': '1'} for _ in records]}
+
+
+@pytest.fixture
+def kinesis():
+    """Mock Kinesis client accepting every record."""
+    client = Mock()
+    client.put_records.side_effect = lambda StreamName, Records: ok_response(Records)
+    with patch('kinesis_emitter.get_kinesis_client', return_value=client):
+        yield client
+
+
+def wait_until(condition, timeout=5.0):
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestKinesisEmitter:
+    """Test buffering and batched sends."""
+
+    def test_emit_only_appends(self, kinesis):
+        """Test that emitting does not call Kinesis."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60)
+
+        for i in range(10):
+            assert emitter.emit({'n': i}, partition_key=f'user_{i}')
+
+        kinesis.put_records.assert_not_called()
+        assert emitter.get_stats()['buffered'] == 10
+
+    def test_flush_splits_by_record_count(self, kinesis):
+        """Test that a flush sends at most 500 records per request."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60)
+        with patch.object(emitter, '_ensure_thread'):
+            for i in range(1200):
+                emitter.emit({'n': i}, partition_key='user')
+
+        assert emitter.flush() == 1200
+        sizes = [len(c.kwargs['Records']) for c in kinesis.put_records.call_args_list]
+        assert sizes == [500, 500, 200]
+
+    def test_flush_splits_by_size(self, kinesis):
+        """Test that a request stays within 5 MB."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60)
+        with patch.object(emitter, '_ensure_thread'):
+            for i in range(60):
+                emitter.emit({'blob': 'x' * 100_000}, partition_key='user')
+
+        emitter.flush()
+
+        for call in kinesis.put_records.call_args_list:
+            records = call.kwargs['Records']
+            assert sum(len(r['Data']) + len(r['PartitionKey']) for r in records) <= 5 * 1024 * 1024
+        assert kinesis.put_records.call_count == 2
+
+    def test_full_buffer_is_sent_in_background(self, kinesis):
+        """Test that reaching 500 records triggers a send without a flush call."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60)
+
+        for i in range(500):
+            emitter.emit({'n': i}, partition_key='user')
+
+        assert wait_until(lambda: emitter.get_stats()['sent'] == 500)
+
+    def test_old_records_are_sent_after_age_limit(self, kinesis):
+        """Test that a partial buffer is sent once its oldest record is due."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=0.05)
+
+        emitter.emit({'n': 1}, partition_key='user')
+
+        assert wait_until(lambda: emitter.get_stats()['sent'] == 1)
+
+    @patch('kinesis_emitter.time.sleep')
+    def test_only_failed_records_are_retried(self, mock_sleep, kinesis):
+        """Test that records rejected by PutRecords are sent again alone."""
+        kinesis.put_records.side_effect = [
+            {
+                'FailedRecordCount': 1,
+                'Records': [
+                    {'SequenceNumber': '1'},
+                    {'ErrorCode': 'ProvisionedThroughputExceededException'},
+                    {'SequenceNumber': '3'},
+                ]
+            },
+            {'FailedRecordCount': 0, 'Records': [{'SequenceNumber': '2'}]},
+        ]
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60)
+        with patch.object(emitter, '_ensure_thread'):
+            for i in range(3):
+                emitter.emit({'n': i}, partition_key=f'user_{i}')
+
+        assert emitter.flush() == 3
+
+        retry = kinesis.put_records.call_args_list[1].kwargs['Records']
+        assert retry == [{'Data': b'{"n": 1}', 'PartitionKey': 'user_1'}]
+        assert emitter.get_stats()['retried'] == 1
+
+    @patch('kinesis_emitter.time.sleep')
+    def test_records_dropped_after_retries(self, mock_sleep, kinesis):
+        """Test that records failing every attempt are counted as failed."""
+        kinesis.put_records.side_effect = Exception("unavailable")
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60, max_retries=2)
+        with patch.object(emitter, '_ensure_thread'):
+            emitter.emit({'n': 1}, partition_key='user')
+
+        assert emitter.flush() == 0
+
+        assert kinesis.put_records.call_count == 3
+        assert emitter.get_stats()['failed'] == 1
+        assert emitter.get_stats()['buffered'] == 0
+
+    def test_bounded_buffer_drops_new_records(self, kinesis):
+        """Test that records beyond the buffer limit are dropped."""
+        emitter = KinesisEmitter('stream', max_buffer_age_seconds=60, max_buffered_records=2)
+        with patch.object(emitter, '_ensure_thread'):
+            assert emitter.emit({'n': 1}, partition_key='user')
+            assert emitter.emit({'n': 2}, partition_key='user')
+            assert not emitter.emit({'n': 3}, partition_key='user')
+
+        assert emitter.get_stats()['dropped'] == 1
+
+    def test_one_emitter_per_stream(self):
+        """Test that the container reuses the emitter of a stream."""
+        assert get_kinesis_emitter('stream-a') is get_kinesis_emitter('stream-a')
+        assert get_kinesis_emitter('stream-a') is not get_kinesis_emitter('stream-b')
+
+
+class TestFlushAfterInvocation:
+    """Test flushing before the handler returns."""
+
+    @pytest.fixture
+    def emitters(self, kinesis):
+        """Registered emitters with a fresh and a due record, without background threads."""
+        fresh = KinesisEmitter('fresh', max_buffer_age_seconds=60)
+        due = KinesisEmitter('due', max_buffer_age_seconds=0)
+        with patch.dict(kinesis_emitter._emitters, {'fresh': fresh, 'due': due}, clear=True):
+            for emitter in (fresh, due):
+                with patch.object(emitter, '_ensure_thread'):
+                    emitter.emit({'n': 1}, partition_key='user')
+            yield fresh, due
+
+    @staticmethod
+    def lambda_context(remaining_time_ms):
+        """Lambda context with the given remaining time."""
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = remaining_time_ms
+        return context
+
+    def test_only_due_emitters_are_flushed(self, emitters):
+        """Test that records younger than the age limit stay buffered."""
+        fresh, due = emitters
+
+        assert flush_due_emitters(self.lambda_context(30000)) == 1
+
+        assert fresh.get_stats()['buffered'] == 1
+        assert due.get_stats()['sent'] == 1
+
+    def test_all_emitters_flushed_when_time_is_low(self, emitters):
+        """Test that everything is sent when the invocation is about to time out."""
+        fresh, due = emitters
+
+        assert flush_due_emitters(self.lambda_context(500)) == 2
+
+        assert fresh.get_stats()['sent'] == 1
+
+    def test_handler_flushes_before_returning(self, emitters):
+        """Test that the decorated handler flushes after the handler body, even on error."""
+        fresh, due = emitters
+
+        @flush_after_invocation
+        def handler(event, context):
+            assert due.get_stats()['buffered'] == 1
+            raise ValueError(event)
+
+        with pytest.raises(ValueError):
+            handler('event', {})
+
+        assert due.get_stats()['sent'] == 1
+        assert fresh.get_stats()['buffered'] == 1
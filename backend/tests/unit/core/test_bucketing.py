@@ -0,0 +1,99 @@
+"""
+Test cases for deterministic bucketing.
+"""
+
+import hashlib
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from backend.app.core.bucketing import AllocationTable, bucket, bucket_many
+from backend.app.core.rules_engine import should_include_in_rollout
+
+
+def _reference_bucket(key, num_buckets=100):
+    """Bucket as computed by the original per-call-site hashing."""
+    return int(hashlib.md5(key.encode()).hexdigest(), 16) % num_buckets
+
+
+USER_IDS = [f"user_{i}" for i in range(2000)] + [str(uuid4()) for _ in range(200)] + [42, ""]
+
+
+class TestBucket:
+    """Test scalar and batched bucketing."""
+
+    def test_scalar_matches_reference(self):
+        """Test that buckets match the original hexdigest formula."""
+        salt = str(uuid4())
+        for user_id in USER_IDS:
+            assert bucket(user_id, salt=salt) == _reference_bucket(f"{user_id}:{salt}")
+            assert bucket(user_id) == _reference_bucket(str(user_id))
+
+    @pytest.mark.parametrize("num_buckets", [1, 7, 100, 1000, 2 ** 16 + 1, 2 ** 30])
+    def test_batched_matches_scalar(self, num_buckets):
+        """Test that the batched API is bit-for-bit equal to the scalar one."""
+        buckets = bucket_many(USER_IDS, salt="flag-key", num_buckets=num_buckets)
+
+        assert buckets.tolist() == [
+            bucket(user_id, salt="flag-key", num_buckets=num_buckets) for user_id in USER_IDS
+        ]
+        assert bucket_many(USER_IDS[:50], num_buckets=num_buckets).tolist() == [
+            _reference_bucket(str(user_id), num_buckets) for user_id in USER_IDS[:50]
+        ]
+
+    def test_empty_batch(self):
+        """Test that an empty batch gives an empty array."""
+        assert bucket_many([], salt="x").shape == (0,)
+
+    def test_invalid_bucket_count(self):
+        """Test that out of range bucket counts are rejected."""
+        with pytest.raises(ValueError):
+            bucket_many(["a"], num_buckets=0)
+        with pytest.raises(ValueError):
+            bucket_many(["a"], num_buckets=2 ** 31)
+
+
+class TestAllocationTable:
+    """Test mapping buckets to values."""
+
+    def test_thresholds(self):
+        """Test that each bucket maps to the first value whose threshold exceeds it."""
+        table = AllocationTable([30, 0, 70], ["a", "b", "c"])
+
+        assert [table.lookup(b) for b in (0, 29, 30, 99)] == ["a", "a", "c", "c"]
+        assert table.lookup_many(np.array([0, 29, 30, 99])) == ["a", "a", "c", "c"]
+
+    def test_fallback_to_last_value(self):
+        """Test that buckets past an under-allocated table go to the last value."""
+        table = AllocationTable([20, 20], ["a", "b"])
+
+        assert table.lookup(95) == "b"
+        assert table.lookup_many(np.arange(100)) == ["a"] * 20 + ["b"] * 80
+
+    def test_batched_matches_scalar(self):
+        """Test that lookups agree for fractional allocations."""
+        table = AllocationTable([33.3, 33.3, 33.4], ["a", "b", "c"])
+        buckets = bucket_many(USER_IDS, salt="exp")
+
+        assert table.lookup_many(buckets) == [table.lookup(b) for b in buckets.tolist()]
+
+    def test_invalid(self):
+        """Test that empty or mismatched tables are rejected."""
+        with pytest.raises(ValueError):
+            AllocationTable([], [])
+        with pytest.raises(ValueError):
+            AllocationTable([50, 50], ["a"])
+
+
+class TestCallSites:
+    """Test that call sites keep their original buckets."""
+
+    def test_rollout_inclusion_unchanged(self):
+        """Test rule rollout inclusion against the original formula."""
+        rule = SimpleNamespace(id="rule_1", rollout_percentage=37)
+
+        for i in range(500):
+            included = should_include_in_rollout(rule, {"user_id": f"user_{i}"})
+            assert included == (_reference_bucket(f"user_{i}:rule_1") < 37)
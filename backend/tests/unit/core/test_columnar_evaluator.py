@@ -0,0 +1,195 @@
+"""
+Test cases for columnar batch evaluation.
+
+Checks that evaluating a batch as per-attribute masks matches evaluating
+each user context on its own.
+"""
+
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.app.core.columnar_evaluator import AttributeColumn, ColumnarEvaluator, _MISSING
+from backend.app.core.rule_compiler import RuleCompiler
+from backend.app.schemas.targeting_rule import (
+    Condition,
+    LogicalOperator,
+    OperatorType,
+    RuleGroup,
+    TargetingRule,
+    TargetingRules,
+)
+from backend.app.services.rules_evaluation_service import RulesEvaluationService
+
+
+def _random_context(rng: random.Random) -> dict:
+    """Build a user context with a mix of types, missing and malformed values."""
+    context = {"user_id": f"user_{rng.randint(0, 10**9)}"}
+    choices = {
+        "country": ["US", "CA", "DE", None, 1, ["US"]],
+        "age": [17, 18, 25.5, "30", "abc", None, True, 65, "-5"],
+        "plan": ["free", "pro", "enterprise", "PRO"],
+        "signup": [
+            "2023-01-15T00:00:00",
+            "2023-07-01T12:00:00",
+            "2024-03-01T00:00:00+00:00",
+            1700000000,
+            datetime(2023, 9, 1),
+            datetime(2023, 9, 1, tzinfo=timezone.utc),
+            "garbage",
+        ],
+        "version": ["1.2.3", "2.0.0", "0.9.1", "v1.5.0", "bad"],
+    }
+    for attribute, values in choices.items():
+        if rng.random() < 0.9:
+            context[attribute] = rng.choice(values)
+    return context
+
+
+def _rules() -> TargetingRules:
+    return TargetingRules(
+        rules=[
+            TargetingRule(
+                id="adults_na",
+                priority=1,
+                rule=RuleGroup(
+                    operator=LogicalOperator.AND,
+                    conditions=[
+                        Condition(attribute="country", operator=OperatorType.IN, value=["US", "CA"]),
+                        Condition(attribute="age", operator=OperatorType.GREATER_THAN_OR_EQUAL, value=18),
+                    ]
+                )
+            ),
+            TargetingRule(
+                id="paid_or_recent",
+                priority=2,
+                rollout_percentage=50,
+                rule=RuleGroup(
+                    operator=LogicalOperator.OR,
+                    conditions=[
+                        Condition(attribute="plan", operator=OperatorType.NOT_EQUALS, value="free"),
+                        Condition(attribute="signup", operator=OperatorType.AFTER, value="2023-06-01T00:00:00"),
+                    ]
+                )
+            ),
+            TargetingRule(
+                id="ranges",
+                priority=3,
+                rule=RuleGroup(
+                    operator=LogicalOperator.OR,
+                    conditions=[
+                        Condition(attribute="age", operator=OperatorType.BETWEEN, value=20, additional_value=40),
+                        Condition(
+                            attribute="signup",
+                            operator=OperatorType.BETWEEN,
+                            value="2023-01-01T00:00:00",
+                            additional_value="2023-02-01T00:00:00"
+                        ),
+                    ],
+                    groups=[
+                        RuleGroup(
+                            operator=LogicalOperator.NOT,
+                            conditions=[
+                                Condition(attribute="plan", operator=OperatorType.STARTS_WITH, value="ent")
+                            ]
+                        )
+                    ]
+                )
+            ),
+            TargetingRule(
+                id="versioned",
+                priority=4,
+                rule=RuleGroup(
+                    operator=LogicalOperator.AND,
+                    conditions=[
+                        Condition(attribute="version", operator=OperatorType.SEMANTIC_VERSION, value="1.2.0"),
+                        Condition(attribute="signup", operator=OperatorType.BEFORE, value="2024-01-01T00:00:00"),
+                    ]
+                )
+            ),
+        ],
+        default_rule=TargetingRule(id="default", rule=RuleGroup(), priority=999)
+    )
+
+
+class TestAttributeColumn:
+    """Test dictionary encoding of attribute columns."""
+
+    def test_encodes_distinct_values(self):
+        """Test that repeated values share a code and missing values get -1."""
+        column = AttributeColumn(["US", "CA", _MISSING, "US", ["x"], ["x"]])
+
+        assert column.codes.tolist() == [0, 1, -1, 0, 2, 3]
+        assert column.uniques[:2] == ["US", "CA"]
+
+    def test_keeps_equal_values_of_different_types_apart(self):
+        """Test that True, 1 and 1.0 are distinct values."""
+        column = AttributeColumn([True, 1, 1.0])
+
+        assert len(column.uniques) == 3
+
+    def test_gather_is_false_for_missing(self):
+        """Test that rows with a missing attribute never match."""
+        column = AttributeColumn(["US", _MISSING])
+
+        assert column.gather(np.array([True])).tolist() == [True, False]
+
+
+class TestColumnarEvaluator:
+    """Test columnar evaluation against per-context evaluation."""
+
+    def test_matches_per_context_evaluation(self):
+        """Test that every user gets the same rule as with row-at-a-time evaluation."""
+        rng = random.Random(42)
+        contexts = [_random_context(rng) for _ in range(2000)]
+        rules = _rules()
+        compiler = RuleCompiler()
+
+        result = ColumnarEvaluator(compiler).evaluate(rules, contexts)
+        compiled = compiler.compile_rule_set(rules)
+
+        assert len(result) == len(contexts)
+        for position, context in enumerate(contexts):
+            assert result.matched_rule(position) == compiled.evaluate(context), context
+
+    def test_service_matches_enhanced_evaluation(self):
+        """Test that the service's columnar mode keeps its operator semantics."""
+        rng = random.Random(7)
+        contexts = [_random_context(rng) for _ in range(1000)]
+        rules = _rules()
+        service = RulesEvaluationService()
+
+        result = service.batch_evaluate_columnar(rules, contexts)
+
+        expected_ids = []
+        for context in contexts:
+            matched_rule = service._evaluate_targeting_rules_enhanced(rules, context)
+            expected_ids.append(matched_rule.id if matched_rule else None)
+        assert result.matched_rule_ids() == expected_ids
+
+    def test_no_match_uses_default_rule(self):
+        """Test that unmatched users map to the default rule."""
+        rules = TargetingRules(
+            rules=[
+                TargetingRule(
+                    id="us",
+                    rule=RuleGroup(conditions=[
+                        Condition(attribute="country", operator=OperatorType.EQUALS, value="US")
+                    ])
+                )
+            ],
+            default_rule=None
+        )
+
+        result = ColumnarEvaluator().evaluate(rules, [{"country": "US"}, {"country": "CA"}, {}])
+
+        assert result.matched_index.tolist() == [0, -1, -1]
+        assert result.matched_rule_ids() == ["us", None, None]
+
+    def test_empty_batch(self):
+        """Test evaluating an empty batch."""
+        result = ColumnarEvaluator().evaluate(_rules(), [])
+
+        assert len(result) == 0
+        assert result.matched_rule_ids() == []
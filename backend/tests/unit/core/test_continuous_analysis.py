@@ -0,0 +1,100 @@
+"""
+Test cases for continuous metric analysis.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.app.core.continuous_analysis import (
+    bootstrap_difference,
+    bootstrap_means,
+    cuped_adjust,
+    percentile_interval,
+)
+
+
+class TestCuped:
+    """Test CUPED adjustment."""
+
+    def test_removes_covariate_variance(self):
+        """Test that a correlated covariate shrinks variance and keeps the mean."""
+        rng = np.random.default_rng(1)
+        covariates = {"a": rng.normal(10, 3, 5000), "b": rng.normal(10, 3, 5000)}
+        values = {k: 2 * v + rng.normal(0, 1, v.size) for k, v in covariates.items()}
+
+        result = cuped_adjust(values, covariates)
+
+        assert result.theta == pytest.approx(2.0, abs=0.05)
+        assert result.variance_reduction > 0.9
+        for key in values:
+            assert result.adjusted[key].mean() == pytest.approx(
+                values[key].mean(), abs=0.2
+            )
+
+    def test_constant_covariate_is_noop(self):
+        """Test that a covariate without variance leaves values unchanged."""
+        values = {"a": np.array([1.0, 2.0, 3.0])}
+        result = cuped_adjust(values, {"a": np.zeros(3)})
+
+        assert result.theta == 0.0
+        assert result.variance_reduction == 0.0
+        np.testing.assert_array_equal(result.adjusted["a"], values["a"])
+
+
+class TestPoissonBootstrap:
+    """Test the vectorized Poisson bootstrap."""
+
+    def test_means_center_on_sample_mean(self):
+        """Test that resampled means scatter around the sample mean."""
+        values = np.random.default_rng(2).exponential(5.0, 2000)
+
+        means = bootstrap_means(values, 500, seed=3)
+
+        assert means.shape == (500,)
+        assert means.mean() == pytest.approx(values.mean(), rel=0.01)
+        assert means.std() == pytest.approx(values.std() / np.sqrt(values.size), rel=0.2)
+
+    def test_blocks_and_parts_are_reproducible(self, monkeypatch):
+        """Test that seeded results do not depend on where the parts run."""
+        values = np.random.default_rng(4).normal(0, 1, 1000)
+        monkeypatch.setattr(
+            "backend.app.core.continuous_analysis.MAX_WEIGHTS_PER_BLOCK", 10000
+        )
+
+        serial = bootstrap_means(values, 200, seed=5, parts=4)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            parallel = bootstrap_means(values, 200, seed=5, executor=executor, parts=4)
+
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_empty_sample(self):
+        """Test that an empty sample yields no interval."""
+        means = bootstrap_means(np.zeros(0), 10, seed=1)
+
+        assert np.isnan(means).all()
+        assert percentile_interval(means) == (0.0, 0.0)
+
+    def test_difference_detects_shift(self):
+        """Test that a clear shift is significant and a null one is not."""
+        rng = np.random.default_rng(6)
+        control = rng.normal(10, 2, 3000)
+        shifted = rng.normal(10.5, 2, 3000)
+        same = rng.normal(10, 2, 3000)
+        control_means = bootstrap_means(control, 1000, seed=7)
+
+        effect = bootstrap_difference(
+            control_means,
+            bootstrap_means(shifted, 1000, seed=8),
+            shifted.mean() - control.mean(),
+        )
+        null = bootstrap_difference(
+            control_means,
+            bootstrap_means(same, 1000, seed=9),
+            same.mean() - control.mean(),
+        )
+
+        assert effect.p_value < 0.01
+        assert 0 < effect.confidence_interval[0] < 0.5 < effect.confidence_interval[1]
+        assert null.p_value > 0.05
@@ -6,7 +6,13 @@ Tests the caching layer for rule evaluation results.
 
 import pytest
 import time
-from backend.app.core.evaluation_cache import EvaluationCache, CacheKey, CacheEntry
+from backend.app.core.evaluation_cache import (
+    EvaluationCache,
+    CacheKey,
+    CacheEntry,
+    ClockEvaluationCache,
+    ShardedEvaluationCache,
+)
 from backend.app.schemas.targeting_rule import (
     TargetingRule,
     RuleGroup,
@@ -89,6 +95,46 @@ class TestCacheKeyGeneration:
         # Should be same despite different order
         assert key1 == key2
 
+    def test_projected_key_ignores_unread_attributes(self):
+        """Test that attributes outside the projection don't affect the key."""
+        cache = EvaluationCache()
+        attributes = {"country"}
+
+        key1 = cache.generate_key("rule_1", {"country": "US", "request_ts": 1}, attributes)
+        key2 = cache.generate_key("rule_1", {"country": "US", "request_ts": 2}, attributes)
+        key3 = cache.generate_key("rule_1", {"country": "CA", "request_ts": 1}, attributes)
+
+        assert key1 == key2
+        assert key1 != key3
+
+    def test_missing_attribute_differs_from_none(self):
+        """Test that a missing attribute and a None value produce different keys."""
+        cache = EvaluationCache()
+        attributes = {"country"}
+
+        assert cache.generate_key("rule_1", {}, attributes) != cache.generate_key("rule_1", {"country": None}, attributes)
+
+    def test_equal_values_of_different_types_differ(self):
+        """Test that True, 1 and 1.0 produce different keys."""
+        cache = EvaluationCache()
+
+        keys = {
+            cache.generate_key("rule_1", {"flag": value})
+            for value in (True, 1, 1.0)
+        }
+
+        assert len(keys) == 3
+
+    def test_unhashable_values(self):
+        """Test that nested lists and dicts can be keyed."""
+        cache = EvaluationCache()
+        user_context = {"tags": ["a", "b"], "profile": {"plan": "pro", "seats": [1, 2]}}
+
+        cache.set("rule_1", user_context, True)
+
+        assert cache.get("rule_1", {"profile": {"seats": [1, 2], "plan": "pro"}, "tags": ["a", "b"]}) is True
+        assert cache.get("rule_1", {"tags": ["b", "a"], "profile": {"plan": "pro", "seats": [1, 2]}}) is None
+
 
 class TestCacheStorage:
     """Test cache storage and retrieval."""
@@ -204,6 +250,42 @@ class TestCacheTTL:
         # Should be expired
         assert cache.get(rule_id, user_context) is None
 
+    def test_cleanup_expired_removes_only_expired(self):
+        """Test that cleanup removes expired entries and keeps live ones."""
+        cache = EvaluationCache(default_ttl=10.0)
+
+        cache.set("rule_1", {"user_id": "user_1"}, True, ttl=0.05)
+        cache.set("rule_1", {"user_id": "user_2"}, True)
+
+        time.sleep(0.1)
+
+        assert cache.cleanup_expired() == 1
+        assert cache.size == 1
+        assert cache.get("rule_1", {"user_id": "user_2"}) is True
+
+    def test_cleanup_skips_refreshed_entries(self):
+        """Test that an entry re-set with a longer TTL survives its old expiry."""
+        cache = EvaluationCache(default_ttl=10.0)
+        user_context = {"user_id": "user_1"}
+
+        cache.set("rule_1", user_context, True, ttl=0.05)
+        cache.set("rule_1", user_context, False)
+
+        time.sleep(0.1)
+
+        assert cache.cleanup_expired() == 0
+        assert cache.get("rule_1", user_context) is False
+
+    def test_expiry_heap_stays_bounded(self):
+        """Test that repeatedly overwriting entries doesn't grow the expiry heap without bound."""
+        cache = EvaluationCache(max_size=10)
+
+        for i in range(1000):
+            cache.set("rule_1", {"user_id": f"user_{i % 5}"}, True)
+
+        assert cache.size == 5
+        assert len(cache._expiry_heap) <= EvaluationCache.EXPIRY_HEAP_COMPACT_FACTOR * 10 + 1
+
 
 class TestCacheSizeManagement:
     """Test cache size limits and eviction."""
@@ -284,6 +366,38 @@ class TestCacheInvalidation:
         # user_2 should still be present
         assert cache.get("rule_1", {"user_id": "user_2", "country": "US"}) is True
 
+    def test_indexes_follow_eviction_and_overwrite(self):
+        """Test that evicted and overwritten entries are dropped from the indexes."""
+        cache = EvaluationCache(max_size=2)
+
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+        cache.set("rule_1", {"user_id": "user_1"}, False)
+        cache.set("rule_2", {"user_id": "user_2"}, True)
+        cache.set("rule_3", {"user_id": "user_3"}, True)
+
+        assert set(cache._rule_index) == {"rule_2", "rule_3"}
+        assert set(cache._user_index) == {"user_2", "user_3"}
+
+        cache.invalidate_rule("rule_2")
+
+        assert cache.size == 1
+        assert set(cache._user_index) == {"user_3"}
+
+        cache.invalidate_user("user_3")
+
+        assert cache.size == 0
+        assert cache._rule_index == {}
+
+    def test_invalidate_unknown_rule_and_user(self):
+        """Test that invalidating ids with no entries is a no-op."""
+        cache = EvaluationCache()
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+
+        cache.invalidate_rule("missing")
+        cache.invalidate_user("missing")
+
+        assert cache.get("rule_1", {"user_id": "user_1"}) is True
+
     def test_clear_all(self):
         """Test clearing entire cache."""
         cache = EvaluationCache()
@@ -326,6 +440,18 @@ class TestCacheStatistics:
         assert stats["misses"] == 1
         assert stats["hit_rate"] == pytest.approx(0.666, rel=0.01)
 
+    def test_track_key_build_time(self):
+        """Test that key construction time is reported."""
+        cache = EvaluationCache()
+
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+        cache.get("rule_1", {"user_id": "user_1"})
+
+        stats = cache.get_stats()
+
+        assert stats["key_build_time_ms"] > 0
+        assert stats["avg_key_build_time_us"] > 0
+
     def test_track_evictions(self):
         """Test tracking number of evictions."""
         cache = EvaluationCache(max_size=2)
@@ -384,6 +510,159 @@ class TestCacheThreadSafety:
         assert cache.size >= 0  # No corruption
 
 
+class TestClockEvaluationCache:
+    """Test CLOCK (second-chance) eviction."""
+
+    def test_referenced_entries_get_a_second_chance(self):
+        """Test that an entry hit since insertion survives the next eviction."""
+        cache = ClockEvaluationCache(max_size=3)
+
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+        cache.set("rule_2", {"user_id": "user_2"}, True)
+        cache.set("rule_3", {"user_id": "user_3"}, True)
+
+        cache.get("rule_1", {"user_id": "user_1"})
+        cache.set("rule_4", {"user_id": "user_4"}, True)
+
+        assert cache.get("rule_1", {"user_id": "user_1"}) is True
+        assert cache.get("rule_2", {"user_id": "user_2"}) is None
+        assert cache.size == 3
+
+    def test_all_referenced_still_evicts(self):
+        """Test that eviction terminates when every entry is referenced."""
+        cache = ClockEvaluationCache(max_size=2)
+
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+        cache.set("rule_2", {"user_id": "user_2"}, True)
+        cache.get("rule_1", {"user_id": "user_1"})
+        cache.get("rule_2", {"user_id": "user_2"})
+
+        cache.set("rule_3", {"user_id": "user_3"}, True)
+
+        assert cache.size == 2
+        assert cache.get_stats()["evictions"] == 1
+        assert set(cache._rule_index) == set(cache._cache[key].rule_id for key in cache._cache)
+
+    def test_expired_entry_is_removed_on_lookup(self):
+        """Test that an expired entry is dropped by a lookup."""
+        cache = ClockEvaluationCache(default_ttl=0.05)
+
+        cache.set("rule_1", {"user_id": "user_1"}, True)
+        time.sleep(0.1)
+
+        assert cache.get("rule_1", {"user_id": "user_1"}) is None
+        assert cache.size == 0
+
+
+class TestShardedEvaluationCache:
+    """Test the sharded evaluation cache."""
+
+    def test_get_and_set(self):
+        """Test storing and retrieving across shards."""
+        cache = ShardedEvaluationCache(num_shards=4)
+
+        for i in range(50):
+            cache.set(f"rule_{i % 5}", {"user_id": f"user_{i}"}, i % 2 == 0)
+
+        assert cache.size == 50
+        assert cache.get("rule_0", {"user_id": "user_0"}) is True
+        assert cache.get("rule_1", {"user_id": "user_1"}) is False
+        assert cache.get("rule_1", {"user_id": "missing"}) is None
+        assert {shard.size > 0 for shard in cache._shards} == {True}
+
+    def test_respects_max_size(self):
+        """Test that total size stays within the per-shard capacity."""
+        cache = ShardedEvaluationCache(max_size=40, num_shards=4)
+
+        for i in range(1000):
+            cache.set("rule_1", {"user_id": f"user_{i}"}, True)
+
+        assert cache.size <= 40
+        assert cache.get_stats()["evictions"] == 1000 - cache.size
+
+    def test_invalidation(self):
+        """Test invalidating by rule and by user across shards."""
+        cache = ShardedEvaluationCache(num_shards=4)
+
+        for i in range(20):
+            cache.set("rule_1", {"user_id": f"user_{i}"}, True)
+            cache.set("rule_2", {"user_id": f"user_{i}"}, True)
+
+        cache.invalidate_rule("rule_1")
+        assert cache.size == 20
+
+        cache.invalidate_user("user_0")
+        assert cache.size == 19
+        assert cache.get("rule_2", {"user_id": "user_0"}) is None
+        assert cache.get("rule_2", {"user_id": "user_1"}) is True
+
+    def test_stats_are_aggregated(self):
+        """Test that get_stats has the EvaluationCache keys, summed across shards."""
+        cache = ShardedEvaluationCache(max_size=100, num_shards=4)
+
+        for i in range(10):
+            cache.set("rule_1", {"user_id": f"user_{i}"}, True)
+            cache.get("rule_1", {"user_id": f"user_{i}"})
+            cache.get("rule_1", {"user_id": f"other_{i}"})
+
+        stats = cache.get_stats()
+
+        assert set(EvaluationCache().get_stats()) <= set(stats)
+        assert stats["hits"] == 10
+        assert stats["misses"] == 10
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 10
+        assert stats["max_size"] == 100
+        assert stats["shards"] == 4
+
+        cache.clear()
+        assert cache.get_stats()["total_requests"] == 0
+
+    def test_cleanup_expired(self):
+        """Test that cleanup removes expired entries from every shard."""
+        cache = ShardedEvaluationCache(num_shards=4)
+
+        for i in range(20):
+            cache.set("rule_1", {"user_id": f"user_{i}"}, True, ttl=0.05 if i % 2 else 10.0)
+        time.sleep(0.1)
+
+        assert cache.cleanup_expired() == 10
+        assert cache.size == 10
+
+    def test_invalid_shard_count(self):
+        """Test that at least one shard is required."""
+        with pytest.raises(ValueError):
+            ShardedEvaluationCache(num_shards=0)
+
+    def test_concurrent_access(self):
+        """Test that concurrent readers and writers see consistent results."""
+        import threading
+
+        cache = ShardedEvaluationCache(max_size=500, num_shards=8)
+        errors = []
+
+        def worker(thread_id):
+            for i in range(500):
+                user_context = {"user_id": f"user_{i % 200}"}
+                expected = (i % 200) % 2 == 0
+                if i % 5 == 0:
+                    cache.set("rule_1", user_context, expected)
+                result = cache.get("rule_1", user_context)
+                if result is not None and result != expected:
+                    errors.append((thread_id, i, result))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert cache.size <= 500
+        for shard in cache._shards:
+            assert sum(len(keys) for keys in shard._rule_index.values()) == shard.size
+
+
 class TestCacheWarming:
     """Test cache warming strategies."""
 
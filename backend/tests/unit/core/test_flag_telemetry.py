@@ -0,0 +1,104 @@
+"""Unit tests for buffered flag evaluation telemetry."""
+import asyncio
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from backend.app.core.flag_telemetry import FlagTelemetryBuffer
+from backend.app.models.metrics.metric import ErrorLog, MetricType, RawMetric
+
+
+def test_evaluations_are_pre_aggregated():
+    """Test that evaluations sharing flag, rule and minute become one bucket."""
+    buffer = FlagTelemetryBuffer()
+    flag_id = uuid4()
+
+    buffer.record_evaluation(flag_id, True, "beta", latency_ms=2.0)
+    buffer.record_evaluation(flag_id, False, "beta", latency_ms=4.0)
+    buffer.record_evaluation(flag_id, True, "beta")
+
+    assert buffer.stats()["buffered_buckets"] == 1
+    rows = {row["metric_type"]: row for row in buffer._metric_rows(buffer._buckets)}
+
+    assert set(rows) == {
+        MetricType.FLAG_EVALUATION.value,
+        MetricType.LATENCY.value,
+        MetricType.RULE_MATCH.value,
+    }
+    assert rows[MetricType.FLAG_EVALUATION.value]["count"] == 3
+    assert rows[MetricType.FLAG_EVALUATION.value]["meta_data"] == {"enabled": 2}
+    assert rows[MetricType.LATENCY.value]["count"] == 2
+    assert rows[MetricType.LATENCY.value]["value"] == pytest.approx(3.0)
+    assert rows[MetricType.RULE_MATCH.value]["count"] == 3
+
+
+def test_buffer_is_bounded():
+    """Test that new keys and errors beyond the limits are dropped and counted."""
+    buffer = FlagTelemetryBuffer(max_buckets=1, max_errors=1)
+    flag_id = uuid4()
+
+    assert buffer.record_evaluation(flag_id, True)
+    assert buffer.record_evaluation(flag_id, True)
+    assert not buffer.record_evaluation(uuid4(), True)
+    assert buffer.record_error("flag_evaluation_error", "boom")
+    assert not buffer.record_error("flag_evaluation_error", "boom")
+
+    stats = buffer.stats()
+    assert stats["buffered_buckets"] == 1
+    assert stats["dropped_evaluations"] == 1
+    assert stats["dropped_errors"] == 1
+
+
+def test_flush_writes_bulk_rows(db_session):
+    """Test that a flush writes all buffered rows in one transaction."""
+    buffer = FlagTelemetryBuffer()
+    for _ in range(5):
+        buffer.record_evaluation(None, True, latency_ms=1.0)
+    buffer.record_error("flag_evaluation_error", "boom", user_id="user_1")
+
+    with patch("backend.app.core.flag_telemetry.SessionLocal", return_value=db_session):
+        assert buffer.flush() == 3
+
+    assert [
+        (row.metric_type, row.count)
+        for row in db_session.query(RawMetric).order_by(RawMetric.metric_type)
+    ] == [(MetricType.FLAG_EVALUATION.value, 5), (MetricType.LATENCY.value, 5)]
+    assert db_session.query(ErrorLog).count() == 1
+    assert buffer.stats()["buffered_buckets"] == 0
+    assert buffer.stats()["flushed_rows"] == 3
+
+
+def test_failed_flush_is_counted():
+    """Test that rows lost to a failed write are counted, not retried forever."""
+    buffer = FlagTelemetryBuffer()
+    buffer.record_evaluation(uuid4(), True, "beta")
+    db = MagicMock()
+    db.execute.side_effect = RuntimeError("database down")
+
+    with patch("backend.app.core.flag_telemetry.SessionLocal", return_value=db):
+        assert buffer.flush() == 0
+
+    db.rollback.assert_called_once()
+    assert buffer.stats()["failed_rows"] == 2
+    assert buffer.stats()["buffered_buckets"] == 0
+
+
+@pytest.mark.asyncio
+async def test_size_trigger_flushes_early():
+    """Test that reaching the threshold flushes before the interval elapses."""
+    buffer = FlagTelemetryBuffer(flush_interval_seconds=60, flush_threshold=2)
+
+    with patch.object(buffer, "flush", return_value=0) as flush:
+        await buffer.start()
+        buffer.record_evaluation(uuid4(), True)
+        buffer.record_evaluation(uuid4(), True)
+
+        for _ in range(50):
+            if flush.called:
+                break
+            await asyncio.sleep(0.01)
+        assert flush.called
+
+        await buffer.stop()
+        assert buffer.is_running is False
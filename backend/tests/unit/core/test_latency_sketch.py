@@ -0,0 +1,133 @@
+"""
+Test cases for streaming latency quantiles.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from backend.app.core.latency_sketch import LatencySketch, RollingLatencySketch
+
+
+def _assert_close(estimate: float, samples: np.ndarray, q: float, accuracy: float):
+    """Check an estimate against the exact quantile, allowing for rank ties."""
+    lower = np.quantile(samples, max(q - 0.001, 0), method="lower")
+    upper = np.quantile(samples, min(q + 0.001, 1), method="higher")
+    assert lower * (1 - accuracy) <= estimate <= upper * (1 + accuracy)
+
+
+class TestLatencySketch:
+    """Test the log-bucketed quantile sketch."""
+
+    @pytest.mark.parametrize("q", [0.0, 0.5, 0.9, 0.95, 0.99, 1.0])
+    def test_quantiles_within_relative_accuracy(self, q):
+        """Test quantile estimates against exact quantiles of a skewed distribution."""
+        rng = np.random.default_rng(1)
+        samples = rng.lognormal(mean=0.0, sigma=1.5, size=20000)
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in samples:
+            sketch.add(value)
+
+        _assert_close(sketch.quantile(q), samples, q, 0.01)
+
+    def test_summary(self):
+        """Test count, mean, min and max are exact."""
+        sketch = LatencySketch()
+        for value in [1.0, 2.0, 3.0, 4.0]:
+            sketch.add(value)
+
+        summary = sketch.summary()
+
+        assert summary["count"] == 4
+        assert summary["avg"] == 2.5
+        assert summary["min"] == 1.0
+        assert summary["max"] == 4.0
+
+    def test_empty_sketch(self):
+        """Test that an empty sketch reports zeros."""
+        sketch = LatencySketch()
+
+        assert sketch.quantile(0.99) == 0.0
+        assert sketch.summary()["max"] == 0.0
+
+    def test_zero_values(self):
+        """Test that zero latencies are counted."""
+        sketch = LatencySketch()
+        for _ in range(90):
+            sketch.add(0.0)
+        for _ in range(10):
+            sketch.add(5.0)
+
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(0.99) == pytest.approx(5.0, rel=0.01)
+
+    def test_merge_matches_single_sketch(self):
+        """Test that merging per-worker sketches equals one sketch of all values."""
+        rng = random.Random(3)
+        values = [rng.expovariate(0.1) for _ in range(5000)]
+        combined = LatencySketch()
+        workers = [LatencySketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            combined.add(value)
+            workers[i % 4].add(value)
+
+        merged = LatencySketch()
+        for worker in workers:
+            merged.merge(worker)
+
+        assert merged.count == combined.count
+        for q in (0.5, 0.95, 0.99):
+            assert merged.quantile(q) == combined.quantile(q)
+
+    def test_merge_requires_same_accuracy(self):
+        """Test that sketches with different accuracies can't be merged."""
+        with pytest.raises(ValueError):
+            LatencySketch(0.01).merge(LatencySketch(0.02))
+
+    def test_serialization_round_trip(self):
+        """Test that a sketch survives to_dict/from_dict."""
+        sketch = LatencySketch()
+        for value in [0.0, 0.5, 1.5, 100.0]:
+            sketch.add(value)
+
+        restored = LatencySketch.from_dict(sketch.to_dict())
+
+        assert restored.summary() == sketch.summary()
+        assert LatencySketch.from_dict(LatencySketch().to_dict()).count == 0
+
+    def test_invalid_arguments(self):
+        """Test that invalid accuracy and quantiles are rejected."""
+        with pytest.raises(ValueError):
+            LatencySketch(relative_accuracy=0)
+        with pytest.raises(ValueError):
+            LatencySketch().quantile(1.5)
+
+
+class TestRollingLatencySketch:
+    """Test the windowed sketch."""
+
+    def test_window_drops_old_slices(self):
+        """Test that values older than the window are not reported."""
+        rolling = RollingLatencySketch(window_seconds=60.0, slices=6)
+
+        rolling.add(100.0, now=0.0)
+        rolling.add(1.0, now=55.0)
+
+        assert rolling.snapshot(now=59.0).count == 2
+        assert rolling.snapshot(now=75.0).count == 1
+        assert rolling.snapshot(now=75.0).max == 1.0
+
+        rolling.add(2.0, now=200.0)
+        assert rolling.snapshot(now=200.0).count == 1
+        assert len(rolling._slices) == 1
+
+    def test_slices_are_reused_within_a_step(self):
+        """Test that values in the same slice share a sketch."""
+        rolling = RollingLatencySketch(window_seconds=60.0, slices=6)
+
+        for second in range(10):
+            rolling.add(1.0, now=100.0 + second * 0.1)
+
+        assert len(rolling._slices) == 1
+        assert rolling.snapshot(now=101.0).count == 10
@@ -0,0 +1,183 @@
+"""
+Test cases for parsed operand caching.
+"""
+
+import itertools
+
+import pytest
+import semver
+
+from backend.app.core.operand_cache import (
+    OperandCache,
+    compile_regex,
+    get_operand_cache,
+    parse_semver_key,
+    parse_version_tuple,
+)
+from backend.app.core.rule_compiler import RuleCompiler
+from backend.app.core.rules_engine import apply_operator
+from backend.app.schemas.targeting_rule import (
+    Condition,
+    LogicalOperator,
+    OperatorType,
+    RuleGroup,
+    TargetingRule,
+    TargetingRules,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_operand_cache():
+    get_operand_cache().clear()
+    yield
+    get_operand_cache().clear()
+
+
+class TestOperandCache:
+    """Test the bounded operand cache."""
+
+    def test_parses_each_literal_once(self):
+        """Test that repeated lookups reuse the parsed value."""
+        cache = OperandCache()
+        calls = []
+
+        def parse(literal):
+            calls.append(literal)
+            return literal.upper()
+
+        assert cache.get("kind", "abc", parse) == "ABC"
+        assert cache.get("kind", "abc", parse) == "ABC"
+
+        assert calls == ["abc"]
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_kinds_are_separate(self):
+        """Test that the same literal is parsed per kind."""
+        cache = OperandCache()
+
+        assert cache.get("a", "1", lambda v: "a") == "a"
+        assert cache.get("b", "1", lambda v: "b") == "b"
+
+    def test_literal_types_are_separate(self):
+        """Test that equal literals of different types don't share entries."""
+        cache = OperandCache()
+
+        assert cache.get("kind", 1, repr) == "1"
+        assert cache.get("kind", 1.0, repr) == "1.0"
+        assert cache.get("kind", True, repr) == "True"
+
+    def test_failures_are_cached(self):
+        """Test that invalid literals are not re-parsed."""
+        cache = OperandCache()
+        calls = []
+
+        def parse(literal):
+            calls.append(literal)
+            return None
+
+        assert cache.get("kind", "bad", parse) is None
+        assert cache.get("kind", "bad", parse) is None
+        assert len(calls) == 1
+
+    def test_dict_literals(self):
+        """Test that dict operands are cached by content."""
+        cache = OperandCache()
+
+        first = cache.get("geo", {"lat": 1.0, "lon": 2.0}, lambda v: dict(v))
+        second = cache.get("geo", {"lon": 2.0, "lat": 1.0}, lambda v: dict(v))
+
+        assert first is second
+
+    def test_bounded(self):
+        """Test that the oldest entries are evicted at max_size."""
+        cache = OperandCache(max_size=3)
+        for i in range(5):
+            cache.get("kind", i, str)
+
+        assert cache.get_stats()["size"] == 3
+        calls = []
+        cache.get("kind", 0, lambda v: calls.append(v))
+        assert calls == [0]
+
+    def test_clear(self):
+        """Test that clear empties the cache and statistics."""
+        cache = OperandCache()
+        cache.get("kind", "x", str)
+
+        cache.clear()
+
+        assert cache.get_stats() == {"size": 0, "max_size": 4096, "hits": 0, "misses": 0, "hit_rate": 0.0}
+
+
+class TestOperandParsers:
+    """Test the cached operand parsers."""
+
+    def test_compile_regex_interned(self):
+        """Test that a pattern compiles to one shared object."""
+        assert compile_regex(r"^a+$") is compile_regex(r"^a+$")
+        assert compile_regex(r"(unclosed") is None
+        assert compile_regex(123) is None
+
+    def test_semver_key_matches_semver_precedence(self):
+        """Test that precedence keys order versions like semver does."""
+        versions = [
+            "1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta",
+            "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0", "1.0.0+build.5",
+            "1.0.0-0", "1.0.0-x.7.z.92", "1.9.0", "1.10.0", "2.0.0",
+        ]
+
+        for a, b in itertools.product(versions, versions):
+            key_a, key_b = parse_semver_key(a), parse_semver_key(b)
+            expected = semver.Version.parse(a).compare(semver.Version.parse(b))
+            assert (key_a > key_b) - (key_a < key_b) == expected, (a, b)
+
+    def test_semver_key_leniency_and_errors(self):
+        """Test the leading 'v' and invalid versions."""
+        assert parse_semver_key("v1.2.3") == parse_semver_key("1.2.3")
+        assert parse_semver_key("1.2") is None
+        assert parse_semver_key(None) is None
+
+    def test_version_tuple(self):
+        """Test the numeric version core."""
+        assert parse_version_tuple("1.2.3-beta+5") == (1, 2, 3)
+        assert parse_version_tuple("2.0") == (2, 0)
+        assert parse_version_tuple("latest") is None
+
+
+class TestSharedByEvaluationPaths:
+    """Test that compiled and interpreted evaluation share the cache."""
+
+    def test_compilation_populates_cache(self):
+        """Test that compiling rules parses their operands up front."""
+        rules = TargetingRules(
+            rules=[
+                TargetingRule(
+                    id="rule_1",
+                    rule=RuleGroup(
+                        operator=LogicalOperator.AND,
+                        conditions=[
+                            Condition(attribute="email", operator=OperatorType.MATCH_REGEX, value=r"@example\.com$"),
+                            Condition(
+                                attribute="app_version",
+                                operator=OperatorType.SEMANTIC_VERSION,
+                                value="2.0.0",
+                                additional_value="gte"
+                            ),
+                            Condition(attribute="signup", operator=OperatorType.AFTER, value="2024-01-01T00:00:00"),
+                        ]
+                    ),
+                    priority=1,
+                    rollout_percentage=100
+                )
+            ]
+        )
+
+        RuleCompiler().compile_rule_set(rules)
+        populated = get_operand_cache().get_stats()
+        assert populated["misses"] == 3
+
+        # The interpreted path finds the same operands already parsed
+        assert apply_operator(OperatorType.MATCH_REGEX, "a@example.com", r"@example\.com$")
+        assert apply_operator(OperatorType.AFTER, "2024-06-01T00:00:00", "2024-01-01T00:00:00")
+        assert get_operand_cache().get_stats()["hits"] == 2
@@ -7,8 +7,10 @@ Tests the rule compiler that pre-validates and optimizes targeting rules.
 import pytest
 from datetime import datetime
 from backend.app.core.rule_compiler import RuleCompiler, CompiledRule, RuleValidationError
+from backend.app.core.rules_engine import evaluate_rule, evaluate_targeting_rules
 from backend.app.schemas.targeting_rule import (
     TargetingRule,
+    TargetingRules,
     RuleGroup,
     Condition,
     LogicalOperator,
@@ -421,6 +423,36 @@ class TestCompilerCache:
         # Should be different objects
         assert compiled1 is not compiled2
 
+    def test_cache_key_keeps_value_types(self):
+        """Test that a rule edited to a value with the same text but another type is recompiled."""
+        def plan_rule(value, additional_value=None):
+            return TargetingRule(
+                id="plan_rule",
+                rule=RuleGroup(
+                    operator=LogicalOperator.AND,
+                    conditions=[
+                        Condition(
+                            attribute="plan",
+                            operator=OperatorType.EQUALS,
+                            value=value,
+                            additional_value=additional_value
+                        )
+                    ],
+                    groups=[]
+                ),
+                priority=1,
+                rollout_percentage=100
+            )
+
+        compiler = RuleCompiler()
+        compiler.compile(plan_rule(5))
+        compiled = compiler.compile(plan_rule("5"))
+
+        assert compiled.matches({"plan": "5"}) is True
+        assert compiler.cache_size == 2
+        assert compiler._hash_rule(plan_rule(True)) != compiler._hash_rule(plan_rule("True"))
+        assert compiler._hash_rule(plan_rule(1, 0)) != compiler._hash_rule(plan_rule(1, None))
+
     def test_cache_size_limit(self):
         """Test that cache respects size limit."""
         compiler = RuleCompiler(cache_max_size=5)
@@ -481,6 +513,208 @@ class TestCompilerCache:
         assert compiler.cache_size == 0
 
 
+class TestCompiledEvaluation:
+    """Test the executable closure tree emitted by the compiler."""
+
+    CONDITIONS = [
+        Condition(attribute="country", operator=OperatorType.EQUALS, value="US"),
+        Condition(attribute="country", operator=OperatorType.NOT_EQUALS, value="US"),
+        Condition(attribute="country", operator=OperatorType.IN, value=["US", "CA"]),
+        Condition(attribute="country", operator=OperatorType.NOT_IN, value=["US", "CA"]),
+        Condition(attribute="email", operator=OperatorType.CONTAINS, value="@example"),
+        Condition(attribute="email", operator=OperatorType.NOT_CONTAINS, value="@example"),
+        Condition(attribute="email", operator=OperatorType.STARTS_WITH, value="admin"),
+        Condition(attribute="email", operator=OperatorType.ENDS_WITH, value=".com"),
+        Condition(attribute="email", operator=OperatorType.MATCH_REGEX, value=r"^[a-z]+@"),
+        Condition(attribute="age", operator=OperatorType.GREATER_THAN, value=18),
+        Condition(attribute="age", operator=OperatorType.GREATER_THAN_OR_EQUAL, value="21"),
+        Condition(attribute="age", operator=OperatorType.LESS_THAN, value=65),
+        Condition(attribute="age", operator=OperatorType.LESS_THAN_OR_EQUAL, value=30.5),
+        Condition(attribute="age", operator=OperatorType.BETWEEN, value=18, additional_value=30),
+        Condition(attribute="signup", operator=OperatorType.BEFORE, value="2024-01-01T00:00:00"),
+        Condition(attribute="signup", operator=OperatorType.AFTER, value="2023-01-01T00:00:00"),
+        Condition(
+            attribute="signup",
+            operator=OperatorType.BETWEEN,
+            value="2023-06-01T00:00:00",
+            additional_value="2023-12-31T00:00:00"
+        ),
+        Condition(attribute="tags", operator=OperatorType.CONTAINS_ALL, value=["a", "b"]),
+        Condition(attribute="tags", operator=OperatorType.CONTAINS_ANY, value=["b", "z"]),
+        Condition(attribute="version", operator=OperatorType.SEMANTIC_VERSION, value="1.2.0", additional_value="gte"),
+        Condition(attribute="version", operator=OperatorType.SEMANTIC_VERSION, value="1.2.0"),
+    ]
+
+    CONTEXTS = [
+        {},
+        {"country": None, "email": None, "age": None, "signup": None, "tags": None, "version": None},
+        {"country": "US", "email": "admin@example.com", "age": 25, "signup": "2023-08-01T00:00:00",
+         "tags": ["a", "b", "c"], "version": "1.2.0"},
+        {"country": "DE", "email": "Bob@test.org", "age": "17", "signup": "not-a-date",
+         "tags": "abc", "version": "v2.0.0"},
+        {"country": ["US"], "email": 42, "age": "old", "signup": 1700000000,
+         "tags": ["z"], "version": "garbage"},
+        {"country": "CA", "email": "carol@example.com", "age": 30.5, "signup": "2022-01-01T00:00:00",
+         "tags": [], "version": "1.1.9"},
+    ]
+
+    def _rule(self, rule_group, rule_id="compiled_rule", priority=1, rollout_percentage=100):
+        return TargetingRule(id=rule_id, rule=rule_group, priority=priority, rollout_percentage=rollout_percentage)
+
+    def test_conditions_match_interpreted_engine(self):
+        """Test that every specialized condition agrees with the interpreted engine."""
+        compiler = RuleCompiler()
+
+        for condition in self.CONDITIONS:
+            rule = self._rule(RuleGroup(operator=LogicalOperator.AND, conditions=[condition]))
+            compiled = compiler.compile(rule)
+
+            assert compiled.evaluator is not None
+            for context in self.CONTEXTS:
+                assert compiled.matches(context) == evaluate_rule(rule, context), (condition, context)
+
+    def test_logical_operators_match_interpreted_engine(self):
+        """Test that AND, OR, NOT and nested groups agree with the interpreted engine."""
+        compiler = RuleCompiler()
+        country, age, email = self.CONDITIONS[2], self.CONDITIONS[9], self.CONDITIONS[4]
+
+        groups = [
+            RuleGroup(operator=LogicalOperator.AND, conditions=[country, age, email]),
+            RuleGroup(operator=LogicalOperator.OR, conditions=[country, age, email]),
+            RuleGroup(operator=LogicalOperator.NOT, conditions=[country]),
+            RuleGroup(operator=LogicalOperator.NOT, conditions=[country, age]),
+            RuleGroup(operator=LogicalOperator.AND, conditions=[]),
+            RuleGroup(
+                operator=LogicalOperator.OR,
+                conditions=[email],
+                groups=[RuleGroup(operator=LogicalOperator.AND, conditions=[country, age])]
+            ),
+        ]
+
+        for group in groups:
+            rule = self._rule(group)
+            compiled = compiler.compile(rule)
+            for context in self.CONTEXTS:
+                assert compiled.matches(context) == evaluate_rule(rule, context), (group, context)
+
+    def test_and_short_circuits(self):
+        """Test that AND stops at the first failing condition."""
+        class RecordingContext(dict):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.reads = []
+
+            def get(self, key, default=None):
+                self.reads.append(key)
+                return super().get(key, default)
+
+        rule = self._rule(RuleGroup(
+            operator=LogicalOperator.AND,
+            conditions=[
+                Condition(attribute="country", operator=OperatorType.EQUALS, value="US"),
+                Condition(attribute="age", operator=OperatorType.GREATER_THAN, value=18),
+            ]
+        ))
+        compiled = RuleCompiler().compile(rule)
+
+        context = RecordingContext(country="CA", age=30)
+        assert compiled.matches(context) is False
+        assert context.reads == ["country"]
+
+    def test_compile_rule_set_sorts_by_priority(self):
+        """Test that compiled rule sets evaluate rules in priority order."""
+        matches_us = RuleGroup(
+            operator=LogicalOperator.AND,
+            conditions=[Condition(attribute="country", operator=OperatorType.EQUALS, value="US")]
+        )
+        targeting_rules = TargetingRules(
+            rules=[
+                self._rule(matches_us, rule_id="low", priority=10),
+                self._rule(matches_us, rule_id="high", priority=1),
+                self._rule(matches_us, rule_id="disabled", priority=0, rollout_percentage=0),
+            ],
+            default_rule=self._rule(RuleGroup(), rule_id="default", priority=999)
+        )
+
+        compiled = RuleCompiler().compile_rule_set(targeting_rules)
+
+        assert [rule.id for rule, _ in compiled.rules] == ["high", "low"]
+        assert compiled.evaluate({"country": "US"}).id == "high"
+        assert compiled.evaluate({"country": "CA"}).id == "default"
+        for context in self.CONTEXTS:
+            assert compiled.evaluate(context) == evaluate_targeting_rules(targeting_rules, context)
+
+    def test_rule_set_key_attributes(self):
+        """Test that rule sets report the attributes their result depends on."""
+        rules = TargetingRules(rules=[
+            self._rule(RuleGroup(conditions=[self.CONDITIONS[0], self.CONDITIONS[9]]), rule_id="a"),
+            self._rule(RuleGroup(conditions=[self.CONDITIONS[4]]), rule_id="b", rollout_percentage=0),
+        ])
+
+        compiled = RuleCompiler().compile_rule_set(rules)
+
+        assert compiled.required_attributes == {"country", "age"}
+        assert compiled.key_attributes({"user_id": "u1"}) == {"country", "age"}
+
+    def test_rule_set_key_attributes_with_rollout(self):
+        """Test that partial rollouts add the stable id fields, or the whole context without one."""
+        rules = TargetingRules(rules=[
+            self._rule(RuleGroup(conditions=[self.CONDITIONS[0]]), rollout_percentage=50),
+        ])
+
+        compiled = RuleCompiler().compile_rule_set(rules)
+
+        assert {"country", "user_id"} <= compiled.key_attributes({"user_id": "u1"})
+        assert compiled.key_attributes({"country": "US"}) is None
+
+    def test_rule_set_memoized_by_identity(self):
+        """Test that compiling the same rules object twice returns the memoized set."""
+        rules = TargetingRules(rules=[self._rule(RuleGroup(conditions=[self.CONDITIONS[0]]))])
+        compiler = RuleCompiler()
+
+        first = compiler.compile_rule_set(rules)
+
+        assert compiler.compile_rule_set(rules) is first
+        assert compiler.compile_rule_set(rules, force_recompile=True) is not first
+
+    def test_rule_set_fingerprint_tracks_contents(self):
+        """Test that rule sets differing only in conditions get different fingerprints."""
+        compiler = RuleCompiler()
+
+        def fingerprint(condition):
+            rules = TargetingRules(rules=[self._rule(RuleGroup(conditions=[condition]), rule_id="a")])
+            return compiler.compile_rule_set(rules).fingerprint
+
+        assert fingerprint(self.CONDITIONS[0]) == fingerprint(self.CONDITIONS[0])
+        assert fingerprint(self.CONDITIONS[0]) != fingerprint(self.CONDITIONS[1])
+
+    def test_invalid_regex_never_matches(self):
+        """Test that an invalid regex compiles to a condition that never matches."""
+        rule = self._rule(RuleGroup(
+            operator=LogicalOperator.AND,
+            conditions=[Condition(attribute="email", operator=OperatorType.MATCH_REGEX, value="[unclosed")]
+        ))
+
+        compiled = RuleCompiler().compile(rule)
+
+        assert compiled.matches({"email": "[unclosed"}) is False
+
+    def test_operator_compiler_override(self):
+        """Test that callers can override the compiler for an operator."""
+        compiler = RuleCompiler(
+            operator_compilers={OperatorType.EQUALS: lambda condition: lambda actual: True}
+        )
+        rule = self._rule(RuleGroup(
+            operator=LogicalOperator.AND,
+            conditions=[Condition(attribute="country", operator=OperatorType.EQUALS, value="US")]
+        ))
+
+        compiled = compiler.compile(rule)
+
+        assert compiled.matches({"country": "CA"}) is True
+        assert compiled.matches({}) is False
+
+
 class TestCompilerPerformance:
     """Test compiler performance characteristics."""
 
@@ -0,0 +1,141 @@
+"""
+Test cases for sequential testing.
+"""
+
+import json
+import math
+
+import numpy as np
+import pytest
+
+from backend.app.core.sequential_testing import (
+    SequentialTest,
+    SufficientStats,
+    confidence_radius,
+    difference_test,
+    mean_test,
+    mixture_likelihood_ratio,
+)
+
+
+class TestMixtureStatistics:
+    """Test the mSPRT building blocks."""
+
+    def test_no_effect_gives_no_evidence(self):
+        """Test that a zero estimate never rejects."""
+        assert mixture_likelihood_ratio(0.0, 0.01, 0.01) < 1.0
+        assert mixture_likelihood_ratio(0.5, 0.0, 0.01) == 1.0
+
+    def test_radius_matches_likelihood_ratio(self):
+        """Test that the interval edge is where the ratio reaches 1/alpha."""
+        variance, tau_squared, alpha = 0.04, 0.01, 0.05
+        radius = confidence_radius(variance, tau_squared, alpha)
+
+        assert mixture_likelihood_ratio(radius, variance, tau_squared) == pytest.approx(1 / alpha)
+        assert confidence_radius(0.0, tau_squared, alpha) == math.inf
+
+    def test_large_effect_is_significant(self):
+        """Test that a clear difference in conversion rates is detected."""
+        control = SufficientStats.from_proportion(10000, 1000)
+        treatment = SufficientStats.from_proportion(10000, 1300)
+
+        result = difference_test(control, treatment)
+
+        assert result.is_significant
+        assert result.estimate == pytest.approx(0.03)
+        lower, upper = result.confidence_interval
+        assert 0 < lower < 0.03 < upper
+
+    def test_mean_confidence_sequence(self):
+        """Test the one-sample interval shrinks around the mean."""
+        small = mean_test(SufficientStats.from_proportion(100, 10))
+        large = mean_test(SufficientStats.from_proportion(100000, 10000))
+
+        assert small.confidence_interval[0] < large.confidence_interval[0] < 0.1
+        assert small.confidence_interval[1] > large.confidence_interval[1] > 0.1
+
+    def test_type_one_error_under_continuous_monitoring(self):
+        """Test that peeking after every batch keeps false positives near alpha."""
+        rng = np.random.default_rng(7)
+        runs, batches, batch_size = 300, 50, 100
+        false_positives = 0
+
+        for _ in range(runs):
+            test = SequentialTest("control")
+            for _ in range(batches):
+                for variant_id in ("control", "treatment"):
+                    conversions = int(rng.binomial(batch_size, 0.1))
+                    test.update(variant_id, batch_size, conversions, conversions)
+                if test.evaluate()["treatment"].is_significant:
+                    false_positives += 1
+                    break
+
+        assert false_positives / runs <= 0.07
+
+
+class TestSequentialTest:
+    """Test the running sequential test."""
+
+    def test_p_values_never_increase(self):
+        """Test that the reported p-value is the running minimum."""
+        test = SequentialTest("control")
+        test.update("control", 1000, 100, 100)
+        test.update("treatment", 1000, 140, 140)
+        first = test.evaluate()["treatment"]
+
+        # A batch that pulls the treatment back to the control rate
+        test.update("control", 1000, 140, 140)
+        test.update("treatment", 1000, 100, 100)
+        second = test.evaluate()["treatment"]
+
+        assert second.p_value == first.p_value
+        assert second.confidence_interval[0] >= first.confidence_interval[0]
+        assert second.confidence_interval[1] <= first.confidence_interval[1]
+
+    def test_state_round_trip(self):
+        """Test that a restored test continues where it left off."""
+        test = SequentialTest("control", alpha=0.1)
+        test.update("control", 500, 50, 50)
+        test.update("treatment", 500, 70, 70)
+        expected = test.evaluate()
+
+        restored = SequentialTest.from_dict(test.to_dict())
+
+        assert restored.stats == test.stats
+        assert restored.evaluate() == expected
+
+    def test_state_without_data_is_json(self):
+        """Test that unbounded intervals are left out of the serialized state."""
+        test = SequentialTest("control")
+        test.update("treatment", 0, 0.0, 0.0)
+        test.evaluate()
+
+        state = json.loads(json.dumps(test.to_dict(), allow_nan=False))
+
+        assert state["intervals"] == {}
+        assert SequentialTest.from_dict(state).evaluate() == test.evaluate()
+
+    def test_set_proportion_folds_the_difference(self):
+        """Test that cumulative totals are folded in once."""
+        test = SequentialTest("control")
+        test.set_proportion("control", 500, 50)
+        test.set_proportion("control", 800, 90)
+        test.set_proportion("control", 800, 90)
+
+        assert test.stats["control"] == SufficientStats.from_proportion(800, 90)
+
+    def test_missing_control_is_inconclusive(self):
+        """Test that variants without a control sample never reject."""
+        test = SequentialTest("control")
+        test.update("treatment", 1000, 500, 500)
+
+        result = test.evaluate()["treatment"]
+        assert result.p_value == 1.0
+        assert not result.is_significant
+
+    def test_invalid_parameters(self):
+        """Test parameter validation."""
+        with pytest.raises(ValueError):
+            SequentialTest("control", alpha=1.5)
+        with pytest.raises(ValueError):
+            SequentialTest("control", mixing_effect_size=0)
@@ -0,0 +1,738 @@
+"""
+Unit tests for the analysis service results engine.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from backend.app.models.assignment import Assignment
+from backend.app.models.event import Event
+from backend.app.models.experiment import Experiment, ExperimentStatus, Variant
+from backend.app.core.sequential_testing import SequentialTest, SufficientStats
+from backend.app.services.analysis_service import AnalysisService
+from backend.app.services.results_rollup_service import ResultsRollupService
+
+
+def _mock_experiment():
+    experiment = Mock()
+    experiment.id = uuid4()
+    experiment.name = "Checkout test"
+    experiment.status = ExperimentStatus.ACTIVE
+    experiment.start_date = None
+    experiment.end_date = None
+    experiment.variants = [
+        Mock(id=uuid4(), is_control=True),
+        Mock(id=uuid4(), is_control=False),
+    ]
+    experiment.variants[0].name = "control"
+    experiment.variants[1].name = "treatment"
+    experiment.metrics = [
+        Mock(id=uuid4(), event_name="purchase"),
+        Mock(id=uuid4(), event_name="signup"),
+    ]
+    return experiment
+
+
+def _db_experiment(db_session, name):
+    """Create an active experiment with control and treatment variants."""
+    experiment = Experiment(
+        id=uuid4(),
+        name=name,
+        status=ExperimentStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    experiment.variants = [
+        Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=50),
+        Variant(id=uuid4(), name="treatment", traffic_allocation=50),
+    ]
+    db_session.add(experiment)
+    db_session.flush()
+    return experiment
+
+
+class TestMetricResults:
+    """Tests for metric statistics over precomputed counts."""
+
+    def setup_method(self):
+        self.mock_db = Mock()
+        self.service = AnalysisService(self.mock_db)
+        self.experiment = _mock_experiment()
+        self.control_id = str(self.experiment.variants[0].id)
+        self.treatment_id = str(self.experiment.variants[1].id)
+
+    def test_statistics_from_count_matrix(self):
+        """Test that results are computed in memory from the grouped counts."""
+        assignment_counts = {self.control_id: 1000, self.treatment_id: 1000}
+        conversion_counts = {
+            (self.control_id, "purchase"): 100,
+            (self.treatment_id, "purchase"): 150,
+            (self.treatment_id, "signup"): 999,
+        }
+
+        result = self.service.calculate_metric_results(
+            self.experiment, self.experiment.metrics[0], assignment_counts, conversion_counts
+        )
+
+        control, treatment = result["variant_results"]
+        assert control["conversion_rate"] == 10.0
+        assert treatment["conversions"] == 150
+        assert treatment["relative_improvement"] == pytest.approx(50.0)
+        assert treatment["is_significant"]
+        assert result["total_conversions"] == 250
+        self.mock_db.query.assert_not_called()
+
+    def test_missing_counts_are_zero(self):
+        """Test that variants absent from the grouped rows count as zero."""
+        result = self.service.calculate_metric_results(
+            self.experiment, self.experiment.metrics[1], {self.control_id: 10}, {}
+        )
+
+        treatment = result["variant_results"][1]
+        assert treatment["sample_size"] == 0
+        assert treatment["conversion_rate"] == 0
+        assert treatment["confidence_interval"] == [0, 0]
+
+    def test_experiment_results_query_counts_once(self):
+        """Test that all metrics share one assignment and one conversion query."""
+        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = (
+            self.experiment
+        )
+
+        with patch.object(
+            self.service, "_get_assignment_counts", return_value={self.control_id: 10, self.treatment_id: 10}
+        ) as assignment_counts, patch.object(
+            self.service, "_get_conversion_counts", return_value={(self.control_id, "signup"): 4}
+        ) as conversion_counts, patch.object(
+            self.service, "calculate_experiment_summary", return_value={}
+        ):
+            results = self.service.get_experiment_results(self.experiment.id)
+
+        assignment_counts.assert_called_once_with(self.experiment)
+        conversion_counts.assert_called_once_with(self.experiment, ["purchase", "signup"])
+        assert [m["total_conversions"] for m in results["metrics_results"]] == [0, 4]
+
+    def test_no_event_names_skips_query(self):
+        """Test that no conversion query runs without metrics."""
+        assert self.service._get_conversion_counts(self.experiment, []) == {}
+        self.mock_db.query.assert_not_called()
+
+
+class TestAssignmentCounts:
+    """Tests for the grouped assignment count query."""
+
+    def test_counts_per_variant(self, db_session):
+        """Test that one grouped query returns every variant's count."""
+        experiment = Experiment(
+            id=uuid4(),
+            name="Grouped Count Experiment",
+            status=ExperimentStatus.ACTIVE,
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        experiment.variants = [
+            Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=50),
+            Variant(id=uuid4(), name="treatment", traffic_allocation=50),
+        ]
+        db_session.add(experiment)
+        db_session.flush()
+        for i in range(5):
+            db_session.add(
+                Assignment(
+                    user_id=f"user_{i}",
+                    experiment_id=experiment.id,
+                    variant_id=experiment.variants[i % 2].id,
+                )
+            )
+        db_session.commit()
+
+        counts = AnalysisService(db_session)._get_assignment_counts(experiment)
+
+        assert counts == {
+            str(experiment.variants[0].id): 3,
+            str(experiment.variants[1].id): 2,
+        }
+
+
+class TestConversionCounts:
+    """Tests for the grouped conversion count query."""
+
+    def test_counts_per_variant_and_event_name(self, db_session):
+        """Test that conversions are counted from event rows in the database."""
+        experiment = _db_experiment(db_session, "Conversion Count Experiment")
+        other = _db_experiment(db_session, "Other Experiment")
+        control, treatment = experiment.variants
+        for variant, event_type, event_name in [
+            (control, "conversion", "purchase"),
+            (control, "conversion", "purchase"),
+            (treatment, "conversion", "purchase"),
+            (treatment, "conversion", "signup"),
+            (treatment, "page_view", "purchase"),
+            (other.variants[0], "conversion", "purchase"),
+        ]:
+            db_session.add(
+                Event(
+                    event_type=event_type,
+                    event_name=event_name,
+                    user_id="user_1",
+                    experiment_id=variant.experiment_id,
+                    variant_id=variant.id,
+                    created_at="2024-03-01T10:00:00+00:00",
+                )
+            )
+        db_session.commit()
+
+        counts = AnalysisService(db_session)._get_conversion_counts(
+            experiment, ["purchase", "signup"]
+        )
+
+        assert counts == {
+            (str(control.id), "purchase"): 2,
+            (str(treatment.id), "purchase"): 1,
+            (str(treatment.id), "signup"): 1,
+        }
+
+
+class TestDailyResults:
+    """Tests for time-bucketed results."""
+
+    def setup_method(self):
+        self.mock_db = Mock()
+        self.service = AnalysisService(self.mock_db)
+        self.experiment = _mock_experiment()
+        # DateTime columns, naive UTC
+        self.experiment.start_date = datetime(2024, 3, 1, 23, 30)
+        self.experiment.end_date = datetime(2024, 3, 3, 12, 0)
+        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = (
+            self.experiment
+        )
+        self.control_id = str(self.experiment.variants[0].id)
+
+    def test_periods_and_cumulative_series(self):
+        """Test that periods come from two grouped queries and accumulate in memory."""
+        first, second = datetime(2024, 3, 2), datetime(2024, 3, 3)
+        assignment_counts = {(first, self.control_id): 10, (second, self.control_id): 30}
+        conversion_counts = {
+            (first, self.control_id, "purchase"): 2,
+            (second, self.control_id, "purchase"): 6,
+        }
+
+        with patch.object(
+            self.service, "_get_period_assignment_counts", return_value=assignment_counts
+        ) as assignment_query, patch.object(
+            self.service, "_get_period_conversion_counts", return_value=conversion_counts
+        ) as conversion_query:
+            results = self.service.get_daily_results(
+                self.experiment.id,
+                metric_id=self.experiment.metrics[0].id,
+                time_zone="Europe/Berlin",
+            )
+
+        assignment_query.assert_called_once()
+        conversion_query.assert_called_once()
+        # 23:30 UTC on March 1st is already March 2nd in Berlin
+        assert [r["date"] for r in results] == ["2024-03-02", "2024-03-03"]
+
+        control = [r["metrics"][0]["variants"][0] for r in results]
+        assert [c["conversion_rate"] for c in control] == [20.0, 20.0]
+        assert control[1]["cumulative_assignments"] == 40
+        assert control[1]["cumulative_conversions"] == 8
+        assert control[1]["cumulative_conversion_rate"] == 20.0
+
+    def test_hour_and_week_periods(self):
+        """Test the period labels of the other granularities."""
+        with patch.object(
+            self.service, "_get_period_assignment_counts", return_value={}
+        ), patch.object(self.service, "_get_period_conversion_counts", return_value={}):
+            hours = self.service.get_daily_results(self.experiment.id, granularity="hour")
+            weeks = self.service.get_daily_results(self.experiment.id, granularity="week")
+
+        assert hours[0]["date"] == "2024-03-01T23:00"
+        assert len(hours) == 38
+        # March 1st 2024 is a Friday, its week starts on Monday February 26th
+        assert [r["date"] for r in weeks] == ["2024-02-26"]
+
+    def test_invalid_granularity_and_time_zone(self):
+        """Test that unsupported periods and time zones are rejected."""
+        with pytest.raises(ValueError):
+            self.service.get_daily_results(self.experiment.id, granularity="month")
+        with pytest.raises(ValueError):
+            self.service.get_daily_results(self.experiment.id, time_zone="Mars/Olympus")
+
+    def test_period_assignment_counts_query(self, db_session):
+        """Test that assignments are grouped by local period in the database."""
+        experiment = Experiment(
+            id=uuid4(),
+            name="Period Count Experiment",
+            status=ExperimentStatus.ACTIVE,
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        experiment.variants = [
+            Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=100),
+        ]
+        db_session.add(experiment)
+        db_session.flush()
+        for i, created_at in enumerate(
+            [datetime(2024, 3, 1, 22, 30), datetime(2024, 3, 1, 23, 30), datetime(2024, 3, 2, 9)]
+        ):
+            db_session.add(
+                Assignment(
+                    user_id=f"user_{i}",
+                    experiment_id=experiment.id,
+                    variant_id=experiment.variants[0].id,
+                    created_at=created_at,
+                )
+            )
+        db_session.commit()
+
+        counts = AnalysisService(db_session)._get_period_assignment_counts(
+            experiment,
+            "day",
+            "America/New_York",
+            datetime(2024, 3, 1, tzinfo=timezone.utc),
+            datetime(2024, 3, 3, tzinfo=timezone.utc),
+        )
+
+        variant_id = str(experiment.variants[0].id)
+        assert counts == {
+            (datetime(2024, 3, 1), variant_id): 2,
+            (datetime(2024, 3, 2), variant_id): 1,
+        }
+
+    def test_period_conversion_counts_query(self, db_session):
+        """Test that conversions are windowed and grouped as points in time."""
+        experiment = _db_experiment(db_session, "Period Conversion Experiment")
+        control = experiment.variants[0]
+        for created_at in [
+            "2024-03-01T21:30:00Z",  # before the window
+            "2024-03-01T22:30:00Z",  # 17:30 in New York, March 1
+            "2024-03-02T06:00:00+02:00",  # 04:00 UTC, 23:00 in New York, March 1
+            "2024-03-02T09:00:00-05:00",  # 14:00 UTC, March 2
+            "2024-03-03T01:00:00+00:00",  # after the window
+        ]:
+            db_session.add(
+                Event(
+                    event_type="conversion",
+                    event_name="purchase",
+                    user_id="user_1",
+                    experiment_id=experiment.id,
+                    variant_id=control.id,
+                    created_at=created_at,
+                )
+            )
+        db_session.commit()
+
+        counts = AnalysisService(db_session)._get_period_conversion_counts(
+            experiment,
+            ["purchase"],
+            "day",
+            "America/New_York",
+            datetime.fromisoformat("2024-03-02T00:00:00+02:00"),
+            datetime(2024, 3, 3, tzinfo=timezone.utc),
+        )
+
+        assert counts == {
+            (datetime(2024, 3, 1), str(control.id), "purchase"): 2,
+            (datetime(2024, 3, 2), str(control.id), "purchase"): 1,
+        }
+
+
+class TestSegmentedResults:
+    """Tests for one-pass segmentation."""
+
+    def setup_method(self):
+        self.mock_db = Mock()
+        self.service = AnalysisService(self.mock_db)
+        self.experiment = _mock_experiment()
+        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = (
+            self.experiment
+        )
+        self.control_id = str(self.experiment.variants[0].id)
+        self.sample_sizes = {
+            ("US", self.control_id): 50,
+            ("DE", self.control_id): 30,
+            ("FR", self.control_id): 5,
+            ("IT", self.control_id): 15,
+        }
+        self.conversion_counts = {
+            ("US", self.control_id, "purchase"): 5,
+            ("FR", self.control_id, "purchase"): 1,
+            ("IT", self.control_id, "purchase"): 2,
+        }
+
+    def _segmented_results(self, max_segments=None, top_segments=None):
+        with patch.object(
+            self.service,
+            "_get_segment_sample_sizes",
+            return_value=(self.sample_sizes, 4),
+        ) as sample_query, patch.object(
+            self.service, "_get_segment_conversion_counts", return_value=self.conversion_counts
+        ) as conversion_query:
+            results = self.service.get_segmented_results(
+                self.experiment.id,
+                "country",
+                metric_id=self.experiment.metrics[0].id,
+                max_segments=max_segments,
+            )
+
+        sample_query.assert_called_once_with(self.experiment.id, "country", max_segments)
+        conversion_query.assert_called_once_with(
+            self.experiment.id, "country", ["purchase"], top_segments
+        )
+        return results
+
+    def test_all_segments_largest_first(self):
+        """Test that every segment is reported, ordered by sample size."""
+        results = self._segmented_results()
+
+        assert [s["segment_value"] for s in results["segments"]] == ["US", "DE", "IT", "FR"]
+        assert results["total_segments"] == 4
+        us = results["segments"][0]["metrics"][0]["variants"][0]
+        assert us["sample_size"] == 50
+        assert us["conversion_rate"] == 10.0
+
+    def test_top_segments_with_other_bucket(self):
+        """Test that segments folded by the queries are reported as 'other'."""
+        self.sample_sizes = {
+            ("US", self.control_id): 50,
+            ("DE", self.control_id): 30,
+            (None, self.control_id): 18,
+        }
+        self.conversion_counts = {
+            ("US", self.control_id, "purchase"): 5,
+            (None, self.control_id, "purchase"): 3,
+        }
+
+        results = self._segmented_results(max_segments=2, top_segments=["DE", "US"])
+
+        segments = results["segments"]
+        assert [(s["segment_value"], s["is_other"]) for s in segments] == [
+            ("US", False),
+            ("DE", False),
+            ("other", True),
+        ]
+        other = segments[2]["metrics"][0]["variants"][0]
+        assert other["sample_size"] == 18
+        assert other["conversions"] == 3
+        assert results["total_segments"] == 4
+
+    def test_invalid_max_segments(self):
+        """Test that max_segments must be positive."""
+        with pytest.raises(ValueError):
+            self.service.get_segmented_results(self.experiment.id, "country", max_segments=0)
+
+    def test_segment_queries(self, db_session):
+        """Test that segment sample sizes and conversions are grouped in the database."""
+        experiment = _db_experiment(db_session, "Segment Experiment")
+        control, treatment = experiment.variants
+        for user_id, variant in [("user_1", control), ("user_2", control), ("user_3", treatment)]:
+            db_session.add(
+                Assignment(user_id=user_id, experiment_id=experiment.id, variant_id=variant.id)
+            )
+        for user_id, variant, event_type, event_name, country in [
+            ("user_1", control, "page_view", "page_view", "US"),
+            ("user_1", control, "conversion", "purchase", "US"),
+            ("user_2", control, "conversion", "purchase", "DE"),
+            ("user_2", control, "conversion", "signup", "DE"),
+            ("user_2", control, "page_view", "page_view", "FR"),
+            ("user_3", treatment, "conversion", "purchase", "US"),
+            ("user_3", treatment, "conversion", "purchase", ""),
+        ]:
+            db_session.add(
+                Event(
+                    event_type=event_type,
+                    event_name=event_name,
+                    user_id=user_id,
+                    experiment_id=experiment.id,
+                    variant_id=variant.id,
+                    event_metadata={"country": country},
+                    created_at="2024-03-01T10:00:00+00:00",
+                )
+            )
+        db_session.commit()
+        service = AnalysisService(db_session)
+
+        sample_sizes = service._get_segment_sample_sizes(experiment.id, "country")
+        conversions = service._get_segment_conversion_counts(
+            experiment.id, "country", ["purchase", "purchase"]
+        )
+
+        assert sample_sizes == (
+            {
+                ("US", str(control.id)): 1,
+                ("DE", str(control.id)): 1,
+                ("FR", str(control.id)): 1,
+                ("US", str(treatment.id)): 1,
+            },
+            3,
+        )
+        assert conversions == {
+            ("US", str(control.id), "purchase"): 1,
+            ("DE", str(control.id), "purchase"): 1,
+            ("US", str(treatment.id), "purchase"): 1,
+        }
+
+        # user_2 is in both folded segments and counts once
+        assert service._get_segment_sample_sizes(experiment.id, "country", 1) == (
+            {
+                ("US", str(control.id)): 1,
+                ("US", str(treatment.id)): 1,
+                (None, str(control.id)): 1,
+            },
+            3,
+        )
+        assert service._get_segment_conversion_counts(
+            experiment.id, "country", ["purchase"], ["US"]
+        ) == {
+            ("US", str(control.id), "purchase"): 1,
+            (None, str(control.id), "purchase"): 1,
+            ("US", str(treatment.id), "purchase"): 1,
+        }
+
+
+class TestSequentialAnalysis:
+    """Tests for the always-valid analysis mode."""
+
+    def setup_method(self):
+        self.service = AnalysisService(Mock())
+        self.experiment = _mock_experiment()
+        self.control_id = str(self.experiment.variants[0].id)
+        self.treatment_id = str(self.experiment.variants[1].id)
+        self.stored_test = None
+        patcher = patch.object(
+            ResultsRollupService,
+            "get_sequential_test",
+            side_effect=lambda experiment_id, event_name: self.stored_test,
+        )
+        self.get_sequential_test = patcher.start()
+
+    def teardown_method(self):
+        patch.stopall()
+
+    def test_sequential_mode(self):
+        """Test that sequential mode reports always-valid p-values and intervals."""
+        result = self.service.calculate_metric_results(
+            self.experiment,
+            self.experiment.metrics[0],
+            {self.control_id: 10000, self.treatment_id: 10000},
+            {(self.control_id, "purchase"): 1000, (self.treatment_id, "purchase"): 1300},
+            analysis_mode="sequential",
+        )
+
+        control, treatment = result["variant_results"]
+        assert control["effect_confidence_interval"] is None
+        assert treatment["is_significant"]
+        lower, upper = treatment["effect_confidence_interval"]
+        assert 0 < lower < 3.0 < upper
+        assert control["confidence_interval"][0] < 10.0 < control["confidence_interval"][1]
+        assert result["best_variant"]["variant_id"] == self.treatment_id
+
+    def test_sequential_is_more_conservative(self):
+        """Test that a borderline fixed-horizon result is not significant sequentially."""
+        counts = (
+            {self.control_id: 5000, self.treatment_id: 5000},
+            {(self.control_id, "purchase"): 500, (self.treatment_id, "purchase"): 570},
+        )
+
+        fixed = self.service.calculate_metric_results(
+            self.experiment, self.experiment.metrics[0], *counts
+        )
+        sequential = self.service.calculate_metric_results(
+            self.experiment, self.experiment.metrics[0], *counts, analysis_mode="sequential"
+        )
+
+        assert fixed["variant_results"][1]["is_significant"]
+        assert not sequential["variant_results"][1]["is_significant"]
+        assert "effect_confidence_interval" not in fixed["variant_results"][1]
+
+    def test_resumes_stored_test(self):
+        """Test that the stored test is advanced by the tail, keeping its running minimum."""
+        stored = SequentialTest(self.control_id)
+        stored.set_proportion(self.control_id, 5000, 500)
+        stored.set_proportion(self.treatment_id, 5000, 650)
+        stored_p_value = stored.evaluate()[self.treatment_id].p_value
+        self.stored_test = stored
+
+        # The tail pulls the treatment back toward the control rate
+        result = self.service.calculate_metric_results(
+            self.experiment,
+            self.experiment.metrics[0],
+            {self.control_id: 6000, self.treatment_id: 6000},
+            {(self.control_id, "purchase"): 600, (self.treatment_id, "purchase"): 660},
+            analysis_mode="sequential",
+        )
+
+        self.get_sequential_test.assert_called_once_with(self.experiment.id, "purchase")
+        assert result["variant_results"][1]["p_value"] == stored_p_value
+        assert stored.stats[self.treatment_id] == SufficientStats.from_proportion(6000, 660)
+
+    def test_invalid_mode(self):
+        """Test that unknown analysis modes are rejected."""
+        with pytest.raises(ValueError):
+            self.service.calculate_metric_results(
+                self.experiment, self.experiment.metrics[0], {}, {}, analysis_mode="bayesian"
+            )
+
+
+class TestContinuousMetricResults:
+    """Tests for continuous metrics with CUPED and bootstrap intervals."""
+
+    def setup_method(self):
+        self.mock_db = Mock()
+        self.service = AnalysisService(self.mock_db)
+        self.experiment = _mock_experiment()
+        self.experiment.start_date = datetime(2024, 3, 1)
+        self.metric = self.experiment.metrics[0]
+        self.metric.name = "Revenue"
+        self.metric.aggregation_method = "sum"
+        self.metric.lower_is_better = False
+        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = (
+            self.experiment
+        )
+        self.control_id = str(self.experiment.variants[0].id)
+        self.treatment_id = str(self.experiment.variants[1].id)
+
+        rng = np.random.default_rng(11)
+        pre = rng.gamma(2.0, 10.0, 4000)
+        post = pre + rng.normal(0, 5, 4000)
+        post[2000:] += 1.0
+        self.user_values = {
+            self.control_id: (post[:2000], pre[:2000]),
+            self.treatment_id: (post[2000:], pre[2000:]),
+        }
+
+    def test_cuped_narrows_intervals(self):
+        """Test that CUPED finds a small lift that the raw values miss."""
+        with patch.object(
+            self.service, "_stream_user_values", return_value=self.user_values
+        ) as stream:
+            adjusted = self.service.get_continuous_metric_results(
+                self.experiment.id, self.metric.id, num_resamples=500, seed=1
+            )
+            raw = self.service.get_continuous_metric_results(
+                self.experiment.id,
+                self.metric.id,
+                use_cuped=False,
+                num_resamples=500,
+                seed=1,
+            )
+
+        assert stream.call_args_list[0].args[1:] == ("purchase", "sum", 14)
+        assert stream.call_args_list[1].args[3] is None
+
+        assert adjusted["cuped"]["variance_reduction"] > 0.5
+        assert raw["cuped"]["enabled"] is False
+
+        adjusted_treatment = adjusted["variant_results"][1]
+        raw_treatment = raw["variant_results"][1]
+        adjusted_width = (
+            adjusted_treatment["effect_confidence_interval"][1]
+            - adjusted_treatment["effect_confidence_interval"][0]
+        )
+        raw_width = (
+            raw_treatment["effect_confidence_interval"][1]
+            - raw_treatment["effect_confidence_interval"][0]
+        )
+        assert adjusted_width < raw_width / 2
+        assert adjusted_treatment["is_significant"]
+        assert adjusted_treatment["sample_size"] == 2000
+        assert set(adjusted["timings"]) == {"load", "cuped", "bootstrap"}
+
+    def test_invalid_metric_and_parameters(self):
+        """Test validation of the metric and bootstrap settings."""
+        with pytest.raises(ValueError):
+            self.service.get_continuous_metric_results(self.experiment.id, uuid4())
+        with pytest.raises(ValueError):
+            self.service.get_continuous_metric_results(
+                self.experiment.id, self.metric.id, num_resamples=0
+            )
+
+        self.metric.aggregation_method = "median"
+        with pytest.raises(ValueError):
+            self.service.get_continuous_metric_results(self.experiment.id, self.metric.id)
+
+    def test_stream_user_values_from_cursor(self):
+        """Test that streamed batches are split into per-variant arrays."""
+        result = Mock()
+        result.partitions.return_value = iter(
+            [
+                [
+                    (self.experiment.variants[0].id, 5.0, 1.0),
+                    (self.experiment.variants[1].id, None, 0.0),
+                ],
+                [(self.experiment.variants[0].id, 2.0, 3.0)],
+            ]
+        )
+        self.mock_db.execute.return_value = result
+
+        average = self.service._stream_user_values(self.experiment, "latency", "average", 7)
+
+        options = self.mock_db.execute.call_args.kwargs["execution_options"]
+        assert options["stream_results"] is True
+        params = self.mock_db.execute.call_args.args[1]
+        assert params["pre_period_start"] == datetime(2024, 2, 23, tzinfo=timezone.utc)
+        np.testing.assert_array_equal(average[self.control_id][0], [5.0, 2.0])
+        np.testing.assert_array_equal(average[self.control_id][1], [1.0, 3.0])
+        # Users without events are left out of averages
+        assert average[self.treatment_id][0].size == 0
+
+    def test_stream_user_values_query(self, db_session):
+        """Test that per-user values and covariates are aggregated in the database."""
+        experiment = _db_experiment(db_session, "Continuous Metric Experiment")
+        experiment.start_date = datetime(2024, 3, 1)
+        control, treatment = experiment.variants
+        for user_id, variant in [
+            ("user_1", control),
+            ("user_2", control),
+            ("user_3", treatment),
+            ("user_4", treatment),
+        ]:
+            db_session.add(
+                Assignment(user_id=user_id, experiment_id=experiment.id, variant_id=variant.id)
+            )
+        # user_1 is also in another experiment
+        other = _db_experiment(db_session, "Other Experiment")
+        db_session.add(
+            Assignment(user_id="user_1", experiment_id=other.id, variant_id=other.variants[0].id)
+        )
+        for user_id, event_name, created_at, value, experiment_id in [
+            ("user_1", "latency", "2024-02-25T10:00:00Z", 4.0, None),
+            ("user_1", "latency", "2024-03-01T09:00:00+02:00", 10.0, experiment.id),
+            ("user_1", "latency", "2024-03-02T00:00:00Z", 20.0, experiment.id),
+            ("user_1", "latency", "2024-03-02T12:00:00Z", 1000.0, other.id),
+            # Before the pre-period
+            ("user_2", "latency", "2024-02-01T00:00:00Z", 100.0, None),
+            ("user_2", "latency", "2024-03-03T00:00:00Z", 6.0, experiment.id),
+            # 23:00 UTC on February 29, in the pre-period
+            ("user_3", "latency", "2024-03-01T01:00:00+02:00", 8.0, None),
+            ("user_3", "signup", "2024-03-02T00:00:00Z", 50.0, experiment.id),
+        ]:
+            db_session.add(
+                Event(
+                    event_type="custom",
+                    event_name=event_name,
+                    user_id=user_id,
+                    experiment_id=experiment_id,
+                    value=value,
+                    created_at=created_at,
+                )
+            )
+        db_session.commit()
+        service = AnalysisService(db_session)
+
+        def user_values(variant, values):
+            metric_values, covariates = values[str(variant.id)]
+            return sorted(zip(metric_values.tolist(), covariates.tolist()))
+
+        total = service._stream_user_values(experiment, "latency", "sum", 7)
+        assert user_values(control, total) == [(6.0, 0.0), (30.0, 4.0)]
+        assert user_values(treatment, total) == [(0.0, 0.0), (0.0, 8.0)]
+
+        average = service._stream_user_values(experiment, "latency", "average")
+        assert user_values(control, average) == [(6.0, 0.0), (15.0, 0.0)]
+        assert user_values(treatment, average) == []
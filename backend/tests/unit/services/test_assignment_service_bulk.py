@@ -0,0 +1,158 @@
+"""
+Unit tests for bulk experiment assignment.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+
+from backend.app.models.assignment import Assignment
+from backend.app.models.event import Event, EventType
+from backend.app.models.experiment import Experiment, ExperimentStatus, Variant
+from backend.app.services.assignment_service import AssignmentService
+
+
+def _reference_variant(user_id, experiment):
+    """Variant chosen by the original per-user hashing."""
+    hash_value = int(hashlib.md5(f"{user_id}:{experiment.id}".encode()).hexdigest(), 16)
+    bucket = hash_value % 100
+    total = 0
+    for variant in experiment.variants:
+        total += variant.traffic_allocation
+        if bucket < total:
+            return variant.id
+    return experiment.variants[-1].id
+
+
+@pytest.fixture
+def active_experiment(db_session):
+    """Create an active experiment with a 30/70 split."""
+    experiment = Experiment(
+        id=uuid4(),
+        name="Bulk Assignment Experiment",
+        status=ExperimentStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    experiment.variants = [
+        Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=30),
+        Variant(id=uuid4(), name="treatment", traffic_allocation=70),
+    ]
+    db_session.add(experiment)
+    db_session.commit()
+    return experiment
+
+
+class TestBulkAssignUsers:
+    """Tests for the set-based bulk assignment path."""
+
+    def test_assigns_in_chunks_with_exposures(self, db_session, active_experiment):
+        """Test that users are assigned once, with one exposure each."""
+        service = AssignmentService(db_session)
+        db_session.add(
+            Assignment(
+                user_id="user_3",
+                experiment_id=active_experiment.id,
+                variant_id=active_experiment.variants[0].id,
+            )
+        )
+        db_session.commit()
+
+        user_ids = [f"user_{i}" for i in range(25)] + ["user_0"]
+        progress = []
+
+        result = service.bulk_assign_users(
+            user_ids,
+            active_experiment.id,
+            context={"source": "backfill"},
+            chunk_size=10,
+            progress_callback=progress.append,
+        )
+
+        assert result == {"assigned": 24, "skipped": 2, "errors": 0}
+        assert [p["processed"] for p in progress] == [11, 21, 26]
+        assert progress[-1]["total"] == 26
+
+        assignments = (
+            db_session.query(Assignment)
+            .filter(Assignment.experiment_id == active_experiment.id)
+            .all()
+        )
+        assert len(assignments) == 25
+        for assignment in assignments:
+            if assignment.user_id != "user_3":
+                assert assignment.variant_id == _reference_variant(assignment.user_id, active_experiment)
+
+        events = (
+            db_session.query(Event)
+            .filter(Event.experiment_id == active_experiment.id)
+            .all()
+        )
+        assert len(events) == 24
+        assert all(event.event_type == EventType.EXPOSURE.value for event in events)
+        assert events[0].event_metadata == {"source": "backfill"}
+
+    def test_rerun_skips_everyone(self, db_session, active_experiment):
+        """Test that a repeated backfill assigns nobody twice."""
+        service = AssignmentService(db_session)
+        user_ids = [f"user_{i}" for i in range(5)]
+
+        service.bulk_assign_users(user_ids, active_experiment.id, track_exposure=False)
+        result = service.bulk_assign_users(user_ids, active_experiment.id, track_exposure=False)
+
+        assert result == {"assigned": 0, "skipped": 5, "errors": 0}
+        assert db_session.query(Event).filter(Event.experiment_id == active_experiment.id).count() == 0
+
+
+class TestBulkAssignChunking:
+    """Tests for chunk handling, with the database mocked."""
+
+    def setup_method(self):
+        self.mock_db = Mock()
+        self.service = AssignmentService(self.mock_db)
+        self.service.event_service = Mock()
+
+        self.experiment = Mock(spec=Experiment)
+        self.experiment.id = uuid4()
+        self.experiment.status = ExperimentStatus.ACTIVE
+        self.experiment.variants = [
+            Mock(id=uuid4(), traffic_allocation=50),
+            Mock(id=uuid4(), traffic_allocation=0),
+            Mock(id=uuid4(), traffic_allocation=50),
+        ]
+        self.mock_db.query.return_value.options.return_value.filter.return_value.first.return_value = self.experiment
+        self.mock_db.query.return_value.filter.return_value.all.return_value = []
+
+    def test_failed_chunk_is_counted_and_rolled_back(self):
+        """Test that an error in one chunk does not stop the others."""
+        self.mock_db.execute.side_effect = [
+            Mock(all=Mock(return_value=[("a", 1), ("b", 2)])),
+            RuntimeError("connection reset"),
+            Mock(all=Mock(return_value=[("e", 1)])),
+        ]
+
+        result = self.service.bulk_assign_users(
+            ["a", "b", "c", "d", "e"], self.experiment.id, track_exposure=False, chunk_size=2
+        )
+
+        assert result == {"assigned": 3, "skipped": 0, "errors": 2}
+        assert self.mock_db.commit.call_count == 2
+        self.mock_db.rollback.assert_called_once()
+
+    def test_invalid_chunk_size(self):
+        """Test that chunk_size must be positive."""
+        with pytest.raises(ValueError):
+            self.service.bulk_assign_users(["a"], self.experiment.id, chunk_size=0)
+
+    def test_hashing_matches_per_user_assignment(self):
+        """Test that batch hashing picks the same variants as per-user hashing."""
+        user_ids = [f"user_{i}" for i in range(500)]
+
+        variants = self.service._hash_users_to_variants(user_ids, self.experiment)
+
+        assert variants == [_reference_variant(user_id, self.experiment) for user_id in user_ids]
+        assert self.experiment.variants[1].id not in variants
+        assert self.service._hash_user_to_variant("user_7", self.experiment) == variants[7]
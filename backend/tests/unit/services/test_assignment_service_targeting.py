@@ -12,6 +12,10 @@ from unittest.mock import Mock, patch, MagicMock
 from uuid import UUID, uuid4
 
 from backend.app.services.assignment_service import AssignmentService
+from backend.app.services.rules_evaluation_service import (
+    RulesEvaluationService,
+    get_rules_evaluation_service,
+)
 from backend.app.models.experiment import Experiment, Variant, ExperimentStatus
 from backend.app.models.assignment import Assignment
 from backend.app.schemas.targeting_rule import (
@@ -71,6 +75,14 @@ class TestAssignmentServiceTargeting:
             ]
         }
 
+    def test_uses_shared_rules_evaluation_service(self):
+        """Test that assignment services share one rules engine unless one is injected."""
+        assert self.service.rules_evaluation_service is get_rules_evaluation_service()
+        assert AssignmentService(self.mock_db).rules_evaluation_service is self.service.rules_evaluation_service
+
+        injected = RulesEvaluationService()
+        assert AssignmentService(self.mock_db, rules_evaluation_service=injected).rules_evaluation_service is injected
+
     def test_assign_user_with_targeting_success(self):
         """Test successful assignment with targeting rules."""
         # Setup mocks
@@ -0,0 +1,265 @@
+"""
+Unit tests for batch event ingestion.
+"""
+
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from backend.app.models.assignment import Assignment
+from backend.app.models.event import Event
+from backend.app.models.experiment import Experiment, ExperimentStatus, Variant
+from backend.app.models.feature_flag import FeatureFlag
+from backend.app.schemas.tracking import EventBatchItem
+from backend.app.services.event_service import EventService, iter_archived_events
+
+
+@pytest.fixture
+def experiment(db_session):
+    """Create an active experiment with two variants."""
+    experiment = Experiment(
+        id=uuid4(),
+        name="checkout-test",
+        status=ExperimentStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    experiment.variants = [
+        Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=50),
+        Variant(id=uuid4(), name="treatment", traffic_allocation=50),
+    ]
+    db_session.add(experiment)
+    db_session.commit()
+    return experiment
+
+
+@pytest.fixture
+def experiment_key():
+    """Resolve experiment keys against experiment names."""
+    columns = SimpleNamespace(key=Experiment.name, id=Experiment.id)
+    with patch("backend.app.services.event_service.Experiment", columns):
+        yield
+
+
+class TestTrackEventsBatch:
+    """Tests for the bulk ingest path."""
+
+    def test_resolves_keys_and_inserts_once(
+        self, db_session, experiment, experiment_key
+    ):
+        """Test that keys and assignments are resolved for the whole batch."""
+        control, treatment = experiment.variants
+        flag = FeatureFlag(key="new-checkout", name="New checkout", status="ACTIVE")
+        db_session.add(flag)
+        db_session.add_all(
+            [
+                Assignment(
+                    experiment_id=experiment.id, variant_id=control.id, user_id="user_1"
+                ),
+                Assignment(
+                    experiment_id=experiment.id,
+                    variant_id=treatment.id,
+                    user_id="user_2",
+                ),
+            ]
+        )
+        db_session.commit()
+
+        events = [
+            EventBatchItem(
+                event_type="purchase",
+                user_id="user_1",
+                experiment_key="checkout-test",
+                value=19.5,
+            ),
+            EventBatchItem(
+                event_type="signup", user_id="user_2", experiment_key="checkout-test"
+            ),
+            EventBatchItem(
+                event_type="click", user_id="user_2", experiment_key="missing"
+            ),
+            EventBatchItem(
+                event_type="click", user_id="user_2", feature_flag_key="new-checkout"
+            ),
+        ]
+
+        with patch.object(db_session, "refresh") as refresh:
+            tracked, errors = EventService(db_session).track_events_batch(events)
+
+        refresh.assert_not_called()
+        assert tracked == 3
+        assert [error["index"] for error in errors] == [2]
+
+        rows = {e.event_type: e for e in db_session.query(Event).all()}
+        assert rows["purchase"].variant_id == control.id
+        assert rows["signup"].variant_id == treatment.id
+        assert rows["purchase"].value == 19.5
+        assert rows["purchase"].event_name == "purchase"
+        assert rows["click"].feature_flag_id == flag.id
+        assert rows["click"].variant_id is None
+
+    def test_nothing_to_insert(self):
+        """Test that a batch without known keys writes nothing."""
+        db = Mock()
+        db.query.return_value.filter.return_value = []
+
+        tracked, errors = EventService(db).track_events_batch(
+            [EventBatchItem(event_type="click", user_id="user_1", feature_flag_key="x")]
+        )
+
+        assert tracked == 0
+        assert errors[0]["index"] == 0
+        db.execute.assert_not_called()
+        db.commit.assert_not_called()
+
+
+def make_archive(events):
+    """Compress events the way the event processor archives them."""
+    return io.BytesIO(gzip.compress(json.dumps(events, default=str).encode("utf-8")))
+
+
+class TestLoadEvents:
+    """Tests for the COPY-based bulk loader."""
+
+    def test_iter_archived_events_streams_array(self):
+        """Test that events are decoded across read boundaries."""
+        events = [
+            {"event_id": f"evt_{i}", "user_id": f"user_{i}", "properties": {"n": i}}
+            for i in range(50)
+        ]
+
+        assert list(iter_archived_events(make_archive(events), read_size=7)) == events
+        assert list(iter_archived_events(make_archive([]))) == []
+
+        with pytest.raises(ValueError):
+            list(iter_archived_events(io.BytesIO(gzip.compress(b'[{"a": 1}, {"b"'))))
+
+    def test_loads_archive_in_chunks(self, db_session, experiment, experiment_key):
+        """Test that archived events are copied with references resolved."""
+        control, treatment = experiment.variants
+        events = [
+            {
+                "event_id": "evt_1",
+                "event_type": "conversion",
+                "user_id": "user_1",
+                "experiment_id": str(experiment.id),
+                "timestamp": "2025-12-18T10:30:00",
+                "properties": {"value": 9.99, "note": 'say "hi", then\nleave'},
+                "metadata": {"source": "mobile_app"},
+                "variant": "control",
+            },
+            {
+                "event_id": "evt_2",
+                "event_type": "page_view",
+                "event_name": "checkout_viewed",
+                "user_id": "user_2",
+                "experiment_key": "checkout-test",
+                "timestamp": "2025-12-18T10:31:00",
+                "variant": "treatment",
+            },
+            {
+                "event_id": "evt_3",
+                "event_type": "page_view",
+                "user_id": "user_3",
+                "experiment_id": str(uuid4()),
+                "timestamp": "2025-12-18T10:32:00",
+                "variant": "control",
+            },
+            {"event_id": "evt_4", "event_type": "page_view"},
+        ]
+
+        stats = EventService(db_session).load_events_from_archive(
+            make_archive(events), chunk_size=2
+        )
+
+        assert stats["loaded"] == 3
+        assert stats["skipped"] == 1
+        assert stats["rows_per_second"] > 0
+
+        rows = {e.user_id: e for e in db_session.query(Event).all()}
+        assert rows["user_1"].experiment_id == experiment.id
+        assert rows["user_1"].variant_id == control.id
+        assert rows["user_1"].value == 9.99
+        assert rows["user_1"].created_at == "2025-12-18T10:30:00+00:00"
+        assert rows["user_1"].event_metadata == {
+            "value": 9.99,
+            "note": 'say "hi", then\nleave',
+            "metadata": {"source": "mobile_app"},
+            "event_id": "evt_1",
+        }
+        assert rows["user_1"].event_name == "conversion"
+        assert rows["user_2"].variant_id == treatment.id
+        assert rows["user_2"].event_name == "checkout_viewed"
+        assert rows["user_2"].value is None
+        assert rows["user_3"].experiment_id is None
+        assert rows["user_3"].variant_id is None
+
+    def test_reloading_skips_loaded_events(self, db_session, experiment_key):
+        """Test that loading an archive again only adds the events not yet loaded."""
+        events = [
+            {"event_id": f"evt_{i}", "event_type": "click", "user_id": f"user_{i}"}
+            for i in range(5)
+        ]
+        service = EventService(db_session)
+
+        first = service.load_events(events[:3], chunk_size=2)
+        # Resumed after a failure, with an event without id
+        second = service.load_events(
+            events + [{"event_type": "click", "user_id": "user_5"}], chunk_size=2
+        )
+
+        assert (first["loaded"], first["duplicates"]) == (3, 0)
+        assert (second["loaded"], second["duplicates"]) == (3, 3)
+        assert sorted(e.source_event_id or "" for e in db_session.query(Event)) == [
+            "", "evt_0", "evt_1", "evt_2", "evt_3", "evt_4"
+        ]
+
+    def test_validates_flags_and_normalizes_timestamps(self, db_session, experiment_key):
+        """Test that unknown flags are stored as NULL and timestamps in UTC."""
+        flag = FeatureFlag(key="new-checkout", name="New checkout", status="ACTIVE")
+        db_session.add(flag)
+        db_session.commit()
+
+        events = [
+            {
+                "event_type": "click",
+                "user_id": "user_1",
+                "feature_flag_id": str(flag.id),
+                "timestamp": "2025-12-18T12:30:00+02:00",
+            },
+            {
+                "event_type": "click",
+                "user_id": "user_2",
+                "feature_flag_key": "new-checkout",
+                "timestamp": "2025-12-18T10:31:00Z",
+            },
+            {
+                "event_type": "click",
+                "user_id": "user_3",
+                "feature_flag_id": str(uuid4()),
+                "timestamp": "2025-12-18T10:32:00.250000",
+            },
+            {"event_type": "click", "user_id": "user_4", "feature_flag_id": "bad-id"},
+            {"event_type": "click", "user_id": "user_5", "timestamp": "yesterday"},
+        ]
+
+        stats = EventService(db_session).load_events(events)
+
+        assert stats["loaded"] == 4
+        assert stats["skipped"] == 1
+
+        rows = {e.user_id: e for e in db_session.query(Event).all()}
+        assert rows["user_1"].feature_flag_id == flag.id
+        assert rows["user_1"].created_at == "2025-12-18T10:30:00+00:00"
+        assert rows["user_2"].feature_flag_id == flag.id
+        assert rows["user_2"].created_at == "2025-12-18T10:31:00+00:00"
+        assert rows["user_3"].feature_flag_id is None
+        assert rows["user_3"].created_at == "2025-12-18T10:32:00.250000+00:00"
+        assert rows["user_4"].feature_flag_id is None
+        assert datetime.fromisoformat(rows["user_4"].created_at).tzinfo is not None
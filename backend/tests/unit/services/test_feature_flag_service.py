@@ -0,0 +1,125 @@
+"""
+Unit tests for feature flag evaluation in FeatureFlagService.
+
+Covers flags whose targeting_rules hold a TargetingRules configuration, which
+are evaluated by the shared rules evaluation service.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from backend.app.models.feature_flag import FeatureFlagStatus
+from backend.app.services.feature_flag_service import FeatureFlagService
+from backend.app.services.rules_evaluation_service import (
+    RulesEvaluationService,
+    get_rules_evaluation_service,
+)
+
+
+TARGETING_RULES = {
+    "version": "1.0",
+    "rules": [
+        {
+            "id": "beta_testers",
+            "rule": {
+                "operator": "and",
+                "conditions": [
+                    {"attribute": "beta", "operator": "eq", "value": True}
+                ]
+            },
+            "rollout_percentage": 100,
+            "priority": 1
+        }
+    ]
+}
+
+
+@pytest.fixture
+def flag():
+    flag = Mock()
+    flag.id = uuid4()
+    flag.key = "new_checkout"
+    flag.status = FeatureFlagStatus.ACTIVE.value
+    flag.rollout_percentage = 0
+    flag.targeting_rules = TARGETING_RULES
+    return flag
+
+
+@pytest.fixture(autouse=True)
+def no_flag_metrics():
+    with patch("backend.app.services.feature_flag_service.flag_telemetry") as telemetry:
+        yield telemetry
+
+
+class TestFeatureFlagServiceTargeting:
+    """Tests for TargetingRules-based flag evaluation."""
+
+    def test_uses_shared_rules_evaluation_service(self):
+        """Test that flag services share one rules engine unless one is injected."""
+        assert FeatureFlagService(Mock()).rules_evaluation_service is get_rules_evaluation_service()
+
+        injected = RulesEvaluationService()
+        assert FeatureFlagService(Mock(), rules_evaluation_service=injected).rules_evaluation_service is injected
+
+    def test_matching_rule_enables_flag(self, flag, no_flag_metrics):
+        """Test that a user matching a targeting rule gets the flag."""
+        service = FeatureFlagService(Mock(), rules_evaluation_service=RulesEvaluationService())
+
+        assert service.evaluate_flag(flag, "user_1", {"beta": True}) is True
+
+        call_kwargs = no_flag_metrics.record_evaluation.call_args.kwargs
+        assert call_kwargs["targeting_rule_id"] == "beta_testers"
+
+    def test_no_match_falls_back_to_flag_rollout(self, flag):
+        """Test that unmatched users get the flag's own rollout percentage."""
+        service = FeatureFlagService(Mock(), rules_evaluation_service=RulesEvaluationService())
+
+        assert service.evaluate_flag(flag, "user_1", {"beta": False}) is False
+
+        flag.rollout_percentage = 100
+        assert service.evaluate_flag(flag, "user_1", {"beta": False}) is True
+
+    def test_default_rule_falls_back_to_flag_rollout(self, flag, no_flag_metrics):
+        """Test that the engine's default rule does not enable the flag."""
+        flag.targeting_rules = {
+            **TARGETING_RULES,
+            "default_rule": {
+                "id": "default",
+                "rule": {"operator": "and", "conditions": []},
+                "rollout_percentage": 0,
+                "priority": 999
+            }
+        }
+        service = FeatureFlagService(Mock(), rules_evaluation_service=RulesEvaluationService())
+
+        results = [
+            service.evaluate_flag(flag, f"user_{i}", {"beta": False}) for i in range(5)
+        ]
+
+        assert results == [False] * 5
+        assert no_flag_metrics.record_evaluation.call_args.kwargs["targeting_rule_id"] is None
+        assert service.evaluate_flag(flag, "user_1", {"beta": True}) is True
+
+    def test_repeated_evaluations_hit_the_cache(self, flag):
+        """Test that evaluations across service instances share cached results."""
+        rules_service = RulesEvaluationService()
+
+        for user_id in ("user_1", "user_2", "user_3"):
+            FeatureFlagService(Mock(), rules_evaluation_service=rules_service).evaluate_flag(
+                flag, user_id, {"beta": True}
+            )
+
+        assert rules_service.get_cache_stats()["evaluation_cache"]["hits"] == 2
+
+    def test_delete_invalidates_cached_results(self, flag):
+        """Test that deleting a flag drops cached evaluations of its rules."""
+        rules_service = RulesEvaluationService()
+        service = FeatureFlagService(Mock(), rules_evaluation_service=rules_service)
+        service.evaluate_flag(flag, "user_1", {"beta": True})
+
+        assert rules_service.evaluation_cache.size == 1
+
+        service.delete_feature_flag(flag)
+
+        assert rules_service.evaluation_cache.size == 0
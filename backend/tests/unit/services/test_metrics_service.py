@@ -241,70 +241,86 @@ def test_log_error(mock_db_session, sample_feature_flag_id):
         assert result == mock_error_log
 
 
-def test_aggregate_metrics(mock_db_session, sample_feature_flag_id):
-    """Test aggregating raw metrics into summary data."""
-    # Create sample aggregation data
-    start_time = datetime.now(timezone.utc) - timedelta(hours=1)
-    end_time = datetime.now(timezone.utc)
-    period = AggregationPeriod.HOUR
-
-    # Mock query results
-    result1 = MagicMock()
-    result1.metric_type = MetricType.FLAG_EVALUATION
-    result1.period_start = start_time
-    result1.feature_flag_id = sample_feature_flag_id
-    result1.targeting_rule_id = "rule_1"
-    result1.segment_id = None
-    result1.count = 10
-    result1.sum_value = 0
-    result1.min_value = 0
-    result1.max_value = 0
-    result1.distinct_users = 5
-
-    result2 = MagicMock()
-    result2.metric_type = MetricType.LATENCY
-    result2.period_start = start_time
-    result2.feature_flag_id = sample_feature_flag_id
-    result2.targeting_rule_id = None
-    result2.segment_id = None
-    result2.count = 10
-    result2.sum_value = 450.0
-    result2.min_value = 40.0
-    result2.max_value = 50.0
-    result2.distinct_users = 5
-
-    # Configure mock query
-    mock_query = MagicMock()
-    mock_db_session.query.return_value = mock_query
-    mock_query.group_by.return_value = mock_query
-    mock_query.filter.return_value = mock_query
-    mock_query.all.return_value = [result1, result2]
+def _add_raw_metrics(db_session, timestamps, value=10.0, metric_type=MetricType.LATENCY):
+    """Add one raw metric per timestamp, each from a new user."""
+    for timestamp in timestamps:
+        db_session.add(
+            RawMetric(
+                metric_type=metric_type,
+                timestamp=timestamp,
+                user_id=str(uuid4()),
+                value=value,
+                count=1,
+            )
+        )
+    db_session.commit()
+
+
+def _aggregated_rows(db_session, period):
+    return [
+        (row.period_start, row.count, row.sum_value, row.distinct_users)
+        for row in db_session.query(AggregatedMetric)
+        .filter(AggregatedMetric.period == period)
+        .order_by(AggregatedMetric.period_start)
+    ]
+
+
+def test_aggregate_metrics(db_session):
+    """Test aggregating raw metrics into summary data with one upsert."""
+    base = datetime(2024, 3, 1, 10, 0)
+    _add_raw_metrics(
+        db_session,
+        [
+            base + timedelta(minutes=5),
+            base + timedelta(minutes=20),
+            base + timedelta(hours=1),
+        ],
+    )
 
-    # Mock the query for existing aggregations
-    mock_agg_query = MagicMock()
-    mock_db_session.query.side_effect = [mock_query, mock_agg_query, mock_agg_query]
-    mock_agg_query.filter.return_value = mock_agg_query
-    mock_agg_query.first.return_value = None  # No existing aggregations
+    upserted = MetricsService.aggregate_metrics(
+        db=db_session,
+        period=AggregationPeriod.HOUR,
+        start_time=base + timedelta(minutes=10),
+        end_time=base + timedelta(hours=2),
+    )
 
-    # Create a patch for AggregatedMetric
-    with patch("backend.app.services.metrics_service.AggregatedMetric") as mock_agg_metric:
-        # Call the service method
-        metrics_created = MetricsService.aggregate_metrics(
-            db=mock_db_session,
-            period=period,
-            start_time=start_time,
-            end_time=end_time,
-            feature_flag_id=sample_feature_flag_id,
-        )
+    # The start time is rounded down, so the first hour is complete
+    assert upserted == 2
+    assert _aggregated_rows(db_session, AggregationPeriod.HOUR) == [
+        (base, 2, 20.0, 2),
+        (base + timedelta(hours=1), 1, 10.0, 1),
+    ]
 
-        # Verify AggregatedMetric was created twice
-        assert mock_agg_metric.call_count == 2
 
-        # Verify db.add was called twice
-        assert mock_db_session.add.call_count == 2
+def test_aggregate_metrics_resumes_from_last_period(db_session):
+    """Test that reruns only rescan the latest aggregated period onwards."""
+    base = datetime(2024, 3, 1, 10, 0)
+    _add_raw_metrics(db_session, [base, base + timedelta(hours=1)])
+    MetricsService.aggregate_metrics(
+        db=db_session, period=AggregationPeriod.HOUR, end_time=base + timedelta(hours=2)
+    )
+
+    # Late arrivals for the last hour and a new hour; the earlier hour is not rescanned
+    _add_raw_metrics(
+        db_session,
+        [
+            base + timedelta(minutes=30),
+            base + timedelta(hours=1, minutes=30),
+            base + timedelta(hours=2),
+        ],
+        value=20.0,
+    )
+    upserted = MetricsService.aggregate_metrics(
+        db=db_session, period=AggregationPeriod.HOUR, end_time=base + timedelta(hours=3)
+    )
 
-        # Verify the result count
-        assert metrics_created == 2
+    assert upserted == 2
+    assert _aggregated_rows(db_session, AggregationPeriod.HOUR) == [
+        (base, 1, 10.0, 1),
+        (base + timedelta(hours=1), 2, 30.0, 2),
+        (base + timedelta(hours=2), 1, 20.0, 1),
+    ]
+    assert db_session.query(AggregatedMetric).count() == 3
 
 
 def test_get_metrics_summary(mock_db_session, sample_feature_flag_id):
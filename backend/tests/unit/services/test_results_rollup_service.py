@@ -0,0 +1,323 @@
+"""
+Unit tests for the incremental experiment results rollup.
+"""
+
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from backend.app.models.assignment import Assignment
+from backend.app.models.event import Event
+from backend.app.models.experiment import Experiment, ExperimentStatus, Variant
+from backend.app.models.experiment_results import (
+    ExperimentDailyStats,
+    ExperimentResultsWatermark,
+    ExperimentSequentialTest,
+)
+from backend.app.services.results_rollup_service import (
+    ResultsRollupService,
+    SufficientStats,
+)
+
+
+@pytest.fixture
+def experiment(db_session):
+    """Create an active experiment with two variants."""
+    experiment = Experiment(
+        id=uuid4(),
+        name="Rollup Experiment",
+        status=ExperimentStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    experiment.variants = [
+        Variant(id=uuid4(), name="control", is_control=True, traffic_allocation=50),
+        Variant(id=uuid4(), name="treatment", traffic_allocation=50),
+    ]
+    db_session.add(experiment)
+    db_session.commit()
+    return experiment
+
+
+class TestRefreshExperiment:
+    """Tests for folding new events into the rollup."""
+
+    def test_folds_rows_and_advances_watermark(self, db_session, experiment):
+        """Test that repeated refreshes add to the daily rows past the watermark."""
+        service = ResultsRollupService(db_session)
+        control_id = experiment.variants[0].id
+        first_cutoff = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        second_cutoff = datetime(2024, 3, 3, tzinfo=timezone.utc)
+
+        with patch.object(service, "_aggregate_events") as aggregate:
+            aggregate.side_effect = [
+                [(control_id, "purchase", date(2024, 3, 1), 2, 30.0, 500.0)],
+                [
+                    (control_id, "purchase", date(2024, 3, 1), 1, 5.0, 25.0),
+                    (control_id, "purchase", date(2024, 3, 2), 4, 40.0, 400.0),
+                ],
+            ]
+
+            assert service.refresh_experiment(experiment.id, first_cutoff) == 1
+            assert service.refresh_experiment(experiment.id, second_cutoff) == 2
+
+        # Each refresh only scans events after the previous watermark
+        assert aggregate.call_args_list[0].args[1:3] == (None, first_cutoff)
+        assert aggregate.call_args_list[1].args[1:3] == (first_cutoff, second_cutoff)
+
+        rows = (
+            db_session.query(ExperimentDailyStats)
+            .filter(ExperimentDailyStats.experiment_id == experiment.id)
+            .order_by(ExperimentDailyStats.day)
+            .all()
+        )
+        assert [(r.day, r.count, r.sum_value, r.sum_squares) for r in rows] == [
+            (date(2024, 3, 1), 3, 35.0, 525.0),
+            (date(2024, 3, 2), 4, 40.0, 400.0),
+        ]
+
+        watermark = (
+            db_session.query(ExperimentResultsWatermark)
+            .filter(ExperimentResultsWatermark.experiment_id == experiment.id)
+            .one()
+        )
+        assert watermark.events_processed_until == second_cutoff
+
+    def test_no_rescan_before_watermark(self, db_session, experiment):
+        """Test that a cutoff at or before the watermark scans nothing."""
+        service = ResultsRollupService(db_session)
+        cutoff = datetime(2024, 3, 2, tzinfo=timezone.utc)
+
+        with patch.object(service, "_aggregate_events", return_value=[]) as aggregate:
+            service.refresh_experiment(experiment.id, cutoff)
+            assert service.refresh_experiment(experiment.id, cutoff) == 0
+
+        aggregate.assert_called_once()
+
+    def test_advances_sequential_tests(self, db_session, experiment):
+        """Test that each refresh folds its delta into the stored sequential test."""
+        service = ResultsRollupService(db_session)
+        control_id, treatment_id = (v.id for v in experiment.variants)
+        first_cutoff = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        second_cutoff = datetime(2024, 3, 3, tzinfo=timezone.utc)
+
+        for i in range(100):
+            db_session.add(
+                Assignment(
+                    experiment_id=experiment.id,
+                    variant_id=(control_id, treatment_id)[i % 2],
+                    user_id=f"user_{i}",
+                )
+            )
+        db_session.commit()
+
+        with patch.object(service, "_aggregate_events") as aggregate:
+            aggregate.side_effect = [
+                [
+                    (control_id, "purchase", date(2024, 3, 1), 5, 5.0, 5.0),
+                    (treatment_id, "purchase", date(2024, 3, 1), 20, 20.0, 20.0),
+                ],
+                [(treatment_id, "purchase", date(2024, 3, 2), 10, 10.0, 10.0)],
+            ]
+            service.refresh_experiment(experiment.id, first_cutoff)
+            first = service.get_sequential_test(experiment.id, "purchase")
+            service.refresh_experiment(experiment.id, second_cutoff)
+
+        test = service.get_sequential_test(experiment.id, "purchase")
+        assert test.control_id == str(control_id)
+        assert test.stats == {
+            str(control_id): SufficientStats.from_proportion(50, 5),
+            str(treatment_id): SufficientStats.from_proportion(50, 30),
+        }
+        # Every refresh is a look; the running minimum p-value carries over
+        assert test.to_dict()["min_p_values"][str(treatment_id)] <= (
+            first.to_dict()["min_p_values"][str(treatment_id)]
+        )
+        assert db_session.query(ExperimentSequentialTest).filter(
+            ExperimentSequentialTest.experiment_id == experiment.id
+        ).count() == 1
+
+    def test_rebuild_replaces_rollup(self, db_session, experiment):
+        """Test that a rebuild discards the rollup and folds every event again."""
+        service = ResultsRollupService(db_session)
+        control_id = experiment.variants[0].id
+        first_cutoff = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        second_cutoff = datetime(2024, 3, 3, tzinfo=timezone.utc)
+
+        with patch.object(service, "_aggregate_events") as aggregate:
+            aggregate.side_effect = [
+                [(control_id, "purchase", date(2024, 3, 1), 2, 30.0, 500.0)],
+                [(control_id, "purchase", date(2024, 3, 1), 1, 5.0, 25.0)],
+            ]
+            service.refresh_experiment(experiment.id, first_cutoff)
+            assert service.rebuild_experiment(experiment.id, second_cutoff) == 1
+
+        # The rebuild scans from the start, not from the watermark
+        assert aggregate.call_args_list[1].args[1:3] == (None, second_cutoff)
+
+        rows = db_session.query(ExperimentDailyStats).filter(
+            ExperimentDailyStats.experiment_id == experiment.id
+        ).all()
+        assert [(r.day, r.count, r.sum_value) for r in rows] == [
+            (date(2024, 3, 1), 1, 5.0)
+        ]
+        watermark = (
+            db_session.query(ExperimentResultsWatermark)
+            .filter(ExperimentResultsWatermark.experiment_id == experiment.id)
+            .one()
+        )
+        assert watermark.events_processed_until == second_cutoff
+
+    def test_sequential_tests_follow_rollup_totals(self, db_session, experiment):
+        """Test that conversions capped at the assignments do not drift from the rollup."""
+        service = ResultsRollupService(db_session)
+        control_id, treatment_id = (v.id for v in experiment.variants)
+
+        def assign(start, count):
+            for i in range(start, start + count):
+                db_session.add(
+                    Assignment(
+                        experiment_id=experiment.id,
+                        variant_id=(control_id, treatment_id)[i % 2],
+                        user_id=f"user_{i}",
+                    )
+                )
+            db_session.commit()
+
+        assign(0, 4)
+        with patch.object(service, "_aggregate_events") as aggregate:
+            aggregate.side_effect = [
+                # Users with several conversion events
+                [(treatment_id, "purchase", date(2024, 3, 1), 5, 5.0, 5.0)],
+                [(treatment_id, "purchase", date(2024, 3, 2), 1, 1.0, 1.0)],
+            ]
+            service.refresh_experiment(experiment.id, datetime(2024, 3, 2, tzinfo=timezone.utc))
+            assign(4, 16)
+            service.refresh_experiment(experiment.id, datetime(2024, 3, 3, tzinfo=timezone.utc))
+
+        test = service.get_sequential_test(experiment.id, "purchase")
+        assert test.stats[str(treatment_id)] == SufficientStats.from_proportion(10, 6)
+
+    def test_refresh_active_experiments_continues_on_error(self, db_session, experiment):
+        """Test that one failing experiment does not stop the others."""
+        service = ResultsRollupService(db_session)
+
+        with patch.object(service, "refresh_experiment", side_effect=RuntimeError("boom")) as refresh:
+            assert service.refresh_active_experiments() == 0
+
+        assert experiment.id in [call.args[0] for call in refresh.call_args_list]
+
+
+class TestConversionStats:
+    """Tests for reading the rollup plus the unprocessed tail."""
+
+    def test_merges_rollup_and_tail(self, db_session, experiment):
+        """Test that rolled up and tail statistics are added up."""
+        service = ResultsRollupService(db_session)
+        control_id, treatment_id = (v.id for v in experiment.variants)
+        cutoff = datetime(2024, 3, 2, tzinfo=timezone.utc)
+
+        with patch.object(
+            service,
+            "_aggregate_events",
+            return_value=[
+                (control_id, "purchase", date(2024, 3, 1), 2, 20.0, 200.0),
+                (control_id, "signup", date(2024, 3, 1), 9, 0.0, 0.0),
+            ],
+        ):
+            service.refresh_experiment(experiment.id, cutoff)
+
+        with patch.object(
+            service,
+            "_aggregate_events",
+            return_value=[
+                (control_id, "purchase", 1, 10.0, 100.0),
+                (treatment_id, "purchase", 3, 3.0, 3.0),
+            ],
+        ) as tail:
+            stats = service.get_conversion_stats(experiment.id, ["purchase"])
+
+        tail.assert_called_once_with(experiment.id, cutoff, None, event_names={"purchase"})
+        assert stats == {
+            (str(control_id), "purchase"): SufficientStats(3, 30.0, 300.0),
+            (str(treatment_id), "purchase"): SufficientStats(3, 3.0, 3.0),
+        }
+
+    def test_without_watermark_scans_everything(self, db_session, experiment):
+        """Test that an experiment never rolled up is read from raw events."""
+        service = ResultsRollupService(db_session)
+
+        with patch.object(service, "_aggregate_events", return_value=[]) as tail:
+            assert service.get_conversion_stats(experiment.id, ["purchase"]) == {}
+
+        assert tail.call_args.args[1] is None
+
+    def test_rollup_and_tail_from_events(self, db_session, experiment):
+        """Test that events are folded by insert time and counted on their own day."""
+        service = ResultsRollupService(db_session)
+        control_id, treatment_id = (v.id for v in experiment.variants)
+
+        def add_event(variant_id, created_at, inserted_at, value, event_type="conversion"):
+            db_session.add(
+                Event(
+                    event_type=event_type,
+                    event_name="purchase",
+                    user_id="user_1",
+                    experiment_id=experiment.id,
+                    variant_id=variant_id,
+                    value=value,
+                    created_at=created_at,
+                    inserted_at=inserted_at,
+                )
+            )
+
+        first = datetime(2024, 3, 2, 0, 0, tzinfo=timezone.utc)
+        add_event(control_id, "2024-03-01T10:00:00Z", first, 2.0)
+        # 23:30 UTC on March 1
+        add_event(control_id, "2024-03-02T01:30:00+02:00", first, 3.0)
+        add_event(treatment_id, "2024-03-01T12:00:00.000000", first, 4.0)
+        add_event(treatment_id, "2024-03-01T12:00:00Z", first, 100.0, event_type="page_view")
+        # Inserted after the cutoff
+        add_event(treatment_id, "2024-03-01T20:00:00Z", first.replace(minute=5), 5.0)
+        db_session.commit()
+
+        assert service.refresh_experiment(experiment.id, first.replace(minute=1)) == 2
+
+        rows = db_session.query(ExperimentDailyStats).filter(
+            ExperimentDailyStats.experiment_id == experiment.id
+        )
+        assert {(r.variant_id, r.day, r.count, r.sum_value) for r in rows} == {
+            (control_id, date(2024, 3, 1), 2, 5.0),
+            (treatment_id, date(2024, 3, 1), 1, 4.0),
+        }
+
+        # A late event with a timestamp before the watermark is still read
+        add_event(control_id, "2024-02-28T09:00:00+00:00", first.replace(minute=10), 6.0)
+        db_session.commit()
+
+        stats = service.get_conversion_stats(experiment.id, ["purchase", "signup"])
+
+        assert stats == {
+            (str(control_id), "purchase"): SufficientStats(3, 11.0, 49.0),
+            (str(treatment_id), "purchase"): SufficientStats(2, 9.0, 41.0),
+        }
+
+        # and is rolled up on the day it happened
+        service.refresh_experiment(experiment.id, first.replace(minute=15))
+        late = db_session.query(ExperimentDailyStats).filter(
+            ExperimentDailyStats.experiment_id == experiment.id,
+            ExperimentDailyStats.day == date(2024, 2, 28),
+        ).one()
+        assert (late.variant_id, late.count, late.sum_value) == (control_id, 1, 6.0)
+
+    def test_sufficient_stats_moments(self):
+        """Test mean and variance from count, sum and sum of squares."""
+        stats = SufficientStats()
+        for value in (2.0, 4.0, 9.0):
+            stats.add(1, value, value * value)
+
+        assert stats.mean == pytest.approx(5.0)
+        assert stats.variance == pytest.approx(13.0)
+        assert SufficientStats().variance == 0.0
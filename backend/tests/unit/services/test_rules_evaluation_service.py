@@ -8,7 +8,9 @@ Tests the high-level rules evaluation service that integrates:
 - Batch evaluation
 """
 
+import json
 import pytest
+import threading
 import time
 from datetime import datetime
 from typing import Dict, Any, List
@@ -17,7 +19,9 @@ from unittest.mock import Mock, patch, MagicMock
 from backend.app.services.rules_evaluation_service import (
     RulesEvaluationService,
     EvaluationResult,
-    EvaluationMetrics
+    EvaluationMetrics,
+    get_rules_evaluation_service,
+    reset_rules_evaluation_service,
 )
 from backend.app.schemas.targeting_rule import (
     TargetingRule,
@@ -233,6 +237,63 @@ class TestCachingBehavior:
         assert result1.matched is True
         assert result2.matched is False
 
+    def test_cache_ignores_attributes_rules_do_not_read(self):
+        """Test that unrelated context attributes don't defeat the cache."""
+        service = RulesEvaluationService()
+
+        rules = TargetingRules(
+            rules=[
+                TargetingRule(
+                    id="rule_1",
+                    rule=RuleGroup(
+                        operator=LogicalOperator.AND,
+                        conditions=[
+                            Condition(attribute="country", operator=OperatorType.EQUALS, value="US")
+                        ],
+                        groups=[]
+                    ),
+                    priority=1,
+                    rollout_percentage=100
+                )
+            ],
+            default_rule=None
+        )
+
+        service.evaluate(rules, {"user_id": "user_1", "country": "US", "request_ts": 1})
+        result = service.evaluate(rules, {"user_id": "user_2", "country": "US", "request_ts": 2})
+
+        assert result.cached is True
+        assert result.matched is True
+
+    def test_cache_key_includes_user_for_partial_rollout(self):
+        """Test that partial rollouts keep per-user cache entries."""
+        service = RulesEvaluationService()
+
+        rules = TargetingRules(
+            rules=[
+                TargetingRule(
+                    id="rule_1",
+                    rule=RuleGroup(
+                        operator=LogicalOperator.AND,
+                        conditions=[
+                            Condition(attribute="country", operator=OperatorType.EQUALS, value="US")
+                        ],
+                        groups=[]
+                    ),
+                    priority=1,
+                    rollout_percentage=50
+                )
+            ],
+            default_rule=None
+        )
+
+        for i in range(50):
+            context = {"user_id": f"user_{i}", "country": "US"}
+            first = service.evaluate(rules, context)
+            second = service.evaluate(rules, context)
+            assert first.matched == second.matched
+            assert service.evaluate(rules, {"user_id": f"user_{i}", "country": "US", "extra": i}).matched == first.matched
+
     def test_cache_invalidation_on_rule_change(self):
         """Test cache invalidation when rules change."""
         service = RulesEvaluationService()
@@ -287,6 +348,39 @@ class TestCachingBehavior:
         result2 = service.evaluate(rules_v2, user_context)
         assert result2.matched is False
 
+    def test_cache_hits_for_later_rules_and_non_matches(self):
+        """Test that matches of any rule and non-matches are served from cache."""
+        service = RulesEvaluationService()
+
+        rules = TargetingRules(
+            rules=[
+                _country_rules("rule_us", "US").rules[0],
+                TargetingRule(
+                    id="rule_ca",
+                    rule=RuleGroup(
+                        operator=LogicalOperator.AND,
+                        conditions=[
+                            Condition(attribute="country", operator=OperatorType.EQUALS, value="CA")
+                        ],
+                        groups=[]
+                    ),
+                    priority=2,
+                    rollout_percentage=100
+                )
+            ],
+            default_rule=None
+        )
+
+        for country, expected_rule_id in (("CA", "rule_ca"), ("FR", None)):
+            context = {"user_id": "user_123", "country": country}
+            first = service.evaluate(rules, context)
+            second = service.evaluate(rules, context)
+
+            assert first.cached is False
+            assert second.cached is True
+            assert second.matched is (expected_rule_id is not None)
+            assert second.matched_rule_id == expected_rule_id
+
 
 class TestMetricsCollection:
     """Test metrics collection functionality."""
@@ -660,7 +754,8 @@ class TestPerformance:
 
     def test_cached_evaluation_is_faster(self):
         """Test that cached evaluation is significantly faster."""
-        service = RulesEvaluationService()
+        # Metrics bookkeeping costs the same on both paths; leave it out of the timing
+        service = RulesEvaluationService(enable_metrics=False)
 
         rules = TargetingRules(
             rules=[
@@ -683,10 +778,11 @@ class TestPerformance:
 
         user_context = {"user_id": "user_123", "country": "US", "age": 25}
 
-        # Time first evaluation (cache miss)
+        # Time first evaluation (cache miss); vary an attribute the rule reads,
+        # since attributes the rule ignores are not part of the cache key
         start = time.time()
         for _ in range(100):
-            service.evaluate(rules, {"user_id": f"unique_{_}", "country": "US", "age": 25})
+            service.evaluate(rules, {"user_id": f"unique_{_}", "country": "US", "age": 25 + _})
         uncached_duration = time.time() - start
 
         # Clear and prepare cache
@@ -701,3 +797,166 @@ class TestPerformance:
 
         # Cached should be faster
         assert cached_duration < uncached_duration
+
+
+def _country_rules(rule_id: str, country: str) -> TargetingRules:
+    return TargetingRules(
+        rules=[
+            TargetingRule(
+                id=rule_id,
+                rule=RuleGroup(
+                    operator=LogicalOperator.AND,
+                    conditions=[
+                        Condition(attribute="country", operator=OperatorType.EQUALS, value=country)
+                    ],
+                    groups=[]
+                ),
+                priority=1,
+                rollout_percentage=100
+            )
+        ],
+        default_rule=None
+    )
+
+
+class TestSharedService:
+    """Test the process-wide shared service."""
+
+    def setup_method(self):
+        reset_rules_evaluation_service()
+
+    def teardown_method(self):
+        reset_rules_evaluation_service()
+
+    def test_shared_instance_is_reused(self):
+        """Test that the shared service is created once per process."""
+        service = get_rules_evaluation_service()
+
+        assert get_rules_evaluation_service() is service
+
+        reset_rules_evaluation_service()
+
+        assert get_rules_evaluation_service() is not service
+
+    def test_shared_instance_created_once_across_threads(self):
+        """Test that concurrent first calls see a single instance."""
+        instances = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            instances.append(get_rules_evaluation_service())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(instance) for instance in instances}) == 1
+
+    def test_same_rule_id_in_different_configurations(self):
+        """Test that cached results of one configuration don't leak into another with the same rule id."""
+        service = RulesEvaluationService()
+        context = {"user_id": "user_1", "country": "US"}
+
+        assert service.evaluate(_country_rules("rule_1", "US"), context).matched is True
+
+        result = service.evaluate(_country_rules("rule_1", "CA"), context)
+
+        assert result.matched is False
+        assert result.cached is False
+
+    def test_concurrent_evaluation(self):
+        """Test that one service can be used from many threads."""
+        service = RulesEvaluationService(cache_max_size=100)
+        rules = _country_rules("rule_1", "US")
+        errors = []
+
+        def worker(worker_id: int):
+            for i in range(200):
+                context = {"user_id": f"user_{worker_id}_{i}", "country": "US" if i % 2 else "CA"}
+                result = service.evaluate(rules, context)
+                if result.error or result.matched != (i % 2 == 1):
+                    errors.append(result)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        metrics = service.get_metrics()
+        assert metrics.total_evaluations == 1600
+        assert metrics.cache_hits + metrics.cache_misses == 1600
+
+    def test_performance_stats_report_cache_hit_rates(self):
+        """Test that get_performance_stats includes cache hit rates."""
+        service = RulesEvaluationService()
+        rules = _country_rules("rule_1", "US")
+        context = {"user_id": "user_1", "country": "US"}
+
+        service.evaluate(rules, context)
+        service.evaluate(rules, context)
+
+        stats = service.get_performance_stats()
+
+        assert stats["cache_hit_rate"] == 0.5
+        assert stats["evaluation_cache"]["hits"] == 1
+        assert "compiler_cache_hit_rate" in stats
+        assert stats["compiler_cache"]["size"] == 1
+
+    def test_performance_stats_report_latency_percentiles(self):
+        """Test that get_performance_stats has cumulative and windowed latency views."""
+        service = RulesEvaluationService()
+        rules = _country_rules("rule_1", "US")
+
+        for i in range(20):
+            service.evaluate(rules, {"user_id": f"user_{i}", "country": "US"})
+
+        latency = service.get_performance_stats()["latency"]
+
+        assert latency["cumulative"]["count"] == 20
+        assert latency["window"]["count"] == 20
+        assert latency["cumulative"]["p99"] >= latency["cumulative"]["p50"] > 0
+        assert latency["window_seconds"] > 0
+
+        service.reset_metrics()
+
+        assert service.get_performance_stats()["latency"]["cumulative"]["count"] == 0
+
+    def test_metrics_history_is_bounded(self):
+        """Test that validated evaluation metrics keep only recent entries."""
+        service = RulesEvaluationService(max_metrics_history=10)
+        rules = _country_rules("rule_1", "US")
+
+        for i in range(50):
+            service.evaluate_rules_with_validation(rules, {"user_id": f"user_{i}", "country": "US"})
+
+        assert len(service.evaluation_metrics) == 10
+        assert service.get_performance_stats()["total_evaluations"] == 10
+
+    def test_stored_rules_parsed_once_per_version(self):
+        """Test that stored configurations are parsed and compiled once until they change."""
+        service = RulesEvaluationService()
+        stored = _country_rules("rule_1", "US").model_dump(mode="json")
+        context = {"user_id": "user_1", "country": "US"}
+
+        rules = service.get_targeting_rules("flag_1", "v1", stored)
+        assert service.get_targeting_rules("flag_1", "v1", dict(stored)) is rules
+        assert service.get_targeting_rules("flag_1", "v1", stored) is not (
+            service.get_targeting_rules("flag_1", None, stored)
+        )
+
+        service.evaluate(rules, context, skip_cache=True)
+        with patch.object(service.rule_compiler, "_hash_rule") as hash_rule:
+            service.evaluate(
+                service.get_targeting_rules("flag_1", "v1", stored), context, skip_cache=True
+            )
+        hash_rule.assert_not_called()
+
+        stored["rules"][0]["rule"]["conditions"][0]["value"] = "CA"
+        updated = service.get_targeting_rules("flag_1", "v2", json.dumps(stored))
+        assert updated is not rules
+        assert service.evaluate(updated, context).matched is False